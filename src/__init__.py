@@ -0,0 +1,2 @@
+# src/__init__.py
+__version__ = '1.1.0'
@@ -1,7 +1,9 @@
 # __main__.py
+import sys
+
 from .cli import main
 from .core.utils.logging import setup_logging
 
 if __name__ == "__main__":
     setup_logging()
-    main()
\ No newline at end of file
+    sys.exit(main())
\ No newline at end of file
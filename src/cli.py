@@ -1,10 +1,15 @@
 # src/cli.py
 from pathlib import Path
 import argparse
+import contextlib
 import logging
 
 from .core.utils.files import find_stdf_files
-from .core.utils.services import process_files
+from .core.utils.stats import merge_statistics, load_statistics
+from .core.utils.manifest import ConversionManifest
+from .core.utils.metrics import merge_metrics, profiled
+# The converter, the watch daemon and the service (asyncio) are imported only when used,
+# so --help and argument errors return without loading them
 
 from .core.utils.logging import setup_logging
 
@@ -15,16 +20,35 @@ def parse_arguments():
     parser = argparse.ArgumentParser(description='STDF to ATDF conversion tool')
     # Existing arguments
     parser.add_argument('input',
-                        help='Input STDF file or directory containing STDF files')
+                        nargs='?',
+                        help='Input STDF file or directory containing STDF files (not used with --serve)')
     parser.add_argument('--output', '-o',
                         action='store_true',
                         help='Generate ATDF output files (using input filename with .atdf extension)')
     parser.add_argument('--database', '-d',
                         action='store_true',
                         help='Generate SQLite database files (using input filename with .db extension)')
+    parser.add_argument('--database-file',
+                        default=None,
+                        help='Append the records of all input files to this single SQLite database '
+                             '(one writer process; files already in it are replaced)')
+    parser.add_argument('--columns', '-c',
+                        action='store_true',
+                        help='Generate column store directories of .npy memmaps (using input filename with .cols extension)')
+    parser.add_argument('--matrix',
+                        action='store_true',
+                        help='Generate a parts x tests matrix of PTR results (<input>.matrix.npy, .parts.npy, .tests.npy)')
+    parser.add_argument('--stats', '-s',
+                        action='store_true',
+                        help='Compute per-test statistics while decoding (<input>.stats.json, plus a '
+                             'test_statistics table with --database and combined.stats.json for directories)')
     parser.add_argument('--records', '-r',
                         nargs='*',
                         help='Specific record types to process')
+    parser.add_argument('--filter',
+                        default=None,
+                        help="Row filter checked before decoding, e.g. 'site=0,1 test_num=1000..1999 hard_bin=1 fail' "
+                             "(clauses on PRR fields drop whole parts)")
     parser.add_argument('--workers', '-w',
                         type=int,
                         default=None,
@@ -35,15 +59,190 @@ def parse_arguments():
                         choices=['advantest', 'teradyne', 'eagle'],
                         help='Specify the preprocessor to use')
 
-    return parser.parse_args()
+    parser.add_argument('--memory-budget', '-m',
+                        type=int,
+                        default=None,
+                        help='Memory budget in MB for in-memory records per file; larger lists spill to a temporary file')
+    parser.add_argument('--spill-dir',
+                        default=None,
+                        help='Directory for spill files (defaults to the system temp directory)')
+
+    parser.add_argument('--incremental', '-i',
+                        action='store_true',
+                        help='Skip files already converted with the same options, tracked in a manifest at the input root')
+    parser.add_argument('--checkpoint',
+                        action='store_true',
+                        help='Periodically checkpoint each conversion (<input>.ckpt.json) so it can be resumed')
+    parser.add_argument('--resume',
+                        action='store_true',
+                        help='Continue interrupted conversions from their checkpoints (implies --checkpoint)')
+    parser.add_argument('--follow', '-f',
+                        action='store_true',
+                        help='Follow STDF files still being written, converting records as they arrive until the MRR')
+    parser.add_argument('--poll-interval',
+                        type=float,
+                        default=1.0,
+                        help='Seconds between polls of a followed file or watched directory (default: 1)')
+    parser.add_argument('--idle-timeout',
+                        type=float,
+                        default=None,
+                        help='Stop following a file after this many seconds without new records')
+    parser.add_argument('--watch',
+                        action='store_true',
+                        help='Run as a daemon converting STDF files dropped into the input directory with a warm worker pool')
+    parser.add_argument('--settle',
+                        type=float,
+                        default=None,
+                        help='Seconds a watched file must stay unchanged before it is converted (default: 5)')
+    parser.add_argument('--scan',
+                        action='store_true',
+                        help='Only read the record headers: log record counts, parts, wafers and integrity problems per file '
+                             'and write them to <input>.scan.json (scan.json in a directory)')
+    parser.add_argument('--metadata',
+                        action='store_true',
+                        help='Only read the lot metadata (MIR, SDR, MRR) from the head and tail of each file '
+                             'into <input>.metadata.json (metadata.json in a directory)')
+    parser.add_argument('--serve',
+                        action='store_true',
+                        help='Run a local conversion service (JSON lines) on --socket or on localhost --port')
+    parser.add_argument('--socket',
+                        default=None,
+                        help='Unix socket path of the conversion service')
+    parser.add_argument('--port',
+                        type=int,
+                        default=None,
+                        help='Localhost TCP port of the conversion service')
+    parser.add_argument('--metrics',
+                        action='store_true',
+                        help='Write per-record-type counters and stage timings (<input>.metrics.json) and log them as a table')
+    parser.add_argument('--compact-arrays',
+                        action='store_true',
+                        help='Hold the numeric arrays of V4-2007 scan records (STR fail data) as NumPy arrays until written')
+    parser.add_argument('--unknown-sidecar',
+                        action='store_true',
+                        help='Copy records of unknown (e.g. vendor-specific) types to <input>.unknown.bin instead of only counting them')
+    parser.add_argument('--resync',
+                        action='store_true',
+                        help='Skip truncated or corrupt records up to the next valid header and report the skipped byte ranges in <input>.quarantine.json')
+    parser.add_argument('--profile',
+                        action='store_true',
+                        help='Profile the conversion of a single file with cProfile and tracemalloc (<input>.prof)')
+    parser.add_argument('--progress',
+                        action='store_true',
+                        help='Log an aggregate progress line (bytes, records/s, ETA, current record type) every few seconds')
+    parser.add_argument('--progress-file',
+                        default=None,
+                        help='Also write the progress as JSON to this file, replaced at every update (implies --progress)')
+    parser.add_argument('--client-jobs',
+                        type=int,
+                        default=None,
+                        help='Jobs one client of the service may run at once (default: 2)')
+
+    args = parser.parse_args()
+    if args.input is None and not args.serve:
+        parser.error('the input argument is required')
+    if args.serve and not (args.socket or args.port):
+        parser.error('--serve needs --socket or --port')
+    if args.filter:
+        from .core.stdf.filters import parse_filter
+        try:
+            parse_filter(args.filter)
+        except ValueError as e:
+            parser.error(f'--filter: {e}')
+    return args
+
+
+def expected_outputs(input_file: Path, args) -> list:
+    """Output files a conversion of input_file with these arguments produces."""
+    from .core.utils.services import get_output_paths
+    paths = get_output_paths(input_file, args.output, args.database, args.columns, args.matrix, args.stats)
+    if paths['matrix']:
+        paths['matrix'] += '.matrix.npy'
+    return [path for path in paths.values() if path]
+
+
+def conversion_options(args) -> dict:
+    """Arguments that change the conversion outputs, as recorded in the manifest."""
+    options = {
+        'output': args.output,
+        'database': args.database,
+        'columns': args.columns,
+        'matrix': args.matrix,
+        'stats': args.stats,
+        'records': sorted(args.records) if args.records else None,
+        'preprocessor': args.preprocessor,
+    }
+    if args.filter:
+        # Only present when set, so manifests of unfiltered runs stay valid
+        options['filter'] = args.filter
+    if args.unknown_sidecar:
+        options['unknown_sidecar'] = True
+    if args.resync:
+        options['resync'] = True
+    if args.database_file:
+        options['database_file'] = str(Path(args.database_file).resolve())
+    return options
 
 
 def main() -> int: # Explicitly indicate return type is exit code
     args = parse_arguments()
-    input_path = Path(args.input)
     exit_code = 0 # Default success exit code
 
+    if args.serve:
+        from .core.utils.server import MAX_JOBS_PER_CLIENT, run_server
+        return run_server(socket_path=args.socket, port=args.port, max_workers=args.workers,
+                          max_per_client=args.client_jobs or MAX_JOBS_PER_CLIENT, conversion_options={
+                              'memory_budget': args.memory_budget * 1024 * 1024 if args.memory_budget else None,
+                              'spill_dir': args.spill_dir,
+                          })
+
+    from .core.utils.services import process_files, get_output_paths
+    input_path = Path(args.input)
     try:
+        if args.scan:
+            from .core.stdf.scan import scan_files
+            from .core.utils.services import calculate_optimal_workers
+            input_files = find_stdf_files(input_path)
+            if not input_files:
+                logger.error(f"No STDF files found in {input_path}")
+                return 1
+            report_path = input_path / 'scan.json' if input_path.is_dir() else input_path.with_suffix('.scan.json')
+            reports = scan_files(input_files, calculate_optimal_workers(len(input_files), args.workers),
+                                 str(report_path))
+            return 1 if any('error' in report for report in reports) else exit_code
+
+        if args.metadata:
+            from .core.stdf.metadata import catalog_files
+            from .core.utils.services import calculate_optimal_workers
+            input_files = find_stdf_files(input_path)
+            if not input_files:
+                logger.error(f"No STDF files found in {input_path}")
+                return 1
+            report_path = (input_path / 'metadata.json' if input_path.is_dir()
+                           else input_path.with_suffix('.metadata.json'))
+            catalog = catalog_files(input_files, calculate_optimal_workers(len(input_files), args.workers),
+                                    str(report_path))
+            return 1 if any('error' in metadata for metadata in catalog) else exit_code
+
+        if args.watch:
+            from .core.utils.watch import SETTLE_TIME, WatchDaemon
+            WatchDaemon([input_path], {
+                'output': args.output,
+                'database': args.database,
+                'columns': args.columns,
+                'matrix': args.matrix,
+                'stats': args.stats,
+                'records': args.records,
+                'preprocessor_type': args.preprocessor,
+                'filter_expression': args.filter,
+                'compact_arrays': args.compact_arrays,
+                'quarantine': args.resync,
+                'memory_budget': args.memory_budget * 1024 * 1024 if args.memory_budget else None,
+                'spill_dir': args.spill_dir,
+            }, max_workers=args.workers, settle_time=args.settle if args.settle is not None else SETTLE_TIME,
+                poll_interval=args.poll_interval).run()
+            return exit_code
+
         input_files = find_stdf_files(input_path)
 
         if not input_files:
@@ -52,16 +251,74 @@ def main() -> int: # Explicitly indicate return type is exit code
 
         logger.info(f"Found {len(input_files)} STDF files to process")
 
+        if args.profile and len(input_files) != 1:
+            logger.error("--profile needs a single input file")
+            return 1
+
+        manifest = None
+        on_file_complete = None
+        skipped_files = []
+        if args.incremental:
+            manifest = ConversionManifest(input_path if input_path.is_dir() else input_path.parent)
+            options = conversion_options(args)
+            pending_files = manifest.pending_files(input_files, options, lambda path: expected_outputs(path, args))
+            pending_set = set(pending_files)
+            skipped_files = [path for path in input_files if path not in pending_set]
+            logger.info(f"Skipping {len(skipped_files)} unchanged files, {len(pending_files)} to convert")
+            input_files = pending_files
+
+            def on_file_complete(path, result):
+                # Recorded in the parent as each worker finishes, one transaction per file
+                manifest.record(path, options)
+
         # Process all files and capture the result (list of dicts)
         # The CLI itself doesn't use this list, but we capture it for consistency
-        processed_data_list = process_files(
-            input_files,
-            output=args.output,
-            database=args.database,
-            records=args.records,
-            max_workers=args.workers,
-            preprocessor_type=args.preprocessor
-        )
+        profile = profiled(str(input_files[0].with_suffix(''))) if args.profile else contextlib.nullcontext()
+        with profile:
+            processed_data_list = process_files(
+                input_files,
+                on_file_complete=on_file_complete,
+                output=args.output,
+                database=args.database,
+                database_file=args.database_file,
+                columns=args.columns,
+                matrix=args.matrix,
+                stats=args.stats,
+                records=args.records,
+                max_workers=args.workers,
+                preprocessor_type=args.preprocessor,
+                filter_expression=args.filter,
+                memory_budget=args.memory_budget * 1024 * 1024 if args.memory_budget else None,
+                spill_dir=args.spill_dir,
+                checkpoint=args.checkpoint or args.resume,
+                resume=args.resume,
+                follow=args.follow,
+                poll_interval=args.poll_interval,
+                idle_timeout=args.idle_timeout,
+                metrics=args.metrics,
+                unknown=args.unknown_sidecar,
+                compact_arrays=args.compact_arrays,
+                quarantine=args.resync,
+                progress=args.progress,
+                progress_file=args.progress_file
+            )
+
+        if manifest:
+            manifest.close()
+
+        if args.metrics:
+            # Each worker returns its file's metrics with the result; report them together
+            metrics = merge_metrics(getattr(result, 'metrics', None) for result in processed_data_list)
+            metrics.log_table()
+            if input_path.is_dir():
+                metrics.save(str(input_path / 'combined.metrics.json'))
+
+        if args.stats and input_path.is_dir():
+            partials = [result.statistics for result in processed_data_list
+                        if getattr(result, 'statistics', None) is not None]
+            # Files skipped by an incremental run contribute their saved statistics
+            partials.extend(load_statistics(get_output_paths(path, stats=True)['stats']) for path in skipped_files)
+            merge_statistics(partials).save(str(input_path / 'combined.stats.json'))
 
         logger.info("Conversion completed successfully")
 
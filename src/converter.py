@@ -1,16 +1,27 @@
 # src/converter.py
 import logging
-from typing import Optional
+import os
+import time
+from typing import Callable, Dict, Iterator, List, Optional, Tuple, Union
 
-from .core.utils.files import managed_files
+from .core.utils.files import managed_files, wait_for_size
 #from .core.stdf.preprocessing import determine_file_params, read_record_header
-from .core.utils.setup import validate_input_file, initialize_record_entries, setup_record_flags, determine_file_params, \
-    read_record_header
+from .core.utils.setup import validate_input_file, initialize_record_entries, setup_record_flags, determine_file_params
 from .core.utils.decorators import timing_decorator
-from .core.utils.database import create_database_from_atdf#, insert_df_into_db
-from .core.stdf.handler import handle_stdf_entries
-from .core.atdf.handler import handle_atdf_entries, write_atdf_file
-from .core.utils.templates import create_stdf_mapping, get_stdf_template, get_atdf_template
+from .core.stdf.handler import handle_stdf_entries, handle_stdf_entry
+from .core.stdf.reader import (HEADER_SIZE, UnknownRecords, QuarantineReport, iter_raw_records, follow_raw_records,
+                               resync_raw_records, plausible_keys, FOLLOW_POLL_INTERVAL)
+from .core.stdf.filters import RecordFilter
+from .core.atdf.handler import handle_atdf_entries
+from .core.utils.templates import create_stdf_mapping, create_stdf_template, find_atdf_template
+from .core.utils.spill import create_spill_store
+from .core.utils.stats import TestStatistics
+from .core.utils.checkpoint import CHECKPOINT_INTERVAL, ConversionCheckpoint, context_entries, sync_text_file
+from .core.utils.metrics import UNKNOWN_RECORD_TYPE, ConversionMetrics
+from .core.utils.progress import ProgressReporter
+
+# The database (pandas, SQLAlchemy) and NumPy-based sinks are imported when an output needs
+# them, so ATDF-only runs and worker processes start without loading those libraries.
 
 # try:
 #     import django
@@ -21,17 +32,57 @@ from .core.utils.templates import create_stdf_mapping, get_stdf_template, get_at
 
 logger = logging.getLogger(__name__)
 
+# Rows per record type in each batch of iter_dataframes
+DATAFRAME_CHUNK_SIZE = 65536
+
+
+class ConversionResult(dict):
+    """
+    Processed ATDF entries keyed by record type, as returned by run_conversion.
+
+    Attributes:
+        statistics: Per-test TestStatistics when statistics were requested, else None.
+        metrics: ConversionMetrics of the conversion (counters and stage timings).
+        quarantine: Byte ranges skipped in resync mode (start, end, bytes, reason), else None.
+    """
+    statistics = None
+    metrics = None
+    quarantine = None
+
 
 def process_record(params: dict) -> None:
     """Process a single STDF record and convert to ATDF if needed."""
+    record_type = params['stdf_template']['record_type']
+    metrics = params.get('metrics')
+    if metrics is not None:
+        start = time.perf_counter()
+
+    stdf_processed_entry = {}
     if params['data']:  # Special checking needed for EPS
-        handle_stdf_entries(params)
+        stdf_processed_entry = handle_stdf_entries(params)
+
+    if metrics is not None:
+        decoded = time.perf_counter()
+        metrics.add_time(record_type, 'decode_s', decoded - start)
 
-    if params['atdf_file'] or params['output_atdf_database']:
+    for sink in params['sinks']:
+        sink.append(record_type, stdf_processed_entry)
+
+    if metrics is not None:
+        metrics.add_time(record_type, 'sinks_s', time.perf_counter() - decoded)
+
+    if params['atdf_template'] is not None and (params['atdf_file'] or params['output_atdf_database']):
         handle_atdf_entries(params)
 
-    # if params['atdf_file']:
-    #     write_atdf_file(params['atdf_file'], params['atdf_template'])
+
+def save_checkpoint(checkpoint: ConversionCheckpoint, input_offset: int, atdf_file,
+                    checkpointed_sinks: dict, atdf_processed_entries: dict) -> None:
+    """Sync the streamed outputs and record where a resumed run continues from."""
+    checkpoint.save(input_offset, {
+        'atdf_offset': sync_text_file(atdf_file) if atdf_file else None,
+        'sinks': {name: sink.checkpoint() for name, sink in checkpointed_sinks.items()},
+        'context': context_entries(atdf_processed_entries, checkpoint.record_counts),
+    })
 
 
 @timing_decorator
@@ -40,78 +91,484 @@ def run_conversion(
         output_atdf_file: Optional[str] = None,
         output_atdf_database: Optional[str] = None,
         records_to_process: Optional[list] = None,
-        preprocessor_type: Optional[str] = None
+        preprocessor_type: Optional[str] = None,
+        memory_budget: Optional[int] = None,
+        spill_dir: Optional[str] = None,
+        output_column_store: Optional[str] = None,
+        output_matrix: Optional[str] = None,
+        output_stats: Optional[str] = None,
+        collect_statistics: bool = False,
+        checkpoint_file: Optional[str] = None,
+        checkpoint_interval: int = CHECKPOINT_INTERVAL,
+        resume: bool = False,
+        follow: bool = False,
+        poll_interval: float = FOLLOW_POLL_INTERVAL,
+        idle_timeout: Optional[float] = None,
+        output_metrics: Optional[str] = None,
+        collect_metrics: bool = False,
+        progress_queue=None,
+        filter_expression: Optional[str] = None,
+        on_part: Optional[Callable] = None,
+        database_queue=None,
+        output_unknown: Optional[str] = None,
+        compact_arrays: bool = False,
+        resync: bool = False,
+        output_quarantine: Optional[str] = None
 ) -> dict:
     """
     Run STDF to ATDF conversion with optional database output.
 
+    Args:
+        memory_budget: Approximate number of bytes the in-memory entries may use.
+            Once exceeded, whole per-record-type lists are spilled to a temporary
+            SQLite file (in spill_dir, or the system temp directory) and returned
+            as lazy list-like views.
+        output_column_store: Directory to write a column store to (one .npy
+            memmap per field per record type), see core.utils.colstore.
+        output_matrix: Path prefix for a parts x tests matrix of PTR results
+            (<prefix>.matrix.npy, .parts.npy, .tests.npy), see core.utils.matrix.
+        output_stats: Path of a JSON summary of per-test statistics (implies collect_statistics).
+        collect_statistics: Compute per-test statistics while decoding; they are returned as
+            result.statistics and, with database output, stored in a test_statistics table.
+        checkpoint_file: Write a checkpoint here about every checkpoint_interval input bytes,
+            at part boundaries; removed once the conversion completes. Only the streamed
+            outputs (ATDF, column store, statistics) can be checkpointed.
+        resume: Continue from checkpoint_file if it matches the input and options: the
+            outputs are truncated to the checkpoint and the input is read from its offset.
+            The returned entries then hold the carried-over header records (FAR, MIR,
+            PMR, the open WIR, ...) and the records after the checkpoint.
+        follow: The input is still being written: wait for it to appear, poll at
+            incomplete records (every poll_interval seconds) and stop after the MRR, or
+            after idle_timeout seconds without a new record. Whenever the reader catches
+            up, the ATDF file is flushed and new entries are appended to the database.
+        output_metrics: Path of a JSON file of the conversion metrics (implies collect_metrics).
+        collect_metrics: Count records, bytes, errors and skipped records and time the
+            decode, sinks, map and write stages per record type; returned as result.metrics.
+        progress_queue: Queue (e.g. of a ProgressMonitor) receiving periodic progress reports:
+            input bytes consumed, records, current record type, and a final done/failed.
+        filter_expression: Row filter such as 'site=0,1 test_num=1000..1999 hard_bin=1 fail',
+            checked on the raw payloads before decoding, see core.stdf.filters. Clauses on
+            PRR fields drop whole parts.
+        on_part: Called with each assembled Part (PIR and PRR entries, results, wafer) as its
+            PRR closes it, see core.utils.parts. With on_part or database output, the PIR,
+            PRR, result and wafer entries carry w_id/p_id links and the database gets a
+            parts table.
+        database_queue: Queue of a DatabaseWriter: the database rows are sent there, for a
+            database shared by all files of a run, instead of written to output_atdf_database.
+        output_unknown: Path of a sidecar STDF file receiving the records of unknown types
+            (no template for their rec_typ/rec_sub) as read; they are otherwise only counted.
+        compact_arrays: Keep the numeric arrays of the V4-2007 records (STR fail data, PSR
+            pattern ranges, ...) as NumPy arrays in the returned entries instead of joining
+            them into comma-separated strings; the ATDF file and database are unchanged.
+        resync: Tolerate damaged input: a truncated record or a corrupt rec_len or header
+            is skipped up to the next offset where a run of plausible headers starts,
+            see core.stdf.reader.resync_raw_records. The skipped ranges are logged and
+            returned as result.quarantine.
+        output_quarantine: Path of a JSON report of the skipped byte ranges (implies resync),
+            written only when something was skipped.
+
     Returns:
-        A dictionary containing the processed ATDF entries, keyed by record type.
+        A ConversionResult: dictionary containing the processed ATDF entries, keyed by record type.
     """
+    resync = resync or bool(output_quarantine)
+    if follow:
+        if resync:
+            raise ValueError("Follow mode waits at incomplete records and cannot resynchronize")
+        if input_stdf_file.lower().endswith('.gz'):
+            raise ValueError("Follow mode needs an uncompressed input file")
+        # Wait for at least the FAR record
+        wait_for_size(input_stdf_file, 6, poll_interval, idle_timeout)
     validate_input_file(input_stdf_file)
+    run_start = time.perf_counter()
+    database_output = bool(output_atdf_database) or database_queue is not None
 
     stdf_mapping = create_stdf_mapping()
-    stdf_processed_entries = initialize_record_entries()
-    atdf_processed_entries = initialize_record_entries()
+    spill_store = create_spill_store(memory_budget, spill_dir)
+    stdf_processed_entries = initialize_record_entries(spill_store)
+    atdf_processed_entries = initialize_record_entries(spill_store)
     record_flags = setup_record_flags(records_to_process)
-    # counters = {'w': 0, 'p': 0}
+
+    # Consumers of the decoded STDF entries, each with append(record_type, entry) and close()
+    sinks = []
+    # Sinks whose state is saved in checkpoints, keyed by their name in the checkpoint
+    checkpointed_sinks = {}
+    statistics = None
+    checkpoint = None
+    resume_state = None
+    database_appender = None
+    record_filter = None
+    quarantine = None
+    parts = None
+    part_table = None
+    progress = ProgressReporter(progress_queue, input_stdf_file) if progress_queue is not None else None
+    metrics = None
+    if output_metrics or collect_metrics:
+        metrics = ConversionMetrics()
+        metrics.files = 1
 
     try:
-        with managed_files(input_stdf_file, output_atdf_file) as (stdf_file, atdf_file):
+        if checkpoint_file:
+            if database_output or output_matrix:
+                raise ValueError("Database and matrix outputs are built in memory and cannot be checkpointed")
+            if output_unknown:
+                raise ValueError("The unknown-record sidecar cannot be checkpointed")
+            if resync:
+                raise ValueError("Resync mode reads a header ahead and cannot be checkpointed")
+            checkpoint = ConversionCheckpoint(checkpoint_file, input_stdf_file, {
+                'output': output_atdf_file, 'columns': output_column_store, 'stats': output_stats,
+                'records': records_to_process, 'preprocessor': preprocessor_type,
+                'filter': filter_expression,
+            }, checkpoint_interval)
+            if resume:
+                resume_state = checkpoint.load()
+        sink_states = resume_state['sinks'] if resume_state else {}
+
+        if resume_state:
+            for record_type, entries in resume_state['context'].items():
+                atdf_processed_entries[record_type].extend(entries)
+            logger.info(f"Resuming {input_stdf_file} from input offset {resume_state['input_offset']}")
+
+        if output_column_store:
+            from .core.utils.colstore import ColumnStoreWriter
+            column_store = ColumnStoreWriter(output_column_store, source=input_stdf_file,
+                                             state=sink_states.get('column_store'))
+            sinks.append(column_store)
+            checkpointed_sinks['column_store'] = column_store
+        if output_matrix:
+            from .core.utils.matrix import PartTestMatrix
+            if not all(record_flags[record_type] for record_type in ('PIR', 'PTR', 'PRR')):
+                logger.warning("The parts x tests matrix needs PIR, PTR and PRR records; some are filtered out")
+            sinks.append(PartTestMatrix(output_matrix))
+        if output_stats or collect_statistics:
+            statistics = TestStatistics(output_stats)
+            if 'statistics' in sink_states:
+                statistics.merge(TestStatistics.from_dict(sink_states['statistics']))
+            sinks.append(statistics)
+            checkpointed_sinks['statistics'] = statistics
+
+        if database_output or on_part:
+            from .core.utils.parts import PartAssembler, PartTable
+            if not all(record_flags[record_type] for record_type in ('PIR', 'PRR')):
+                logger.warning("Linking records to parts needs PIR and PRR records; some are filtered out")
+            callbacks = [on_part] if on_part else []
+            if database_output:
+                part_table = PartTable()
+                callbacks.append(part_table)
+            parts = PartAssembler(callbacks, keep_results=on_part is not None, state=sink_states.get('parts'))
+            sinks.append(parts)
+            checkpointed_sinks['parts'] = parts
+
+        if follow and output_atdf_database:
+            from .core.utils.database import DatabaseAppender
+            database_appender = DatabaseAppender(output_atdf_database)
+
+        atdf_offset = resume_state['atdf_offset'] if resume_state else None
+        with managed_files(input_stdf_file, output_atdf_file, atdf_offset) as (stdf_file, atdf_file):
             file_params = determine_file_params(stdf_file)
+            if resume_state:
+                stdf_file.seek(resume_state['input_offset'])
 
-            while True:
-                header_data = read_record_header(stdf_file, file_params['endianness'])
-                if not header_data:
-                    break
+            if follow:
+                def on_idle():
+                    # Caught up with the tester: make everything so far visible
+                    if atdf_file:
+                        atdf_file.flush()
+                    if database_appender is not None:
+                        database_appender.append(atdf_processed_entries)
 
-                rec_len, rec_typ, rec_sub = header_data
-                data = stdf_file.read(rec_len)
+                records = follow_raw_records(stdf_file, file_params['endianness'], poll_interval,
+                                             idle_timeout, on_idle)
+            elif resync:
+                quarantine = QuarantineReport(input_stdf_file, output_quarantine)
+                records = resync_raw_records(stdf_file, file_params['endianness'], plausible_keys(stdf_mapping),
+                                             quarantine)
+            else:
+                records = iter_raw_records(stdf_file, file_params['endianness'])
+            if filter_expression:
+                # Drops records (and whole parts) before they are decoded
+                record_filter = RecordFilter(filter_expression, file_params['endianness'])
+                records = record_filter.apply(records)
 
-                if len(data) < rec_len:
-                    logger.error(f"Incomplete record data: expected {rec_len} bytes, got {len(data)}")
+            unknown_records = UnknownRecords(file_params['endianness'], output_unknown)
+            if progress is not None:
+                progress.started(stdf_file)
+            loop_start = time.perf_counter()
+            for rec_typ, rec_sub, data in records:
+                record_type = stdf_mapping.get((rec_typ, rec_sub))
+                if progress is not None:
+                    progress.update(stdf_file, record_type)
+                if record_type is None:
+                    # Vendor or corrupt records: counted (and copied to the sidecar), not decoded
+                    unknown_records.add(rec_typ, rec_sub, data)
+                    if metrics is not None:
+                        metrics.skipped(UNKNOWN_RECORD_TYPE)
                     continue
-
                 try:
-                    stdf_template = get_stdf_template(stdf_mapping, rec_typ, rec_sub)
-                    record_type = stdf_template['record_type']
-
-                    if not record_flags.get(record_type, False):
-                        continue
-
-                    atdf_template = get_atdf_template(record_type)
-
-                    process_record({
-                        'data': data,
-                        'endianness': file_params['endianness'],
-                        'stdf_template': stdf_template,
-                        'atdf_template': atdf_template,
-                        'stdf_processed_entries': stdf_processed_entries,
-                        'atdf_processed_entries': atdf_processed_entries,
-                        'stdf_file': stdf_file,
-                        'atdf_file': atdf_file,
-                        'preprocessor_type': preprocessor_type,  # Pass preprocessor type through
-                        'output_atdf_database': output_atdf_database,
-                    })
+                    stdf_template = create_stdf_template(record_type)
+                    at_boundary = checkpoint is not None and checkpoint.track(rec_typ, rec_sub, record_type, data)
+                    if at_boundary and record_filter is not None and record_filter.buffering:
+                        # Parts read past but held back by the filter would be lost on resume
+                        at_boundary = False
+
+                    if record_flags.get(record_type, False):
+                        if metrics is not None:
+                            metrics.count(record_type, HEADER_SIZE + len(data))
+                        atdf_template = find_atdf_template(record_type)
+
+                        process_record({
+                            'data': data,
+                            'endianness': file_params['endianness'],
+                            'stdf_template': stdf_template,
+                            'atdf_template': atdf_template,
+                            'stdf_processed_entries': stdf_processed_entries,
+                            'atdf_processed_entries': atdf_processed_entries,
+                            'stdf_file': stdf_file,
+                            'atdf_file': atdf_file,
+                            'preprocessor_type': preprocessor_type,  # Pass preprocessor type through
+                            'output_atdf_database': database_output,
+                            'sinks': sinks,
+                            'metrics': metrics,
+                            'parts': parts,
+                            'compact_arrays': compact_arrays,
+                        })
+                    elif metrics is not None:
+                        metrics.skipped(record_type)
+
+                    if at_boundary and checkpoint.due(stdf_file.tell()):
+                        save_checkpoint(checkpoint, stdf_file.tell(), atdf_file,
+                                        checkpointed_sinks, atdf_processed_entries)
 
                 except Exception as e:
                     logger.error(f"Error processing record: {e}")
+                    if metrics is not None:
+                        metrics.error(record_type)
                     continue
+            records_seconds = time.perf_counter() - loop_start
+            unknown_records.close()
+            if quarantine is not None:
+                quarantine.close()
+            if record_filter is not None:
+                record_filter.log_summary(input_stdf_file)
+                if metrics is not None:
+                    for record_type, count in record_filter.dropped.items():
+                        metrics.skipped(record_type, count)
 
+        sinks_start = time.perf_counter()
+        for sink in sinks:
+            sink.close()
+        sinks_seconds = time.perf_counter() - sinks_start
 
+        if spill_store is not None:
+            # The STDF entries are not returned; drop their spilled chunks early
+            stdf_processed_entries.release()
 
-        if output_atdf_database:
-            create_database_from_atdf(output_atdf_database, atdf_processed_entries)
+        if database_output:
+            from .core.utils.database import create_database_from_atdf, write_parts_table, write_statistics_table
+            if progress is not None:
+                progress.stage('database')
+            database_start = time.perf_counter()
+            if database_queue is not None:
+                from .core.utils.consolidated import send_to_database
+                extra_tables = {'parts': part_table.rows}
+                if statistics is not None:
+                    extra_tables['test_statistics'] = statistics.summary()
+                send_to_database(database_queue, input_stdf_file, atdf_processed_entries, extra_tables)
+            elif database_appender is not None:
+                database_appender.close(atdf_processed_entries)
+            else:
+                create_database_from_atdf(output_atdf_database, atdf_processed_entries)
+            if output_atdf_database:
+                write_parts_table(output_atdf_database, part_table.rows)
+                if statistics is not None:
+                    write_statistics_table(output_atdf_database, statistics)
+            if metrics is not None:
+                metrics.add_phase('database', time.perf_counter() - database_start)
             # if django_available:
             #     insert_df_into_db(atdf_processed_entries)
             # else:
             #     create_database_from_atdf(output_atdf_database, atdf_processed_entries)
 
+        if checkpoint is not None:
+            checkpoint.remove()
+
+        if metrics is not None:
+            metrics.input_bytes = os.path.getsize(input_stdf_file)
+            metrics.add_phase('records', records_seconds)
+            metrics.add_phase('close_sinks', sinks_seconds)
+            metrics.add_phase('total', time.perf_counter() - run_start)
+            if output_metrics:
+                metrics.save(output_metrics)
+
+        if progress is not None:
+            progress.finished()
+
         logger.info(f"Successfully processed {input_stdf_file}")
         # Return the processed entries
-        return atdf_processed_entries
+        result = ConversionResult(atdf_processed_entries)
+        result.statistics = statistics
+        result.metrics = metrics
+        result.quarantine = quarantine.ranges if quarantine is not None else None
+        return result
 
     except Exception as e:
         logger.exception(f"Fatal error during conversion: {e}")
+        if progress is not None:
+            progress.finished(failed=True)
         # Re-raise the exception to signal failure clearly.
         raise
+
+
+def iter_records(
+        input_stdf_file: str,
+        records: Optional[List[str]] = None,
+        fields: Optional[Union[List[str], Dict[str, List[str]]]] = None,
+        raw: bool = False,
+        filter_expression: Optional[str] = None
+) -> Iterator[Tuple[str, Union[dict, memoryview]]]:
+    """
+    Iterate over the records of an STDF file one at a time.
+
+    Records are read and decoded as they are requested, so memory stays
+    constant and stopping early (e.g. after the first WIR) skips the rest of
+    the file; the file is closed when the generator is exhausted or closed.
+
+    Args:
+        records: Record types to include (default: all known record types).
+        fields: STDF field names to decode, as for to_dataframes; decoding of a
+            record stops after the last of them.
+        raw: Yield the undecoded payload as a memoryview instead of a dict.
+        filter_expression: Row filter checked on the raw payloads, see core.stdf.filters.
+
+    Yields:
+        tuple: (record_type, entry) with entry a dict of STDF field values (None
+        for missing ones), or (record_type, payload) with raw=True.
+    """
+    validate_input_file(input_stdf_file)
+
+    stdf_mapping = create_stdf_mapping()
+    record_flags = setup_record_flags(records)
+    # record_type -> (template, fields to return, field to stop decoding after)
+    layouts = {}
+
+    with managed_files(input_stdf_file) as (stdf_file, _):
+        endianness = determine_file_params(stdf_file)['endianness']
+        raw_records = iter_raw_records(stdf_file, endianness)
+        if filter_expression:
+            raw_records = RecordFilter(filter_expression, endianness).apply(raw_records)
+
+        for rec_typ, rec_sub, data in raw_records:
+            record_type = stdf_mapping.get((rec_typ, rec_sub))
+            if record_type is None or not record_flags.get(record_type, False):
+                continue
+            if raw:
+                yield record_type, memoryview(data)
+                continue
+
+            layout = layouts.get(record_type)
+            if layout is None:
+                stdf_template = create_stdf_template(record_type)
+                names = [name for name, _ in stdf_template['payload_fields']]
+                selected = select_fields(record_type, fields)
+                if selected is None:
+                    selected = names
+                stop_after = max(selected, key=names.index) if selected else None
+                layout = layouts[record_type] = (stdf_template, selected, stop_after)
+            stdf_template, selected, stop_after = layout
+
+            stdf_processed_entry = {}
+            if data and selected:
+                stdf_processed_entry = handle_stdf_entry(stdf_template, data, endianness, stop_after=stop_after)
+            yield record_type, {field: stdf_processed_entry.get(field) for field in selected}
+
+
+def iter_dataframes(
+        input_stdf_file: str,
+        records: Optional[List[str]] = None,
+        fields: Optional[Union[List[str], Dict[str, List[str]]]] = None,
+        chunk_size: Optional[int] = DATAFRAME_CHUNK_SIZE,
+        filter_expression: Optional[str] = None
+):
+    """
+    Decode an STDF file into columnar batches: a DataFrame of up to chunk_size rows per record type.
+
+    A batch is yielded as soon as its record type has chunk_size rows, and the
+    remaining rows of every record type at the end of the file; with
+    chunk_size=None, each record type is yielded once, at the end. Memory is
+    bounded by chunk_size rows per record type. Arguments as for to_dataframes.
+
+    Yields:
+        tuple: (record_type, DataFrame)
+    """
+    from .core.utils.columnar import RecordColumnBuilder
+    validate_input_file(input_stdf_file)
+
+    stdf_mapping = create_stdf_mapping()
+    record_flags = setup_record_flags(records)
+    builders = {}
+    stop_after = {}
+
+    with managed_files(input_stdf_file) as (stdf_file, _):
+        endianness = determine_file_params(stdf_file)['endianness']
+        raw_records = iter_raw_records(stdf_file, endianness)
+        if filter_expression:
+            raw_records = RecordFilter(filter_expression, endianness).apply(raw_records)
+
+        for rec_typ, rec_sub, data in raw_records:
+            record_type = stdf_mapping.get((rec_typ, rec_sub))
+            if record_type is None or not record_flags.get(record_type, False):
+                continue
+
+            builder = builders.get(record_type)
+            if builder is None:
+                builder = builders[record_type] = RecordColumnBuilder(
+                    record_type, select_fields(record_type, fields))
+                stop_after[record_type] = builder.last_field
+
+            stdf_processed_entry = {}
+            if data and builder.dtypes:
+                stdf_processed_entry = handle_stdf_entry(create_stdf_template(record_type), data, endianness,
+                                                         stop_after=stop_after[record_type])
+            builder.append(stdf_processed_entry)
+
+            if chunk_size and len(builder) >= chunk_size:
+                yield record_type, builder.to_frame()
+                builders[record_type] = RecordColumnBuilder(record_type, select_fields(record_type, fields))
+
+    for record_type, builder in builders.items():
+        if len(builder) or chunk_size is None:
+            yield record_type, builder.to_frame()
+
+
+@timing_decorator
+def to_dataframes(
+        input_stdf_file: str,
+        records: Optional[List[str]] = None,
+        fields: Optional[Union[List[str], Dict[str, List[str]]]] = None
+) -> dict:
+    """
+    Decode an STDF file straight into one pandas DataFrame per record type.
+
+    Columns are filled while decoding with dtypes taken from the STDF templates
+    (U*4 as uint32, R*4 as float32, strings as categoricals, ...), so no
+    intermediate list of dicts is built.
+
+    Args:
+        records: Record types to include (default: all).
+        fields: STDF field names to keep, either one list applied to every record
+            type (fields a record type does not have are ignored) or a dict of
+            lists keyed by record type.
+
+    Returns:
+        A dictionary of DataFrames keyed by record type, for the types present in the file.
+    """
+    return dict(iter_dataframes(input_stdf_file, records, fields, chunk_size=None))
+
+
+def select_fields(record_type: str, fields) -> Optional[List[str]]:
+    """Resolve the fields argument of to_dataframes for one record type (None keeps all)."""
+    if fields is None:
+        return None
+    if isinstance(fields, dict):
+        return fields.get(record_type)
+    stdf_fields = create_stdf_template(record_type)['fields']
+    return [field for field in fields if field in stdf_fields]
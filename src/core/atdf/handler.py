@@ -2,13 +2,20 @@
 from .parsers import *
 from .preprocessors.base import preprocess_record
 from ..utils.epoch import convert_epoch_to_datetime
+from ..utils.templates import bulk_array_records
 import logging
+import time
 
 logger = logging.getLogger(__name__)
 
 
-def handle_atdf_entry(atdf_template, stdf_template):
-    """Process ATDF record_type data."""
+def handle_atdf_entry(atdf_template, stdf_template, compact_arrays=False):
+    """
+    Process ATDF record_type data.
+
+    With compact_arrays, NumPy arrays (the numeric arrays of the V4-2007
+    records) are kept in the entry instead of being joined into strings.
+    """
     record_type = atdf_template['record_type']
     atdf_processed_entry = {}
 
@@ -41,6 +48,8 @@ def handle_atdf_entry(atdf_template, stdf_template):
         ('limit_compare', 'MPR'): parse_limit_compare,
         ('pass_fail_flag', 'FTR'): parse_ftr_pass_fail_flag,
         ('alarm_flags', 'FTR'): parse_ftr_alarm_flags,
+        ('pass_fail_flag', 'STR'): parse_ftr_pass_fail_flag,
+        ('alarm_flags', 'STR'): parse_ftr_alarm_flags,
 
         ('relative_address', 'FTR'): parse_ftr_relative_address,
 
@@ -69,7 +78,7 @@ def handle_atdf_entry(atdf_template, stdf_template):
             if key in field_processor_map:
                 atdf_info['value'] = field_processor_map[key](stdf_value)
             else:
-                atdf_info['value'] = process_default_value(stdf_value)
+                atdf_info['value'] = process_default_value(stdf_value, compact_arrays)
         elif atdf_info['stdf'] is None and atdf_field == 'atdf_version' and record_type == 'FAR':
             atdf_info['value'] = 2
 
@@ -78,61 +87,6 @@ def handle_atdf_entry(atdf_template, stdf_template):
     return atdf_processed_entry
 
 
-# def update_counters(record, atdf_processed_entry, atdf_processed_entries, counters):
-#     """Update counters for ATDF records."""
-#
-#     def get_latest_matching_entry(entries, record_type):
-#         if record_type not in entries:
-#             logger.warning(f"No {record_type} entries found for matching")
-#             return None
-#
-#         try:
-#             return next(
-#                 (entry for entry in reversed(entries[record_type])
-#                  if entry['head_number'] == atdf_processed_entry['head_number'] and
-#                  ('p_id' not in entry or entry.get('site_number') == atdf_processed_entry.get('site_number'))
-#                  ),
-#                 None
-#             )
-#         except KeyError as e:
-#             logger.error(f"Missing required field in entry: {e}")
-#             return None
-#
-#     if record == 'WIR':
-#         counters['w'] += 1
-#         atdf_processed_entry['w_id'] = counters['w']
-#
-#     elif record == 'WRR':
-#         wafer_entry = get_latest_matching_entry(atdf_processed_entries, 'WIR')
-#         atdf_processed_entry['w_id'] = wafer_entry['w_id'] if wafer_entry else None
-#
-#     elif record == 'PIR':
-#         counters['p'] += 1
-#         atdf_processed_entry['p_id'] = counters['p']
-#         wafer_entry = get_latest_matching_entry(atdf_processed_entries, 'WIR')
-#         atdf_processed_entry['w_id'] = wafer_entry['w_id'] if wafer_entry else None
-#
-#     elif record in ['PTR', 'MPR', 'FTR']:
-#         part_entry = get_latest_matching_entry(atdf_processed_entries, 'PIR')
-#         atdf_processed_entry['p_id'] = part_entry['p_id'] if part_entry else None
-#
-#         wafer_entry = get_latest_matching_entry(atdf_processed_entries, 'WIR')
-#         atdf_processed_entry['w_id'] = wafer_entry['w_id'] if wafer_entry else None
-#
-#     elif record == 'PRR':
-#         if 'PIR' not in atdf_processed_entries or not atdf_processed_entries['PIR']:
-#             counters['p'] += 1
-#             atdf_processed_entry['p_id'] = counters['p']
-#         else:
-#             part_entry = get_latest_matching_entry(atdf_processed_entries, 'PIR')
-#             atdf_processed_entry['p_id'] = part_entry['p_id'] if part_entry else None
-#
-#         wafer_entry = get_latest_matching_entry(atdf_processed_entries, 'WIR')
-#         atdf_processed_entry['w_id'] = wafer_entry['w_id'] if wafer_entry else None
-#
-#     return atdf_processed_entry, counters
-
-
 # def write_atdf_file(atdf_file, atdf_template):
 #     """Write ATDF record to file."""
 #     fields = atdf_template['fields']
@@ -189,6 +143,11 @@ def write_atdf_file(atdf_file, atdf_processed_entry, atdf_template):
 
     # Create a working copy of the processed entry
     fields_to_write = atdf_processed_entry.copy()
+    if atdf_template['record_type'] in bulk_array_records():
+        # Compact arrays are only joined here, for the line being written
+        for key, value in fields_to_write.items():
+            if hasattr(value, 'tolist'):
+                fields_to_write[key] = format_array(value)
 
     # Get keys in reverse order for cleanup
     keys_to_remove = list(fields_to_write.keys())[::-1]
@@ -223,17 +182,31 @@ def handle_atdf_entries(params):
     stdf_template = params['stdf_template']
     atdf_processed_entries = params['atdf_processed_entries']
     preprocessor_type = params.get('preprocessor_type')
+    metrics = params.get('metrics')
+    if metrics is not None:
+        start = time.perf_counter()
 
-    atdf_processed_entry = handle_atdf_entry(atdf_template, stdf_template)
+    atdf_processed_entry = handle_atdf_entry(atdf_template, stdf_template, params.get('compact_arrays', False))
 
     record_type = atdf_template['record_type']
-    #atdf_processed_entry, counters = update_counters(record_type, atdf_processed_entry, atdf_processed_entries, counters)
 
     # Only preprocess specific record types
     if preprocessor_type:
         atdf_processed_entry = preprocess_record(record_type, atdf_processed_entry, preprocessor_type)
 
-    atdf_processed_entries[record_type].append(atdf_processed_entry)
+    if metrics is not None:
+        mapped = time.perf_counter()
+        metrics.add_time(record_type, 'map_s', mapped - start)
 
     if params['atdf_file']:
-        write_atdf_file(params['atdf_file'], atdf_processed_entry, atdf_template)
\ No newline at end of file
+        write_atdf_file(params['atdf_file'], atdf_processed_entry, atdf_template)
+
+    parts = params.get('parts')
+    if parts is not None:
+        # Wafer and part ids are database columns, added once the ATDF line is written
+        atdf_processed_entry.update(parts.link())
+
+    atdf_processed_entries[record_type].append(atdf_processed_entry)
+
+    if metrics is not None:
+        metrics.add_time(record_type, 'write_s', time.perf_counter() - mapped)
\ No newline at end of file
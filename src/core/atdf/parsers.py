@@ -159,9 +159,16 @@ def parse_radix_array(stdf_value):
         return None
     return ','.join(mapping[element] for element in stdf_value)
 
-def process_default_value(stdf_value):
+def format_array(stdf_value):
+    """Comma-joined items of a bulk-decoded NumPy array, like those of a tuple."""
+    return ','.join(map(str, stdf_value.tolist()))
+
+def process_default_value(stdf_value, compact_arrays=False):
     if stdf_value is None:
         return None
     elif isinstance(stdf_value, tuple):
         return ','.join(map(str, stdf_value))
+    elif hasattr(stdf_value, 'tolist'):
+        # NumPy arrays of the V4-2007 records stay arrays with compact_arrays
+        return stdf_value if compact_arrays else format_array(stdf_value)
     return stdf_value
\ No newline at end of file
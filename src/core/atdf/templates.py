@@ -283,4 +283,88 @@ ATDF_TEMPLATES = {
     "DTR": {
         "text_data": {"stdf": "text_dat", "value": None, "req": False}
     },
-}
\ No newline at end of file
+    # STDF V4-2007 scan records, which ATDF 2 does not define: written in the same style
+    "VUR": {
+        "update_names": {"stdf": "upd_nam", "value": None, "req": False}
+    },
+    "PSR": {
+        "continuation_flag": {"stdf": "cont_flg", "value": None, "req": False},
+        "psr_index": {"stdf": "psr_indx", "value": None, "req": True},
+        "psr_name": {"stdf": "psr_nam", "value": None, "req": False},
+        "option_flags": {"stdf": "opt_flg", "value": None, "req": False},
+        "total_pattern_count": {"stdf": "totp_cnt", "value": None, "req": False},
+        "pattern_begin": {"stdf": "pat_bgn", "value": None, "req": False},
+        "pattern_end": {"stdf": "pat_end", "value": None, "req": False},
+        "pattern_files": {"stdf": "pat_file", "value": None, "req": False},
+        "pattern_labels": {"stdf": "pat_lbl", "value": None, "req": False},
+        "file_uids": {"stdf": "file_uid", "value": None, "req": False},
+        "atpg_descriptions": {"stdf": "atpg_dsc", "value": None, "req": False},
+        "source_ids": {"stdf": "src_id", "value": None, "req": False}
+    },
+    "NMR": {
+        "continuation_flag": {"stdf": "cont_flg", "value": None, "req": False},
+        "total_map_count": {"stdf": "totm_cnt", "value": None, "req": False},
+        "pmr_indexes": {"stdf": "pmr_indx", "value": None, "req": False},
+        "atpg_names": {"stdf": "atpg_nam", "value": None, "req": False}
+    },
+    "CNR": {
+        "chain_number": {"stdf": "chn_num", "value": None, "req": True},
+        "bit_position": {"stdf": "bit_pos", "value": None, "req": True},
+        "cell_name": {"stdf": "cell_nam", "value": None, "req": True}
+    },
+    "SSR": {
+        "ssr_name": {"stdf": "ssr_nam", "value": None, "req": False},
+        "chain_list": {"stdf": "chn_list", "value": None, "req": False}
+    },
+    "CDR": {
+        "continuation_flag": {"stdf": "cont_flg", "value": None, "req": False},
+        "cdr_index": {"stdf": "cdr_indx", "value": None, "req": True},
+        "chain_name": {"stdf": "chn_nam", "value": None, "req": False},
+        "chain_length": {"stdf": "chn_len", "value": None, "req": False},
+        "scan_in_pin": {"stdf": "sin_pin", "value": None, "req": False},
+        "scan_out_pin": {"stdf": "sout_pin", "value": None, "req": False},
+        "master_clocks": {"stdf": "m_clks", "value": None, "req": False},
+        "slave_clocks": {"stdf": "s_clks", "value": None, "req": False},
+        "inversion": {"stdf": "inv_val", "value": None, "req": False},
+        "cell_list": {"stdf": "cell_lst", "value": None, "req": False}
+    },
+    "STR": {
+        "test_number": {"stdf": "test_num", "value": None, "req": True},
+        "head_number": {"stdf": "head_num", "value": None, "req": True},
+        "site_number": {"stdf": "site_num", "value": None, "req": True},
+        "pass_fail_flag": {"stdf": "test_flg", "value": None, "req": True},
+        "alarm_flags": {"stdf": "test_flg", "value": None, "req": False},
+        "continuation_flag": {"stdf": "cont_flg", "value": None, "req": False},
+        "psr_index": {"stdf": "psr_ref", "value": None, "req": False},
+        "log_type": {"stdf": "log_typ", "value": None, "req": False},
+        "test_text": {"stdf": "test_txt", "value": None, "req": False},
+        "alarm_id": {"stdf": "alarm_id", "value": None, "req": False},
+        "programmed_text": {"stdf": "prog_txt", "value": None, "req": False},
+        "result_text": {"stdf": "rslt_txt", "value": None, "req": False},
+        "z_handling": {"stdf": "z_val", "value": None, "req": False},
+        "fail_map_flags": {"stdf": "fmu_flg", "value": None, "req": False},
+        "mask_map": {"stdf": "mask_map", "value": None, "req": False},
+        "fail_map": {"stdf": "fal_map", "value": None, "req": False},
+        "cycle_count": {"stdf": "cyc_cnt", "value": None, "req": False},
+        "total_fail_count": {"stdf": "totf_cnt", "value": None, "req": False},
+        "total_logged_count": {"stdf": "totl_cnt", "value": None, "req": False},
+        "cycle_base": {"stdf": "cyc_base", "value": None, "req": False},
+        "bit_base": {"stdf": "bit_base", "value": None, "req": False},
+        "capture_begin": {"stdf": "cap_bgn", "value": None, "req": False},
+        "limit_indexes": {"stdf": "lim_indx", "value": None, "req": False},
+        "limit_specs": {"stdf": "lim_spec", "value": None, "req": False},
+        "conditions": {"stdf": "cond_lst", "value": None, "req": False},
+        "cycle_offsets": {"stdf": "cyc_ofst", "value": None, "req": False},
+        "pmr_indexes": {"stdf": "pmr_indx", "value": None, "req": False},
+        "chain_numbers": {"stdf": "chn_num", "value": None, "req": False},
+        "expected_data": {"stdf": "exp_data", "value": None, "req": False},
+        "captured_data": {"stdf": "cap_data", "value": None, "req": False},
+        "new_data": {"stdf": "new_data", "value": None, "req": False},
+        "pattern_numbers": {"stdf": "pat_num", "value": None, "req": False},
+        "bit_positions": {"stdf": "bit_pos", "value": None, "req": False},
+        "user_data_1": {"stdf": "usr1", "value": None, "req": False},
+        "user_data_2": {"stdf": "usr2", "value": None, "req": False},
+        "user_data_3": {"stdf": "usr3", "value": None, "req": False},
+        "user_text": {"stdf": "user_txt", "value": None, "req": False}
+    }
+}
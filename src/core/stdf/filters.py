@@ -0,0 +1,273 @@
+# src/core/stdf/filters.py
+"""
+Row filters evaluated on raw record payloads, before records are decoded.
+
+A filter expression is a list of clauses separated by spaces or ';', all of
+which must hold:
+
+    site=0,1 test_num=1000..1999 hard_bin=1,2 x=-5..5 fail
+
+A clause is <field>=<values>, with values a comma-separated list of numbers
+and inclusive ranges (lo..hi, lo.., ..hi), or the keyword 'fail' (failing
+test results only). Fields are STDF field names or the aliases head, site, x
+and y. Each clause is compiled against the template layout into a check on
+the field's fixed offset in the payload (e.g. PTR test_num at 0, head_num and
+site_num at 4 and 5), so records that do not match are never decoded.
+
+Clauses on fields of the part records (PIR, PTR, MPR, FTR, STR) drop single
+records. Clauses on fields only the PRR has (hard_bin, soft_bin, x_coord,
+y_coord, ...) drop whole parts: the records of an open part are buffered per
+head and site until its PRR decides. Records outside the part records (MIR,
+WIR, TSR, HBR, ...) are never filtered.
+"""
+import logging
+import re
+import struct
+from typing import Callable, Dict, Iterable, List, Optional, Tuple
+
+from src.core.utils.templates import create_stdf_template
+
+logger = logging.getLogger(__name__)
+
+FIELD_ALIASES = {'head': 'head_num', 'site': 'site_num', 'x': 'x_coord', 'y': 'y_coord'}
+FAIL_KEYWORD = 'fail'
+# Records filtered by their own fields, and the record closing a part
+RESULT_RECORDS = ('PTR', 'MPR', 'FTR', 'STR')
+PART_RECORDS = ('PIR',) + RESULT_RECORDS
+PART_RESULT_RECORD = 'PRR'
+# Sizes and struct formats of the fixed-size data types
+FIXED_FORMATS = {
+    'U*1': 'B', 'U*2': 'H', 'U*4': 'I',
+    'I*1': 'b', 'I*2': 'h', 'I*4': 'i',
+    'R*4': 'f', 'R*8': 'd',
+    'B*1': 'B', 'C*1': 'B', 'N*1': 'B',
+}
+# test_flg bits 6 (pass/fail flag invalid) and 7 (test failed)
+TEST_FAILED_MASK = 0xC0
+TEST_FAILED = 0x80
+
+CLAUSE_PATTERN = re.compile(r'^([a-z_]+)=(.+)$')
+Range = Tuple[Optional[float], Optional[float]]
+
+
+def parse_number(text: str) -> float:
+    try:
+        return int(text)
+    except ValueError:
+        return float(text)
+
+
+def parse_values(text: str) -> List[Range]:
+    """Parse '1,3..5,10..' into inclusive (lo, hi) ranges, None for an open end."""
+    ranges = []
+    for item in text.split(','):
+        if '..' in item:
+            lo, hi = item.split('..', 1)
+            ranges.append((parse_number(lo) if lo else None, parse_number(hi) if hi else None))
+        else:
+            value = parse_number(item)
+            ranges.append((value, value))
+    return ranges
+
+
+def parse_filter(expression: str) -> Dict[str, List[List[Range]]]:
+    """
+    Parse a filter expression into {field: [ranges of each clause]} ('fail' maps to []).
+
+    Raises:
+        ValueError: The expression is not valid or names an unknown field.
+    """
+    clauses = {}
+    for token in re.split(r'[\s;]+', expression.strip()):
+        if not token or token.lower() == 'and':
+            continue
+        if token.lower() == FAIL_KEYWORD:
+            clauses.setdefault(FAIL_KEYWORD, [])
+            continue
+        match = CLAUSE_PATTERN.match(token.lower())
+        if not match:
+            raise ValueError(f"Invalid filter clause {token!r}, expected <field>=<values> or '{FAIL_KEYWORD}'")
+        field, values = FIELD_ALIASES.get(match.group(1), match.group(1)), match.group(2)
+        if not fixed_field_records(field):
+            raise ValueError(f"Cannot filter on {field!r}: not a fixed-offset field of "
+                             f"{', '.join(PART_RECORDS + (PART_RESULT_RECORD,))}")
+        try:
+            clauses.setdefault(field, []).append(parse_values(values))
+        except ValueError:
+            raise ValueError(f"Invalid values in filter clause {token!r}") from None
+    if not clauses:
+        raise ValueError("Empty filter expression")
+    return clauses
+
+
+def fixed_field_layout(record_type: str) -> Dict[str, Tuple[int, str]]:
+    """Offsets and dtypes of the leading fixed-size payload fields of a record type."""
+    layout = {}
+    offset = 0
+    for name, info in create_stdf_template(record_type)['payload_fields']:
+        if info['dtype'] not in FIXED_FORMATS:
+            break
+        layout[name] = (offset, info['dtype'])
+        offset += struct.calcsize(FIXED_FORMATS[info['dtype']])
+    return layout
+
+
+def fixed_field_records(field: str) -> List[str]:
+    """Part and result records that have field at a fixed offset."""
+    return [record_type for record_type in PART_RECORDS + (PART_RESULT_RECORD,)
+            if field in fixed_field_layout(record_type)]
+
+
+def compile_ranges(ranges: List[Range]) -> Callable[[float], bool]:
+    if all(lo is not None and lo == hi for lo, hi in ranges):
+        values = frozenset(lo for lo, _ in ranges)
+        return values.__contains__
+    return lambda value: any((lo is None or value >= lo) and (hi is None or value <= hi) for lo, hi in ranges)
+
+
+def compile_field_check(offset: int, dtype: str, ranges: List[Range], endianness: str) -> Callable[[bytes], bool]:
+    """Check of one field of a payload; a payload too short to hold the field does not match."""
+    matches = compile_ranges(ranges)
+    end = offset + struct.calcsize(FIXED_FORMATS[dtype])
+    if dtype in ('U*1', 'B*1', 'C*1', 'N*1'):
+        return lambda data: len(data) >= end and matches(data[offset])
+    unpack_from = struct.Struct(endianness + FIXED_FORMATS[dtype]).unpack_from
+    return lambda data: len(data) >= end and matches(unpack_from(data, offset)[0])
+
+
+def compile_fail_check(offset: int) -> Callable[[bytes], bool]:
+    """Check that test_flg (at offset) marks a valid failing result."""
+    return lambda data: len(data) > offset and data[offset] & TEST_FAILED_MASK == TEST_FAILED
+
+
+def compile_record_check(record_type: str, clauses: dict, endianness: str) -> Optional[Callable[[bytes], bool]]:
+    """All clauses that apply to a record type as one payload check (None when none apply)."""
+    layout = fixed_field_layout(record_type)
+    checks = []
+    for field, clause_ranges in clauses.items():
+        if field == FAIL_KEYWORD:
+            if record_type in RESULT_RECORDS:
+                checks.append(compile_fail_check(layout['test_flg'][0]))
+        elif field in layout:
+            offset, dtype = layout[field]
+            checks.extend(compile_field_check(offset, dtype, ranges, endianness) for ranges in clause_ranges)
+    if not checks:
+        return None
+    if len(checks) == 1:
+        return checks[0]
+    return lambda data: all(check(data) for check in checks)
+
+
+def is_part_level(field: str) -> bool:
+    """Clauses on fields no record within a part has can only be decided at the PRR."""
+    return field != FAIL_KEYWORD and not any(field in fixed_field_layout(record_type)
+                                             for record_type in PART_RECORDS)
+
+
+def record_key(record_type: str) -> Tuple[int, int]:
+    fields = create_stdf_template(record_type)['fields']
+    return fields['rec_typ']['value'], fields['rec_sub']['value']
+
+
+class RecordFilter:
+    """
+    A compiled filter expression, applied to a stream of raw records with apply().
+
+    Counts the records and parts it drops per record type in dropped and
+    dropped_parts.
+    """
+
+    def __init__(self, expression: str, endianness: str):
+        self.expression = expression
+        clauses = parse_filter(expression)
+        record_clauses = {field: ranges for field, ranges in clauses.items() if not is_part_level(field)}
+        part_clauses = {field: ranges for field, ranges in clauses.items() if is_part_level(field)}
+
+        # (rec_typ, rec_sub) -> (record type, check of its own fields), for the record types clauses apply to
+        self.checks = {}
+        for record_type in PART_RECORDS + (PART_RESULT_RECORD,):
+            check = compile_record_check(record_type, record_clauses, endianness)
+            if check is not None:
+                self.checks[record_key(record_type)] = (record_type, check)
+        self.part_check = (compile_record_check(PART_RESULT_RECORD, part_clauses, endianness)
+                           if part_clauses else None)
+        self.record_types = {record_key(record_type): record_type
+                             for record_type in PART_RECORDS + (PART_RESULT_RECORD,)}
+        # head_num and site_num offsets of the records buffered with their part
+        self.head_site = {record_key(record_type): fixed_field_layout(record_type)['head_num'][0]
+                          for record_type in PART_RECORDS + (PART_RESULT_RECORD,)}
+        self.pir_key = record_key('PIR')
+        self.prr_key = record_key(PART_RESULT_RECORD)
+        # Open parts by (head, site): their buffered records
+        self.open_parts = {}
+        self.dropped = {}
+        self.dropped_parts = 0
+
+    @property
+    def buffering(self) -> bool:
+        """Whether records read so far are held back in open parts."""
+        return bool(self.open_parts)
+
+    def _drop(self, record_type: str, count: int = 1) -> None:
+        self.dropped[record_type] = self.dropped.get(record_type, 0) + count
+
+    def apply(self, records: Iterable[Tuple[int, int, bytes]]):
+        """Yield the (rec_typ, rec_sub, data) records that pass the filter."""
+        checks = self.checks
+        part_check = self.part_check
+        head_site = self.head_site
+        open_parts = self.open_parts
+        pir_key = self.pir_key
+        prr_key = self.prr_key
+
+        for record in records:
+            key = (record[0], record[1])
+            data = record[2]
+            record_check = checks.get(key)
+            if record_check is not None and not record_check[1](data):
+                self._drop(record_check[0])
+                # A dropped PRR still closes its part
+                if key == prr_key and part_check is not None and len(data) >= 2:
+                    self._close_part((data[0], data[1]))
+                continue
+            if part_check is None or key not in head_site:
+                yield record
+                continue
+
+            offset = head_site[key]
+            part = (data[offset], data[offset + 1]) if len(data) >= offset + 2 else None
+            if key == pir_key:
+                if part in open_parts:
+                    # A PIR without a PRR: keep what the unfinished part had
+                    logger.warning(f"PIR for head {part[0]} site {part[1]} before the PRR of the previous part")
+                    yield from open_parts.pop(part)
+                open_parts[part] = [record]
+            elif key == prr_key:
+                if part_check(data):
+                    yield from open_parts.pop(part, ())
+                    yield record
+                else:
+                    self._drop(PART_RESULT_RECORD)
+                    self._close_part(part)
+            elif part in open_parts:
+                open_parts[part].append(record)
+            else:
+                yield record
+
+        if open_parts:
+            # Parts without a PRR cannot be decided; keep them
+            logger.warning(f"{len(open_parts)} part(s) without a PRR at the end of the file kept unfiltered")
+            for part in list(open_parts):
+                yield from open_parts.pop(part)
+
+    def _close_part(self, part) -> None:
+        """Drop a part and the records buffered for it."""
+        for rec_typ, rec_sub, _ in self.open_parts.pop(part, ()):
+            self._drop(self.record_types[(rec_typ, rec_sub)])
+        self.dropped_parts += 1
+
+    def log_summary(self, input_file: str) -> None:
+        dropped = sum(self.dropped.values())
+        parts = f", {self.dropped_parts} parts" if self.part_check is not None else ''
+        logger.info(f"Filter '{self.expression}' dropped {dropped} records{parts} of {input_file}"
+                    f"{' (' + ', '.join(f'{rt} {n}' for rt, n in sorted(self.dropped.items())) + ')' if dropped else ''}")
@@ -5,13 +5,18 @@ import logging
 logger = logging.getLogger(__name__)
 
 
-def handle_stdf_entry(stdf_template, data, endianness):
-    """Process STDF record data."""
+def handle_stdf_entry(stdf_template, data, endianness, stop_after=None):
+    """
+    Process STDF record data.
+
+    Fields are decoded in order; if stop_after names a field, decoding ends
+    once that field has been decoded and the remaining fields are left out.
+    """
     offset = 0
     stdf_processed_entry = {}
 
     # Start from third field (skip rec_len, rec_typ, rec_sub)
-    fields_to_process = list(stdf_template['fields'].items())[3:]
+    fields_to_process = stdf_template.get('payload_fields') or list(stdf_template['fields'].items())[3:]
 
     for stdf_field, stdf_info in fields_to_process:
         dtype = stdf_info['dtype']
@@ -20,14 +25,19 @@ def handle_stdf_entry(stdf_template, data, endianness):
         array_size = (stdf_template['fields'][ref]['value']
                       if ref else 0)
 
-        value, offset = unpack_dtype(dtype, data, endianness, offset, array_size=array_size)
+        if dtype in SIZED_ARRAY_DTYPES:
+            item_size = stdf_template['fields'][stdf_info['size']]['value']
+            value, offset = unpack_dtype(dtype, data, endianness, offset, array_size=array_size, item_size=item_size)
+        else:
+            value, offset = unpack_dtype(dtype, data, endianness, offset, array_size=array_size)
 
         stdf_info['value'] = value
-        stdf_processed_entry[stdf_field] = value
 
         check_invalid_and_set_None_after_unpack(stdf_template, stdf_field)
+        # Keep the entry consistent with the template: missing values are None
+        stdf_processed_entry[stdf_field] = stdf_info['value']
 
-        if offset >= len(data):
+        if offset >= len(data) or stdf_field == stop_after:
             break
 
     return stdf_processed_entry
@@ -38,6 +48,9 @@ def handle_stdf_entries(params):
 
     Args:
         params (dict): Dictionary of parameters needed for processing the STDF record.
+
+    Returns:
+        dict: The processed STDF entry.
     """
     stdf_template = params['stdf_template']
     data = params['data']
@@ -46,3 +59,4 @@ def handle_stdf_entries(params):
 
     stdf_processed_entry = handle_stdf_entry(stdf_template, data, endianness)
     stdf_processed_entries[stdf_template['record_type']].append(stdf_processed_entry)
+    return stdf_processed_entry
@@ -0,0 +1,175 @@
+# src/core/stdf/metadata.py
+"""
+Lot metadata (MIR, SDR, MRR) of STDF files read from the head and tail only.
+
+The header records are read up to the first record that is not one (usually
+a PMR, WIR or PIR), and the MRR is found in a window at the end of the file:
+candidate MRR headers are searched backwards and accepted when the record
+headers after them lead exactly to the end of the file. Only the MIR, SDRs
+and MRR are decoded, so the time does not depend on the file size. Gzip
+files cannot be read from the end; they are streamed to the MRR, skipping
+the payloads of the records in between.
+"""
+import json
+import logging
+import os
+import struct
+from concurrent.futures import ProcessPoolExecutor
+from pathlib import Path
+from typing import List, Optional
+
+from .handler import handle_stdf_entry
+from .reader import HEADER_SIZE, MRR_KEY, plausible_keys
+from ..utils.epoch import convert_epoch_to_datetime
+from ..utils.files import get_file_handle
+from ..utils.setup import determine_file_params
+from ..utils.templates import create_stdf_mapping, create_stdf_template
+
+logger = logging.getLogger(__name__)
+
+# Records before the first wafer, part or summary record
+HEADER_RECORDS = frozenset(('FAR', 'ATR', 'VUR', 'MIR', 'RDR', 'SDR', 'PSR', 'NMR', 'CNR', 'SSR', 'CDR'))
+# Bytes at the end of the file searched for the MRR
+TAIL_WINDOW = 64 * 1024
+# MIR fields copied to the top level of the metadata, with start_t and finish_t
+LOT_FIELDS = ('lot_id', 'sblot_id', 'part_typ', 'job_nam', 'job_rev', 'node_nam', 'tstr_typ', 'test_cod',
+              'oper_nam', 'setup_t', 'start_t')
+
+
+def decode_record(record_type: str, data: bytes, endianness: str) -> dict:
+    return handle_stdf_entry(create_stdf_template(record_type), data, endianness) if data else {}
+
+
+def chain_ends_at(buffer: bytes, position: int, header_struct: struct.Struct, keys: frozenset) -> bool:
+    """Whether the records starting at position have plausible headers and end exactly at the end of buffer."""
+    end = len(buffer)
+    while position + HEADER_SIZE <= end:
+        rec_len, rec_typ, rec_sub = header_struct.unpack_from(buffer, position)
+        if (rec_typ, rec_sub) not in keys:
+            return False
+        position += HEADER_SIZE + rec_len
+    return position == end
+
+
+def find_tail_mrr(stdf_file, size: int, endianness: str, window: int = TAIL_WINDOW) -> Optional[bytes]:
+    """
+    Payload of the MRR in the last window bytes of a seekable file (None when there is none).
+
+    MRR key bytes are searched from the end backwards; the first candidate whose
+    header chain leads to the end of the file is the MRR, so payload bytes that
+    happen to look like an MRR header are not taken for it.
+    """
+    start = max(0, size - window)
+    stdf_file.seek(start)
+    tail = stdf_file.read(size - start)
+    header_struct = struct.Struct(endianness + 'HBB')
+    keys = plausible_keys(create_stdf_mapping())
+    key_bytes = bytes(MRR_KEY)
+    position = len(tail)
+    while True:
+        position = tail.rfind(key_bytes, 0, position)
+        if position < 2:
+            return None
+        header_start = position - 2
+        if chain_ends_at(tail, header_start, header_struct, keys):
+            rec_len = header_struct.unpack_from(tail, header_start)[0]
+            return tail[position + 2:position + 2 + rec_len]
+        # Continue with key bytes starting before this candidate
+        position += 1
+
+
+def stream_last_mrr(stdf_file, header: bytes, header_struct: struct.Struct) -> Optional[bytes]:
+    """Payload of the last MRR of a file readable only forward, starting at the record of header."""
+    read = stdf_file.read
+    mrr = None
+    while len(header) == HEADER_SIZE:
+        rec_len, rec_typ, rec_sub = header_struct.unpack(header)
+        if (rec_typ, rec_sub) == MRR_KEY:
+            data = read(rec_len)
+            if len(data) == rec_len:
+                mrr = data
+        else:
+            stdf_file.seek(rec_len, os.SEEK_CUR)
+        header = read(HEADER_SIZE)
+    return mrr
+
+
+def read_lot_metadata(input_file: str, tail_window: int = TAIL_WINDOW) -> dict:
+    """
+    Read the MIR, SDRs and MRR of an STDF file without decoding anything else.
+
+    Returns:
+        dict: file, endianness, the LOT_FIELDS of the MIR, start_t and finish_t
+        (epoch seconds) with start_time and finish_time as text, complete
+        (whether an MRR was found), and the decoded 'MIR', 'SDR' (a list) and
+        'MRR' entries (None when missing).
+    """
+    input_file = str(input_file)
+    stdf_mapping = create_stdf_mapping()
+    with get_file_handle(input_file, 'rb') as stdf_file:
+        endianness = determine_file_params(stdf_file)['endianness']
+        header_struct = struct.Struct(endianness + 'HBB')
+        read = stdf_file.read
+        mir = None
+        sdrs = []
+        header = read(HEADER_SIZE)
+        while len(header) == HEADER_SIZE:
+            rec_len, rec_typ, rec_sub = header_struct.unpack(header)
+            record_type = stdf_mapping.get((rec_typ, rec_sub))
+            if record_type not in HEADER_RECORDS:
+                break
+            data = read(rec_len)
+            if record_type == 'MIR':
+                mir = decode_record('MIR', data, endianness)
+            elif record_type == 'SDR':
+                sdrs.append(decode_record('SDR', data, endianness))
+            header = read(HEADER_SIZE)
+
+        if input_file.lower().endswith('.gz'):
+            mrr_data = stream_last_mrr(stdf_file, header, header_struct)
+        else:
+            mrr_data = find_tail_mrr(stdf_file, os.fstat(stdf_file.fileno()).st_size, endianness, tail_window)
+    mrr = decode_record('MRR', mrr_data, endianness) if mrr_data is not None else None
+
+    metadata = {'file': input_file, 'endianness': 'big' if endianness == '>' else 'little'}
+    metadata.update({field: (mir or {}).get(field) for field in LOT_FIELDS})
+    metadata['finish_t'] = mrr.get('finish_t') if mrr else None
+    for field, name in (('start_t', 'start_time'), ('finish_t', 'finish_time')):
+        metadata[name] = convert_epoch_to_datetime(metadata[field], 'sqlite') if metadata[field] else None
+    metadata['complete'] = mrr is not None
+    metadata.update({'MIR': mir, 'SDR': sdrs, 'MRR': mrr})
+    return metadata
+
+
+def catalog_files(input_paths: List[Path], max_workers: int = 1, report_path: Optional[str] = None) -> List[dict]:
+    """
+    Read the lot metadata of several files (in max_workers processes), logging one line per file.
+
+    With report_path, the metadata of all files is written there as a JSON list.
+    """
+    if max_workers > 1 and len(input_paths) > 1:
+        with ProcessPoolExecutor(max_workers=max_workers) as executor:
+            catalog = list(executor.map(_metadata_or_error, map(str, input_paths), chunksize=16))
+    else:
+        catalog = [_metadata_or_error(str(path)) for path in input_paths]
+
+    for metadata in catalog:
+        if 'error' in metadata:
+            logger.error(f"{metadata['file']}: {metadata['error']}")
+            continue
+        logger.info(f"{metadata['file']}: lot {metadata['lot_id']}, part {metadata['part_typ']}, "
+                    f"job {metadata['job_nam']}, tester {metadata['node_nam']}, {metadata['start_time']} - "
+                    f"{metadata['finish_time'] if metadata['complete'] else 'no MRR'}")
+    if report_path:
+        with open(report_path, 'w') as f:
+            json.dump(catalog, f, indent=1)
+        logger.info(f"Wrote lot metadata of {len(catalog)} file(s) to {report_path}")
+    return catalog
+
+
+def _metadata_or_error(input_file: str) -> dict:
+    # A file that cannot be read is reported, not fatal to the catalog
+    try:
+        return read_lot_metadata(input_file)
+    except Exception as e:
+        return {'file': input_file, 'error': str(e)}
@@ -0,0 +1,248 @@
+# src/core/stdf/packers.py
+"""
+Encoding of STDF V4 fields and records: the inverse of the unpackers.
+
+pack_dtype(dtype, value, ...) turns a value as returned by unpack_dtype back
+into its bytes, and pack_record builds a complete record (header included)
+from an entry as returned by handle_stdf_entry, following the field order
+and array references of STDF_TEMPLATES.
+"""
+import struct
+import logging
+from typing import Optional
+
+from src.core.utils.templates import create_stdf_template
+
+logger = logging.getLogger(__name__)
+
+# ATDF prefix of a V*n item -> (type code, dtype), see unpack_Vn
+VARIABLE_DATA_TYPES = {
+    'U': (1, 'U*1'),
+    'M': (2, 'U*2'),
+    'B': (3, 'U*4'),
+    'I': (4, 'I*1'),
+    'S': (5, 'I*2'),
+    'L': (6, 'I*4'),
+    'F': (7, 'R*4'),
+    'D': (8, 'R*8'),
+    'T': (10, 'C*n'),
+    'X': (11, 'B*n'),
+    'Y': (12, 'D*n'),
+    'N': (13, 'N*1'),
+}
+NUMERIC_FORMATS = {
+    'U*1': 'B', 'U*2': 'H', 'U*4': 'I', 'U*8': 'Q',
+    'I*1': 'b', 'I*2': 'h', 'I*4': 'i',
+    'R*4': 'f', 'R*8': 'd',
+}
+ARRAY_FORMATS = {'xU*1': 'B', 'xU*2': 'H', 'xR*4': 'f',
+                 'kxU*1': 'B', 'kxU*2': 'H', 'kxU*4': 'I', 'kxU*8': 'Q'}
+# Item size of a kxU*f array -> struct format
+FIELD_SIZE_FORMATS = {1: 'B', 2: 'H', 4: 'I', 8: 'Q'}
+# Largest record payload the U*2 rec_len can describe
+MAX_RECORD_LENGTH = 65535
+
+
+def pack_C1(value) -> bytes:
+    if value is None:
+        return b'\x00'
+    return value.encode()[:1] or b' '
+
+
+def pack_Cn(value) -> bytes:
+    encoded = (value or '').encode()
+    if len(encoded) > 255:
+        raise ValueError(f"String of {len(encoded)} bytes does not fit a C*n field")
+    return bytes([len(encoded)]) + encoded
+
+
+def pack_Sn(value, endianness: str) -> bytes:
+    encoded = (value or '').encode()
+    if len(encoded) > 65535:
+        raise ValueError(f"String of {len(encoded)} bytes does not fit an S*n field")
+    return struct.pack(endianness + 'H', len(encoded)) + encoded
+
+
+def pack_B1(value) -> bytes:
+    return bytes([int(value, 2) if isinstance(value, str) else (value or 0)])
+
+
+def pack_Bn(value) -> bytes:
+    if not value:
+        return b'\x00'
+    hex_value = value if len(value) % 2 == 0 else '0' + value
+    encoded = bytes.fromhex(hex_value)
+    return bytes([len(encoded)]) + encoded
+
+
+def pack_Dn(value, endianness: str) -> bytes:
+    if isinstance(value, str):
+        # Hex string of whole bytes, as decoded with is_array=False
+        encoded = bytes.fromhex(value)
+        return struct.pack(endianness + 'H', len(encoded) * 8) + encoded
+    # Tuple of 1-based bit positions, as decoded with is_array=True
+    bits = value or ()
+    encoded = bytearray((max(bits) + 7) // 8 if bits else 0)
+    for bit in bits:
+        encoded[(bit - 1) // 8] |= 1 << ((bit - 1) % 8)
+    return struct.pack(endianness + 'H', len(encoded) * 8) + bytes(encoded)
+
+
+def pack_N1(value) -> bytes:
+    return bytes([int(value, 16) & 0x0F if isinstance(value, str) else (value or 0) & 0x0F])
+
+
+def pack_Vn(value, endianness: str) -> bytes:
+    packed = bytearray()
+    for item in value or ():
+        prefix, text = item[0], item[1:]
+        if prefix not in VARIABLE_DATA_TYPES:
+            raise ValueError(f"Invalid V*n item {item!r}")
+        type_code, dtype = VARIABLE_DATA_TYPES[prefix]
+        if dtype in ('U*1', 'U*2', 'U*4', 'I*1', 'I*2', 'I*4'):
+            item_value = int(text)
+        elif dtype in ('R*4', 'R*8'):
+            item_value = float(text)
+        elif text == 'None':
+            item_value = None
+        else:
+            item_value = text
+        packed.append(type_code)
+        packed += pack_dtype(dtype, item_value, endianness)
+    return bytes(packed)
+
+
+def pack_xCn(value) -> bytes:
+    return b''.join(pack_Cn(item) for item in value)
+
+
+def pack_kxCf(value, item_size: int) -> bytes:
+    return b''.join(item.encode()[:item_size].ljust(item_size) for item in value)
+
+
+def field_size(values) -> int:
+    """Smallest kxU*f item size holding every value."""
+    largest = max((int(value) for value in values), default=0)
+    return next(size for size in FIELD_SIZE_FORMATS if largest < 1 << (8 * size))
+
+
+def pack_xN1(value) -> bytes:
+    nibbles = list(value)
+    if len(nibbles) % 2:
+        nibbles.append(0)
+    return bytes((nibbles[i] & 0x0F) | ((nibbles[i + 1] & 0x0F) << 4) for i in range(0, len(nibbles), 2))
+
+
+def pack_dtype(dtype: str, value, endianness: str, item_size: Optional[int] = None) -> bytes:
+    """
+    Bytes that unpack_dtype decodes to value (arrays take their size from the value).
+
+    item_size is the item width of kxU*f and kxC*f arrays.
+    """
+
+    if dtype in NUMERIC_FORMATS:
+        return struct.pack(endianness + NUMERIC_FORMATS[dtype], value if value is not None else 0)
+
+    match dtype:
+        case "C*1":
+            return pack_C1(value)
+        case "C*n":
+            return pack_Cn(value)
+        case "B*1":
+            return pack_B1(value)
+        case "B*n":
+            return pack_Bn(value)
+        case "D*n":
+            return pack_Dn(value, endianness)
+        case "N*1":
+            return pack_N1(value)
+        case "V*n":
+            return pack_Vn(value, endianness)
+        case "xC*1":
+            return b''.join(value or ())
+        case "xC*n":
+            return pack_xCn(value or ())
+        case "xU*1" | "xU*2" | "xR*4":
+            value = value or ()
+            return struct.pack(endianness + f"{len(value)}{ARRAY_FORMATS[dtype]}", *value)
+        case "kxU*1" | "kxU*2" | "kxU*4" | "kxU*8":
+            # NumPy arrays as decoded, or any sequence of integers
+            value = [int(item) for item in value] if value is not None else ()
+            return struct.pack(endianness + f"{len(value)}{ARRAY_FORMATS[dtype]}", *value)
+        case "kxU*f":
+            value = [int(item) for item in value] if value is not None else ()
+            if not value:
+                return b''
+            return struct.pack(endianness + f"{len(value)}{FIELD_SIZE_FORMATS[item_size]}", *value)
+        case "S*n":
+            return pack_Sn(value, endianness)
+        case "kxC*n":
+            return pack_xCn(value or ())
+        case "kxC*f":
+            return pack_kxCf(value or (), item_size or 0)
+        case "kxS*n":
+            return b''.join(pack_Sn(item, endianness) for item in value or ())
+        case "xN*1":
+            return pack_xN1(value or ())
+        case _:
+            message = f"Invalid data type: {dtype}"
+            logger.error(message)
+            raise ValueError(message)
+
+
+def missing_value(field_info: dict):
+    """Value to encode for a field left as None: its missing-value sentinel where it has one."""
+    missing = field_info['missing']
+    if isinstance(missing, int):
+        return missing
+    if missing == 'space':
+        return ' '
+    return None
+
+
+def pack_record(record_type: str, entry: dict, endianness: str, omit_after: Optional[str] = None) -> bytes:
+    """
+    Encode a record from an entry of field values, header included.
+
+    Fields are written in template order up to the last field present in the
+    entry (or omit_after), so leaving out trailing fields truncates the record
+    as the specification allows. Fields before it that are missing or None are
+    written as their missing value. Array counts not given in the entry are
+    taken from the length of the arrays referring to them.
+    """
+    stdf_template = create_stdf_template(record_type)
+    payload_fields = stdf_template['payload_fields']
+    names = [name for name, _ in payload_fields]
+
+    present = [name for name in names if name in entry]
+    last = omit_after if omit_after is not None else (present[-1] if present else None)
+    if last is None:
+        payload_fields = []
+    else:
+        payload_fields = payload_fields[:names.index(last) + 1]
+
+    counts = {}
+    for name, info in stdf_template['payload_fields']:
+        if info['ref'] and info['ref'] not in counts and entry.get(name) is not None:
+            counts[info['ref']] = len(entry[name])
+        if 'size' in info and entry.get(info['size']) is None:
+            items = entry.get(name)
+            items = () if items is None else items
+            counts[info['size']] = (field_size(items) if info['dtype'] == 'kxU*f'
+                                    else max((len(item.encode()) for item in items), default=0))
+
+    payload = bytearray()
+    values = {}
+    for name, info in payload_fields:
+        value = entry.get(name)
+        if value is None:
+            value = counts.get(name, missing_value(info))
+        values[name] = value
+        item_size = values.get(info['size']) if 'size' in info else None
+        payload += pack_dtype(info['dtype'], value, endianness, item_size)
+
+    if len(payload) > MAX_RECORD_LENGTH:
+        raise ValueError(f"{record_type} payload of {len(payload)} bytes exceeds {MAX_RECORD_LENGTH}")
+    rec_typ = stdf_template['fields']['rec_typ']['value']
+    rec_sub = stdf_template['fields']['rec_sub']['value']
+    return struct.pack(endianness + 'HBB', len(payload), rec_typ, rec_sub) + bytes(payload)
@@ -0,0 +1,309 @@
+# src/core/stdf/reader.py
+"""Record-level reading of STDF files."""
+import json
+import logging
+import re
+import struct
+import time
+from typing import Callable, Iterable, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+HEADER_SIZE = 4
+FAR_KEY = (0, 10)
+MRR_KEY = (1, 20)
+# FAR cpu_type written for each byte order
+CPU_TYPES = {'>': 1, '<': 2}
+# Seconds between polls of a file that is still being written
+FOLLOW_POLL_INTERVAL = 1.0
+# rec_typ values reserved for vendor records: plausible headers although they have no template
+VENDOR_REC_TYPS = (180, 181)
+# Bytes searched per read while looking for the next plausible header
+RESYNC_WINDOW = 1 << 20
+# Records that must follow a candidate header, each with a plausible header, to resume reading there
+RESYNC_SUCCESSORS = 2
+
+
+def iter_raw_records(stdf_file, endianness: str):
+    """
+    Yield the raw records of an open STDF file.
+
+    Yields:
+        tuple: (rec_typ, rec_sub, data) with data the record payload as bytes.
+    """
+    header_struct = struct.Struct(endianness + 'HBB')
+    read = stdf_file.read
+
+    while True:
+        header = read(HEADER_SIZE)
+        if len(header) < HEADER_SIZE:
+            if header:
+                logger.error(f"Incomplete record header: expected {HEADER_SIZE} bytes, got {len(header)}")
+            break
+
+        rec_len, rec_typ, rec_sub = header_struct.unpack(header)
+        data = read(rec_len)
+
+        if len(data) < rec_len:
+            logger.error(f"Incomplete record data: expected {rec_len} bytes, got {len(data)}")
+            continue
+
+        yield rec_typ, rec_sub, data
+
+
+def plausible_keys(known_keys: Iterable[Tuple[int, int]]) -> frozenset:
+    """(rec_typ, rec_sub) keys a header may have when resynchronizing: the known ones and vendor records."""
+    return frozenset(known_keys) | frozenset((rec_typ, rec_sub) for rec_typ in VENDOR_REC_TYPS
+                                             for rec_sub in range(256))
+
+
+def header_chain_valid(stdf_file, position: int, header_struct: struct.Struct, keys: frozenset,
+                       successors: int = RESYNC_SUCCESSORS) -> bool:
+    """
+    Whether a plausible record starts at position: its key is in keys and it is
+    followed by as many records with plausible headers, the file ending only at
+    a record boundary.
+    """
+    for _ in range(successors + 1):
+        stdf_file.seek(position)
+        header = stdf_file.read(HEADER_SIZE)
+        if not header:
+            return True
+        if len(header) < HEADER_SIZE:
+            return False
+        rec_len, rec_typ, rec_sub = header_struct.unpack(header)
+        if (rec_typ, rec_sub) not in keys:
+            return False
+        position += HEADER_SIZE + rec_len
+        # The record must be complete
+        stdf_file.seek(position - 1)
+        if not stdf_file.read(1):
+            return False
+    return True
+
+
+def key_pattern(keys: frozenset) -> re.Pattern:
+    """Regex matching (zero-width) where the rec_typ and rec_sub bytes of one of keys start."""
+    subs = {}
+    for rec_typ, rec_sub in keys:
+        subs.setdefault(rec_typ, set()).add(rec_sub)
+
+    def byte_class(values):
+        return b'[' + b''.join(re.escape(bytes([value])) for value in sorted(values)) + b']'
+
+    any_sub = [rec_typ for rec_typ, values in subs.items() if len(values) == 256]
+    alternatives = [re.escape(bytes([rec_typ])) + byte_class(values)
+                    for rec_typ, values in sorted(subs.items()) if len(values) < 256]
+    if any_sub:
+        alternatives.append(byte_class(any_sub))
+    return re.compile(b'(?=' + b'|'.join(alternatives) + b')', re.DOTALL)
+
+
+def find_next_header(stdf_file, start: int, endianness: str, keys: frozenset) -> Tuple[Optional[int], int]:
+    """
+    Find the first offset from start where header_chain_valid holds.
+
+    Candidates are found by searching RESYNC_WINDOW bytes at a time for the
+    (rec_typ, rec_sub) byte pairs of keys, so long corrupt stretches are
+    skipped at the speed of a regex search.
+
+    Returns:
+        tuple: (offset or None when there is none, offset where the search ended).
+    """
+    header_struct = struct.Struct(endianness + 'HBB')
+    pattern = key_pattern(keys)
+    position = start
+    while True:
+        stdf_file.seek(position)
+        window = stdf_file.read(RESYNC_WINDOW + HEADER_SIZE)
+        for match in pattern.finditer(window, 2):
+            offset = match.start() - 2
+            if offset >= RESYNC_WINDOW:
+                break
+            if header_chain_valid(stdf_file, position + offset, header_struct, keys):
+                return position + offset, position + offset
+        if len(window) < RESYNC_WINDOW + HEADER_SIZE:
+            return None, position + len(window)
+        position += RESYNC_WINDOW
+
+
+def resync_raw_records(stdf_file, endianness: str, keys: frozenset, quarantine: 'QuarantineReport'):
+    """
+    Yield the raw records of an open STDF file, skipping damaged stretches.
+
+    A record is yielded once the header after it is plausible as well (its key
+    is in keys, see plausible_keys) or the file ends right after it. Otherwise
+    the record is truncated, its rec_len is corrupt or the next header is
+    damaged: reading resumes at the next offset found by find_next_header and
+    the bytes skipped are added to quarantine. A record whose claimed end lies
+    beyond that offset had a corrupt length and is skipped with them. Between
+    damaged stretches the file is read sequentially, as by iter_raw_records.
+
+    Yields:
+        tuple: (rec_typ, rec_sub, data) with data the record payload as bytes.
+    """
+    header_struct = struct.Struct(endianness + 'HBB')
+    read = stdf_file.read
+    offset = stdf_file.tell()
+    header = read(HEADER_SIZE)
+
+    while True:
+        if len(header) < HEADER_SIZE:
+            if header:
+                quarantine.add(offset, offset + len(header), 'incomplete header')
+            return
+        rec_len, rec_typ, rec_sub = header_struct.unpack(header)
+        if (rec_typ, rec_sub) in keys:
+            data = read(rec_len)
+            end = offset + HEADER_SIZE + rec_len
+            next_header = read(HEADER_SIZE)
+            complete = len(data) == rec_len
+            if complete and (not next_header or (len(next_header) == HEADER_SIZE
+                                                 and (next_header[2], next_header[3]) in keys)):
+                yield rec_typ, rec_sub, data
+                offset = end
+                header = next_header
+                continue
+            if complete and len(next_header) < HEADER_SIZE:
+                yield rec_typ, rec_sub, data
+                quarantine.add(end, end + len(next_header), 'incomplete header')
+                return
+            position, searched = find_next_header(stdf_file, offset + HEADER_SIZE, endianness, keys)
+            if complete and (position is None or position >= end):
+                # The record fits; the header after it is damaged
+                yield rec_typ, rec_sub, data
+                quarantine.add(end, position if position is not None else searched, 'damaged header')
+            else:
+                # A header found before the claimed end means the length is wrong; without one
+                # the file really ends inside the record
+                quarantine.add(offset, position if position is not None else searched,
+                               'bad record length' if position is not None else 'truncated record')
+        else:
+            position, searched = find_next_header(stdf_file, offset + 1, endianness, keys)
+            quarantine.add(offset, position if position is not None else searched, 'unknown header')
+        if position is None:
+            return
+        stdf_file.seek(position)
+        offset = position
+        header = read(HEADER_SIZE)
+
+
+def follow_raw_records(stdf_file, endianness: str, poll_interval: float = FOLLOW_POLL_INTERVAL,
+                       idle_timeout: Optional[float] = None, on_idle: Optional[Callable[[], None]] = None):
+    """
+    Yield the raw records of an STDF file that is still being written, up to and including its MRR.
+
+    An incomplete header or record means the writer is not done with it yet: the
+    file is rewound to the last complete record boundary and polled every
+    poll_interval seconds. on_idle is called once each time the reader catches
+    up with the writer (e.g. to flush outputs). With idle_timeout, following
+    stops when no complete record arrived for that many seconds.
+
+    Yields:
+        tuple: (rec_typ, rec_sub, data) with data the record payload as bytes.
+    """
+    header_struct = struct.Struct(endianness + 'HBB')
+    read = stdf_file.read
+    boundary = stdf_file.tell()
+    idle_since = None
+
+    while True:
+        header = read(HEADER_SIZE)
+        if len(header) == HEADER_SIZE:
+            rec_len, rec_typ, rec_sub = header_struct.unpack(header)
+            data = read(rec_len)
+            if len(data) == rec_len:
+                boundary += HEADER_SIZE + rec_len
+                idle_since = None
+                yield rec_typ, rec_sub, data
+                if (rec_typ, rec_sub) == MRR_KEY:
+                    return
+                continue
+
+        stdf_file.seek(boundary)
+        now = time.monotonic()
+        if idle_since is None:
+            idle_since = now
+            if on_idle:
+                on_idle()
+        elif idle_timeout is not None and now - idle_since >= idle_timeout:
+            logger.warning(f"No new records for {idle_timeout}s and no MRR yet, stopping at offset {boundary}")
+            return
+        time.sleep(poll_interval)
+
+
+class UnknownRecords:
+    """
+    Records whose (rec_typ, rec_sub) has no template: counted, and optionally copied to a sidecar.
+
+    The sidecar is an STDF file in the input's byte order: a FAR followed by
+    the unknown records as read, so it can be decoded later (e.g. after
+    registering a vendor layout with register_record_type).
+    """
+
+    def __init__(self, endianness: str, sidecar_path: Optional[str] = None):
+        self.endianness = endianness
+        self.sidecar_path = sidecar_path
+        self.header_struct = struct.Struct(endianness + 'HBB')
+        self.counts = {}
+        self.bytes = 0
+        self._sidecar = None
+
+    def add(self, rec_typ: int, rec_sub: int, data: bytes) -> None:
+        key = (rec_typ, rec_sub)
+        count = self.counts.get(key)
+        if count is None:
+            logger.debug(f"No template for rec_typ={rec_typ}, rec_sub={rec_sub}; skipping these records")
+            count = 0
+        self.counts[key] = count + 1
+        self.bytes += len(data)
+        if self.sidecar_path:
+            if self._sidecar is None:
+                self._sidecar = open(self.sidecar_path, 'wb')
+                self._sidecar.write(self.header_struct.pack(2, *FAR_KEY) + bytes([CPU_TYPES[self.endianness], 4]))
+            self._sidecar.write(self.header_struct.pack(len(data), rec_typ, rec_sub))
+            self._sidecar.write(data)
+
+    @property
+    def total(self) -> int:
+        return sum(self.counts.values())
+
+    def close(self) -> None:
+        if self._sidecar is not None:
+            self._sidecar.close()
+        if self.counts:
+            types = ', '.join(f"{rec_typ}/{rec_sub} x{count}" for (rec_typ, rec_sub), count in sorted(self.counts.items()))
+            sidecar = f", copied to {self.sidecar_path}" if self._sidecar is not None else ''
+            logger.warning(f"Skipped {self.total} records of unknown types ({types}; {self.bytes} bytes){sidecar}")
+
+
+class QuarantineReport:
+    """
+    Byte ranges of an input skipped by resync_raw_records, optionally written to a JSON report.
+
+    The report lists each range (start and end offsets, bytes, reason) and the
+    total bytes quarantined; it is only written when something was skipped.
+    """
+
+    def __init__(self, input_file: str, report_path: Optional[str] = None):
+        self.input_file = str(input_file)
+        self.report_path = report_path
+        self.ranges = []
+
+    def add(self, start: int, end: int, reason: str) -> None:
+        logger.warning(f"Quarantined bytes {start}-{end} of {self.input_file} ({reason}), resynchronized")
+        self.ranges.append({'start': start, 'end': end, 'bytes': end - start, 'reason': reason})
+
+    @property
+    def bytes(self) -> int:
+        return sum(quarantined['bytes'] for quarantined in self.ranges)
+
+    def close(self) -> None:
+        if not self.ranges:
+            return
+        logger.warning(f"Quarantined {self.bytes} bytes in {len(self.ranges)} range(s) of {self.input_file}")
+        if self.report_path:
+            with open(self.report_path, 'w') as f:
+                json.dump({'input': self.input_file, 'quarantined_bytes': self.bytes, 'ranges': self.ranges},
+                          f, indent=1)
+            logger.info(f"Wrote quarantine report to {self.report_path}")
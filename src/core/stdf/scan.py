@@ -0,0 +1,199 @@
+# src/core/stdf/scan.py
+"""
+Header-only scan of STDF files: a record histogram and an integrity report, without decoding.
+
+Uncompressed files are memory-mapped and walked from header to header, so
+the cost is one struct unpack per record whatever the payload sizes; gzip
+files are streamed, reading past the payloads.
+"""
+import json
+import logging
+import mmap
+import os
+import struct
+from concurrent.futures import ProcessPoolExecutor
+from pathlib import Path
+from typing import Dict, List, Optional
+
+from .reader import HEADER_SIZE, FAR_KEY, MRR_KEY
+from ..utils.files import get_file_handle
+from ..utils.templates import create_stdf_mapping
+
+logger = logging.getLogger(__name__)
+
+PIR_KEY = (5, 10)
+WIR_KEY = (2, 10)
+# Bytes read at a time when skipping gzip payloads
+SKIP_CHUNK = 1 << 20
+
+
+def endianness_of(far: bytes) -> str:
+    """Byte order from the first 6 bytes of a file, as determine_file_params reads it (cpu_type 1 is big-endian)."""
+    return '>' if len(far) > 4 and far[4] == 1 else '<'
+
+
+def walk_headers(view, size: int, endianness: str):
+    """
+    Count the records of a buffer (e.g. an mmap) by walking its headers.
+
+    Returns:
+        tuple: ({(rec_typ, rec_sub): [records, bytes]}, offset after the last complete
+        record, key of the last complete record).
+    """
+    unpack_from = struct.Struct(endianness + 'HBB').unpack_from
+    counts = {}
+    offset = 0
+    last_key = None
+    while offset + HEADER_SIZE <= size:
+        rec_len, rec_typ, rec_sub = unpack_from(view, offset)
+        end = offset + HEADER_SIZE + rec_len
+        if end > size:
+            break
+        key = (rec_typ, rec_sub)
+        counted = counts.get(key)
+        if counted is None:
+            counts[key] = [1, HEADER_SIZE + rec_len]
+        else:
+            counted[0] += 1
+            counted[1] += HEADER_SIZE + rec_len
+        last_key = key
+        offset = end
+    return counts, offset, last_key
+
+
+def stream_headers(stdf_file, endianness: str):
+    """walk_headers for a file that can only be read forward (gzip); returns the size read as well."""
+    header_struct = struct.Struct(endianness + 'HBB')
+    read = stdf_file.read
+    counts = {}
+    offset = 0
+    last_key = None
+    trailing = 0
+    while True:
+        header = read(HEADER_SIZE)
+        if len(header) < HEADER_SIZE:
+            trailing = len(header)
+            break
+        rec_len, rec_typ, rec_sub = header_struct.unpack(header)
+        remaining = rec_len
+        while remaining:
+            skipped = len(read(min(remaining, SKIP_CHUNK)))
+            if not skipped:
+                break
+            remaining -= skipped
+        if remaining:
+            trailing = HEADER_SIZE + rec_len - remaining
+            break
+        key = (rec_typ, rec_sub)
+        counted = counts.get(key)
+        if counted is None:
+            counts[key] = [1, HEADER_SIZE + rec_len]
+        else:
+            counted[0] += 1
+            counted[1] += HEADER_SIZE + rec_len
+        last_key = key
+        offset += HEADER_SIZE + rec_len
+    return counts, offset, last_key, offset + trailing
+
+
+def scan_file(input_file: str) -> dict:
+    """
+    Scan the record headers of one STDF file (plain or .gz).
+
+    Returns:
+        dict: file, size (uncompressed for gzip), endianness, records, record_types ({name: {records, bytes}},
+        unknown types named '<rec_typ>/<rec_sub>'), parts and wafers (PIR and WIR
+        counts), starts_with_far, ends_with_mrr and trailing_bytes (bytes after
+        the last complete record: a truncated record or garbage).
+    """
+    input_file = str(input_file)
+    if input_file.lower().endswith('.gz'):
+        with get_file_handle(input_file, 'rb') as stdf_file:
+            head = stdf_file.read(6)
+            endianness = endianness_of(head)
+            stdf_file.seek(0)
+            counts, end, last_key, size = stream_headers(stdf_file, endianness)
+    else:
+        with open(input_file, 'rb') as stdf_file:
+            size = os.fstat(stdf_file.fileno()).st_size
+            head = stdf_file.read(6)
+            endianness = endianness_of(head)
+            if size:
+                with mmap.mmap(stdf_file.fileno(), 0, access=mmap.ACCESS_READ) as view:
+                    counts, end, last_key = walk_headers(view, size, endianness)
+            else:
+                counts, end, last_key = {}, 0, None
+
+    stdf_mapping = create_stdf_mapping()
+    record_types = {}
+    for key, (records, record_bytes) in sorted(counts.items()):
+        name = stdf_mapping.get(key) or f"{key[0]}/{key[1]}"
+        record_types[name] = {'records': records, 'bytes': record_bytes}
+    return {
+        'file': input_file,
+        'size': size,
+        'endianness': 'big' if endianness == '>' else 'little',
+        'records': sum(records for records, _ in counts.values()),
+        'record_types': record_types,
+        'parts': counts.get(PIR_KEY, (0,))[0],
+        'wafers': counts.get(WIR_KEY, (0,))[0],
+        'starts_with_far': len(head) >= HEADER_SIZE and (head[2], head[3]) == FAR_KEY,
+        'ends_with_mrr': last_key == MRR_KEY,
+        'trailing_bytes': size - end,
+    }
+
+
+def format_scan(report: dict) -> str:
+    """One line summarizing a scan report."""
+    problems = []
+    if not report['starts_with_far']:
+        problems.append('no FAR')
+    if not report['ends_with_mrr']:
+        problems.append('no MRR at the end')
+    if report['trailing_bytes']:
+        problems.append(f"{report['trailing_bytes']} trailing bytes")
+    unknown = [name for name in report['record_types'] if '/' in name]
+    if unknown:
+        problems.append(f"unknown types {', '.join(unknown)}")
+    return (f"{report['file']}: {report['records']:,} records, {report['size'] / 1e6:.1f} MB, "
+            f"{report['parts']:,} parts, {report['wafers']} wafers, {report['endianness']}-endian, "
+            f"{'; '.join(problems) if problems else 'complete'}")
+
+
+def scan_files(input_paths: List[Path], max_workers: int = 1,
+               report_path: Optional[str] = None) -> List[dict]:
+    """
+    Scan several files (in max_workers processes), logging one line per file.
+
+    With report_path, the reports are written there as JSON: the reports of
+    all files and the record types summed over them.
+    """
+    if max_workers > 1 and len(input_paths) > 1:
+        with ProcessPoolExecutor(max_workers=max_workers) as executor:
+            reports = list(executor.map(_scan_or_error, map(str, input_paths), chunksize=16))
+    else:
+        reports = [_scan_or_error(str(path)) for path in input_paths]
+
+    totals: Dict[str, dict] = {}
+    for report in reports:
+        if 'error' in report:
+            logger.error(f"{report['file']}: {report['error']}")
+            continue
+        logger.info(format_scan(report))
+        for name, counted in report['record_types'].items():
+            total = totals.setdefault(name, {'records': 0, 'bytes': 0})
+            total['records'] += counted['records']
+            total['bytes'] += counted['bytes']
+    if report_path:
+        with open(report_path, 'w') as f:
+            json.dump({'files': reports, 'record_types': dict(sorted(totals.items()))}, f, indent=1)
+        logger.info(f"Wrote scan report of {len(reports)} file(s) to {report_path}")
+    return reports
+
+
+def _scan_or_error(input_file: str) -> dict:
+    # A file that cannot be read is reported, not fatal to the scan of the others
+    try:
+        return scan_file(input_file)
+    except (OSError, EOFError, ValueError) as e:
+        return {'file': input_file, 'error': str(e)}
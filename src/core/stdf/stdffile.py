@@ -0,0 +1,241 @@
+# src/core/stdf/stdffile.py
+"""
+Random access to the records of an uncompressed STDF file.
+
+STDFFile memory-maps the file and, on first use, walks its record headers
+into an index of offsets and keys (NumPy arrays, 10 bytes per record). Records
+are then decoded only when accessed, by record number, by type or by part,
+and the last cache_size decoded records are kept in an LRU cache.
+"""
+import logging
+import mmap
+import struct
+from array import array
+from functools import lru_cache
+from typing import Optional, Tuple
+
+import numpy as np
+
+from .filters import fixed_field_layout
+from .handler import handle_stdf_entry
+from .reader import HEADER_SIZE
+from ..utils.parts import Part, RESULT_RECORDS
+from ..utils.setup import determine_endianness
+from ..utils.templates import create_stdf_mapping, create_stdf_template
+
+logger = logging.getLogger(__name__)
+
+# Decoded records kept by default
+CACHE_SIZE = 10_000
+
+
+def record_key(record_type: str) -> int:
+    """Index key of a record type: rec_typ << 8 | rec_sub."""
+    fields = create_stdf_template(record_type)['fields']
+    return fields['rec_typ']['value'] << 8 | fields['rec_sub']['value']
+
+
+class RecordSelection:
+    """Records of an STDFFile selected by record number (e.g. by_type), decoded when accessed."""
+
+    def __init__(self, stdf_file: 'STDFFile', indices: np.ndarray):
+        self.stdf_file = stdf_file
+        self.indices = indices
+
+    def __len__(self) -> int:
+        return len(self.indices)
+
+    def __getitem__(self, item):
+        if isinstance(item, slice):
+            return [self.stdf_file.entry(int(index)) for index in self.indices[item]]
+        return self.stdf_file.entry(int(self.indices[item]))
+
+    def __iter__(self):
+        for index in self.indices:
+            yield self.stdf_file.entry(int(index))
+
+
+class STDFFile:
+    """
+    An STDF file as a sequence of records, indexed lazily and decoded on access.
+
+    stdf[n] is the (record_type, entry) pair of record n (from 0, in file
+    order) and stdf[a:b] a list of them; entries are dicts of STDF field values
+    as yielded by iter_records. Records of unknown types are ('<rec_typ>/<rec_sub>',
+    payload bytes). Decoded entries are shared with the cache: copy one before
+    changing it.
+
+    by_type('PRR') selects the records of one type, part(n) assembles part n.
+    Gzip files have no random access: decompress them first.
+    """
+
+    def __init__(self, path: str, cache_size: int = CACHE_SIZE):
+        if str(path).lower().endswith('.gz'):
+            raise ValueError(f"{path}: STDFFile needs an uncompressed file")
+        self.path = str(path)
+        self._file = open(self.path, 'rb')
+        self._view = mmap.mmap(self._file.fileno(), 0, access=mmap.ACCESS_READ)
+        self.endianness = determine_endianness(self._view[4:5])
+        self._offsets = None
+        self._keys = None
+        self._stdf_mapping = create_stdf_mapping()
+        self._decode = lru_cache(maxsize=cache_size)(self._decode_record)
+        self._layouts = {}
+
+    def __enter__(self) -> 'STDFFile':
+        return self
+
+    def __exit__(self, *exc_info) -> None:
+        self.close()
+
+    def close(self) -> None:
+        self._decode.cache_clear()
+        self._view.close()
+        self._file.close()
+
+    def _build_index(self) -> None:
+        unpack_from = struct.Struct(self.endianness + 'HBB').unpack_from
+        view = self._view
+        size = len(view)
+        offsets = array('q')
+        keys = array('H')
+        offset = 0
+        while offset + HEADER_SIZE <= size:
+            rec_len, rec_typ, rec_sub = unpack_from(view, offset)
+            if offset + HEADER_SIZE + rec_len > size:
+                logger.warning(f"Incomplete record at offset {offset} of {self.path}; "
+                               f"the last {size - offset} bytes are not indexed")
+                break
+            offsets.append(offset)
+            keys.append(rec_typ << 8 | rec_sub)
+            offset += HEADER_SIZE + rec_len
+        self._offsets = np.frombuffer(offsets, dtype=np.int64) if offsets else np.zeros(0, dtype=np.int64)
+        self._keys = np.frombuffer(keys, dtype=np.uint16) if keys else np.zeros(0, dtype=np.uint16)
+        logger.debug(f"Indexed {len(offsets)} records of {self.path}")
+
+    @property
+    def offsets(self) -> np.ndarray:
+        """Byte offset of every record's header, by record number."""
+        if self._offsets is None:
+            self._build_index()
+        return self._offsets
+
+    @property
+    def keys(self) -> np.ndarray:
+        """rec_typ << 8 | rec_sub of every record, by record number."""
+        if self._keys is None:
+            self._build_index()
+        return self._keys
+
+    def __len__(self) -> int:
+        return len(self.offsets)
+
+    def __getitem__(self, item):
+        if isinstance(item, slice):
+            return [self._decode(index) for index in range(*item.indices(len(self)))]
+        if item < 0:
+            item += len(self)
+        if not 0 <= item < len(self):
+            raise IndexError(f"Record {item} out of range ({len(self)} records)")
+        return self._decode(item)
+
+    def __iter__(self):
+        for index in range(len(self)):
+            yield self._decode(index)
+
+    def entry(self, index: int) -> dict:
+        """The decoded entry of record index (without its record type)."""
+        return self[index][1]
+
+    def payload(self, index: int) -> memoryview:
+        """The undecoded payload of record index (a view of the mapped file, valid until close)."""
+        offset = int(self.offsets[index])
+        rec_len = struct.unpack_from(self.endianness + 'H', self._view, offset)[0]
+        return memoryview(self._view)[offset + HEADER_SIZE:offset + HEADER_SIZE + rec_len]
+
+    def _name(self, key: int) -> str:
+        return self._stdf_mapping.get((key >> 8, key & 0xFF)) or f"{key >> 8}/{key & 0xFF}"
+
+    def record_type(self, index: int) -> str:
+        return self._name(int(self.keys[index]))
+
+    def _decode_record(self, index: int) -> Tuple[str, object]:
+        key = int(self.keys[index])
+        record_type = self._stdf_mapping.get((key >> 8, key & 0xFF))
+        data = bytes(self.payload(index))
+        if record_type is None:
+            return self._name(key), data
+        layout = self._layouts.get(record_type)
+        if layout is None:
+            stdf_template = create_stdf_template(record_type)
+            layout = self._layouts[record_type] = (stdf_template, [name for name, _ in stdf_template['payload_fields']])
+        stdf_template, names = layout
+        decoded = handle_stdf_entry(stdf_template, data, self.endianness) if data else {}
+        return record_type, {name: decoded.get(name) for name in names}
+
+    def indices(self, record_type: str) -> np.ndarray:
+        """Record numbers of the records of one type."""
+        return np.flatnonzero(self.keys == record_key(record_type))
+
+    def by_type(self, record_type: str) -> RecordSelection:
+        """The records of one type, as a sequence of entries decoded on access."""
+        return RecordSelection(self, self.indices(record_type))
+
+    def counts(self) -> dict:
+        """Number of records per record type."""
+        keys, counts = np.unique(self.keys, return_counts=True)
+        return {self._name(key): count for key, count in zip(keys.tolist(), counts.tolist())}
+
+    def _head_site(self, index: int, offset: int) -> Optional[Tuple[int, int]]:
+        # head_num and site_num follow each other at offset in the payload of part records
+        position = int(self.offsets[index]) + HEADER_SIZE + offset
+        end = int(self.offsets[index + 1]) if index + 1 < len(self.offsets) else len(self._view)
+        return (self._view[position], self._view[position + 1]) if position + 2 <= end else None
+
+    def part(self, n: int) -> Part:
+        """
+        Part n (from 1, in file order of the PIRs, as the p_id of run_conversion).
+
+        The part holds its PIR and PRR entries, its results (the PTR, MPR, FTR and
+        STR records of its head and site between the two) and its wafer (the
+        last WIR of its head before the PIR, unless a WRR closed it).
+        """
+        pirs = self.indices('PIR')
+        if not 1 <= n <= len(pirs):
+            raise IndexError(f"Part {n} out of range ({len(pirs)} parts)")
+        start = int(pirs[n - 1])
+        pir = self.entry(start)
+        head_num, site_num = pir.get('head_num'), pir.get('site_num')
+
+        w_id = None
+        wafer = None
+        wirs = self.indices('WIR')
+        wrrs = self.indices('WRR')
+        for position in range(int(np.searchsorted(wirs, start)) - 1, -1, -1):
+            wir = int(wirs[position])
+            if self.entry(wir).get('head_num') == head_num:
+                closed = any(self.entry(int(wrr)).get('head_num') == head_num
+                             for wrr in wrrs[(wrrs > wir) & (wrrs < start)])
+                if not closed:
+                    w_id, wafer = position + 1, self.entry(wir)
+                break
+
+        part = Part(n, w_id, head_num, site_num, wafer, pir)
+        # Index key -> (record type, offset of head_num) of the records that belong to parts
+        part_records = {record_key(record_type): (record_type, fixed_field_layout(record_type)['head_num'][0])
+                        for record_type in RESULT_RECORDS + ('PIR', 'PRR')}
+        keys = self.keys
+        for index in range(start + 1, len(keys)):
+            found = part_records.get(int(keys[index]))
+            if found is None or self._head_site(index, found[1]) != (head_num, site_num):
+                continue
+            record_type = found[0]
+            if record_type in RESULT_RECORDS:
+                part.results.append((record_type, self.entry(index)))
+            else:
+                # The PRR closes the part; a PIR on the same head and site means it had none
+                if record_type == 'PRR':
+                    part.prr = self.entry(index)
+                break
+        part.result_count = len(part.results)
+        return part
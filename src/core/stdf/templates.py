@@ -366,5 +366,140 @@ STDF_TEMPLATES = {
         "rec_typ": {"dtype": "U*1", "ref": None, "value": 50, "missing": None},
         "rec_sub": {"dtype": "U*1", "ref": None, "value": 30, "missing": None},
         "text_dat": {"dtype": "C*n", "ref": None, "value": None, "missing": None}
+    },
+    # STDF V4-2007 (scan/ATPG) records. Their numeric kx arrays are decoded in bulk into NumPy
+    # arrays; kxU*f and kxC*f items are as wide as the field named by "size"
+    "VUR": {
+        "rec_len": {"dtype": "U*2", "ref": None, "value": None, "missing": None},
+        "rec_typ": {"dtype": "U*1", "ref": None, "value": 0, "missing": None},
+        "rec_sub": {"dtype": "U*1", "ref": None, "value": 30, "missing": None},
+        "upd_cnt": {"dtype": "U*1", "ref": None, "value": None, "missing": None},
+        "upd_nam": {"dtype": "kxC*n", "ref": "upd_cnt", "value": None, "missing": None}
+    },
+    "PSR": {
+        "rec_len": {"dtype": "U*2", "ref": None, "value": None, "missing": None},
+        "rec_typ": {"dtype": "U*1", "ref": None, "value": 1, "missing": None},
+        "rec_sub": {"dtype": "U*1", "ref": None, "value": 90, "missing": None},
+        "cont_flg": {"dtype": "B*1", "ref": None, "value": None, "missing": None},
+        "psr_indx": {"dtype": "U*2", "ref": None, "value": None, "missing": None},
+        "psr_nam": {"dtype": "C*n", "ref": None, "value": None, "missing": "length byte = 0"},
+        "opt_flg": {"dtype": "B*1", "ref": None, "value": None, "missing": None},
+        "totp_cnt": {"dtype": "U*2", "ref": None, "value": None, "missing": None},
+        "locp_cnt": {"dtype": "U*2", "ref": None, "value": None, "missing": None},
+        "pat_bgn": {"dtype": "kxU*8", "ref": "locp_cnt", "value": None, "missing": None},
+        "pat_end": {"dtype": "kxU*8", "ref": "locp_cnt", "value": None, "missing": None},
+        "pat_file": {"dtype": "kxC*n", "ref": "locp_cnt", "value": None, "missing": None},
+        "pat_lbl": {"dtype": "kxC*n", "ref": "locp_cnt", "value": None, "missing": None},
+        "file_uid": {"dtype": "kxC*n", "ref": "locp_cnt", "value": None, "missing": None},
+        "atpg_dsc": {"dtype": "kxC*n", "ref": "locp_cnt", "value": None, "missing": None},
+        "src_id": {"dtype": "kxC*n", "ref": "locp_cnt", "value": None, "missing": None}
+    },
+    "NMR": {
+        "rec_len": {"dtype": "U*2", "ref": None, "value": None, "missing": None},
+        "rec_typ": {"dtype": "U*1", "ref": None, "value": 1, "missing": None},
+        "rec_sub": {"dtype": "U*1", "ref": None, "value": 91, "missing": None},
+        "cont_flg": {"dtype": "B*1", "ref": None, "value": None, "missing": None},
+        "totm_cnt": {"dtype": "U*2", "ref": None, "value": None, "missing": None},
+        "locm_cnt": {"dtype": "U*2", "ref": None, "value": None, "missing": None},
+        "pmr_indx": {"dtype": "kxU*2", "ref": "locm_cnt", "value": None, "missing": None},
+        "atpg_nam": {"dtype": "kxC*n", "ref": "locm_cnt", "value": None, "missing": None}
+    },
+    "CNR": {
+        "rec_len": {"dtype": "U*2", "ref": None, "value": None, "missing": None},
+        "rec_typ": {"dtype": "U*1", "ref": None, "value": 1, "missing": None},
+        "rec_sub": {"dtype": "U*1", "ref": None, "value": 92, "missing": None},
+        "chn_num": {"dtype": "U*2", "ref": None, "value": None, "missing": None},
+        "bit_pos": {"dtype": "U*4", "ref": None, "value": None, "missing": None},
+        "cell_nam": {"dtype": "S*n", "ref": None, "value": None, "missing": None}
+    },
+    "SSR": {
+        "rec_len": {"dtype": "U*2", "ref": None, "value": None, "missing": None},
+        "rec_typ": {"dtype": "U*1", "ref": None, "value": 1, "missing": None},
+        "rec_sub": {"dtype": "U*1", "ref": None, "value": 93, "missing": None},
+        "ssr_nam": {"dtype": "C*n", "ref": None, "value": None, "missing": "length byte = 0"},
+        "chn_cnt": {"dtype": "U*2", "ref": None, "value": None, "missing": None},
+        "chn_list": {"dtype": "kxU*2", "ref": "chn_cnt", "value": None, "missing": None}
+    },
+    "CDR": {
+        "rec_len": {"dtype": "U*2", "ref": None, "value": None, "missing": None},
+        "rec_typ": {"dtype": "U*1", "ref": None, "value": 1, "missing": None},
+        "rec_sub": {"dtype": "U*1", "ref": None, "value": 94, "missing": None},
+        "cont_flg": {"dtype": "B*1", "ref": None, "value": None, "missing": None},
+        "cdr_indx": {"dtype": "U*2", "ref": None, "value": None, "missing": None},
+        "chn_nam": {"dtype": "C*n", "ref": None, "value": None, "missing": "length byte = 0"},
+        "chn_len": {"dtype": "U*4", "ref": None, "value": None, "missing": None},
+        "sin_pin": {"dtype": "U*2", "ref": None, "value": None, "missing": None},
+        "sout_pin": {"dtype": "U*2", "ref": None, "value": None, "missing": None},
+        "mstr_cnt": {"dtype": "U*1", "ref": None, "value": None, "missing": None},
+        "m_clks": {"dtype": "kxU*2", "ref": "mstr_cnt", "value": None, "missing": None},
+        "slav_cnt": {"dtype": "U*1", "ref": None, "value": None, "missing": None},
+        "s_clks": {"dtype": "kxU*2", "ref": "slav_cnt", "value": None, "missing": None},
+        "inv_val": {"dtype": "U*1", "ref": None, "value": None, "missing": None},
+        "lst_cnt": {"dtype": "U*2", "ref": None, "value": None, "missing": None},
+        "cell_lst": {"dtype": "kxS*n", "ref": "lst_cnt", "value": None, "missing": None}
+    },
+    "STR": {
+        "rec_len": {"dtype": "U*2", "ref": None, "value": None, "missing": None},
+        "rec_typ": {"dtype": "U*1", "ref": None, "value": 15, "missing": None},
+        "rec_sub": {"dtype": "U*1", "ref": None, "value": 30, "missing": None},
+        "cont_flg": {"dtype": "B*1", "ref": None, "value": None, "missing": None},
+        "test_num": {"dtype": "U*4", "ref": None, "value": None, "missing": None},
+        "head_num": {"dtype": "U*1", "ref": None, "value": None, "missing": None},
+        "site_num": {"dtype": "U*1", "ref": None, "value": None, "missing": None},
+        "psr_ref": {"dtype": "U*2", "ref": None, "value": None, "missing": None},
+        "test_flg": {"dtype": "B*1", "ref": None, "value": None, "missing": None},
+        "log_typ": {"dtype": "C*n", "ref": None, "value": None, "missing": "length byte = 0"},
+        "test_txt": {"dtype": "C*n", "ref": None, "value": None, "missing": "length byte = 0"},
+        "alarm_id": {"dtype": "C*n", "ref": None, "value": None, "missing": "length byte = 0"},
+        "prog_txt": {"dtype": "C*n", "ref": None, "value": None, "missing": "length byte = 0"},
+        "rslt_txt": {"dtype": "C*n", "ref": None, "value": None, "missing": "length byte = 0"},
+        "z_val": {"dtype": "U*1", "ref": None, "value": None, "missing": None},
+        "fmu_flg": {"dtype": "B*1", "ref": None, "value": None, "missing": None},
+        "mask_map": {"dtype": "D*n", "ref": None, "value": None, "missing": "length byte = 0"},
+        "fal_map": {"dtype": "D*n", "ref": None, "value": None, "missing": "length byte = 0"},
+        "cyc_cnt": {"dtype": "U*8", "ref": None, "value": None, "missing": None},
+        "totf_cnt": {"dtype": "U*4", "ref": None, "value": None, "missing": None},
+        "totl_cnt": {"dtype": "U*4", "ref": None, "value": None, "missing": None},
+        "cyc_base": {"dtype": "U*8", "ref": None, "value": None, "missing": None},
+        "bit_base": {"dtype": "U*4", "ref": None, "value": None, "missing": None},
+        "cond_cnt": {"dtype": "U*2", "ref": None, "value": None, "missing": None},
+        "lim_cnt": {"dtype": "U*2", "ref": None, "value": None, "missing": None},
+        "cyc_size": {"dtype": "U*1", "ref": None, "value": None, "missing": None},
+        "pmr_size": {"dtype": "U*1", "ref": None, "value": None, "missing": None},
+        "chn_size": {"dtype": "U*1", "ref": None, "value": None, "missing": None},
+        "pat_size": {"dtype": "U*1", "ref": None, "value": None, "missing": None},
+        "bit_size": {"dtype": "U*1", "ref": None, "value": None, "missing": None},
+        "u1_size": {"dtype": "U*1", "ref": None, "value": None, "missing": None},
+        "u2_size": {"dtype": "U*1", "ref": None, "value": None, "missing": None},
+        "u3_size": {"dtype": "U*1", "ref": None, "value": None, "missing": None},
+        "utx_size": {"dtype": "U*1", "ref": None, "value": None, "missing": None},
+        "cap_bgn": {"dtype": "U*2", "ref": None, "value": None, "missing": None},
+        "lim_indx": {"dtype": "kxU*2", "ref": "lim_cnt", "value": None, "missing": None},
+        "lim_spec": {"dtype": "kxU*4", "ref": "lim_cnt", "value": None, "missing": None},
+        "cond_lst": {"dtype": "kxC*n", "ref": "cond_cnt", "value": None, "missing": None},
+        "cyco_cnt": {"dtype": "U*2", "ref": None, "value": None, "missing": None},
+        "cyc_ofst": {"dtype": "kxU*f", "ref": "cyco_cnt", "value": None, "missing": None, "size": "cyc_size"},
+        "pmr_cnt": {"dtype": "U*2", "ref": None, "value": None, "missing": None},
+        "pmr_indx": {"dtype": "kxU*f", "ref": "pmr_cnt", "value": None, "missing": None, "size": "pmr_size"},
+        "chn_cnt": {"dtype": "U*2", "ref": None, "value": None, "missing": None},
+        "chn_num": {"dtype": "kxU*f", "ref": "chn_cnt", "value": None, "missing": None, "size": "chn_size"},
+        "exp_cnt": {"dtype": "U*2", "ref": None, "value": None, "missing": None},
+        "exp_data": {"dtype": "kxU*1", "ref": "exp_cnt", "value": None, "missing": None},
+        "cap_cnt": {"dtype": "U*2", "ref": None, "value": None, "missing": None},
+        "cap_data": {"dtype": "kxU*1", "ref": "cap_cnt", "value": None, "missing": None},
+        "new_cnt": {"dtype": "U*2", "ref": None, "value": None, "missing": None},
+        "new_data": {"dtype": "kxU*1", "ref": "new_cnt", "value": None, "missing": None},
+        "pat_cnt": {"dtype": "U*2", "ref": None, "value": None, "missing": None},
+        "pat_num": {"dtype": "kxU*f", "ref": "pat_cnt", "value": None, "missing": None, "size": "pat_size"},
+        "bpos_cnt": {"dtype": "U*2", "ref": None, "value": None, "missing": None},
+        "bit_pos": {"dtype": "kxU*f", "ref": "bpos_cnt", "value": None, "missing": None, "size": "bit_size"},
+        "usr1_cnt": {"dtype": "U*2", "ref": None, "value": None, "missing": None},
+        "usr1": {"dtype": "kxU*f", "ref": "usr1_cnt", "value": None, "missing": None, "size": "u1_size"},
+        "usr2_cnt": {"dtype": "U*2", "ref": None, "value": None, "missing": None},
+        "usr2": {"dtype": "kxU*f", "ref": "usr2_cnt", "value": None, "missing": None, "size": "u2_size"},
+        "usr3_cnt": {"dtype": "U*2", "ref": None, "value": None, "missing": None},
+        "usr3": {"dtype": "kxU*f", "ref": "usr3_cnt", "value": None, "missing": None, "size": "u3_size"},
+        "txt_cnt": {"dtype": "U*2", "ref": None, "value": None, "missing": None},
+        "user_txt": {"dtype": "kxC*f", "ref": "txt_cnt", "value": None, "missing": None, "size": "utx_size"}
     }
-}
\ No newline at end of file
+}
@@ -5,6 +5,13 @@ import logging
 
 logger = logging.getLogger(__name__)
 
+# NumPy item types of the numeric kx arrays (V4-2007 records), decoded in bulk
+BULK_ARRAY_TYPES = {'kxU*1': 'u1', 'kxU*2': 'u2', 'kxU*4': 'u4', 'kxU*8': 'u8'}
+# Item sizes a kxU*f array may have
+FIELD_SIZE_TYPES = {1: 'u1', 2: 'u2', 4: 'u4', 8: 'u8'}
+# Array dtypes whose item size is given by another field (the template's "size")
+SIZED_ARRAY_DTYPES = frozenset(('kxU*f', 'kxC*f'))
+
 def unpack_C1(data, endianness, offset):
     result = struct.unpack(endianness + 's', data[offset:offset + 1])[0]
     if result == b'\x00':
@@ -59,6 +66,10 @@ def unpack_U4(data, endianness, offset):
     return struct.unpack(endianness + 'I', data[offset:offset + 4])[0], offset + 4
 
 
+def unpack_U8(data, endianness, offset):
+    return struct.unpack(endianness + 'Q', data[offset:offset + 8])[0], offset + 8
+
+
 def unpack_I1(data, endianness, offset):
     return struct.unpack(endianness + 'b', data[offset:offset + 1])[0], offset + 1
 
@@ -155,6 +166,12 @@ def unpack_Dn(data, endianness, offset, is_array):
         return hex_to_tuple(value), offset
 
 
+def unpack_Sn(data, endianness, offset):
+    """Unpack a string with a U*2 length (V4-2007)."""
+    byte_count, offset = unpack_U2(data, endianness, offset)
+    return bytes(data[offset:offset + byte_count]).decode(errors='replace'), offset + byte_count
+
+
 def unpack_N1(data, endianness, offset):
     return hex(struct.unpack(endianness + 'B', data[offset:offset + 1])[0] & 0x0F)[2:].upper(), offset + 1  # extract only the lower nibble
 
@@ -210,6 +227,45 @@ def unpack_xN1(data, endianness, offset, array_size):
     return tuple(new_list), offset
 
 
+def unpack_kx_bulk(data, endianness, offset, array_size, item_type):
+    """
+    Decode a numeric array in one NumPy call instead of per element.
+
+    The values are copied into a native-order array, so they do not keep the
+    record buffer alive.
+    """
+    import numpy as np
+
+    dtype = np.dtype(endianness + item_type)
+    values = np.frombuffer(data, dtype=dtype, count=array_size, offset=offset)
+    return values.astype(dtype.newbyteorder('=')), offset + dtype.itemsize * array_size
+
+
+def unpack_kxUf(data, endianness, offset, array_size, item_size):
+    if not array_size:
+        return unpack_kx_bulk(data, endianness, offset, 0, 'u1')
+    if item_size not in FIELD_SIZE_TYPES:
+        raise ValueError(f"Invalid item size {item_size} of a kxU*f array")
+    return unpack_kx_bulk(data, endianness, offset, array_size, FIELD_SIZE_TYPES[item_size])
+
+
+def unpack_kxCf(data, endianness, offset, array_size, item_size):
+    """Unpack an array of fixed-length strings of item_size bytes each."""
+    item_size = item_size or 0
+    raw = bytes(data[offset:offset + array_size * item_size])
+    values = tuple(raw[start:start + item_size].decode(errors='replace')
+                   for start in range(0, len(raw), item_size)) if item_size else ('',) * array_size
+    return values, offset + array_size * item_size
+
+
+def unpack_kxSn(data, endianness, offset, array_size):
+    new_list = []
+    for _ in range(array_size):
+        temp, offset = unpack_Sn(data, endianness, offset)
+        new_list.append(temp)
+    return tuple(new_list), offset
+
+
 def hex_to_tuple(hex_value):
     new_list = []
     for byte_index, byte_value in enumerate(bytes.fromhex(hex_value)):
@@ -223,6 +279,9 @@ def unpack_dtype(dtype, data, endianness, offset, **kwargs):
     array_size = kwargs.get("array_size", 0)
     is_array = kwargs.get("is_array", True)
 
+    if dtype in BULK_ARRAY_TYPES:
+        return unpack_kx_bulk(data, endianness, offset, array_size, BULK_ARRAY_TYPES[dtype])
+
     match dtype:
         case "C*1":
             return unpack_C1(data, endianness, offset)
@@ -239,6 +298,9 @@ def unpack_dtype(dtype, data, endianness, offset, **kwargs):
         case "U*4":
             return unpack_U4(data, endianness, offset)
 
+        case "U*8":
+            return unpack_U8(data, endianness, offset)
+
         case "I*1":
             return unpack_I1(data, endianness, offset)
 
@@ -290,6 +352,21 @@ def unpack_dtype(dtype, data, endianness, offset, **kwargs):
         case "xN*1":
             return unpack_xN1(data, endianness, offset, array_size)
 
+        case "S*n":
+            return unpack_Sn(data, endianness, offset)
+
+        case "kxU*f":
+            return unpack_kxUf(data, endianness, offset, array_size, kwargs.get("item_size"))
+
+        case "kxC*n":
+            return unpack_xCn(data, endianness, offset, array_size)
+
+        case "kxC*f":
+            return unpack_kxCf(data, endianness, offset, array_size, kwargs.get("item_size"))
+
+        case "kxS*n":
+            return unpack_kxSn(data, endianness, offset, array_size)
+
         case _:
             message = f"Invalid data type: {dtype}"
             logger.error(message)
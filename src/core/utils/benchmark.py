@@ -0,0 +1,259 @@
+# src/core/utils/benchmark.py
+"""
+End-to-end benchmark on a synthetic corpus, with regression checks against a baseline.
+
+    python -m src.core.utils.benchmark run --output bench.json [--parts 2000 --tests 100 --files 4]
+    python -m src.core.utils.benchmark compare bench.json baseline.json [--tolerance 0.1]
+
+run generates a corpus with src.core.utils.synthetic and measures, in this
+process, the throughput (records/s and MB/s of STDF input) of each stage:
+header scan, decode (handle_stdf_entry), ATDF mapping (handle_atdf_entry),
+ATDF writing and database load. It then times a full ATDF + database
+conversion in a fresh interpreter for its peak RSS, the conversion of the
+multi-file corpus with 1..N workers, and the startup time. compare exits
+non-zero when a metric is worse than the baseline by more than the tolerance.
+"""
+import argparse
+import json
+import os
+import platform
+import subprocess
+import sys
+import tempfile
+import time
+from pathlib import Path
+from typing import Dict, List, Optional
+
+from .files import get_file_handle
+from .setup import determine_file_params, initialize_record_entries
+from .startup import PROJECT_ROOT, measure_startup
+from .synthetic import generate_stdf
+from .templates import create_stdf_mapping, get_atdf_template, get_stdf_template
+from src.core.atdf.handler import handle_atdf_entry, write_atdf_file
+from src.core.stdf.handler import handle_stdf_entry
+from src.core.stdf.reader import HEADER_SIZE, iter_raw_records
+
+BENCHMARK_VERSION = 1
+# Relative change of a metric beyond which compare reports a regression
+DEFAULT_TOLERANCE = 0.10
+
+
+def stage_result(seconds: float, records: int, input_bytes: int) -> dict:
+    return {
+        'seconds': seconds,
+        'records': records,
+        'bytes': input_bytes,
+        'records_per_s': records / seconds if seconds else None,
+        'mb_per_s': input_bytes / seconds / 1e6 if seconds else None,
+    }
+
+
+def benchmark_stages(stdf_path: str, directory: str) -> Dict[str, dict]:
+    """Time each conversion stage over every record of stdf_path, in this process."""
+    stdf_mapping = create_stdf_mapping()
+
+    start = time.perf_counter()
+    records = 0
+    input_bytes = 0
+    with get_file_handle(stdf_path, 'rb') as stdf_file:
+        endianness = determine_file_params(stdf_file)['endianness']
+        for _, _, data in iter_raw_records(stdf_file, endianness):
+            records += 1
+            input_bytes += HEADER_SIZE + len(data)
+    stages = {'scan': stage_result(time.perf_counter() - start, records, input_bytes)}
+
+    # Decoding and mapping share the templates, so they are timed record by record in one pass
+    timings = {'decode': 0.0, 'map': 0.0, 'write': 0.0}
+    atdf_processed_entries = initialize_record_entries()
+    clock = time.perf_counter
+    with get_file_handle(stdf_path, 'rb') as stdf_file, \
+            open(os.path.join(directory, 'benchmark.atdf'), 'w') as atdf_file:
+        endianness = determine_file_params(stdf_file)['endianness']
+        for rec_typ, rec_sub, data in iter_raw_records(stdf_file, endianness):
+            if (rec_typ, rec_sub) not in stdf_mapping:
+                continue
+            t0 = clock()
+            stdf_template = get_stdf_template(stdf_mapping, rec_typ, rec_sub)
+            if data:
+                handle_stdf_entry(stdf_template, data, endianness)
+            t1 = clock()
+            atdf_template = get_atdf_template(stdf_template['record_type'])
+            atdf_processed_entry = handle_atdf_entry(atdf_template, stdf_template)
+            atdf_processed_entries[stdf_template['record_type']].append(atdf_processed_entry)
+            t2 = clock()
+            write_atdf_file(atdf_file, atdf_processed_entry, atdf_template)
+            t3 = clock()
+            timings['decode'] += t1 - t0
+            timings['map'] += t2 - t1
+            timings['write'] += t3 - t2
+    for stage, seconds in timings.items():
+        stages[stage] = stage_result(seconds, records, input_bytes)
+
+    from .database import create_database_from_atdf
+    start = time.perf_counter()
+    create_database_from_atdf(os.path.join(directory, 'benchmark.db'), atdf_processed_entries)
+    stages['database'] = stage_result(time.perf_counter() - start, records, input_bytes)
+    return stages
+
+
+def run_measured(command: List[str], directory: str) -> dict:
+    """Run a command in a fresh interpreter; wall time and the peak RSS of that process."""
+    env = dict(os.environ, PYTHONPATH=str(PROJECT_ROOT))
+    start = time.perf_counter()
+    process = subprocess.Popen(command, cwd=directory, env=env, stdout=subprocess.DEVNULL,
+                               stderr=subprocess.DEVNULL)
+    _, status, usage = os.wait4(process.pid, 0)
+    seconds = time.perf_counter() - start
+    process.returncode = os.waitstatus_to_exitcode(status)
+    if process.returncode:
+        raise RuntimeError(f"{' '.join(command)} failed with exit code {process.returncode}")
+    # ru_maxrss is in kilobytes on Linux and in bytes on macOS
+    peak_rss = usage.ru_maxrss * (1 if sys.platform == 'darwin' else 1024)
+    return {'seconds': seconds, 'peak_rss_mb': peak_rss / 1e6}
+
+
+def benchmark_end_to_end(stdf_path: str, records: int, directory: str) -> dict:
+    result = run_measured([sys.executable, '-m', 'src', stdf_path, '--output', '--database'], directory)
+    size = os.path.getsize(stdf_path)
+    result.update(records_per_s=records / result['seconds'], mb_per_s=size / result['seconds'] / 1e6)
+    return result
+
+
+def benchmark_scaling(corpus: Path, records: int, max_workers: int, directory: str) -> List[dict]:
+    """Convert the whole corpus directory to ATDF with 1..max_workers workers."""
+    results = []
+    for workers in range(1, max_workers + 1):
+        result = run_measured([sys.executable, '-m', 'src', str(corpus), '--output', '--workers', str(workers)],
+                              directory)
+        result.update(workers=workers, records_per_s=records / result['seconds'])
+        result['speedup'] = results[0]['seconds'] / result['seconds'] if results else 1.0
+        results.append(result)
+    return results
+
+
+def run_benchmark(parts: int = 2000, tests: int = 100, sites: int = 4, files: int = 4,
+                  max_workers: Optional[int] = None, seed: int = 0, startup_repeat: int = 3) -> dict:
+    """Generate a corpus in a temporary directory and run every benchmark on it."""
+    max_workers = max_workers or min(files, os.cpu_count() or 1)
+    with tempfile.TemporaryDirectory() as directory:
+        corpus = Path(directory) / 'corpus'
+        corpus.mkdir()
+        paths = [str(corpus / f"lot{index}.stdf") for index in range(files)]
+        counts = [generate_stdf(path, parts_per_wafer=parts, sites=sites, tests=tests, seed=seed + index)
+                  for index, path in enumerate(paths)]
+        records = sum(counts[0].values())
+
+        single = Path(directory) / 'single'
+        single.mkdir()
+        stages = benchmark_stages(paths[0], str(single))
+        end_to_end = benchmark_end_to_end(paths[0], records, str(single))
+        scaling = benchmark_scaling(corpus, sum(sum(c.values()) for c in counts), max_workers, directory)
+
+    return {
+        'version': BENCHMARK_VERSION,
+        'created': time.strftime('%Y-%m-%dT%H:%M:%S'),
+        'python': platform.python_version(),
+        'platform': platform.platform(),
+        'cpu_count': os.cpu_count(),
+        'corpus': {'parts': parts, 'tests': tests, 'sites': sites, 'files': files, 'seed': seed,
+                   'records_per_file': records, 'bytes_per_file': stages['scan']['bytes']},
+        'stages': stages,
+        'end_to_end': end_to_end,
+        'scaling': scaling,
+        'startup': measure_startup(startup_repeat) if startup_repeat else {},
+    }
+
+
+def flatten_metrics(results: dict) -> Dict[str, tuple]:
+    """Comparable metrics as {name: (value, higher_is_better)}."""
+    metrics = {}
+    for stage, result in results.get('stages', {}).items():
+        metrics[f"stages.{stage}.records_per_s"] = (result['records_per_s'], True)
+        metrics[f"stages.{stage}.mb_per_s"] = (result['mb_per_s'], True)
+    end_to_end = results.get('end_to_end', {})
+    for name, higher_is_better in (('seconds', False), ('peak_rss_mb', False), ('records_per_s', True)):
+        if name in end_to_end:
+            metrics[f"end_to_end.{name}"] = (end_to_end[name], higher_is_better)
+    for result in results.get('scaling', []):
+        metrics[f"scaling.workers_{result['workers']}.records_per_s"] = (result['records_per_s'], True)
+    for name, seconds in results.get('startup', {}).items():
+        metrics[f"startup.{name}"] = (seconds, False)
+    return metrics
+
+
+def compare_results(current: dict, baseline: dict, tolerance: float = DEFAULT_TOLERANCE) -> List[dict]:
+    """Metrics present in both results, each with its relative change and whether it regressed."""
+    if current.get('corpus') != baseline.get('corpus'):
+        print("Warning: the corpus differs from the baseline's; the comparison may not be meaningful",
+              file=sys.stderr)
+    current_metrics = flatten_metrics(current)
+    comparison = []
+    for name, (baseline_value, higher_is_better) in flatten_metrics(baseline).items():
+        if name not in current_metrics or not baseline_value or current_metrics[name][0] is None:
+            continue
+        value = current_metrics[name][0]
+        change = (value - baseline_value) / baseline_value
+        worse = -change if higher_is_better else change
+        comparison.append({'metric': name, 'baseline': baseline_value, 'current': value, 'change': change,
+                           'regression': worse > tolerance})
+    return comparison
+
+
+def print_results(results: dict) -> None:
+    print(f"{'stage':<10} {'records/s':>12} {'MB/s':>9} {'seconds':>9}")
+    for stage, result in results['stages'].items():
+        print(f"{stage:<10} {result['records_per_s']:>12,.0f} {result['mb_per_s']:>9.2f} {result['seconds']:>9.3f}")
+    end_to_end = results['end_to_end']
+    print(f"end-to-end {end_to_end['records_per_s']:>12,.0f} {end_to_end['mb_per_s']:>9.2f} "
+          f"{end_to_end['seconds']:>9.3f}  peak RSS {end_to_end['peak_rss_mb']:.1f} MB")
+    for result in results['scaling']:
+        print(f"workers={result['workers']:<3} {result['records_per_s']:>12,.0f} records/s  "
+              f"speedup {result['speedup']:.2f}x")
+    for name, seconds in results['startup'].items():
+        print(f"startup {name:<14} {seconds * 1000:7.1f} ms")
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description='Benchmark the converter and compare against a baseline')
+    commands = parser.add_subparsers(dest='command', required=True)
+    run = commands.add_parser('run', help='Run the benchmark on a generated corpus')
+    run.add_argument('--output', '-o', default='benchmark.json', help='Results file (default: benchmark.json)')
+    run.add_argument('--parts', type=int, default=2000, help='Parts per file (default: 2000)')
+    run.add_argument('--tests', type=int, default=100, help='Tests per part (default: 100)')
+    run.add_argument('--sites', type=int, default=4, help='Sites (default: 4)')
+    run.add_argument('--files', type=int, default=4, help='Files of the scaling corpus (default: 4)')
+    run.add_argument('--workers', type=int, default=None,
+                     help='Largest worker count of the scaling run (default: min(files, CPUs))')
+    run.add_argument('--seed', type=int, default=0, help='Corpus seed (default: 0)')
+    run.add_argument('--startup-repeat', type=int, default=3, help='Runs per startup measurement, 0 to skip (default: 3)')
+    compare = commands.add_parser('compare', help='Compare results against a baseline')
+    compare.add_argument('current', help='Results of run')
+    compare.add_argument('baseline', help='Baseline results')
+    compare.add_argument('--tolerance', type=float, default=DEFAULT_TOLERANCE,
+                         help='Relative slowdown reported as a regression (default: 0.1)')
+    args = parser.parse_args()
+
+    if args.command == 'run':
+        results = run_benchmark(parts=args.parts, tests=args.tests, sites=args.sites, files=args.files,
+                                max_workers=args.workers, seed=args.seed, startup_repeat=args.startup_repeat)
+        with open(args.output, 'w') as f:
+            json.dump(results, f, indent=2)
+        print_results(results)
+        print(f"Results written to {args.output}")
+        return 0
+
+    with open(args.current) as f:
+        current = json.load(f)
+    with open(args.baseline) as f:
+        baseline = json.load(f)
+    comparison = compare_results(current, baseline, args.tolerance)
+    for row in comparison:
+        flag = 'REGRESSION' if row['regression'] else ''
+        print(f"{row['metric']:<40} {row['baseline']:>14.4g} {row['current']:>14.4g} {row['change']:>+8.1%}  {flag}")
+    regressions = sum(row['regression'] for row in comparison)
+    print(f"{regressions} regression(s) beyond {args.tolerance:.0%}")
+    return 1 if regressions else 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,115 @@
+# src/core/utils/checkpoint.py
+"""Checkpoints for resuming long single-file conversions."""
+import json
+import logging
+import os
+from pathlib import Path
+from typing import Optional
+
+from .manifest import fingerprint_file, options_key
+
+logger = logging.getLogger(__name__)
+
+CHECKPOINT_VERSION = 1
+# Input bytes converted between two checkpoints
+CHECKPOINT_INTERVAL = 64 * 1024 * 1024
+# Record types whose latest ATDF entries are carried over into a resumed result
+CONTEXT_RECORDS = ('FAR', 'ATR', 'MIR', 'RDR', 'SDR', 'PMR', 'PGR', 'PLR', 'WCR')
+
+PIR_KEY = (5, 10)
+PRR_KEY = (5, 20)
+
+
+def checkpoint_path(input_file: str) -> str:
+    return f"{input_file}.ckpt.json"
+
+
+class ConversionCheckpoint:
+    """
+    Periodic checkpoint of a conversion, taken at part boundaries.
+
+    A checkpoint is only taken when no part is open on any head/site, so the
+    converter state to carry over reduces to the header records (MIR, PMR
+    map, current WIR, ...) and the output positions. The file is replaced
+    atomically and tied to the input fingerprint and the conversion options.
+    """
+
+    def __init__(self, path: str, input_file: str, options: dict, interval: int = CHECKPOINT_INTERVAL):
+        self.path = Path(path)
+        self.interval = interval
+        size = os.path.getsize(input_file)
+        self.identity = {
+            'input': str(input_file),
+            'size': size,
+            'fingerprint': fingerprint_file(Path(input_file), size),
+            'options': options_key(options),
+        }
+        self.open_parts = set()
+        self.record_counts = {}
+        self.last_offset = 0
+
+    def load(self) -> Optional[dict]:
+        """Return the saved state, or None when there is no usable checkpoint."""
+        if not self.path.exists():
+            logger.info(f"No checkpoint at {self.path}, converting from the start")
+            return None
+        with open(self.path) as f:
+            state = json.load(f)
+        if state.get('version') != CHECKPOINT_VERSION or state.get('identity') != self.identity:
+            logger.warning(f"Checkpoint {self.path} belongs to another input or other options, ignoring it")
+            return None
+
+        self.record_counts = dict(state['record_counts'])
+        self.last_offset = state['input_offset']
+        return state
+
+    def track(self, rec_typ: int, rec_sub: int, record_type: str, data: bytes) -> bool:
+        """Count a record; True when it closed the last open part (a checkpoint boundary)."""
+        self.record_counts[record_type] = self.record_counts.get(record_type, 0) + 1
+        key = (rec_typ, rec_sub)
+        if key == PIR_KEY and len(data) >= 2:
+            self.open_parts.add((data[0], data[1]))
+        elif key == PRR_KEY and len(data) >= 2:
+            self.open_parts.discard((data[0], data[1]))
+            return not self.open_parts
+        return False
+
+    def due(self, input_offset: int) -> bool:
+        return input_offset - self.last_offset >= self.interval
+
+    def save(self, input_offset: int, state: dict) -> None:
+        state = {
+            'version': CHECKPOINT_VERSION,
+            'identity': self.identity,
+            'input_offset': input_offset,
+            'record_counts': self.record_counts,
+            **state,
+        }
+        temporary = self.path.with_name(self.path.name + '.tmp')
+        with open(temporary, 'w') as f:
+            json.dump(state, f, default=str)
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(temporary, self.path)
+        self.last_offset = input_offset
+        logger.info(f"Checkpoint at input offset {input_offset} written to {self.path}")
+
+    def remove(self) -> None:
+        if self.path.exists():
+            self.path.unlink()
+
+
+def context_entries(atdf_processed_entries: dict, record_counts: dict) -> dict:
+    """ATDF header entries to carry into a resumed run: the CONTEXT_RECORDS and the open wafer's WIR."""
+    context = {record_type: list(atdf_processed_entries[record_type])
+               for record_type in CONTEXT_RECORDS if atdf_processed_entries.get(record_type)}
+    if record_counts.get('WIR', 0) > record_counts.get('WRR', 0) and atdf_processed_entries.get('WIR'):
+        context['WIR'] = [atdf_processed_entries['WIR'][-1]]
+    return context
+
+
+def sync_text_file(text_file) -> int:
+    """Flush and fsync an output file; return its size in bytes."""
+    text_file.flush()
+    os.fsync(text_file.fileno())
+    return os.fstat(text_file.fileno()).st_size
@@ -0,0 +1,434 @@
+# src/core/utils/colstore.py
+"""
+Columnar output: one directory per STDF file with a memory-mappable .npy file per column.
+
+Layout:
+    <store>/schema.json                 record counts and column descriptions
+    <store>/.partial                    present while the store is being written
+    <store>/<REC>/<field>.npy           numeric column (one value per record)
+    <store>/<REC>/<field>.valid.npy     validity mask, only if the column has missing values
+    <store>/<REC>/<field>.npy           string column: int32 codes, -1 for missing
+    <store>/<REC>/<field>.categories.json   string dictionary for the codes
+    <store>/<REC>/<field>.npy           array column: flat values
+    <store>/<REC>/<field>.offsets.npy   array column: int64 row offsets into the values (count + 1)
+
+Columns are appended incrementally while converting; the .npy headers are
+rewritten with the final shape when the store is closed. A writer can be
+checkpointed (buffers flushed and synced, lengths returned) and later
+reopened from that state, truncating anything appended after it.
+"""
+import json
+import logging
+import os
+import shutil
+from pathlib import Path
+from typing import Dict, List, Optional
+
+import numpy as np
+
+from .columnar import column_kind, numpy_dtype, nullable_integer_dtype, record_columns, to_column_value
+
+logger = logging.getLogger(__name__)
+
+SCHEMA_FILE = 'schema.json'
+# Marks a store still being written (or interrupted), so a later run may replace it
+PARTIAL_FILE = '.partial'
+SCHEMA_VERSION = 1
+# Rows buffered per column before being appended to disk
+FLUSH_ROWS = 65536
+
+
+class NpyAppender:
+    """
+    Append-only writer for a one-dimensional .npy file.
+
+    With length given, an existing file is reopened and truncated to its first
+    length values instead (resuming from a checkpoint).
+    """
+
+    def __init__(self, path: Path, dtype: str, length: Optional[int] = None):
+        self.path = path
+        self.dtype = np.dtype(dtype)
+        if length is None:
+            self.length = 0
+            self._file = open(path, 'wb')
+            self._header_size = self._write_header()
+            return
+
+        self.length = length
+        self._file = open(path, 'r+b')
+        np.lib.format.read_magic(self._file)
+        np.lib.format.read_array_header_1_0(self._file)
+        self._header_size = self._file.tell()
+        self._file.truncate(self._header_size + length * self.dtype.itemsize)
+        self._file.seek(0, os.SEEK_END)
+
+    def _write_header(self) -> int:
+        self._file.seek(0)
+        np.lib.format.write_array_header_1_0(self._file, {
+            'descr': np.lib.format.dtype_to_descr(self.dtype),
+            'fortran_order': False,
+            'shape': (self.length,),
+        })
+        return self._file.tell()
+
+    def append(self, values: np.ndarray) -> None:
+        values = np.ascontiguousarray(values, dtype=self.dtype)
+        values.tofile(self._file)
+        self.length += len(values)
+
+    def sync(self) -> None:
+        self._file.flush()
+        os.fsync(self._file.fileno())
+
+    def close(self) -> None:
+        end = self._file.tell()
+        # NumPy pads the header so the shape can grow without changing its size
+        if self._write_header() != self._header_size:
+            raise ValueError(f"Header size changed while finalizing {self.path}")
+        self._file.seek(end)
+        self._file.close()
+
+
+class NumericColumnWriter:
+    def __init__(self, directory: Path, field: str, stdf_dtype: str, state: Optional[dict] = None):
+        self.directory = directory
+        self.field = field
+        self.dtype = numpy_dtype(stdf_dtype)
+        self.values = NpyAppender(directory / f"{field}.npy", self.dtype, state and state['length'])
+        self.valid = None
+        self._buffer = []
+        self._has_missing = False
+
+        if state is not None:
+            valid_path = directory / f"{field}.valid.npy"
+            if state['valid'] is not None:
+                self.valid = NpyAppender(valid_path, 'bool', state['valid'])
+            elif valid_path.exists():
+                valid_path.unlink()
+
+    def append(self, value) -> None:
+        if value is None:
+            self._has_missing = True
+        self._buffer.append(value)
+        if len(self._buffer) >= FLUSH_ROWS:
+            self.flush()
+
+    def flush(self) -> None:
+        if not self._buffer:
+            return
+        buffer = self._buffer
+        self._buffer = []
+        if not self._has_missing:
+            self.values.append(np.array(buffer, dtype=self.dtype))
+            if self.valid is not None:
+                self.valid.append(np.ones(len(buffer), dtype=bool))
+            return
+
+        self._has_missing = False
+        valid = np.array([value is not None for value in buffer], dtype=bool)
+        fill = np.nan if np.dtype(self.dtype).kind == 'f' else 0
+        self.values.append(np.array([fill if value is None else value for value in buffer], dtype=self.dtype))
+        if self.valid is None:
+            self.valid = NpyAppender(self.directory / f"{self.field}.valid.npy", 'bool')
+            self.valid.append(np.ones(self.values.length - len(buffer), dtype=bool))
+        self.valid.append(valid)
+
+    def checkpoint(self) -> dict:
+        self.flush()
+        self.values.sync()
+        if self.valid is not None:
+            self.valid.sync()
+        return {'length': self.values.length, 'valid': self.valid.length if self.valid is not None else None}
+
+    def close(self) -> dict:
+        self.flush()
+        self.values.close()
+        if self.valid is not None:
+            self.valid.close()
+        return {'nullable': self.valid is not None}
+
+
+class StringColumnWriter:
+    def __init__(self, directory: Path, field: str, state: Optional[dict] = None):
+        self.directory = directory
+        self.field = field
+        self.codes = NpyAppender(directory / f"{field}.npy", '<i4', state and state['length'])
+        self.categories = {}
+        self._buffer = []
+
+        if state is not None:
+            self.categories = {value: code for code, value in enumerate(state['categories'])}
+
+    def append(self, value) -> None:
+        if value is None:
+            code = -1
+        else:
+            code = self.categories.get(value)
+            if code is None:
+                code = self.categories[value] = len(self.categories)
+        self._buffer.append(code)
+        if len(self._buffer) >= FLUSH_ROWS:
+            self.flush()
+
+    def flush(self) -> None:
+        if self._buffer:
+            self.codes.append(np.array(self._buffer, dtype='<i4'))
+            self._buffer = []
+
+    def checkpoint(self) -> dict:
+        self.flush()
+        self.codes.sync()
+        return {'length': self.codes.length, 'categories': list(self.categories)}
+
+    def close(self) -> dict:
+        self.flush()
+        self.codes.close()
+        with open(self.directory / f"{self.field}.categories.json", 'w') as f:
+            json.dump(list(self.categories), f)
+        return {'categories': len(self.categories)}
+
+
+class ArrayColumnWriter:
+    def __init__(self, directory: Path, field: str, stdf_dtype: str, state: Optional[dict] = None):
+        self.dtype = numpy_dtype(stdf_dtype)
+        self.values = NpyAppender(directory / f"{field}.npy", self.dtype, state and state['length'])
+        self.offsets = NpyAppender(directory / f"{field}.offsets.npy", '<i8', state and state['offsets'])
+        if state is None:
+            self.offsets.append(np.zeros(1, dtype='<i8'))
+        self._values = []
+        # Blocks of values in row order: bulk-decoded NumPy arrays, and the items of tuples before them
+        self._blocks = []
+        self._offsets = []
+        self._end = self.values.length
+
+    def append(self, value) -> None:
+        if isinstance(value, np.ndarray):
+            if self._values:
+                self._blocks.append(np.array(self._values, dtype=self.dtype))
+                self._values = []
+            self._blocks.append(value)
+            self._end += len(value)
+        elif value:
+            self._values.extend(value)
+            self._end += len(value)
+        self._offsets.append(self._end)
+        if len(self._offsets) >= FLUSH_ROWS:
+            self.flush()
+
+    def flush(self) -> None:
+        if self._offsets:
+            blocks = self._blocks + [np.array(self._values, dtype=self.dtype)]
+            self.values.append(np.concatenate(blocks).astype(self.dtype, copy=False))
+            self.offsets.append(np.array(self._offsets, dtype='<i8'))
+            self._values = []
+            self._blocks = []
+            self._offsets = []
+
+    def checkpoint(self) -> dict:
+        self.flush()
+        self.values.sync()
+        self.offsets.sync()
+        return {'length': self.values.length, 'offsets': self.offsets.length}
+
+    def close(self) -> dict:
+        self.flush()
+        self.values.close()
+        self.offsets.close()
+        return {}
+
+
+def create_column_writer(directory: Path, field: str, stdf_dtype: str, state: Optional[dict] = None):
+    kind = column_kind(stdf_dtype)
+    if kind == 'numeric':
+        return NumericColumnWriter(directory, field, stdf_dtype, state)
+    if kind == 'array':
+        return ArrayColumnWriter(directory, field, stdf_dtype, state)
+    return StringColumnWriter(directory, field, state)
+
+
+class RecordTypeWriter:
+    """Column writers for every payload field of one record type."""
+
+    def __init__(self, directory: Path, record_type: str, state: Optional[dict] = None):
+        directory.mkdir(parents=True, exist_ok=True)
+        self.record_type = record_type
+        self.count = state['count'] if state else 0
+        self.dtypes = record_columns(record_type)
+        self.writers = {
+            field: create_column_writer(directory, field, stdf_dtype, state and state['columns'][field])
+            for field, stdf_dtype in self.dtypes.items()
+        }
+
+    def append(self, stdf_processed_entry: dict) -> None:
+        for field, writer in self.writers.items():
+            writer.append(to_column_value(self.dtypes[field], stdf_processed_entry.get(field)))
+        self.count += 1
+
+    def checkpoint(self) -> dict:
+        return {'count': self.count,
+                'columns': {field: writer.checkpoint() for field, writer in self.writers.items()}}
+
+    def close(self) -> dict:
+        columns = {}
+        for field, writer in self.writers.items():
+            stdf_dtype = self.dtypes[field]
+            columns[field] = {'kind': column_kind(stdf_dtype), 'stdf_dtype': stdf_dtype,
+                              'dtype': numpy_dtype(stdf_dtype), **writer.close()}
+        return {'count': self.count, 'columns': columns}
+
+
+class ColumnStoreWriter:
+    """
+    Incrementally writes decoded STDF records into a column store directory.
+
+    Args:
+        state: A checkpoint() result; the partially written store in directory
+            is reopened and truncated to it instead of being replaced.
+    """
+
+    def __init__(self, directory: str, source: Optional[str] = None, state: Optional[dict] = None):
+        self.directory = Path(directory)
+        self.source = source
+        self.record_writers = {}
+        if state is None:
+            prepare_store_directory(self.directory)
+            return
+
+        for path in self.directory.iterdir():
+            # Record types first seen after the checkpoint
+            if path.is_dir() and path.name not in state['records']:
+                shutil.rmtree(path)
+        for record_type, record_state in state['records'].items():
+            self.record_writers[record_type] = RecordTypeWriter(
+                self.directory / record_type, record_type, record_state)
+
+    def append(self, record_type: str, stdf_processed_entry: dict) -> None:
+        writer = self.record_writers.get(record_type)
+        if writer is None:
+            writer = self.record_writers[record_type] = RecordTypeWriter(self.directory / record_type, record_type)
+        writer.append(stdf_processed_entry)
+
+    def checkpoint(self) -> dict:
+        """Flush and sync every column; the returned state can be passed back to resume."""
+        return {'records': {record_type: writer.checkpoint() for record_type, writer in self.record_writers.items()}}
+
+    def close(self) -> None:
+        schema = {
+            'version': SCHEMA_VERSION,
+            'source': self.source,
+            'records': {record_type: writer.close() for record_type, writer in self.record_writers.items()},
+        }
+        with open(self.directory / SCHEMA_FILE, 'w') as f:
+            json.dump(schema, f, indent=2)
+        (self.directory / PARTIAL_FILE).unlink(missing_ok=True)
+        logger.info(f"Wrote column store {self.directory} ({len(self.record_writers)} record types)")
+
+
+def prepare_store_directory(directory: Path) -> None:
+    """Create the store directory, replacing a previous or partial store but never unrelated content."""
+    if directory.exists():
+        if ((directory / SCHEMA_FILE).exists() or (directory / PARTIAL_FILE).exists()
+                or (directory.is_dir() and not any(directory.iterdir()))):
+            shutil.rmtree(directory)
+        else:
+            raise ValueError(f"{directory} exists and is not a column store")
+    directory.mkdir(parents=True)
+    (directory / PARTIAL_FILE).touch()
+
+
+class ColumnStore:
+    """Read-only access to a column store; numeric columns are memory-mapped."""
+
+    def __init__(self, directory: str):
+        self.directory = Path(directory)
+        schema_path = self.directory / SCHEMA_FILE
+        if not schema_path.exists():
+            raise ValueError(f"{directory} is not a column store (missing {SCHEMA_FILE})")
+        with open(schema_path) as f:
+            self.schema = json.load(f)
+
+    @property
+    def record_types(self) -> List[str]:
+        return list(self.schema['records'])
+
+    def count(self, record_type: str) -> int:
+        return self._record(record_type)['count']
+
+    def columns(self, record_type: str) -> Dict[str, dict]:
+        return self._record(record_type)['columns']
+
+    def _record(self, record_type: str) -> dict:
+        if record_type not in self.schema['records']:
+            raise KeyError(f"No {record_type} records in {self.directory}")
+        return self.schema['records'][record_type]
+
+    def _column_info(self, record_type: str, field: str) -> dict:
+        columns = self.columns(record_type)
+        if field not in columns:
+            raise KeyError(f"No column {field} for {record_type} in {self.directory}")
+        return columns[field]
+
+    def column(self, record_type: str, field: str) -> np.ndarray:
+        """Memory-mapped values (numeric), codes (string) or flat values (array) of a column."""
+        self._column_info(record_type, field)
+        return np.load(self.directory / record_type / f"{field}.npy", mmap_mode='r')
+
+    def valid(self, record_type: str, field: str) -> Optional[np.ndarray]:
+        """Validity mask of a numeric column, or None when no value is missing."""
+        if not self._column_info(record_type, field).get('nullable'):
+            return None
+        return np.load(self.directory / record_type / f"{field}.valid.npy", mmap_mode='r')
+
+    def categories(self, record_type: str, field: str) -> List[str]:
+        """Dictionary of a string column; codes index into this list."""
+        self._column_info(record_type, field)
+        with open(self.directory / record_type / f"{field}.categories.json") as f:
+            return json.load(f)
+
+    def strings(self, record_type: str, field: str) -> np.ndarray:
+        """Decode a string column into an object array (None where missing)."""
+        codes = np.asarray(self.column(record_type, field))
+        lookup = np.array(self.categories(record_type, field) + [None], dtype=object)
+        return lookup[codes]
+
+    def offsets(self, record_type: str, field: str) -> np.ndarray:
+        """Row offsets of an array column: row i spans values[offsets[i]:offsets[i + 1]]."""
+        self._column_info(record_type, field)
+        return np.load(self.directory / record_type / f"{field}.offsets.npy", mmap_mode='r')
+
+    def to_frame(self, record_type: str, fields: Optional[List[str]] = None, rows=None):
+        """Build a pandas DataFrame of the selected fields and rows (index array, slice or boolean mask)."""
+        import pandas as pd
+
+        data = {}
+        for field in fields or list(self.columns(record_type)):
+            info = self._column_info(record_type, field)
+            if info['kind'] == 'numeric':
+                values = self.column(record_type, field)
+                values = np.asarray(values if rows is None else values[rows])
+                valid = self.valid(record_type, field)
+                if valid is not None:
+                    valid = np.asarray(valid if rows is None else valid[rows])
+                    if values.dtype.kind == 'f':
+                        values = np.where(valid, values, np.nan)
+                    else:
+                        values = pd.array(values, dtype=nullable_integer_dtype(values.dtype))
+                        values[~valid] = pd.NA
+                data[field] = values
+            elif info['kind'] == 'string':
+                codes = np.asarray(self.column(record_type, field))
+                codes = codes if rows is None else codes[rows]
+                data[field] = pd.Categorical.from_codes(codes, categories=self.categories(record_type, field))
+            else:
+                values = self.column(record_type, field)
+                offsets = np.asarray(self.offsets(record_type, field))
+                row_index = np.arange(len(offsets) - 1)
+                row_index = row_index if rows is None else row_index[rows]
+                data[field] = [np.asarray(values[offsets[i]:offsets[i + 1]]) for i in row_index]
+        return pd.DataFrame(data)
+
+
+def open_column_store(directory: str) -> ColumnStore:
+    """Open a column store written by run_conversion(output_column_store=...)."""
+    return ColumnStore(directory)
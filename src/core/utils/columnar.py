@@ -0,0 +1,238 @@
+# src/core/utils/columnar.py
+"""Column layout of STDF records derived from the STDF template dtypes."""
+from array import array
+from typing import Any, Dict, List, Optional
+
+import numpy as np
+
+from src.core.stdf.templates import STDF_TEMPLATES
+
+# Scalar STDF dtypes stored as fixed-width numeric columns (B*1 flags as their byte value)
+NUMERIC_DTYPES = {
+    'U*1': 'u1',
+    'U*2': 'u2',
+    'U*4': 'u4',
+    'U*8': 'u8',
+    'I*1': 'i1',
+    'I*2': 'i2',
+    'I*4': 'i4',
+    'R*4': 'f4',
+    'R*8': 'f8',
+    'B*1': 'u1',
+}
+
+# Numeric array STDF dtypes stored as flat values plus per-row offsets
+ARRAY_DTYPES = {
+    'xU*1': 'u1',
+    'xU*2': 'u2',
+    'xR*4': 'f4',
+    'xN*1': 'u1',
+    # V4-2007 arrays, decoded as NumPy arrays; kxU*f items vary in width per record
+    'kxU*1': 'u1',
+    'kxU*2': 'u2',
+    'kxU*4': 'u4',
+    'kxU*8': 'u8',
+    'kxU*f': 'u8',
+}
+
+# Fields carried by every record header rather than the payload
+HEADER_FIELDS = ('rec_len', 'rec_typ', 'rec_sub')
+
+
+def column_kind(stdf_dtype: str) -> str:
+    """Return 'numeric', 'array' or 'string' for an STDF field dtype."""
+    if stdf_dtype in NUMERIC_DTYPES:
+        return 'numeric'
+    if stdf_dtype in ARRAY_DTYPES:
+        return 'array'
+    return 'string'
+
+
+def numpy_dtype(stdf_dtype: str) -> Optional[str]:
+    """Little-endian NumPy dtype string for numeric and array fields, None for strings."""
+    dtype = NUMERIC_DTYPES.get(stdf_dtype) or ARRAY_DTYPES.get(stdf_dtype)
+    return f"<{dtype}" if dtype else None
+
+
+def nullable_integer_dtype(dtype) -> str:
+    """Name of the pandas nullable integer dtype matching a NumPy integer dtype."""
+    dtype = np.dtype(dtype)
+    return f"{'UInt' if dtype.kind == 'u' else 'Int'}{dtype.itemsize * 8}"
+
+
+def record_columns(record_type: str, fields: Optional[List[str]] = None) -> Dict[str, str]:
+    """Payload fields of a record type mapped to their STDF dtypes, optionally restricted to fields."""
+    if record_type not in STDF_TEMPLATES:
+        raise ValueError(f"No template found for STDF record type {record_type}")
+
+    columns = {
+        field: info['dtype']
+        for field, info in STDF_TEMPLATES[record_type].items()
+        if field not in HEADER_FIELDS
+    }
+    if fields:
+        unknown = [field for field in fields if field not in columns]
+        if unknown:
+            raise ValueError(f"Unknown {record_type} fields: {', '.join(unknown)}")
+        columns = {field: columns[field] for field in fields}
+    return columns
+
+
+def to_column_value(stdf_dtype: str, value: Any) -> Any:
+    """Convert a decoded STDF value to the representation stored in its column."""
+    if value is None:
+        return None
+    if stdf_dtype == 'B*1':
+        return int(value, 2)
+    if stdf_dtype in ARRAY_DTYPES or stdf_dtype in NUMERIC_DTYPES:
+        return value
+    if isinstance(value, tuple):
+        return ','.join(map(str, value))
+    return str(value)
+
+
+# array module typecodes for the NumPy dtypes used by numeric columns
+TYPECODES = {'u1': 'B', 'u2': 'H', 'u4': 'I', 'u8': 'Q', 'i1': 'b', 'i2': 'h', 'i4': 'i', 'f4': 'f', 'f8': 'd'}
+
+
+def _typed_array(dtype: str) -> array:
+    return array(TYPECODES[dtype.lstrip('<')])
+
+
+def _to_numpy(values: array, dtype: str) -> np.ndarray:
+    return np.frombuffer(values, dtype=values.typecode).astype(dtype.lstrip('<'), copy=False)
+
+
+class NumericColumnBuilder:
+    """Numeric column accumulated in a compact array with a lazily created validity mask."""
+
+    def __init__(self, stdf_dtype: str):
+        self.dtype = numpy_dtype(stdf_dtype)
+        self.values = _typed_array(self.dtype)
+        self.valid = None
+        self._fill = float('nan') if self.dtype.endswith(('f4', 'f8')) else 0
+
+    def append(self, value) -> None:
+        if value is None:
+            if self.valid is None:
+                self.valid = bytearray(b'\x01') * len(self.values)
+            self.values.append(self._fill)
+            self.valid.append(0)
+            return
+        self.values.append(value)
+        if self.valid is not None:
+            self.valid.append(1)
+
+    def __len__(self) -> int:
+        return len(self.values)
+
+    def to_array(self):
+        values = _to_numpy(self.values, self.dtype)
+        if self.valid is None or values.dtype.kind == 'f':
+            return values
+
+        import pandas as pd
+
+        result = pd.array(values, dtype=nullable_integer_dtype(values.dtype))
+        result[np.frombuffer(self.valid, dtype=np.uint8) == 0] = pd.NA
+        return result
+
+
+class StringColumnBuilder:
+    """Dictionary-encoded string column; materializes as a pandas Categorical."""
+
+    def __init__(self):
+        self.codes = array('i')
+        self.categories = {}
+
+    def append(self, value) -> None:
+        if value is None:
+            self.codes.append(-1)
+            return
+        code = self.categories.get(value)
+        if code is None:
+            code = self.categories[value] = len(self.categories)
+        self.codes.append(code)
+
+    def __len__(self) -> int:
+        return len(self.codes)
+
+    def to_array(self):
+        import pandas as pd
+
+        return pd.Categorical.from_codes(np.frombuffer(self.codes, dtype=self.codes.typecode),
+                                         categories=list(self.categories))
+
+
+class ArrayColumnBuilder:
+    """Ragged numeric column stored as flat values plus row offsets."""
+
+    def __init__(self, stdf_dtype: str):
+        self.dtype = numpy_dtype(stdf_dtype)
+        self.values = _typed_array(self.dtype)
+        self.offsets = array('q', [0])
+
+    def append(self, value) -> None:
+        if isinstance(value, np.ndarray):
+            # Bulk-decoded arrays are copied as one block
+            self.values.frombytes(value.astype(self.values.typecode, copy=False).tobytes())
+        elif value:
+            self.values.extend(value)
+        self.offsets.append(len(self.values))
+
+    def __len__(self) -> int:
+        return len(self.offsets) - 1
+
+    def to_array(self):
+        values = _to_numpy(self.values, self.dtype)
+        offsets = np.frombuffer(self.offsets, dtype=self.offsets.typecode)
+        result = np.empty(len(self), dtype=object)
+        result[:] = np.split(values, offsets[1:-1]) if len(self) else []
+        return result
+
+
+def create_column_builder(stdf_dtype: str):
+    kind = column_kind(stdf_dtype)
+    if kind == 'numeric':
+        return NumericColumnBuilder(stdf_dtype)
+    if kind == 'array':
+        return ArrayColumnBuilder(stdf_dtype)
+    return StringColumnBuilder()
+
+
+class RecordColumnBuilder:
+    """
+    Accumulates decoded entries of one record type column by column.
+
+    Values go straight into typed arrays, so no per-row dicts are kept and
+    no type inference is needed when the DataFrame is built.
+    """
+
+    def __init__(self, record_type: str, fields: Optional[List[str]] = None):
+        self.record_type = record_type
+        self.dtypes = record_columns(record_type, fields)
+        self.builders = {field: create_column_builder(stdf_dtype) for field, stdf_dtype in self.dtypes.items()}
+        self.count = 0
+
+    @property
+    def last_field(self) -> Optional[str]:
+        """Last payload field that has to be decoded to fill every column."""
+        fields = list(record_columns(self.record_type))
+        return max(self.dtypes, key=fields.index) if self.dtypes else None
+
+    def append(self, stdf_processed_entry: dict) -> None:
+        for field, builder in self.builders.items():
+            builder.append(to_column_value(self.dtypes[field], stdf_processed_entry.get(field)))
+        self.count += 1
+
+    def __len__(self) -> int:
+        return self.count
+
+    def to_arrays(self) -> Dict[str, Any]:
+        """Columns as NumPy arrays, pandas nullable arrays (integers with missing values) or Categoricals."""
+        return {field: builder.to_array() for field, builder in self.builders.items()}
+
+    def to_frame(self):
+        import pandas as pd
+
+        return pd.DataFrame(self.to_arrays(), index=pd.RangeIndex(self.count))
@@ -0,0 +1,231 @@
+# src/core/utils/consolidated.py
+"""
+One SQLite database for a whole multi-file run, written by a single writer process.
+
+Workers transform their entries as for a per-file database and send the rows
+in batches over a bounded queue (send_to_database); the writer process
+(DatabaseWriter) owns the only connection and commits in large transactions.
+Every row carries the file_id of its input file, a stable key derived from
+its path: ingesting a file that is already present first deletes its rows,
+so re-running a lot replaces files instead of duplicating them.
+"""
+import hashlib
+import logging
+import os
+import queue
+import sqlite3
+import time
+from datetime import datetime
+from pathlib import Path
+from typing import Dict, List, Optional
+
+from .database import iter_table_chunks, session_ids
+
+logger = logging.getLogger(__name__)
+
+# Rows per message from a worker, messages the queue holds before workers block
+BATCH_ROWS = 5_000
+QUEUE_BATCHES = 32
+# Rows written before the writer commits; it also commits when the queue runs dry
+COMMIT_ROWS = 200_000
+IDLE_COMMIT_SECONDS = 1.0
+FILES_TABLE = 'files'
+
+
+def file_key(input_file: str) -> str:
+    """file_id of an input file: a short hash of its resolved path, the same on every run."""
+    return hashlib.sha1(str(Path(input_file).resolve()).encode()).hexdigest()[:16]
+
+
+def sql_value(value):
+    """Value as stored by sqlite3 (datetimes as text, like pandas writes them)."""
+    if value is None or isinstance(value, (int, float, str, bytes)):
+        return value
+    return str(value)
+
+
+def send_to_database(database_queue, input_file: str, atdf_processed_entries: Dict[str, List[Dict]],
+                     extra_tables: Optional[Dict[str, List[dict]]] = None) -> int:
+    """
+    Send the entries of one conversion to the writer, as one begin/rows.../end sequence.
+
+    extra_tables holds rows of tables built outside the record entries (parts,
+    test_statistics); they get the file's file_id. Each batch carries the
+    columns of all of its rows, which the writer adds to tables that lack
+    them. If sending fails midway,
+    the writer is told to drop what it received for the file.
+    """
+    file_id = file_key(input_file)
+    _, test_session_id = session_ids(atdf_processed_entries, file_id)
+    stat = os.stat(input_file)
+    database_queue.put(('begin', file_id, {'path': str(Path(input_file).resolve()), 'size': stat.st_size,
+                                           'mtime': stat.st_mtime}))
+    sent = 0
+    try:
+        for table_name, columns, chunk in iter_table_chunks(atdf_processed_entries, file_id, test_session_id,
+                                                            chunk_size=BATCH_ROWS):
+            database_queue.put(('rows', file_id, table_name, columns,
+                                [[sql_value(row.get(column)) for column in columns] for row in chunk]))
+            sent += len(chunk)
+        for table_name, rows in (extra_tables or {}).items():
+            if not rows:
+                continue
+            for start in range(0, len(rows), BATCH_ROWS):
+                batch = rows[start:start + BATCH_ROWS]
+                columns = list(dict.fromkeys(column for row in batch for column in row))
+                database_queue.put(('rows', file_id, table_name, ['file_id'] + columns,
+                                    [[file_id] + [sql_value(row.get(column)) for column in columns]
+                                     for row in batch]))
+            sent += len(rows)
+    except BaseException:
+        database_queue.put(('abort', file_id))
+        raise
+    database_queue.put(('end', file_id, sent))
+    return sent
+
+
+class ConsolidatedDatabase:
+    """
+    The writer side: the connection to the consolidated database and its schema.
+
+    Tables are created from the columns of their first batch, gain columns
+    when later batches bring new ones, and are indexed on file_id. The files
+    table records path, size, mtime, row count and status ('loading' until
+    every row of the file has been committed, then 'complete').
+    """
+
+    def __init__(self, path: str, commit_rows: int = COMMIT_ROWS):
+        self.connection = sqlite3.connect(path)
+        self.connection.execute('PRAGMA journal_mode=WAL')
+        self.connection.execute('PRAGMA synchronous=NORMAL')
+        self.connection.execute(f'CREATE TABLE IF NOT EXISTS "{FILES_TABLE}" (file_id TEXT PRIMARY KEY, path TEXT, '
+                                f'size INTEGER, mtime REAL, rows INTEGER, status TEXT, ingested_at TEXT)')
+        self.commit_rows = commit_rows
+        self.pending_rows = 0
+        self.tables = {}
+        for (name,) in self.connection.execute("SELECT name FROM sqlite_master WHERE type = 'table'"):
+            self.tables[name] = [row[1] for row in self.connection.execute(f'PRAGMA table_info("{name}")')]
+
+    def _ensure_table(self, table_name: str, columns: List[str]) -> None:
+        known = self.tables.get(table_name)
+        if known is None:
+            definition = ', '.join(f'"{column}"' for column in columns)
+            self.connection.execute(f'CREATE TABLE "{table_name}" ({definition})')
+            if 'file_id' in columns:
+                self.connection.execute(f'CREATE INDEX "ix_{table_name}_file_id" ON "{table_name}" (file_id)')
+            self.tables[table_name] = list(columns)
+            return
+        for column in columns:
+            if column not in known:
+                self.connection.execute(f'ALTER TABLE "{table_name}" ADD COLUMN "{column}"')
+                known.append(column)
+
+    def delete_file(self, file_id: str) -> None:
+        for table_name, columns in self.tables.items():
+            if table_name != FILES_TABLE and 'file_id' in columns:
+                self.connection.execute(f'DELETE FROM "{table_name}" WHERE file_id = ?', (file_id,))
+
+    def begin(self, file_id: str, info: dict) -> None:
+        existing = self.connection.execute(f'SELECT path FROM "{FILES_TABLE}" WHERE file_id = ?',
+                                           (file_id,)).fetchone()
+        if existing:
+            logger.info(f"Replacing the rows of {info['path']} already in the database")
+            self.delete_file(file_id)
+        self.connection.execute(f'INSERT OR REPLACE INTO "{FILES_TABLE}" VALUES (?, ?, ?, ?, 0, ?, ?)',
+                                (file_id, info['path'], info['size'], info['mtime'], 'loading',
+                                 datetime.now().isoformat(timespec='seconds')))
+
+    def insert(self, table_name: str, columns: List[str], rows: List[list]) -> None:
+        self._ensure_table(table_name, columns)
+        names = ', '.join(f'"{column}"' for column in columns)
+        placeholders = ', '.join('?' * len(columns))
+        self.connection.executemany(f'INSERT INTO "{table_name}" ({names}) VALUES ({placeholders})', rows)
+        self.pending_rows += len(rows)
+        if self.pending_rows >= self.commit_rows:
+            self.commit()
+
+    def end(self, file_id: str, rows: int) -> None:
+        self.connection.execute(f'UPDATE "{FILES_TABLE}" SET rows = ?, status = ? WHERE file_id = ?',
+                                (rows, 'complete', file_id))
+
+    def abort(self, file_id: str) -> None:
+        self.delete_file(file_id)
+        self.connection.execute(f'DELETE FROM "{FILES_TABLE}" WHERE file_id = ?', (file_id,))
+
+    def commit(self) -> None:
+        self.connection.commit()
+        self.pending_rows = 0
+
+    def close(self) -> None:
+        self.commit()
+        self.connection.close()
+
+
+def run_writer(path: str, database_queue, commit_rows: int = COMMIT_ROWS) -> None:
+    """Writer process: apply messages from the queue until None arrives."""
+    database = ConsolidatedDatabase(path, commit_rows)
+    failed = set()
+    files = 0
+    while True:
+        try:
+            message = database_queue.get(timeout=IDLE_COMMIT_SECONDS)
+        except queue.Empty:
+            if database.pending_rows:
+                database.commit()
+            continue
+        if message is None:
+            break
+        kind, file_id = message[0], message[1]
+        if file_id in failed and kind != 'begin':
+            continue
+        try:
+            if kind == 'begin':
+                failed.discard(file_id)
+                database.begin(file_id, message[2])
+            elif kind == 'rows':
+                database.insert(*message[2:])
+            elif kind == 'end':
+                database.end(file_id, message[2])
+                files += 1
+            elif kind == 'abort':
+                database.abort(file_id)
+        except Exception as e:
+            # Drop the file and keep draining the queue, so workers never block on a writer
+            # that stopped reading; rows of other files in the open transaction are kept
+            logger.error(f"Database writer failed on {kind} of file {file_id}: {e}")
+            failed.add(file_id)
+            database.abort(file_id)
+    database.close()
+    logger.info(f"Database writer stored {files} file(s) in {path}")
+
+
+class DatabaseWriter:
+    """
+    Context manager running run_writer in its own process.
+
+    queue is a bounded manager queue, so it can be passed to pool workers as an
+    argument; workers block while it is full, which keeps memory bounded when
+    they convert faster than the writer commits.
+    """
+
+    def __init__(self, path: str, queue_batches: int = QUEUE_BATCHES):
+        import multiprocessing
+        self.path = path
+        self._manager = multiprocessing.Manager()
+        self.queue = self._manager.Queue(maxsize=queue_batches)
+        self._process = multiprocessing.Process(target=run_writer, args=(path, self.queue),
+                                                name='database-writer')
+
+    def __enter__(self) -> 'DatabaseWriter':
+        self._process.start()
+        logger.info(f"Writing all files to {self.path}")
+        return self
+
+    def __exit__(self, *exc_info) -> None:
+        start = time.perf_counter()
+        self.queue.put(None)
+        self._process.join()
+        self._manager.shutdown()
+        if self._process.exitcode != 0:
+            raise RuntimeError(f"Database writer exited with code {self._process.exitcode}")
+        logger.info(f"Database writer finished in {time.perf_counter() - start:.1f} s after the last file")
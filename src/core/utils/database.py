@@ -1,16 +1,17 @@
 # database.py
-import pandas as pd
-from sqlalchemy import create_engine
+# pandas and SQLAlchemy are imported where they are used: runs without database output never load them
 import logging
 from datetime import datetime
 from .epoch import convert_epoch_to_datetime
+from .templates import bulk_array_records
+from src.core.atdf.parsers import format_array
 from typing import Optional, Dict, List, Any
 
 logger = logging.getLogger(__name__)
 
 # Record type groupings for the new schema
 RECORD_GROUPS = {
-    'file_metadata': ['FAR', 'ATR'],          # File attributes and audit trail
+    'file_metadata': ['FAR', 'ATR', 'VUR'],   # File attributes, audit trail and version updates
     'test_sessions': ['MIR', 'MRR'],  # Master Information/Results
     'wafer_info': ['WIR', 'WRR', 'WCR'],      # Wafer Information/Results/Config
     'device_info': ['PIR', 'PRR'],  # Part Information/Results
@@ -22,12 +23,17 @@ RECORD_GROUPS = {
     'test_summaries': ['TSR'],  # Test Synopsis
     'test_configuration': ['SDR'],  # Site Description
     'program_sections': ['BPS', 'EPS'],  # Program Sections
-    'generic_data': ['GDR', 'DTR']  # Generic Data and Text
+    'generic_data': ['GDR', 'DTR'],  # Generic Data and Text
+    'scan_results': ['STR'],  # Scan Test Records (V4-2007)
+    'scan_structure': ['PSR', 'NMR', 'CNR', 'SSR', 'CDR']  # Pattern, name map, cell, scan structure and chain
 }
 
 # Map of fields to handle specially (like timestamps)
 TIMESTAMP_FIELDS = ['modification_timestamp', 'setup_time', 'start_time', 'finish_time']
 
+# Records transformed and inserted per DataFrame when building a database
+DATABASE_CHUNK_SIZE = 50_000
+
 
 def transform_record_data(record_type: str, data: dict) -> dict:
     """Transform record data based on record type for the new schema."""
@@ -47,7 +53,7 @@ def transform_record_data(record_type: str, data: dict) -> dict:
             'full_wafer_id': None,  # Links to wafer
             'part_id': None  # Unique part identifier
         })
-    elif record_type in ['PTR', 'FTR', 'MPR']:
+    elif record_type in ['PTR', 'FTR', 'MPR', 'STR']:
         transformed_data.update({
             'part_id': None,  # Links to part
             'test_id': None  # Unique test identifier
@@ -56,6 +62,12 @@ def transform_record_data(record_type: str, data: dict) -> dict:
     # Copy original data at the end to preserve all fields
     transformed_data.update(data.copy())
 
+    if record_type in bulk_array_records():
+        # Arrays kept compact in memory are stored as the same comma-joined text
+        for field, value in transformed_data.items():
+            if hasattr(value, 'tolist'):
+                transformed_data[field] = format_array(value)
+
     # Handle timestamp conversions after copying data
     for field in TIMESTAMP_FIELDS:
         if field in transformed_data:
@@ -72,67 +84,216 @@ def get_table_name_for_record(record_type: str) -> str:
     return f'table_{record_type}'  # Fallback for unhandled record types
 
 
-def create_database_from_atdf(output_atdf_database: str, atdf_processed_entries: Dict[str, List[Dict]]):
-    """Create SQLite database from ATDF records using the new schema."""
-    engine = create_engine(f"sqlite:///{output_atdf_database}")
-    logger.info(f"Creating database at {output_atdf_database}")
+def part_key(record: dict):
+    """Part a record belongs to: its p_id from the part assembler when linked, else its part_id."""
+    p_id = record.get('p_id')
+    return p_id if p_id is not None else record.get('part_id', 'unknown')
+
+
+def transform_record_with_ids(record_type: str, record: dict, file_id: str, test_session_id: str) -> dict:
+    """Transform a record and add the file, session, wafer, part and test relationship IDs."""
+    transformed = transform_record_data(record_type, record)
+
+    # Add relationship IDs
+    transformed['file_id'] = file_id
+    transformed['test_session_id'] = test_session_id
+
+    # Add additional relationships based on record type
+    if record_type in ['WIR', 'WRR']:
+        transformed['wafer_id'] = f"{test_session_id}_{transformed.get('wafer_id', 'unknown')}"
+    elif record_type in ['PIR', 'PRR']:
+        wafer_id = transformed.get('wafer_id')
+        if wafer_id:
+            transformed['full_wafer_id'] = f"{test_session_id}_{wafer_id}"
+        transformed['part_id'] = f"{test_session_id}_{part_key(transformed)}"
+    elif record_type in ['PTR', 'FTR', 'MPR', 'STR']:
+        transformed['part_id'] = f"{test_session_id}_{part_key(transformed)}"
+        transformed['test_id'] = f"{test_session_id}_{transformed.get('test_number', 'unknown')}"
 
-    # Generate a unique identifier for this file/test run
-    file_id = datetime.now().strftime('%Y%m%d_%H%M%S')
+    return transformed
+
+
+def create_sqlite_engine(output_atdf_database: str):
+    from sqlalchemy import create_engine
+    return create_engine(f"sqlite:///{output_atdf_database}")
+
+
+def write_table_chunk(engine, table_name: str, chunk: List[dict], columns: List[str], start: int) -> int:
+    """Write one chunk of transformed records, creating the table on the first chunk."""
+    import pandas as pd
+    df = pd.DataFrame(chunk, columns=columns)
+    df.index = pd.RangeIndex(start, start + len(df))
+    df.to_sql(table_name, engine, index=True, if_exists='replace' if start == 0 else 'append')
+    return len(df)
+
+
+def add_table_columns(engine, table_name: str, columns: List[str]) -> None:
+    """Add columns to an existing table, for records bringing fields its first chunk did not have."""
+    from sqlalchemy import text
+    with engine.begin() as connection:
+        for column in columns:
+            connection.execute(text(f'ALTER TABLE "{table_name}" ADD COLUMN "{column}"'))
+
+
+def session_ids(atdf_processed_entries: Dict[str, List[Dict]], file_id: Optional[str] = None):
+    """file_id (by default a timestamp) and test_session_id (file_id plus the MIR lot_id) of a conversion."""
+    if file_id is None:
+        # Generate a unique identifier for this file/test run
+        file_id = datetime.now().strftime('%Y%m%d_%H%M%S')
 
     # Find MIR record first to get lot/test info if available
-    mir_data = None
-    if 'MIR' in atdf_processed_entries and atdf_processed_entries['MIR']:
+    if 'MIR' in atdf_processed_entries and len(atdf_processed_entries['MIR']):
         mir_data = atdf_processed_entries['MIR'][0]  # Get first MIR record
         test_session_id = f"{file_id}_{mir_data.get('lot_id', 'unknown')}"
     else:
         test_session_id = file_id
+    return file_id, test_session_id
+
+
+def iter_table_chunks(atdf_processed_entries: Dict[str, List[Dict]], file_id: str, test_session_id: str,
+                      chunk_size: int = DATABASE_CHUNK_SIZE):
+    """
+    Transform the entries table by table, in chunks of up to chunk_size records.
+
+    Yields:
+        tuple: (table_name, columns, chunk) with chunk a list of transformed records and
+        columns the union of the fields of every record of the table yielded so far, in
+        first-appearance order. It only grows: a table written from earlier chunks needs
+        the columns past its own added.
+    """
+    # Group record types by table, keeping first-appearance order
+    grouped_types = {}
+    for record_type in atdf_processed_entries:
+        grouped_types.setdefault(get_table_name_for_record(record_type), []).append(record_type)
 
-    # Group and transform the data
-    grouped_data = {}
-    for record_type, data in atdf_processed_entries.items():
-        table_name = get_table_name_for_record(record_type)
-        if table_name not in grouped_data:
-            grouped_data[table_name] = []
-
-        # Transform and add relationship IDs
-        transformed_records = []
-        for record in data:
-            transformed = transform_record_data(record_type, record)
-
-            # Add relationship IDs
-            transformed['file_id'] = file_id
-            transformed['test_session_id'] = test_session_id
-
-            # Add additional relationships based on record type
-            if record_type in ['WIR', 'WRR']:
-                transformed['wafer_id'] = f"{test_session_id}_{transformed.get('wafer_id', 'unknown')}"
-            elif record_type in ['PIR', 'PRR']:
-                wafer_id = transformed.get('wafer_id')
-                if wafer_id:
-                    transformed['full_wafer_id'] = f"{test_session_id}_{wafer_id}"
-                transformed['part_id'] = f"{test_session_id}_{transformed.get('part_id', 'unknown')}"
-            elif record_type in ['PTR', 'FTR', 'MPR']:
-                transformed['part_id'] = f"{test_session_id}_{transformed.get('part_id', 'unknown')}"
-                transformed['test_id'] = f"{test_session_id}_{transformed.get('test_number', 'unknown')}"
-
-            transformed_records.append(transformed)
-
-        grouped_data[table_name].extend(transformed_records)
-
-    # Create tables and insert data
-    for table_name, data in grouped_data.items():
-        if data:
-            df = pd.DataFrame(data)
-            df.to_sql(table_name, engine, index=True, if_exists='replace')
-            logger.info(f"Created table '{table_name}' with {len(df)} records")
+    # Transform each table in chunks so spilled entries never need to be fully materialized
+    for table_name, record_types in grouped_types.items():
+        # Records may leave out trailing optional fields, so any record can bring new columns
+        columns = {}
+        chunk = []
+        for record_type in record_types:
+            for record in atdf_processed_entries[record_type]:
+                transformed = transform_record_with_ids(record_type, record, file_id, test_session_id)
+                if not columns.keys() >= transformed.keys():
+                    columns.update(dict.fromkeys(transformed))
+                chunk.append(transformed)
+                if len(chunk) >= chunk_size:
+                    yield table_name, list(columns), chunk
+                    chunk = []
+        if chunk:
+            yield table_name, list(columns), chunk
+
+
+def create_database_from_atdf(output_atdf_database: str, atdf_processed_entries: Dict[str, List[Dict]]):
+    """Create SQLite database from ATDF records using the new schema."""
+    engine = create_sqlite_engine(output_atdf_database)
+    logger.info(f"Creating database at {output_atdf_database}")
+
+    file_id, test_session_id = session_ids(atdf_processed_entries)
+
+    written = {}
+    table_columns = {}
+    for table_name, columns, chunk in iter_table_chunks(atdf_processed_entries, file_id, test_session_id):
+        known = table_columns.get(table_name)
+        if known is not None and len(columns) > len(known):
+            add_table_columns(engine, table_name, columns[len(known):])
+        table_columns[table_name] = columns
+        written[table_name] = written.get(table_name, 0) + write_table_chunk(
+            engine, table_name, chunk, columns, written.get(table_name, 0))
+    for table_name, rows in written.items():
+        logger.info(f"Created table '{table_name}' with {rows} records")
 
     engine.dispose()
     logger.info("Database creation complete.")
 
 
-def create_dataframe(data: list, record_type: Optional[str] = None) -> Optional[pd.DataFrame]:
+class DatabaseAppender:
+    """
+    Appends ATDF entries to a database while they are still accumulating (follow mode).
+
+    Each append() writes the entries added since the previous call. Tables are
+    created on first write and gain columns when new records bring new fields.
+    """
+
+    def __init__(self, output_atdf_database: str):
+        self.output_atdf_database = output_atdf_database
+        self.engine = create_sqlite_engine(output_atdf_database)
+        self.file_id = datetime.now().strftime('%Y%m%d_%H%M%S')
+        self.test_session_id = None
+        self.written_entries = {}
+        self.table_rows = {}
+        self.table_columns = {}
+        logger.info(f"Appending to database at {output_atdf_database}")
+
+    def append(self, atdf_processed_entries: Dict[str, List[Dict]], final: bool = False) -> int:
+        """Write the new entries; until the MIR has been seen (or final), nothing is written."""
+        if self.test_session_id is None:
+            if len(atdf_processed_entries.get('MIR', [])):
+                self.test_session_id = f"{self.file_id}_{atdf_processed_entries['MIR'][0].get('lot_id', 'unknown')}"
+            elif final:
+                self.test_session_id = self.file_id
+            else:
+                return 0
+
+        new_entries = {}
+        for record_type, entries in atdf_processed_entries.items():
+            start = self.written_entries.get(record_type, 0)
+            if len(entries) > start:
+                new_entries[record_type] = entries[start:]
+                self.written_entries[record_type] = len(entries)
+
+        appended = 0
+        for table_name, columns, chunk in iter_table_chunks(new_entries, self.file_id, self.test_session_id):
+            if table_name not in self.table_columns:
+                self.table_columns[table_name] = columns
+                self.table_rows[table_name] = 0
+            else:
+                known = set(self.table_columns[table_name])
+                missing = [column for column in columns if column not in known]
+                if missing:
+                    add_table_columns(self.engine, table_name, missing)
+                    self.table_columns[table_name].extend(missing)
+            self._write(table_name, chunk)
+            appended += len(chunk)
+        return appended
+
+    def _write(self, table_name: str, chunk: List[dict]) -> None:
+        self.table_rows[table_name] += write_table_chunk(
+            self.engine, table_name, chunk, self.table_columns[table_name], self.table_rows[table_name])
+
+    def close(self, atdf_processed_entries: Dict[str, List[Dict]]) -> None:
+        self.append(atdf_processed_entries, final=True)
+        self.engine.dispose()
+        for table_name, rows in self.table_rows.items():
+            logger.info(f"Table '{table_name}' has {rows} records")
+
+
+def write_statistics_table(output_atdf_database: str, statistics, table_name: str = 'test_statistics'):
+    """Store the per-test statistics summary (see core.utils.stats) as a table."""
+    rows = statistics.summary()
+    if not rows:
+        return
+    import pandas as pd
+    engine = create_sqlite_engine(output_atdf_database)
+    pd.DataFrame(rows).to_sql(table_name, engine, index=False, if_exists='replace')
+    engine.dispose()
+    logger.info(f"Created table '{table_name}' with {len(rows)} records")
+
+
+def write_parts_table(output_atdf_database: str, rows: List[dict], table_name: str = 'parts'):
+    """Store one row per assembled part (see core.utils.parts) as a table."""
+    if not rows:
+        return
+    import pandas as pd
+    engine = create_sqlite_engine(output_atdf_database)
+    pd.DataFrame(rows).to_sql(table_name, engine, index=False, if_exists='replace')
+    engine.dispose()
+    logger.info(f"Created table '{table_name}' with {len(rows)} records")
+
+
+def create_dataframe(data: list, record_type: Optional[str] = None) -> Optional['pd.DataFrame']:
     """Create DataFrame from record data."""
+    import pandas as pd
     if not data:
         logger.warning("Empty data list provided, returning None.")
         return None
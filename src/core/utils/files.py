@@ -1,6 +1,8 @@
 # src/core/utils/files.py
 """Utilities for file handling operations."""
 import gzip
+import os
+import time
 from pathlib import Path
 from contextlib import contextmanager
 import struct
@@ -10,17 +12,28 @@ from typing import List, Optional
 
 logger = logging.getLogger(__name__)
 
+# Bytes inspected when checking that an input file is binary
+BINARY_CHECK_SIZE = 1024
+
 
 @contextmanager
-def managed_files(stdf_path: str, atdf_path: Optional[str] = None):
-    """Context manager for handling file resources safely."""
+def managed_files(stdf_path: str, atdf_path: Optional[str] = None, atdf_offset: Optional[int] = None):
+    """
+    Context manager for handling file resources safely.
+
+    With atdf_offset, an existing ATDF file is truncated to that many bytes and
+    appended to instead of being replaced (resuming a conversion).
+    """
     stdf_file = None
     atdf_file = None
     try:
         stdf_file = get_file_handle(stdf_path, 'rb')
         reset_and_check_binary(stdf_file)
 
-        if atdf_path:
+        if atdf_path and atdf_offset is not None:
+            os.truncate(atdf_path, atdf_offset)
+            atdf_file = get_file_handle(atdf_path, 'a')
+        elif atdf_path:
             atdf_file = get_file_handle(atdf_path, 'w')
 
         yield stdf_file, atdf_file
@@ -46,13 +59,23 @@ def is_binary(content: bytes) -> bool:
 
 
 def reset_and_check_binary(file_handle) -> None:
-    """Reset file pointer and verify binary content."""
+    """Reset file pointer and verify binary content from the leading bytes."""
     file_handle.seek(0)
-    if not is_binary(file_handle.read()):
+    if not is_binary(file_handle.read(BINARY_CHECK_SIZE)):
         raise ValueError("File content is not binary")
     file_handle.seek(0)
 
 
+def wait_for_size(path: str, size: int, poll_interval: float, timeout: Optional[float] = None) -> None:
+    """Wait until a file being written holds at least size bytes; TimeoutError after timeout seconds."""
+    waited = 0.0
+    while not Path(path).exists() or Path(path).stat().st_size < size:
+        if timeout is not None and waited >= timeout:
+            raise TimeoutError(f"{path} did not reach {size} bytes within {timeout}s")
+        time.sleep(poll_interval)
+        waited += poll_interval
+
+
 def is_file(path: str) -> bool:
     """Check if path is a valid file."""
     return Path(path).is_file()
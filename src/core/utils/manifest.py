@@ -0,0 +1,120 @@
+# src/core/utils/manifest.py
+"""Conversion manifest for incremental directory runs."""
+import hashlib
+import json
+import logging
+import os
+import sqlite3
+import time
+from pathlib import Path
+from typing import Iterable, List, Optional
+
+from src import __version__
+
+logger = logging.getLogger(__name__)
+
+MANIFEST_NAME = '.stdf2atdf-manifest.db'
+# Bytes hashed from the start and from the end of each file
+FINGERPRINT_BLOCK = 64 * 1024
+
+
+def fingerprint_file(path: Path, size: Optional[int] = None) -> str:
+    """Fast content fingerprint: BLAKE2b of the file size, the first and the last block."""
+    if size is None:
+        size = path.stat().st_size
+    digest = hashlib.blake2b(str(size).encode(), digest_size=16)
+    with open(path, 'rb') as f:
+        digest.update(f.read(FINGERPRINT_BLOCK))
+        if size > FINGERPRINT_BLOCK:
+            f.seek(max(FINGERPRINT_BLOCK, size - FINGERPRINT_BLOCK))
+            digest.update(f.read(FINGERPRINT_BLOCK))
+    return digest.hexdigest()
+
+
+def options_key(options: dict) -> str:
+    """Canonical JSON of the conversion options that affect the outputs."""
+    return json.dumps(options, sort_keys=True, default=str)
+
+
+class ConversionManifest:
+    """
+    SQLite manifest at the root of an input tree recording converted files.
+
+    A file is current when its path, size and mtime (or, if only the mtime
+    changed, its fingerprint), the converter version and the options all
+    match its entry. Each entry is written in its own transaction.
+    """
+
+    def __init__(self, root: Path):
+        self.root = Path(root)
+        self.path = self.root / MANIFEST_NAME
+        self.connection = sqlite3.connect(self.path)
+        self.connection.execute('PRAGMA journal_mode=WAL')
+        self.connection.execute(
+            'CREATE TABLE IF NOT EXISTS files ('
+            'path TEXT PRIMARY KEY, size INTEGER, mtime_ns INTEGER, fingerprint TEXT, '
+            'converter_version TEXT, options TEXT, converted_at REAL)'
+        )
+        self.connection.commit()
+
+    def _key(self, path: Path) -> str:
+        try:
+            return str(Path(path).resolve().relative_to(self.root.resolve()))
+        except ValueError:
+            return str(Path(path).resolve())
+
+    def is_current(self, path: Path, options: dict) -> bool:
+        row = self.connection.execute(
+            'SELECT size, mtime_ns, fingerprint, converter_version, options FROM files WHERE path = ?',
+            (self._key(path),)
+        ).fetchone()
+        if row is None:
+            return False
+
+        size, mtime_ns, fingerprint, converter_version, stored_options = row
+        if converter_version != __version__ or stored_options != options_key(options):
+            return False
+
+        stat = Path(path).stat()
+        if stat.st_size != size:
+            return False
+        if stat.st_mtime_ns == mtime_ns:
+            return True
+
+        # Touched but possibly unchanged: compare content before reconverting
+        if fingerprint_file(Path(path), stat.st_size) != fingerprint:
+            return False
+        with self.connection:
+            self.connection.execute('UPDATE files SET mtime_ns = ? WHERE path = ?',
+                                    (stat.st_mtime_ns, self._key(path)))
+        return True
+
+    def record(self, path: Path, options: dict) -> None:
+        """Record a successful conversion of path with the given options."""
+        stat = Path(path).stat()
+        with self.connection:
+            self.connection.execute(
+                'INSERT OR REPLACE INTO files '
+                '(path, size, mtime_ns, fingerprint, converter_version, options, converted_at) '
+                'VALUES (?, ?, ?, ?, ?, ?, ?)',
+                (self._key(path), stat.st_size, stat.st_mtime_ns, fingerprint_file(Path(path), stat.st_size),
+                 __version__, options_key(options), time.time())
+            )
+
+    def pending_files(self, paths: Iterable[Path], options: dict, expected_outputs=None) -> List[Path]:
+        """
+        Files that need converting: not current in the manifest, or missing an expected output.
+
+        Args:
+            expected_outputs: Optional callable returning the output paths of an input file.
+        """
+        pending = []
+        for path in paths:
+            outputs = expected_outputs(path) if expected_outputs else []
+            if self.is_current(path, options) and all(os.path.exists(output) for output in outputs):
+                continue
+            pending.append(path)
+        return pending
+
+    def close(self) -> None:
+        self.connection.close()
@@ -0,0 +1,157 @@
+# src/core/utils/matrix.py
+"""Parts x tests matrix of PTR results, filled while streaming records."""
+import logging
+from array import array
+from typing import Optional, Tuple
+
+import numpy as np
+
+logger = logging.getLogger(__name__)
+
+# Rows (parts) and columns (tests) added when the matrix has to grow
+ROW_CHUNK = 1024
+COLUMN_CHUNK = 256
+
+PART_FIELDS = [
+    ('head_num', 'u1'),
+    ('site_num', 'u1'),
+    ('part_flg', 'u1'),
+    ('num_test', 'u2'),
+    ('hard_bin', 'u2'),
+    ('soft_bin', 'u2'),
+    ('x_coord', 'i2'),
+    ('y_coord', 'i2'),
+]
+# Stored for part fields without a value: the STDF missing value of the coordinates, 0 otherwise
+MISSING_COORDINATE = -32768
+PART_DEFAULTS = {'x_coord': MISSING_COORDINATE, 'y_coord': MISSING_COORDINATE}
+
+
+class PartTestMatrix:
+    """
+    Float32 matrix with one row per part (PIR..PRR) and one column per PTR test_num.
+
+    Each PTR is assigned to the part currently open on its head/site. Cells of
+    tests a part did not run stay NaN; a test repeated within one part keeps
+    its last result. The matrix grows in chunks of rows and columns. Parts
+    without coordinates get MISSING_COORDINATE as x_coord and y_coord; PTRs
+    without a test_num have no column and are only counted.
+    """
+
+    def __init__(self, output_prefix: Optional[str] = None,
+                 row_chunk: int = ROW_CHUNK, column_chunk: int = COLUMN_CHUNK):
+        self.output_prefix = output_prefix
+        self.row_chunk = row_chunk
+        self.column_chunk = column_chunk
+        self.matrix = np.full((row_chunk, column_chunk), np.nan, dtype=np.float32)
+        self.row_count = 0
+        self.test_columns = {}
+        self.test_numbers = array('I')
+        self.open_parts = {}
+        self.parts = {name: [] for name, _ in PART_FIELDS}
+        self.part_ids = []
+        self.orphan_results = 0
+        self.unnumbered_results = 0
+
+    def _grow(self, rows: int, columns: int) -> None:
+        capacity_rows, capacity_columns = self.matrix.shape
+        if rows <= capacity_rows and columns <= capacity_columns:
+            return
+        # Grow by at least one chunk, and geometrically for large matrices
+        if rows > capacity_rows:
+            capacity_rows += max(self.row_chunk, capacity_rows // 2)
+        if columns > capacity_columns:
+            capacity_columns += max(self.column_chunk, capacity_columns // 2)
+        grown = np.full((capacity_rows, capacity_columns), np.nan, dtype=np.float32)
+        used_rows, used_columns = self.row_count, len(self.test_numbers)
+        grown[:used_rows, :used_columns] = self.matrix[:used_rows, :used_columns]
+        self.matrix = grown
+
+    def _open_part(self, head_num, site_num) -> int:
+        row = self.row_count
+        self._grow(row + 1, len(self.test_numbers))
+        self.row_count += 1
+        for name, _ in PART_FIELDS:
+            self.parts[name].append(PART_DEFAULTS.get(name, 0))
+        self.parts['head_num'][row] = head_num
+        self.parts['site_num'][row] = site_num
+        self.part_ids.append('')
+        self.open_parts[(head_num, site_num)] = row
+        return row
+
+    def _test_column(self, test_num: int) -> int:
+        column = self.test_columns.get(test_num)
+        if column is None:
+            column = len(self.test_numbers)
+            self._grow(self.row_count, column + 1)
+            self.test_columns[test_num] = column
+            self.test_numbers.append(test_num)
+        return column
+
+    def append(self, record_type: str, stdf_processed_entry: dict) -> None:
+        if record_type == 'PTR':
+            row = self.open_parts.get((stdf_processed_entry.get('head_num'), stdf_processed_entry.get('site_num')))
+            if row is None:
+                self.orphan_results += 1
+                return
+            test_num = stdf_processed_entry.get('test_num')
+            if test_num is None:
+                self.unnumbered_results += 1
+                return
+            # Resolve the column first: adding a test may reallocate the matrix
+            column = self._test_column(test_num)
+            result = stdf_processed_entry.get('result')
+            self.matrix[row, column] = np.nan if result is None else result
+
+        elif record_type == 'PIR':
+            self._open_part(stdf_processed_entry.get('head_num'), stdf_processed_entry.get('site_num'))
+
+        elif record_type == 'PRR':
+            key = (stdf_processed_entry.get('head_num'), stdf_processed_entry.get('site_num'))
+            row = self.open_parts.pop(key, None)
+            if row is None:
+                # PRR without PIR: the part ran no tracked tests but still gets a row
+                row = self._open_part(*key)
+                del self.open_parts[key]
+            for name, _ in PART_FIELDS:
+                value = stdf_processed_entry.get(name)
+                if name == 'part_flg' and value is not None:
+                    value = int(value, 2)
+                self.parts[name][row] = value if value is not None else PART_DEFAULTS.get(name, 0)
+            self.part_ids[row] = stdf_processed_entry.get('part_id') or ''
+
+    def to_arrays(self) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+        """Return (matrix, parts, tests): the used matrix, a structured part index and the test numbers."""
+        matrix = self.matrix[:self.row_count, :len(self.test_numbers)]
+        id_width = max((len(part_id) for part_id in self.part_ids), default=0) or 1
+        parts = np.zeros(self.row_count, dtype=PART_FIELDS + [('part_id', f'U{id_width}')])
+        for name, _ in PART_FIELDS:
+            parts[name] = self.parts[name]
+        parts['part_id'] = self.part_ids
+        tests = np.frombuffer(self.test_numbers, dtype=self.test_numbers.typecode).astype(np.uint32)
+        return matrix, parts, tests
+
+    def save(self, prefix: str) -> None:
+        """Write <prefix>.matrix.npy, <prefix>.parts.npy and <prefix>.tests.npy."""
+        matrix, parts, tests = self.to_arrays()
+        np.save(f"{prefix}.matrix.npy", matrix)
+        np.save(f"{prefix}.parts.npy", parts)
+        np.save(f"{prefix}.tests.npy", tests)
+        logger.info(f"Wrote {matrix.shape[0]} parts x {matrix.shape[1]} tests matrix to {prefix}.matrix.npy")
+
+    def close(self) -> None:
+        if self.open_parts:
+            logger.warning(f"{len(self.open_parts)} parts were still open at the end of the file")
+        if self.orphan_results:
+            logger.warning(f"{self.orphan_results} PTR results had no open part and were not placed in the matrix")
+        if self.unnumbered_results:
+            logger.warning(f"{self.unnumbered_results} PTR results had no test_num and were not placed in the matrix")
+        if self.output_prefix:
+            self.save(self.output_prefix)
+
+
+def load_part_test_matrix(prefix: str, mmap_mode: Optional[str] = 'r') -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+    """Load (matrix, parts, tests) written by PartTestMatrix.save; the matrix is memory-mapped by default."""
+    return (np.load(f"{prefix}.matrix.npy", mmap_mode=mmap_mode),
+            np.load(f"{prefix}.parts.npy"),
+            np.load(f"{prefix}.tests.npy"))
@@ -0,0 +1,179 @@
+# src/core/utils/metrics.py
+"""Per-record-type counters and stage timings of conversions, and optional profiling."""
+import io
+import json
+import logging
+from contextlib import contextmanager
+from typing import Iterable, Optional
+
+logger = logging.getLogger(__name__)
+
+METRICS_VERSION = 1
+# Per-record stages, timed around the decoder, the sinks, the ATDF mapping and the ATDF writer
+STAGES = ('decode', 'sinks', 'map', 'write')
+COUNTERS = ('records', 'bytes', 'errors', 'skipped')
+# Record type under which records without a template are counted
+UNKNOWN_RECORD_TYPE = 'unknown'
+PROFILE_TOP = 25
+
+
+def empty_counters() -> dict:
+    counters = {name: 0 for name in COUNTERS}
+    counters.update({f"{stage}_s": 0.0 for stage in STAGES})
+    return counters
+
+
+class ConversionMetrics:
+    """
+    Counters and timings of one or more conversions.
+
+    Per record type: records and bytes read (headers included), errors,
+    records skipped by the record filter or dropped by a row filter (those are
+    not counted as read), and seconds spent decoding, in the sinks, mapping to
+    ATDF and writing ATDF. Per run: phases such as the record loop, closing the
+    sinks and loading the database. Metrics of several files add up with merge.
+    """
+
+    def __init__(self):
+        self.record_types = {}
+        self.phases = {}
+        self.files = 0
+        self.input_bytes = 0
+
+    def _counters(self, record_type: str) -> dict:
+        counters = self.record_types.get(record_type)
+        if counters is None:
+            counters = self.record_types[record_type] = empty_counters()
+        return counters
+
+    def count(self, record_type: str, size: int) -> None:
+        counters = self._counters(record_type)
+        counters['records'] += 1
+        counters['bytes'] += size
+
+    def add_time(self, record_type: str, stage_key: str, seconds: float) -> None:
+        """Add to a stage timer; stage_key is '<stage>_s' (e.g. 'decode_s')."""
+        self._counters(record_type)[stage_key] += seconds
+
+    def error(self, record_type: Optional[str]) -> None:
+        self._counters(record_type or UNKNOWN_RECORD_TYPE)['errors'] += 1
+
+    def skipped(self, record_type: str, count: int = 1) -> None:
+        self._counters(record_type)['skipped'] += count
+
+    def add_phase(self, phase: str, seconds: float) -> None:
+        self.phases[phase] = self.phases.get(phase, 0.0) + seconds
+
+    def merge(self, other: 'ConversionMetrics') -> 'ConversionMetrics':
+        for record_type, counters in other.record_types.items():
+            own = self._counters(record_type)
+            for name, value in counters.items():
+                own[name] += value
+        for phase, seconds in other.phases.items():
+            self.add_phase(phase, seconds)
+        self.files += other.files
+        self.input_bytes += other.input_bytes
+        return self
+
+    def totals(self) -> dict:
+        totals = empty_counters()
+        for counters in self.record_types.values():
+            for name, value in counters.items():
+                totals[name] += value
+        return totals
+
+    def to_dict(self) -> dict:
+        totals = self.totals()
+        phases = dict(self.phases)
+        if 'records' in phases:
+            # Reading the input (gzip included) and dispatching, i.e. the loop minus the timed stages
+            phases['read'] = max(0.0, phases['records'] - sum(totals[f"{stage}_s"] for stage in STAGES))
+        return {
+            'version': METRICS_VERSION,
+            'files': self.files,
+            'input_bytes': self.input_bytes,
+            'phases': phases,
+            'totals': totals,
+            'record_types': dict(sorted(self.record_types.items())),
+        }
+
+    @classmethod
+    def from_dict(cls, data: dict) -> 'ConversionMetrics':
+        metrics = cls()
+        metrics.files = data['files']
+        metrics.input_bytes = data['input_bytes']
+        metrics.phases = {phase: seconds for phase, seconds in data['phases'].items() if phase != 'read'}
+        metrics.record_types = {record_type: dict(counters) for record_type, counters in data['record_types'].items()}
+        return metrics
+
+    def save(self, path: str) -> None:
+        with open(path, 'w') as f:
+            json.dump(self.to_dict(), f, indent=1)
+        logger.info(f"Wrote conversion metrics to {path}")
+
+    def table(self) -> str:
+        """Plain-text table of the per-record-type metrics, slowest record types first."""
+        header = (f"{'record':<8}{'records':>11}{'MB':>9}{'decode s':>10}{'sinks s':>9}{'map s':>8}"
+                  f"{'write s':>9}{'us/rec':>8}{'errors':>8}{'skipped':>9}")
+        lines = [header, '-' * len(header)]
+
+        def stage_seconds(counters):
+            return sum(counters[f"{stage}_s"] for stage in STAGES)
+
+        rows = sorted(self.record_types.items(), key=lambda item: stage_seconds(item[1]), reverse=True)
+        for record_type, counters in rows + [('total', self.totals())]:
+            per_record = stage_seconds(counters) / counters['records'] * 1e6 if counters['records'] else 0.0
+            lines.append(f"{record_type:<8}{counters['records']:>11,}{counters['bytes'] / 1e6:>9.2f}"
+                         f"{counters['decode_s']:>10.3f}{counters['sinks_s']:>9.3f}{counters['map_s']:>8.3f}"
+                         f"{counters['write_s']:>9.3f}{per_record:>8.1f}{counters['errors']:>8}"
+                         f"{counters['skipped']:>9}")
+        phases = self.to_dict()['phases']
+        if phases:
+            lines.append('phases: ' + ', '.join(f"{phase} {seconds:.3f} s" for phase, seconds in phases.items()))
+        return '\n'.join(lines)
+
+    def log_table(self) -> None:
+        logger.info(f"Conversion metrics ({self.files} file(s), {self.input_bytes / 1e6:.1f} MB):\n{self.table()}")
+
+
+def merge_metrics(partials: Iterable[Optional[ConversionMetrics]]) -> ConversionMetrics:
+    """Aggregate the metrics of several conversions (e.g. one per worker result)."""
+    merged = ConversionMetrics()
+    for partial in partials:
+        if partial is not None:
+            merged.merge(partial)
+    return merged
+
+
+@contextmanager
+def profiled(output_prefix: str, top: int = PROFILE_TOP):
+    """
+    Run the enclosed code under cProfile and tracemalloc.
+
+    Writes <output_prefix>.prof (load with pstats or snakeviz) and logs the
+    functions with the most cumulative time, the peak traced memory and the
+    lines that allocated the most memory still held at the end.
+    """
+    import cProfile
+    import pstats
+    import tracemalloc
+
+    profiler = cProfile.Profile()
+    tracemalloc.start()
+    profiler.enable()
+    try:
+        yield
+    finally:
+        profiler.disable()
+        snapshot = tracemalloc.take_snapshot()
+        _, peak = tracemalloc.get_traced_memory()
+        tracemalloc.stop()
+
+        profile_path = f"{output_prefix}.prof"
+        profiler.dump_stats(profile_path)
+        text = io.StringIO()
+        pstats.Stats(profiler, stream=text).sort_stats('cumulative').print_stats(top)
+        logger.info(f"Profile written to {profile_path}, top {top} functions by cumulative time:\n{text.getvalue()}")
+
+        allocations = '\n'.join(str(stat) for stat in snapshot.statistics('lineno')[:top])
+        logger.info(f"Peak traced memory {peak / 1e6:.1f} MB; largest allocations still held:\n{allocations}")
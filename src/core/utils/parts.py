@@ -0,0 +1,183 @@
+# src/core/utils/parts.py
+"""Assembly of parts (PIR, results, PRR) from interleaved multi-site record streams."""
+import logging
+from typing import Callable, Dict, List, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+RESULT_RECORDS = ('PTR', 'MPR', 'FTR', 'STR')
+# Records that get the ids of their wafer (w_id) and part (p_id)
+WAFER_RECORDS = ('WIR', 'WRR')
+PART_RECORDS = ('PIR', 'PRR') + RESULT_RECORDS
+# part_flg bits 3 (part failed) and 4 (pass/fail flag invalid), as decoded into a bit string
+PART_FAILED_BIT = 3
+PART_FLAG_INVALID_BIT = 4
+
+
+def part_passed(part_flg: Optional[str]) -> Optional[bool]:
+    """Pass/fail of a part from its PRR part_flg (None when the flag is missing or invalid)."""
+    if part_flg is None:
+        return None
+    flags = int(part_flg, 2)
+    if flags >> PART_FLAG_INVALID_BIT & 1:
+        return None
+    return not flags >> PART_FAILED_BIT & 1
+
+
+class Part:
+    """
+    One tested part: its PIR and PRR entries, its results and the wafer it belongs to.
+
+    Entries are STDF entries as decoded by handle_stdf_entry. results holds
+    (record_type, entry) pairs of the PTR, MPR, FTR and STR records in file order;
+    it is only filled when the assembler keeps results.
+    """
+    __slots__ = ('p_id', 'w_id', 'head_num', 'site_num', 'wafer', 'pir', 'prr', 'results', 'result_count')
+
+    def __init__(self, p_id: int, w_id: Optional[int], head_num: int, site_num: int,
+                 wafer: Optional[dict], pir: Optional[dict]):
+        self.p_id = p_id
+        self.w_id = w_id
+        self.head_num = head_num
+        self.site_num = site_num
+        self.wafer = wafer
+        self.pir = pir
+        self.prr = None
+        self.results = []
+        self.result_count = 0
+
+    @property
+    def passed(self) -> Optional[bool]:
+        return part_passed(self.prr.get('part_flg')) if self.prr else None
+
+    def summary(self) -> dict:
+        """One row describing the part, as stored in the parts table."""
+        prr = self.prr or {}
+        return {
+            'p_id': self.p_id,
+            'w_id': self.w_id,
+            'head_num': self.head_num,
+            'site_num': self.site_num,
+            'wafer_id': self.wafer.get('wafer_id') if self.wafer else None,
+            'part_id': prr.get('part_id'),
+            'hard_bin': prr.get('hard_bin'),
+            'soft_bin': prr.get('soft_bin'),
+            'x_coord': prr.get('x_coord'),
+            'y_coord': prr.get('y_coord'),
+            'test_t': prr.get('test_t'),
+            'num_test': prr.get('num_test'),
+            'passed': self.passed,
+            'results': self.result_count,
+        }
+
+
+class PartAssembler:
+    """
+    Sink linking records to their wafer and part while streaming.
+
+    State is one open Part per (head, site) and one open wafer per head, so
+    every record is linked in constant time however many sites interleave. A
+    PRR closes its part and hands it to every callback. Wafer and part ids
+    (w_id, p_id) count from 1 in file order; link() returns the ids of the
+    record appended last, for the ATDF entry of the same record.
+
+    Results are only kept in the open parts when keep_results is set, so
+    linking alone needs no per-part memory.
+    """
+
+    def __init__(self, callbacks: Optional[List[Callable[[Part], None]]] = None,
+                 keep_results: bool = False, state: Optional[dict] = None):
+        self.callbacks = callbacks or []
+        self.keep_results = keep_results
+        self.open_parts: Dict[Tuple[int, int], Part] = {}
+        # head_num -> (w_id, WIR entry)
+        self.wafers: Dict[int, Tuple[int, dict]] = {}
+        self.part_count = 0
+        self.wafer_count = 0
+        self.orphan_results = 0
+        self._link = {}
+        if state is not None:
+            self.part_count = state['part_count']
+            self.wafer_count = state['wafer_count']
+            self.wafers = {int(head): (w_id, wafer) for head, (w_id, wafer) in state['wafers'].items()}
+
+    def _wafer(self, head_num) -> Tuple[Optional[int], Optional[dict]]:
+        return self.wafers.get(head_num, (None, None))
+
+    def append(self, record_type: str, stdf_processed_entry: dict) -> None:
+        if record_type in RESULT_RECORDS:
+            part = self.open_parts.get((stdf_processed_entry.get('head_num'), stdf_processed_entry.get('site_num')))
+            if part is None:
+                self.orphan_results += 1
+                self._link = {'w_id': self._wafer(stdf_processed_entry.get('head_num'))[0], 'p_id': None}
+                return
+            part.result_count += 1
+            if self.keep_results:
+                part.results.append((record_type, stdf_processed_entry))
+            self._link = {'w_id': part.w_id, 'p_id': part.p_id}
+
+        elif record_type == 'PIR':
+            key = (stdf_processed_entry.get('head_num'), stdf_processed_entry.get('site_num'))
+            if key in self.open_parts:
+                logger.warning(f"PIR for head {key[0]} site {key[1]} before the PRR of part "
+                               f"{self.open_parts[key].p_id}; emitting that part without a PRR")
+                self._emit(self.open_parts.pop(key))
+            self.part_count += 1
+            w_id, wafer = self._wafer(key[0])
+            self.open_parts[key] = Part(self.part_count, w_id, key[0], key[1], wafer, stdf_processed_entry)
+            self._link = {'w_id': w_id, 'p_id': self.part_count}
+
+        elif record_type == 'PRR':
+            key = (stdf_processed_entry.get('head_num'), stdf_processed_entry.get('site_num'))
+            part = self.open_parts.pop(key, None)
+            if part is None:
+                # A PRR without a PIR still describes a part
+                self.part_count += 1
+                w_id, wafer = self._wafer(key[0])
+                part = Part(self.part_count, w_id, key[0], key[1], wafer, None)
+            part.prr = stdf_processed_entry
+            self._link = {'w_id': part.w_id, 'p_id': part.p_id}
+            self._emit(part)
+
+        elif record_type == 'WIR':
+            self.wafer_count += 1
+            self.wafers[stdf_processed_entry.get('head_num')] = (self.wafer_count, stdf_processed_entry)
+            self._link = {'w_id': self.wafer_count}
+
+        elif record_type == 'WRR':
+            w_id, _ = self.wafers.pop(stdf_processed_entry.get('head_num'), (None, None))
+            self._link = {'w_id': w_id}
+
+        else:
+            self._link = {}
+
+    def link(self) -> dict:
+        """Ids of the record appended last: w_id for wafer records, w_id and p_id for part records."""
+        return self._link
+
+    def _emit(self, part: Part) -> None:
+        for callback in self.callbacks:
+            callback(part)
+
+    def checkpoint(self) -> dict:
+        # Checkpoints are taken between parts: only the counters and open wafers carry over
+        return {'part_count': self.part_count, 'wafer_count': self.wafer_count,
+                'wafers': {head: [w_id, wafer] for head, (w_id, wafer) in self.wafers.items()}}
+
+    def close(self) -> None:
+        if self.open_parts:
+            logger.warning(f"{len(self.open_parts)} part(s) without a PRR at the end of the file")
+            for key in list(self.open_parts):
+                self._emit(self.open_parts.pop(key))
+        if self.orphan_results:
+            logger.warning(f"{self.orphan_results} test results outside of any part (no PIR on their head/site)")
+
+
+class PartTable:
+    """Part callback collecting one summary row per part, for the parts table of the database."""
+
+    def __init__(self):
+        self.rows = []
+
+    def __call__(self, part: Part) -> None:
+        self.rows.append(part.summary())
@@ -0,0 +1,208 @@
+# src/core/utils/progress.py
+"""Live progress of conversions: per-file reports from the workers, aggregated in the parent."""
+import json
+import logging
+import os
+import queue
+import threading
+import time
+from pathlib import Path
+from typing import Dict, List, Optional
+
+logger = logging.getLogger(__name__)
+
+# Seconds between two reports of a worker
+REPORT_INTERVAL = 1.0
+# Seconds between two progress lines (and progress file updates) of the parent
+PROGRESS_INTERVAL = 5.0
+# Records between two clock reads of a worker
+CHECK_EVERY = 1024
+
+
+def input_position(stdf_file) -> int:
+    """Bytes of the input file consumed so far (the compressed offset for gzip files)."""
+    raw_file = getattr(stdf_file, 'fileobj', None) or stdf_file
+    return raw_file.tell()
+
+
+def format_duration(seconds: Optional[float]) -> str:
+    if seconds is None:
+        return '--:--:--'
+    seconds = int(seconds)
+    return f"{seconds // 3600:02d}:{seconds % 3600 // 60:02d}:{seconds % 60:02d}"
+
+
+class ProgressReporter:
+    """
+    Worker side: sends the progress of one conversion to a queue every interval seconds.
+
+    update() is called for every record and only reads the clock every
+    CHECK_EVERY records, so it costs little more than a counter.
+    """
+
+    def __init__(self, progress_queue, input_file: str, interval: float = REPORT_INTERVAL):
+        self.queue = progress_queue
+        self.input_file = str(input_file)
+        self.total_bytes = os.path.getsize(input_file)
+        self.interval = interval
+        self.records = 0
+        self.start = time.monotonic()
+        self.last_report = self.start
+        self._countdown = CHECK_EVERY
+
+    def _send(self, stdf_file, record_type: Optional[str], state: str) -> None:
+        now = time.monotonic()
+        self.queue.put({
+            'file': self.input_file,
+            'state': state,
+            'bytes': input_position(stdf_file) if stdf_file is not None else self.total_bytes,
+            'total_bytes': self.total_bytes,
+            'records': self.records,
+            'record_type': record_type,
+            'elapsed': now - self.start,
+        })
+        self.last_report = now
+
+    def started(self, stdf_file) -> None:
+        self._send(stdf_file, None, 'running')
+
+    def update(self, stdf_file, record_type: Optional[str]) -> None:
+        self.records += 1
+        self._countdown -= 1
+        if self._countdown:
+            return
+        self._countdown = CHECK_EVERY
+        if time.monotonic() - self.last_report >= self.interval:
+            self._send(stdf_file, record_type, 'running')
+
+    def stage(self, stage: str) -> None:
+        """Report a stage after the record loop (e.g. 'database'), which sends no record updates."""
+        self._send(None, None, stage)
+
+    def finished(self, failed: bool = False) -> None:
+        self._send(None, None, 'failed' if failed else 'done')
+
+
+class ProgressMonitor:
+    """
+    Parent side: aggregates the reports of all workers.
+
+    Logs one line every interval seconds with the files done, bytes consumed
+    out of the total input size, records/s, an ETA and the file and record
+    type (or post-processing stage) of each file in progress; with
+    progress_file, the same state is written there as JSON (replaced
+    atomically). A file reading records whose last report is older than three
+    progress intervals is flagged as stalled.
+    """
+
+    def __init__(self, input_paths: List[Path], progress_file: Optional[str] = None,
+                 interval: float = PROGRESS_INTERVAL, use_processes: bool = False):
+        self.progress_file = progress_file
+        self.interval = interval
+        self.files = {str(path): {'state': 'queued', 'bytes': 0, 'total_bytes': os.path.getsize(path),
+                                  'records': 0, 'record_type': None, 'updated': None}
+                      for path in input_paths}
+        self.total_bytes = sum(state['total_bytes'] for state in self.files.values())
+        self._manager = None
+        if use_processes:
+            # A manager queue can be passed to pool workers as an argument
+            import multiprocessing
+            self._manager = multiprocessing.Manager()
+            self.queue = self._manager.Queue()
+        else:
+            self.queue = queue.Queue()
+        self._thread = None
+        self._stop = threading.Event()
+        self.start = None
+
+    def __enter__(self) -> 'ProgressMonitor':
+        self.start = time.monotonic()
+        self._thread = threading.Thread(target=self._run, name='progress-monitor', daemon=True)
+        self._thread.start()
+        return self
+
+    def __exit__(self, *exc_info) -> None:
+        self._stop.set()
+        self._thread.join()
+        self.report()
+        if self._manager is not None:
+            self._manager.shutdown()
+
+    def _drain(self, timeout: float) -> None:
+        try:
+            message = self.queue.get(timeout=timeout)
+        except (queue.Empty, EOFError, OSError):
+            return
+        while message is not None:
+            state = self.files.setdefault(message['file'], {'total_bytes': message['total_bytes']})
+            state.update(message)
+            state['updated'] = time.monotonic()
+            try:
+                message = self.queue.get_nowait()
+            except (queue.Empty, EOFError, OSError):
+                message = None
+
+    def _run(self) -> None:
+        next_report = time.monotonic() + self.interval
+        while not self._stop.is_set():
+            self._drain(min(self.interval, max(0.0, next_report - time.monotonic())) or 0.01)
+            if time.monotonic() >= next_report:
+                self.report()
+                next_report = time.monotonic() + self.interval
+        self._drain(0.01)
+
+    def summary(self) -> dict:
+        now = time.monotonic()
+        elapsed = now - self.start
+        finished = [state for state in self.files.values() if state['state'] in ('done', 'failed')]
+        bytes_done = sum(state['total_bytes'] if state['state'] in ('done', 'failed')
+                         else min(state['bytes'], state['total_bytes']) for state in self.files.values())
+        records = sum(state['records'] for state in self.files.values())
+        rate = bytes_done / elapsed if elapsed > 0 else 0.0
+        files = {}
+        for path, state in self.files.items():
+            idle = now - state['updated'] if state['updated'] is not None else None
+            files[path] = {
+                'state': state['state'],
+                'bytes': state['bytes'],
+                'total_bytes': state['total_bytes'],
+                'fraction': state['bytes'] / state['total_bytes'] if state['total_bytes'] else 1.0,
+                'records': state['records'],
+                'record_type': state['record_type'],
+                'seconds_since_update': idle,
+                'stalled': state['state'] == 'running' and idle is not None and idle > 3 * self.interval,
+            }
+        return {
+            'updated': time.strftime('%Y-%m-%dT%H:%M:%S'),
+            'elapsed': elapsed,
+            'files_total': len(self.files),
+            'files_done': len(finished),
+            'files_failed': sum(state['state'] == 'failed' for state in finished),
+            'bytes_total': self.total_bytes,
+            'bytes_done': bytes_done,
+            'fraction': bytes_done / self.total_bytes if self.total_bytes else 1.0,
+            'records': records,
+            'records_per_s': records / elapsed if elapsed > 0 else 0.0,
+            'bytes_per_s': rate,
+            'eta_s': (self.total_bytes - bytes_done) / rate if rate > 0 else None,
+            'files': files,
+        }
+
+    def report(self) -> Dict:
+        summary = self.summary()
+        active = [(path, state) for path, state in summary['files'].items()
+                  if state['state'] not in ('queued', 'done', 'failed')]
+        current = ', '.join(f"{Path(path).name} {state['fraction']:.0%}"
+                            f"{' ' + state['record_type'] if state['state'] == 'running' and state['record_type'] else ''}"
+                            f"{'' if state['state'] == 'running' else ' ' + state['state']}"
+                            f"{' STALLED' if state['stalled'] else ''}" for path, state in active)
+        logger.info(f"Progress: {summary['files_done']}/{summary['files_total']} files, "
+                    f"{summary['fraction']:.1%} of {summary['bytes_total'] / 1e6:.1f} MB, "
+                    f"{summary['records_per_s']:,.0f} records/s, ETA {format_duration(summary['eta_s'])}"
+                    f"{' | ' + current if current else ''}")
+        if self.progress_file:
+            temporary = f"{self.progress_file}.tmp"
+            with open(temporary, 'w') as f:
+                json.dump(summary, f, indent=1)
+            os.replace(temporary, self.progress_file)
+        return summary
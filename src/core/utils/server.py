@@ -0,0 +1,300 @@
+# src/core/utils/server.py
+"""
+Local conversion service: an asyncio server dispatching jobs to a warm process pool.
+
+Protocol: newline-delimited JSON over a Unix socket or a localhost TCP port.
+Each request line is an object such as
+
+    {"id": 1, "op": "convert", "path": "lot.stdf", "outputs": ["output", "database"],
+     "records": ["PIR", "PRR"], "preprocessor": null}
+    {"id": 2, "op": "query", "path": "lot.stdf", "records": ["PTR"],
+     "fields": ["test_num", "result"], "limit": 1000, "filter": "site=0"}
+
+and is answered by event lines carrying the same id: "accepted" (with the job
+id and whether it was merged into an identical job already running),
+"progress" (job state changes), then "result" (record counts of a
+conversion) or "rows" batches (a query), and finally "done" or "error".
+Requests on one connection run concurrently.
+"""
+import asyncio
+import itertools
+import json
+import logging
+import os
+import signal
+import socket
+import stat
+import struct
+from pathlib import Path
+from typing import AsyncIterator, Dict, List, Optional
+
+from .manifest import options_key
+from .watch import convert_file, start_warm_pool
+
+logger = logging.getLogger(__name__)
+
+# Jobs one client may have running at once; further jobs wait
+MAX_JOBS_PER_CLIENT = 2
+# Rows per "rows" event of a query
+ROWS_PER_EVENT = 1000
+OUTPUTS = ('output', 'database', 'columns', 'matrix', 'stats')
+
+
+def query_file(path: str, records: Optional[List[str]], fields, limit: Optional[int],
+               filter_expression: Optional[str] = None) -> Dict[str, list]:
+    """
+    Worker task: decode the requested records and fields into JSON-ready rows per record type.
+
+    Records are streamed, so with a limit the file is only read until every
+    requested record type has limit rows.
+    """
+    from src.converter import iter_records
+    wanted = set(records) if records else None
+    rows = {}
+    full = set()
+    entries = iter_records(path, records=records, fields=fields, filter_expression=filter_expression)
+    try:
+        for record_type, entry in entries:
+            record_rows = rows.setdefault(record_type, [])
+            if limit is None or len(record_rows) < limit:
+                record_rows.append(entry)
+            if wanted and limit is not None and len(record_rows) >= limit:
+                full.add(record_type)
+                if full >= wanted:
+                    break
+    finally:
+        entries.close()
+    return rows
+
+
+def json_default(value):
+    """Serialize NumPy scalars and anything else json cannot."""
+    return value.item() if hasattr(value, 'item') else str(value)
+
+
+class Job:
+    """One unit of work; every request merged into it receives all of its events."""
+
+    def __init__(self, job_id: int, key: str):
+        self.job_id = job_id
+        self.key = key
+        self.events = []
+        self.finished = False
+        self._changed = asyncio.Condition()
+
+    async def publish(self, event: dict, final: bool = False) -> None:
+        async with self._changed:
+            self.events.append(event)
+            self.finished = self.finished or final
+            self._changed.notify_all()
+
+    async def follow(self) -> AsyncIterator[dict]:
+        """Yield every event from the first, waiting for new ones until the job has finished."""
+        index = 0
+        while True:
+            async with self._changed:
+                await self._changed.wait_for(lambda: index < len(self.events) or self.finished)
+                pending = self.events[index:]
+                finished = self.finished
+            for event in pending:
+                yield event
+            index += len(pending)
+            if finished and index == len(self.events):
+                return
+
+
+class ConversionServer:
+    """
+    Accepts convert and query requests and runs them on a persistent, pre-warmed process pool.
+
+    Identical requests (same operation, file, file size and mtime, outputs,
+    record filter and projection) arriving while a job runs are merged into
+    it. Each client (the "client" field of a request, else the peer process
+    on a Unix socket, else the connection) runs at most max_per_client jobs
+    at once.
+    """
+
+    def __init__(self, max_workers: Optional[int] = None, max_per_client: int = MAX_JOBS_PER_CLIENT,
+                 conversion_options: Optional[dict] = None):
+        self.max_workers = max_workers or max(1, (os.cpu_count() or 2) // 2)
+        self.max_per_client = max_per_client
+        self.conversion_options = conversion_options or {}
+        self.executor = None
+        self.jobs = {}
+        self.client_limits = {}
+        self._job_ids = itertools.count(1)
+        self._connection_ids = itertools.count(1)
+
+    def _client_limit(self, client: str) -> asyncio.Semaphore:
+        limit = self.client_limits.get(client)
+        if limit is None:
+            limit = self.client_limits[client] = asyncio.Semaphore(self.max_per_client)
+        return limit
+
+    @staticmethod
+    def job_key(request: dict) -> str:
+        path = Path(request['path']).resolve()
+        file_stat = path.stat()
+        return options_key({
+            'op': request['op'], 'path': str(path), 'size': file_stat.st_size, 'mtime_ns': file_stat.st_mtime_ns,
+            'outputs': sorted(request.get('outputs') or []), 'records': sorted(request.get('records') or []),
+            'fields': request.get('fields'), 'limit': request.get('limit'),
+            'preprocessor': request.get('preprocessor'), 'filter': request.get('filter'),
+        })
+
+    async def _run_job(self, job: Job, request: dict, client: str) -> None:
+        loop = asyncio.get_running_loop()
+        try:
+            await job.publish({'event': 'progress', 'state': 'queued'})
+            async with self._client_limit(client):
+                await job.publish({'event': 'progress', 'state': 'running'})
+                if request['op'] == 'convert':
+                    options = dict(self.conversion_options)
+                    options.update({output: output in (request.get('outputs') or []) for output in OUTPUTS})
+                    options.update(records=request.get('records'), preprocessor_type=request.get('preprocessor'),
+                                   filter_expression=request.get('filter'))
+                    counts = await loop.run_in_executor(self.executor, convert_file, Path(request['path']), options)
+                    await job.publish({'event': 'result', 'records': counts})
+                else:
+                    rows = await loop.run_in_executor(self.executor, query_file, request['path'],
+                                                      request.get('records'), request.get('fields'),
+                                                      request.get('limit'), request.get('filter'))
+                    for record_type, record_rows in rows.items():
+                        for start in range(0, len(record_rows), ROWS_PER_EVENT):
+                            await job.publish({'event': 'rows', 'record_type': record_type,
+                                               'rows': record_rows[start:start + ROWS_PER_EVENT]})
+            await job.publish({'event': 'done'}, final=True)
+        except Exception as e:
+            logger.error(f"Job {job.job_id} failed: {e}")
+            await job.publish({'event': 'error', 'message': str(e)}, final=True)
+        finally:
+            self.jobs.pop(job.key, None)
+
+    async def _handle_request(self, request: dict, client: str, send) -> None:
+        request_id = request.get('id')
+        try:
+            if request.get('op') not in ('convert', 'query'):
+                raise ValueError(f"Unknown op {request.get('op')!r}")
+            key = self.job_key(request)
+        except Exception as e:
+            await send({'id': request_id, 'event': 'error', 'message': str(e)})
+            return
+
+        job = self.jobs.get(key)
+        merged = job is not None
+        if not merged:
+            job = self.jobs[key] = Job(next(self._job_ids), key)
+            asyncio.ensure_future(self._run_job(job, request, request.get('client', client)))
+        await send({'id': request_id, 'event': 'accepted', 'job': job.job_id, 'merged': merged})
+        async for event in job.follow():
+            await send({'id': request_id, 'job': job.job_id, **event})
+
+    def _peer(self, writer) -> str:
+        sock = writer.get_extra_info('socket')
+        if sock is not None and sock.family == getattr(socket, 'AF_UNIX', None) and hasattr(socket, 'SO_PEERCRED'):
+            pid, _, _ = struct.unpack('3i', sock.getsockopt(socket.SOL_SOCKET, socket.SO_PEERCRED,
+                                                            struct.calcsize('3i')))
+            return f"pid:{pid}"
+        return f"connection:{next(self._connection_ids)}"
+
+    async def handle_connection(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter) -> None:
+        client = self._peer(writer)
+        write_lock = asyncio.Lock()
+        tasks = []
+
+        async def send(event: dict) -> None:
+            async with write_lock:
+                writer.write(json.dumps(event, default=json_default).encode() + b'\n')
+                await writer.drain()
+
+        try:
+            while True:
+                line = await reader.readline()
+                if not line:
+                    break
+                try:
+                    request = json.loads(line)
+                except json.JSONDecodeError as e:
+                    await send({'event': 'error', 'message': f"Invalid request: {e}"})
+                    continue
+                tasks.append(asyncio.ensure_future(self._handle_request(request, client, send)))
+            await asyncio.gather(*tasks)
+        except (ConnectionError, asyncio.CancelledError):
+            for task in tasks:
+                task.cancel()
+        finally:
+            writer.close()
+
+    async def serve(self, socket_path: Optional[str] = None, host: str = '127.0.0.1',
+                    port: Optional[int] = None) -> None:
+        """
+        Serve on socket_path (Unix socket) or on host:port until cancelled or terminated.
+
+        A socket left at socket_path by a previous server is replaced; any other
+        file there raises FileExistsError.
+        """
+        try:
+            # SIGTERM stops the server like Ctrl+C so the pool's workers are shut down too
+            asyncio.get_running_loop().add_signal_handler(signal.SIGTERM, asyncio.current_task().cancel)
+        except (NotImplementedError, RuntimeError):
+            pass
+        if socket_path and os.path.exists(socket_path):
+            # Only a socket left by a previous server is replaced, never another file
+            if not stat.S_ISSOCK(os.stat(socket_path).st_mode):
+                raise FileExistsError(f"{socket_path} exists and is not a socket")
+            os.unlink(socket_path)
+        self.executor = start_warm_pool(self.max_workers)
+        if socket_path:
+            server = await asyncio.start_unix_server(self.handle_connection, path=socket_path)
+            logger.info(f"Serving on {socket_path} with {self.max_workers} workers")
+        else:
+            server = await asyncio.start_server(self.handle_connection, host=host, port=port)
+            logger.info(f"Serving on {host}:{server.sockets[0].getsockname()[1]} with {self.max_workers} workers")
+        try:
+            async with server:
+                await server.serve_forever()
+        finally:
+            self.executor.shutdown(wait=True)
+            if socket_path and os.path.exists(socket_path):
+                os.unlink(socket_path)
+
+
+async def submit(request: dict, socket_path: Optional[str] = None, host: str = '127.0.0.1',
+                 port: Optional[int] = None) -> AsyncIterator[dict]:
+    """Client helper: send one request and yield its events until "done" or "error"."""
+    if socket_path:
+        reader, writer = await asyncio.open_unix_connection(socket_path)
+    else:
+        reader, writer = await asyncio.open_connection(host, port)
+    try:
+        writer.write(json.dumps(request).encode() + b'\n')
+        await writer.drain()
+        while True:
+            line = await reader.readline()
+            if not line:
+                return
+            event = json.loads(line)
+            yield event
+            if event['event'] in ('done', 'error'):
+                return
+    finally:
+        writer.close()
+
+
+def request_job(request: dict, **address) -> List[dict]:
+    """Blocking client helper: all events of one request."""
+    async def collect():
+        return [event async for event in submit(request, **address)]
+    return asyncio.run(collect())
+
+
+def run_server(socket_path: Optional[str] = None, port: Optional[int] = None, **server_options) -> int:
+    """Run a ConversionServer until interrupted; returns the exit code."""
+    try:
+        asyncio.run(ConversionServer(**server_options).serve(socket_path=socket_path, port=port))
+    except FileExistsError as e:
+        logger.error(str(e))
+        return 1
+    except (KeyboardInterrupt, asyncio.CancelledError):
+        logger.info("Server stopped")
+    return 0
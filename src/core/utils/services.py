@@ -1,20 +1,24 @@
 # src/services.py
 import os
-import psutil
 from concurrent.futures import ProcessPoolExecutor, as_completed
 from pathlib import Path
-from typing import Optional, List
+from typing import Callable, Dict, Optional, List
 from src.converter import run_conversion
+from src.core.utils.checkpoint import checkpoint_path
+from src.core.utils.progress import ProgressMonitor
 import logging
 
 logger = logging.getLogger(__name__)
 
 def calculate_optimal_workers(file_count: int, max_workers: Optional[int] = None) -> int:
     """Calculate optimal number of workers based on system resources and file count."""
+    if file_count <= 1:
+        return 1
+    import psutil
     cpu_count = os.cpu_count() or 1
     available_memory = psutil.virtual_memory().available
     reserved_cpus = max(1, cpu_count // 4)
-    max_cpus = cpu_count - reserved_cpus
+    max_cpus = max(1, cpu_count - reserved_cpus)
 
     estimated_memory_per_process = 500 * 1024 * 1024
     max_processes_by_memory = available_memory // (estimated_memory_per_process * 2)
@@ -47,12 +51,56 @@ def process_files(input_paths: List[Path],
                   database: bool = False,
                   records: Optional[List[str]] = None,
                   max_workers: Optional[int] = None,
-                  preprocessor_type: Optional[str] = None) -> List[dict]: # Changed return type
-    """Process multiple STDF files in parallel."""
+                  preprocessor_type: Optional[str] = None,
+                  columns: bool = False,
+                  matrix: bool = False,
+                  stats: bool = False,
+                  on_file_complete: Optional[Callable[[Path, dict], None]] = None,
+                  progress: bool = False,
+                  progress_file: Optional[str] = None,
+                  database_file: Optional[str] = None,
+                  **conversion_options) -> List[dict]: # Changed return type
+    """
+    Process multiple STDF files in parallel.
+
+    on_file_complete, if given, is called in the parent process with the input
+    path and result of every successfully converted file as soon as it finishes.
+    With progress (or progress_file), workers report their progress and the
+    parent logs an aggregate progress line with an ETA, and writes it as JSON
+    to progress_file.
+    With database_file, the database rows of every file are appended to that
+    single database by one writer process instead of a .db per file.
+    Additional keyword arguments (e.g. memory_budget) are forwarded to run_conversion.
+    """
     workers = calculate_optimal_workers(len(input_paths), max_workers)
+    if progress or progress_file:
+        with ProgressMonitor(input_paths, progress_file, use_processes=workers > 1) as monitor:
+            return process_files(input_paths, output, database, records, workers, preprocessor_type, columns,
+                                 matrix, stats, on_file_complete, progress_queue=monitor.queue,
+                                 database_file=database_file, **conversion_options)
+    if database_file:
+        from .consolidated import DatabaseWriter
+        with DatabaseWriter(database_file) as writer:
+            return process_files(input_paths, output, False, records, workers, preprocessor_type, columns,
+                                 matrix, stats, on_file_complete, database_queue=writer.queue,
+                                 **conversion_options)
+
     logger.info(f"Processing {len(input_paths)} files using {workers} workers")
     results_list = [] # Initialize list to store results
 
+    if workers == 1:
+        # No pool: spares spawning a worker and pickling the results back
+        for input_path in input_paths:
+            try:
+                result_dict = process_single_file(input_path, output, database, records, preprocessor_type,
+                                                  columns=columns, matrix=matrix, stats=stats, **conversion_options)
+                results_list.append(result_dict)
+                if on_file_complete:
+                    on_file_complete(input_path, result_dict)
+            except Exception as e:
+                logger.error(f"Failed to process {input_path}: {str(e)}")
+        return results_list
+
     with ProcessPoolExecutor(max_workers=workers) as executor:
         future_to_path = {
             executor.submit(
@@ -61,7 +109,11 @@ def process_files(input_paths: List[Path],
                 output,
                 database,
                 records,
-                preprocessor_type
+                preprocessor_type,
+                columns=columns,
+                matrix=matrix,
+                stats=stats,
+                **conversion_options
             ): input_path
             for input_path in input_paths
         }
@@ -73,6 +125,8 @@ def process_files(input_paths: List[Path],
                 # Get the dictionary returned by process_single_file
                 result_dict = future.result()
                 results_list.append(result_dict) # Add it to our list
+                if on_file_complete:
+                    on_file_complete(input_path, result_dict)
                 completed += 1
                 if completed % workers == 0:
                     logger.info(f"Processed {completed}/{len(input_paths)} files")
@@ -83,25 +137,68 @@ def process_files(input_paths: List[Path],
     return results_list # Return the list of dictionaries
 
 
+def get_output_paths(input_file: Path,
+                     output: bool = False,
+                     database: bool = False,
+                     columns: bool = False,
+                     matrix: bool = False,
+                     stats: bool = False,
+                     checkpoint: bool = False,
+                     metrics: bool = False,
+                     unknown: bool = False,
+                     quarantine: bool = False) -> Dict[str, Optional[str]]:
+    """Output paths derived from the input filename for each requested output (None if not requested)."""
+    return {
+        'output': str(input_file.with_suffix('.atdf')) if output else None,
+        'database': str(input_file.with_suffix('.db')) if database else None,
+        'columns': str(input_file.with_suffix('.cols')) if columns else None,
+        # Prefix of <stem>.matrix.npy, <stem>.parts.npy and <stem>.tests.npy
+        'matrix': str(input_file.with_suffix('')) if matrix else None,
+        'stats': str(input_file.with_suffix('.stats.json')) if stats else None,
+        'checkpoint': checkpoint_path(str(input_file)) if checkpoint else None,
+        'metrics': str(input_file.with_suffix('.metrics.json')) if metrics else None,
+        # Not .stdf, so directory runs do not pick the sidecar up as an input
+        'unknown': str(input_file.with_suffix('.unknown.bin')) if unknown else None,
+        'quarantine': str(input_file.with_suffix('.quarantine.json')) if quarantine else None,
+    }
+
+
 def process_single_file(input_file: Path,
                         output: bool = False, # Changed from Optional[Path]
                         database: bool = False, # Changed from Optional[Path]
                         records: Optional[List[str]] = None,
-                        preprocessor_type: Optional[str] = None) -> dict: # Changed return type
+                        preprocessor_type: Optional[str] = None,
+                        columns: bool = False,
+                        matrix: bool = False,
+                        stats: bool = False,
+                        checkpoint: bool = False,
+                        metrics: bool = False,
+                        unknown: bool = False,
+                        quarantine: bool = False,
+                        **conversion_options) -> dict: # Changed return type
     """Process a single STDF file."""
     processed_data = {} # Initialize return value
     try:
         # Determine output paths based on boolean flags
-        output_file_path = input_file.with_suffix('.atdf') if output else None
-        database_file_path = input_file.with_suffix('.db') if database else None
+        paths = get_output_paths(input_file, output, database, columns, matrix, stats, checkpoint, metrics, unknown,
+                                 quarantine)
 
         # Call run_conversion and capture the returned dictionary
         processed_data = run_conversion(
             str(input_file),
-            str(output_file_path) if output_file_path else None,
-            str(database_file_path) if database_file_path else None,
+            paths['output'],
+            paths['database'],
             records,
-            preprocessor_type
+            preprocessor_type,
+            output_column_store=paths['columns'],
+            output_matrix=paths['matrix'],
+            output_stats=paths['stats'],
+            checkpoint_file=paths['checkpoint'],
+            output_metrics=paths['metrics'],
+            collect_metrics=metrics,
+            output_unknown=paths['unknown'],
+            output_quarantine=paths['quarantine'],
+            **conversion_options
         )
         logger.info(f"Successfully processed {input_file}")
 
@@ -5,6 +5,7 @@ import struct
 from typing import Dict, List, Optional, Any, Tuple
 from .files import is_file
 from .templates import get_record_types
+from .spill import SpillStore, SpillingRecordEntries
 
 logger = logging.getLogger(__name__)
 
@@ -15,8 +16,10 @@ def validate_input_file(input_stdf_file: str) -> None:
         logger.error(message)
         raise ValueError(message)
 
-def initialize_record_entries() -> Dict[str, list]:
-    """Initialize record lists for each record type."""
+def initialize_record_entries(spill_store: Optional[SpillStore] = None) -> Dict[str, list]:
+    """Initialize record lists for each record type, spilling to disk if a store is given."""
+    if spill_store is not None:
+        return SpillingRecordEntries(get_record_types(), spill_store)
     return {record_type: [] for record_type in get_record_types()}
 
 def setup_record_flags(records_to_process: Optional[List[str]]) -> Dict[str, bool]:
@@ -0,0 +1,301 @@
+# src/core/utils/spill.py
+"""Spill-to-disk storage for processed record entries under a memory budget."""
+import logging
+import os
+import pickle
+import sqlite3
+import sys
+import tempfile
+import weakref
+from collections.abc import Sequence
+from typing import Dict, Iterable, List, Optional
+
+logger = logging.getLogger(__name__)
+
+# Entries per on-disk chunk; also the size of the in-memory tail of a spilled list
+SPILL_CHUNK_SIZE = 10_000
+# Number of appends between two memory estimates
+CHECK_INTERVAL = 4096
+# Number of entries sampled per list when estimating its footprint
+SIZE_SAMPLE = 16
+
+
+def estimate_entry_size(entry: dict) -> int:
+    """Roughly estimate the in-memory footprint of one processed entry in bytes."""
+    size = sys.getsizeof(entry)
+    for value in entry.values():
+        size += sys.getsizeof(value)
+    return size
+
+
+def estimate_list_size(entries: list) -> int:
+    """Estimate the footprint of a list of entries from an evenly spaced sample."""
+    count = len(entries)
+    if not count:
+        return 0
+    step = max(1, count // SIZE_SAMPLE)
+    sample = entries[::step][:SIZE_SAMPLE]
+    average = sum(estimate_entry_size(entry) for entry in sample) / len(sample)
+    return int(average * count) + sys.getsizeof(entries)
+
+
+def _remove_file(path: str) -> None:
+    try:
+        os.remove(path)
+    except OSError:
+        pass
+
+
+class SpillStore:
+    """
+    Temporary SQLite database holding spilled record lists in pickled chunks.
+
+    The store owns its file: it is removed once the store and every list
+    referencing it are garbage collected. Pickling a store (e.g. when a worker
+    returns its results to the parent process) hands ownership of the file to
+    the unpickled copy.
+    """
+
+    def __init__(self, memory_budget: int, spill_dir: Optional[str] = None):
+        self.memory_budget = memory_budget
+        fd, self.path = tempfile.mkstemp(prefix='stdf2atdf_spill_', suffix='.db', dir=spill_dir)
+        os.close(fd)
+        self._finalizer = weakref.finalize(self, _remove_file, self.path)
+        self._connection = None
+        self._tracked = []
+        self._appends = 0
+        self._next_list_id = 0
+        self.spilled_bytes = 0
+
+    def __getstate__(self):
+        self.commit()
+        self._finalizer.detach()
+        return {'memory_budget': self.memory_budget, 'path': self.path,
+                'next_list_id': self._next_list_id, 'spilled_bytes': self.spilled_bytes}
+
+    def __setstate__(self, state):
+        self.memory_budget = state['memory_budget']
+        self.path = state['path']
+        self._finalizer = weakref.finalize(self, _remove_file, self.path)
+        self._connection = None
+        self._tracked = []
+        self._appends = 0
+        self._next_list_id = state['next_list_id']
+        self.spilled_bytes = state['spilled_bytes']
+
+    @property
+    def connection(self) -> sqlite3.Connection:
+        if self._connection is None:
+            self._connection = sqlite3.connect(self.path)
+            self._connection.execute('PRAGMA journal_mode=OFF')
+            self._connection.execute('PRAGMA synchronous=OFF')
+            self._connection.execute(
+                'CREATE TABLE IF NOT EXISTS chunks ('
+                'list_id INTEGER, chunk_index INTEGER, payload BLOB, '
+                'PRIMARY KEY (list_id, chunk_index))'
+            )
+        return self._connection
+
+    def commit(self) -> None:
+        if self._connection is not None:
+            self._connection.commit()
+
+    def close(self) -> None:
+        """Close the connection; the file itself lives as long as the store."""
+        if self._connection is not None:
+            self._connection.commit()
+            self._connection.close()
+            self._connection = None
+
+    def new_list_id(self) -> int:
+        self._next_list_id += 1
+        return self._next_list_id
+
+    def write_chunk(self, list_id: int, chunk_index: int, entries: list) -> None:
+        payload = pickle.dumps(entries, protocol=pickle.HIGHEST_PROTOCOL)
+        self.spilled_bytes += len(payload)
+        self.connection.execute(
+            'INSERT OR REPLACE INTO chunks (list_id, chunk_index, payload) VALUES (?, ?, ?)',
+            (list_id, chunk_index, payload)
+        )
+
+    def read_chunk(self, list_id: int, chunk_index: int) -> list:
+        row = self.connection.execute(
+            'SELECT payload FROM chunks WHERE list_id = ? AND chunk_index = ?',
+            (list_id, chunk_index)
+        ).fetchone()
+        if row is None:
+            raise IndexError(f"Spilled chunk {chunk_index} of list {list_id} is missing")
+        return pickle.loads(row[0])
+
+    def delete_list(self, list_id: int) -> None:
+        self.connection.execute('DELETE FROM chunks WHERE list_id = ?', (list_id,))
+
+    def track(self, owner: dict, record_type: str) -> None:
+        """Register owner[record_type] as an in-memory list counted against the budget."""
+        self._tracked.append((owner, record_type))
+
+    def note_append(self) -> None:
+        self._appends += 1
+        if self._appends >= CHECK_INTERVAL:
+            self._appends = 0
+            self.enforce_budget()
+
+    def enforce_budget(self) -> None:
+        """Spill the largest in-memory lists until the estimate is back under budget."""
+        sizes = []
+        for owner, record_type in self._tracked:
+            entries = owner[record_type]
+            if isinstance(entries, _TrackedList) and entries:
+                sizes.append((estimate_list_size(entries), owner, record_type))
+
+        total = sum(size for size, _, _ in sizes)
+        if total <= self.memory_budget:
+            return
+
+        # Spill down to half the budget so the next check does not immediately spill again
+        target = self.memory_budget // 2
+        for size, owner, record_type in sorted(sizes, key=lambda item: item[0], reverse=True):
+            if total <= target:
+                break
+            entries = owner[record_type]
+            spilled = SpilledList(self)
+            spilled.extend(entries)
+            entries.clear()
+            owner[record_type] = spilled
+            total -= size
+            logger.info(f"Spilled {len(spilled)} {record_type} entries (~{size // (1024 * 1024)} MB) to {self.path}")
+        self.commit()
+
+
+class _TrackedList(list):
+    """In-memory entry list that reports appends to its spill store."""
+    __slots__ = ('_store',)
+
+    def __init__(self, store: SpillStore):
+        super().__init__()
+        self._store = store
+
+    def append(self, entry) -> None:
+        super().append(entry)
+        self._store.note_append()
+
+    def __reduce__(self):
+        return list, (list(self),)
+
+
+class SpilledList(Sequence):
+    """
+    Lazy, list-like view over entries spilled to a SpillStore.
+
+    Entries are written in fixed-size chunks; only the unfinished tail and the
+    most recently read chunk are held in memory. Supports len(), indexing,
+    slicing, iteration and further appends.
+    """
+
+    def __init__(self, store: SpillStore, chunk_size: int = SPILL_CHUNK_SIZE):
+        self._store = store
+        self._list_id = store.new_list_id()
+        self._chunk_size = chunk_size
+        self._chunk_count = 0
+        self._tail = []
+        self._cached_index = None
+        self._cached_chunk = None
+
+    def __getstate__(self):
+        state = self.__dict__.copy()
+        state['_cached_index'] = None
+        state['_cached_chunk'] = None
+        return state
+
+    def append(self, entry) -> None:
+        self._tail.append(entry)
+        if len(self._tail) >= self._chunk_size:
+            self._flush_tail()
+
+    def extend(self, entries: Iterable) -> None:
+        for entry in entries:
+            self.append(entry)
+
+    def _flush_tail(self) -> None:
+        self._store.write_chunk(self._list_id, self._chunk_count, self._tail)
+        self._chunk_count += 1
+        self._tail = []
+
+    def _chunk(self, chunk_index: int) -> list:
+        if chunk_index != self._cached_index:
+            self._cached_chunk = self._store.read_chunk(self._list_id, chunk_index)
+            self._cached_index = chunk_index
+        return self._cached_chunk
+
+    def __len__(self) -> int:
+        return self._chunk_count * self._chunk_size + len(self._tail)
+
+    def __getitem__(self, index):
+        if isinstance(index, slice):
+            return [self[i] for i in range(*index.indices(len(self)))]
+
+        length = len(self)
+        if index < 0:
+            index += length
+        if not 0 <= index < length:
+            raise IndexError('SpilledList index out of range')
+
+        chunk_index, position = divmod(index, self._chunk_size)
+        if chunk_index < self._chunk_count:
+            return self._chunk(chunk_index)[position]
+        return self._tail[position]
+
+    def __iter__(self):
+        for chunk_index in range(self._chunk_count):
+            # Read chunks directly so a full iteration does not pin the cache
+            yield from self._store.read_chunk(self._list_id, chunk_index)
+        yield from list(self._tail)
+
+    def release(self) -> None:
+        """Drop all entries, including the spilled chunks on disk."""
+        self._store.delete_list(self._list_id)
+        self._chunk_count = 0
+        self._tail = []
+        self._cached_index = None
+        self._cached_chunk = None
+
+    def __repr__(self) -> str:
+        return f"<SpilledList of {len(self)} entries in {self._chunk_count} chunks>"
+
+
+class SpillingRecordEntries(dict):
+    """Record entry dict whose per-record-type lists spill to disk under a memory budget."""
+
+    def __init__(self, record_types: List[str], store: SpillStore):
+        super().__init__()
+        self.store = store
+        for record_type in record_types:
+            self[record_type] = _TrackedList(store)
+            store.track(self, record_type)
+
+    def __reduce__(self):
+        return dict, (dict(self),)
+
+    def release(self) -> None:
+        """Drop all entries, freeing both memory and spilled chunks."""
+        for record_type, entries in self.items():
+            if isinstance(entries, SpilledList):
+                entries.release()
+            else:
+                entries.clear()
+        self.store.commit()
+
+
+def create_spill_store(memory_budget: Optional[int], spill_dir: Optional[str] = None) -> Optional[SpillStore]:
+    """Create a spill store when a memory budget (in bytes) is configured."""
+    if not memory_budget:
+        return None
+    if memory_budget < 0:
+        raise ValueError(f"Memory budget must be positive, got {memory_budget}")
+    return SpillStore(memory_budget, spill_dir)
+
+
+def materialize(entries_by_type: Dict[str, Sequence]) -> Dict[str, list]:
+    """Return a plain dict of lists, reading any spilled entries back into memory."""
+    return {record_type: list(entries) for record_type, entries in entries_by_type.items()}
@@ -0,0 +1,78 @@
+# src/core/utils/startup.py
+"""
+Startup time budget of the command line tool.
+
+    python -m src.core.utils.startup [--repeat N]
+
+Times `python -m src --help` and the ATDF conversion of a minimal STDF file
+(FAR, MIR, MRR) in fresh interpreters, reports the best of N runs and exits
+non-zero when either exceeds its budget.
+"""
+import argparse
+import os
+import struct
+import subprocess
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+# Seconds, best of the repeated runs
+STARTUP_BUDGETS = {
+    'help': 0.3,
+    'minimal_atdf': 0.5,
+}
+PROJECT_ROOT = Path(__file__).resolve().parents[3]
+
+
+def write_minimal_stdf(path: Path) -> None:
+    """FAR, an empty MIR (times and codes only) and an MRR, little-endian."""
+    def record(rec_typ: int, rec_sub: int, payload: bytes) -> bytes:
+        return struct.pack('<HBB', len(payload), rec_typ, rec_sub) + payload
+
+    mir = struct.pack('<IIB', 0, 0, 1) + b'P' + b' ' + b' ' + struct.pack('<H', 65535) + b' '
+    with open(path, 'wb') as f:
+        f.write(record(0, 10, bytes([2, 4])))
+        f.write(record(1, 10, mir))
+        f.write(record(1, 20, struct.pack('<I', 0)))
+
+
+def best_time(command: list, repeat: int, directory: str) -> float:
+    # Run from the scratch directory (the tool writes its log to the working directory)
+    env = dict(os.environ, PYTHONPATH=str(PROJECT_ROOT))
+    best = None
+    for _ in range(repeat):
+        start = time.perf_counter()
+        subprocess.run(command, cwd=directory, env=env, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL,
+                       check=True)
+        elapsed = time.perf_counter() - start
+        best = elapsed if best is None else min(best, elapsed)
+    return best
+
+
+def measure_startup(repeat: int = 5) -> dict:
+    with tempfile.TemporaryDirectory() as directory:
+        stdf_path = Path(directory) / 'minimal.stdf'
+        write_minimal_stdf(stdf_path)
+        return {
+            'help': best_time([sys.executable, '-m', 'src', '--help'], repeat, directory),
+            'minimal_atdf': best_time([sys.executable, '-m', 'src', str(stdf_path), '--output'], repeat, directory),
+        }
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description='Check the startup time budget')
+    parser.add_argument('--repeat', type=int, default=5, help='Runs per command; the best is kept (default: 5)')
+    args = parser.parse_args()
+
+    over_budget = False
+    for name, elapsed in measure_startup(args.repeat).items():
+        budget = STARTUP_BUDGETS[name]
+        status = 'ok' if elapsed <= budget else 'OVER BUDGET'
+        over_budget = over_budget or elapsed > budget
+        print(f"{name:<14} {elapsed * 1000:7.1f} ms  (budget {budget * 1000:.0f} ms)  {status}")
+    return 1 if over_budget else 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,339 @@
+# src/core/utils/stats.py
+"""Single-pass, mergeable per-test statistics over PTR results."""
+import json
+import logging
+import math
+from typing import Iterable, List, Optional
+
+logger = logging.getLogger(__name__)
+
+STATS_VERSION = 1
+# Relative accuracy of the quantile sketch (values are reported within +/-1%)
+RELATIVE_ACCURACY = 0.01
+QUANTILES = (0.01, 0.05, 0.25, 0.5, 0.75, 0.95, 0.99)
+# Magnitudes below this are counted in the sketch's zero bucket
+MIN_INDEXABLE = 1e-30
+
+
+class QuantileSketch:
+    """
+    Logarithmic-bucket quantile sketch (DDSketch style).
+
+    Every value falls in a bucket whose bounds differ by a factor gamma, so
+    quantiles are returned with a bounded relative error. Bucket counts simply
+    add up, which makes merging exact and order independent.
+    """
+
+    def __init__(self, relative_accuracy: float = RELATIVE_ACCURACY):
+        self.relative_accuracy = relative_accuracy
+        self.gamma = (1 + relative_accuracy) / (1 - relative_accuracy)
+        self._log_gamma = math.log(self.gamma)
+        self.positive = {}
+        self.negative = {}
+        self.zero_count = 0
+        self.count = 0
+
+    def _index(self, magnitude: float) -> int:
+        return math.ceil(math.log(magnitude) / self._log_gamma)
+
+    def _value(self, index: int) -> float:
+        return 2 * self.gamma ** index / (self.gamma + 1)
+
+    def add(self, value: float) -> None:
+        if value > MIN_INDEXABLE:
+            index = self._index(value)
+            self.positive[index] = self.positive.get(index, 0) + 1
+        elif value < -MIN_INDEXABLE:
+            index = self._index(-value)
+            self.negative[index] = self.negative.get(index, 0) + 1
+        else:
+            self.zero_count += 1
+        self.count += 1
+
+    def merge(self, other: 'QuantileSketch') -> None:
+        if other.relative_accuracy != self.relative_accuracy:
+            raise ValueError("Cannot merge quantile sketches with different accuracies")
+        for index, count in other.positive.items():
+            self.positive[index] = self.positive.get(index, 0) + count
+        for index, count in other.negative.items():
+            self.negative[index] = self.negative.get(index, 0) + count
+        self.zero_count += other.zero_count
+        self.count += other.count
+
+    def quantile(self, q: float) -> Optional[float]:
+        if not self.count:
+            return None
+        rank = q * (self.count - 1)
+        seen = 0
+        for index in sorted(self.negative, reverse=True):
+            seen += self.negative[index]
+            if seen > rank:
+                return -self._value(index)
+        seen += self.zero_count
+        if seen > rank:
+            return 0.0
+        for index in sorted(self.positive):
+            seen += self.positive[index]
+            if seen > rank:
+                return self._value(index)
+        return self._value(max(self.positive)) if self.positive else 0.0
+
+    def to_dict(self) -> dict:
+        return {
+            'relative_accuracy': self.relative_accuracy,
+            'positive': {str(index): count for index, count in self.positive.items()},
+            'negative': {str(index): count for index, count in self.negative.items()},
+            'zero_count': self.zero_count,
+        }
+
+    @classmethod
+    def from_dict(cls, state: dict) -> 'QuantileSketch':
+        sketch = cls(state['relative_accuracy'])
+        sketch.positive = {int(index): count for index, count in state['positive'].items()}
+        sketch.negative = {int(index): count for index, count in state['negative'].items()}
+        sketch.zero_count = state['zero_count']
+        sketch.count = sketch.zero_count + sum(sketch.positive.values()) + sum(sketch.negative.values())
+        return sketch
+
+
+class RunningStats:
+    """Count, mean and variance (Welford), min/max, fail count and a quantile sketch for one test."""
+
+    def __init__(self, relative_accuracy: float = RELATIVE_ACCURACY):
+        self.count = 0
+        self.mean = 0.0
+        self.m2 = 0.0
+        self.minimum = math.inf
+        self.maximum = -math.inf
+        self.fails = 0
+        self.executions = 0
+        self.sketch = QuantileSketch(relative_accuracy)
+
+    def add(self, value: Optional[float], failed: bool) -> None:
+        self.executions += 1
+        if failed:
+            self.fails += 1
+        if value is None or not math.isfinite(value):
+            return
+        self.count += 1
+        delta = value - self.mean
+        self.mean += delta / self.count
+        self.m2 += delta * (value - self.mean)
+        if value < self.minimum:
+            self.minimum = value
+        if value > self.maximum:
+            self.maximum = value
+        self.sketch.add(value)
+
+    def merge(self, other: 'RunningStats') -> None:
+        """Combine with another partial state (Chan et al. parallel variance)."""
+        if other.count:
+            total = self.count + other.count
+            delta = other.mean - self.mean
+            self.m2 += other.m2 + delta * delta * self.count * other.count / total
+            self.mean += delta * other.count / total
+            self.count = total
+            self.minimum = min(self.minimum, other.minimum)
+            self.maximum = max(self.maximum, other.maximum)
+        self.fails += other.fails
+        self.executions += other.executions
+        self.sketch.merge(other.sketch)
+
+    @property
+    def stdev(self) -> Optional[float]:
+        return math.sqrt(self.m2 / (self.count - 1)) if self.count > 1 else None
+
+    def to_dict(self) -> dict:
+        return {
+            'count': self.count, 'mean': self.mean, 'm2': self.m2,
+            'min': self.minimum if self.count else None, 'max': self.maximum if self.count else None,
+            'fails': self.fails, 'executions': self.executions, 'sketch': self.sketch.to_dict(),
+        }
+
+    @classmethod
+    def from_dict(cls, state: dict) -> 'RunningStats':
+        stats = cls(state['sketch']['relative_accuracy'])
+        stats.count, stats.mean, stats.m2 = state['count'], state['mean'], state['m2']
+        stats.minimum = state['min'] if state['min'] is not None else math.inf
+        stats.maximum = state['max'] if state['max'] is not None else -math.inf
+        stats.fails, stats.executions = state['fails'], state['executions']
+        stats.sketch = QuantileSketch.from_dict(state['sketch'])
+        return stats
+
+
+def is_failed(test_flg: Optional[str]) -> bool:
+    """STDF TEST_FLG: bit 7 set means the test failed, unless bit 6 (no pass/fail indication) is set."""
+    if test_flg is None:
+        return False
+    flags = int(test_flg, 2)
+    return bool(flags & 0x80) and not flags & 0x40
+
+
+def invalid_limits(opt_flag: Optional[str]) -> tuple:
+    """
+    Limit fields a PTR does not hold a valid value for, from its OPT_FLAG.
+
+    Bits 6/7 mean the test has no low/high limit and bits 4/5 that this PTR's
+    low/high limit is invalid (the first PTR of the test has the default).
+    """
+    if opt_flag is None:
+        return ()
+    flags = int(opt_flag, 2)
+    return tuple(field for field, mask in (('lo_limit', 0x50), ('hi_limit', 0xA0)) if flags & mask)
+
+
+def process_capability(stats: RunningStats, lo_limit: Optional[float], hi_limit: Optional[float]):
+    """Return (cp, cpk) from the limits; either is None when it cannot be computed."""
+    stdev = stats.stdev
+    if not stdev:
+        return None, None
+    cp = (hi_limit - lo_limit) / (6 * stdev) if lo_limit is not None and hi_limit is not None else None
+    sides = []
+    if hi_limit is not None:
+        sides.append((hi_limit - stats.mean) / (3 * stdev))
+    if lo_limit is not None:
+        sides.append((stats.mean - lo_limit) / (3 * stdev))
+    return cp, min(sides) if sides else None
+
+
+class TestStatistics:
+    """
+    Per-test statistics collected from PTR records without storing results.
+
+    State is kept per (test_num, head_num, site_num); per-test totals over all
+    sites are derived by merging. Partial collectors from different workers or
+    from chunks of one file combine with merge().
+    """
+
+    def __init__(self, output_path: Optional[str] = None, relative_accuracy: float = RELATIVE_ACCURACY):
+        self.output_path = output_path
+        self.relative_accuracy = relative_accuracy
+        self.states = {}
+        # Test descriptions: limits and units default to the first PTR that carries valid ones
+        self.tests = {}
+
+    def append(self, record_type: str, stdf_processed_entry: dict) -> None:
+        if record_type != 'PTR':
+            return
+        test_num = stdf_processed_entry.get('test_num')
+        key = (test_num, stdf_processed_entry.get('head_num'), stdf_processed_entry.get('site_num'))
+        state = self.states.get(key)
+        if state is None:
+            state = self.states[key] = RunningStats(self.relative_accuracy)
+        state.add(stdf_processed_entry.get('result'), is_failed(stdf_processed_entry.get('test_flg')))
+
+        info = self.tests.get(test_num)
+        if info is None:
+            info = self.tests[test_num] = {'test_txt': None, 'units': None, 'lo_limit': None, 'hi_limit': None}
+        invalid = invalid_limits(stdf_processed_entry.get('opt_flag'))
+        for field in info:
+            if field in invalid:
+                continue
+            if info[field] is None and stdf_processed_entry.get(field) not in (None, ''):
+                info[field] = stdf_processed_entry[field]
+
+    def merge(self, other: 'TestStatistics') -> 'TestStatistics':
+        for key, state in other.states.items():
+            if key in self.states:
+                self.states[key].merge(state)
+            else:
+                merged = self.states[key] = RunningStats(state.sketch.relative_accuracy)
+                merged.merge(state)
+        for test_num, info in other.tests.items():
+            mine = self.tests.setdefault(test_num, dict(info))
+            for field, value in info.items():
+                if mine.get(field) is None:
+                    mine[field] = value
+        return self
+
+    def _row(self, test_num, head_num, site_num, stats: RunningStats) -> dict:
+        info = self.tests.get(test_num, {})
+        cp, cpk = process_capability(stats, info.get('lo_limit'), info.get('hi_limit'))
+        row = {
+            'test_num': test_num, 'head_num': head_num, 'site_num': site_num,
+            'test_txt': info.get('test_txt'), 'units': info.get('units'),
+            'lo_limit': info.get('lo_limit'), 'hi_limit': info.get('hi_limit'),
+            'executions': stats.executions, 'count': stats.count, 'fails': stats.fails,
+            'mean': stats.mean if stats.count else None, 'stdev': stats.stdev,
+            'min': stats.minimum if stats.count else None, 'max': stats.maximum if stats.count else None,
+            'cp': cp, 'cpk': cpk,
+        }
+        for q in QUANTILES:
+            row[f"q{int(q * 100):02d}"] = stats.sketch.quantile(q)
+        return row
+
+    def summary(self) -> List[dict]:
+        """One row per test and site, followed by one overall row per test (head/site None)."""
+        rows = []
+        overall = {}
+        for (test_num, head_num, site_num), stats in sorted(self.states.items(), key=_state_sort_key):
+            rows.append(self._row(test_num, head_num, site_num, stats))
+            total = overall.get(test_num)
+            if total is None:
+                total = overall[test_num] = RunningStats(stats.sketch.relative_accuracy)
+            total.merge(stats)
+        rows.extend(self._row(test_num, None, None, stats)
+                    for test_num, stats in sorted(overall.items(), key=lambda item: _sort_value(item[0])))
+        return rows
+
+    def to_dict(self) -> dict:
+        state = self.checkpoint()
+        return {'version': state['version'], 'relative_accuracy': state['relative_accuracy'],
+                'summary': self.summary(), 'tests': state['tests'], 'state': state['state']}
+
+    def checkpoint(self) -> dict:
+        """Mergeable state only (no summary), restored with from_dict."""
+        return {
+            'version': STATS_VERSION,
+            'relative_accuracy': self.relative_accuracy,
+            'tests': {str(test_num): info for test_num, info in self.tests.items()},
+            'state': [
+                {'test_num': test_num, 'head_num': head_num, 'site_num': site_num, **stats.to_dict()}
+                for (test_num, head_num, site_num), stats in self.states.items()
+            ],
+        }
+
+    @classmethod
+    def from_dict(cls, data: dict) -> 'TestStatistics':
+        statistics = cls(relative_accuracy=data['relative_accuracy'])
+        # Keys are test numbers as text, 'None' for PTRs without a test_num
+        statistics.tests = {int(test_num) if test_num != 'None' else None: info
+                            for test_num, info in data['tests'].items()}
+        for state in data['state']:
+            key = (state['test_num'], state['head_num'], state['site_num'])
+            statistics.states[key] = RunningStats.from_dict(state)
+        return statistics
+
+    def save(self, path: str) -> None:
+        with open(path, 'w') as f:
+            json.dump(self.to_dict(), f, indent=1)
+        logger.info(f"Wrote statistics for {len(self.tests)} tests to {path}")
+
+    def close(self) -> None:
+        if self.output_path:
+            self.save(self.output_path)
+
+
+def _sort_value(number: Optional[int]) -> int:
+    return number if number is not None else -1
+
+
+def _state_sort_key(item):
+    (test_num, head_num, site_num), _ = item
+    return _sort_value(test_num), _sort_value(head_num), _sort_value(site_num)
+
+
+def load_statistics(path: str) -> TestStatistics:
+    """Load a statistics JSON file written by TestStatistics.save."""
+    with open(path) as f:
+        return TestStatistics.from_dict(json.load(f))
+
+
+def merge_statistics(partials: Iterable[TestStatistics]) -> TestStatistics:
+    """Merge partial statistics (e.g. one per file or per chunk) into a new collector."""
+    merged = None
+    for partial in partials:
+        if merged is None:
+            merged = TestStatistics(relative_accuracy=partial.relative_accuracy)
+        merged.merge(partial)
+    return merged if merged is not None else TestStatistics()
@@ -0,0 +1,314 @@
+# src/core/utils/synthetic.py
+"""
+Synthetic STDF V4 lots for benchmarks and tests.
+
+    python -m src.core.utils.synthetic lot.stdf --wafers 2 --parts 500 --sites 4 --tests 100
+    python -m src.core.utils.synthetic --verify lot.stdf
+
+Files are built with the encoder of src.core.stdf.packers from a seeded
+random generator, so the same arguments always produce the same bytes. A
+.gz output path writes gzip. --verify decodes every record of a file and
+checks that encoding the decoded entry gives back the original bytes.
+"""
+import argparse
+import logging
+import math
+import random
+import sys
+from collections import Counter
+from typing import Dict, Optional
+
+from .files import get_file_handle
+from .setup import determine_file_params
+from .templates import create_stdf_mapping, create_stdf_template, get_stdf_template
+from src.core.stdf.handler import handle_stdf_entry
+from src.core.stdf.packers import pack_record
+from src.core.stdf.reader import iter_raw_records
+
+logger = logging.getLogger(__name__)
+
+# Share of PTR, MPR and FTR among the tests of a part
+DEFAULT_MIX = {'PTR': 0.8, 'MPR': 0.1, 'FTR': 0.1}
+# 'none': every record complete; 'repeat': only the first record of each test
+# carries limits, units and texts (as most testers write them); 'random':
+# records cut after a random optional field
+OMIT_PATTERNS = ('none', 'repeat', 'random')
+ENDIANNESS = {'little': '<', 'big': '>'}
+CPU_TYPES = {'<': 2, '>': 1}
+# Last field written by a record that leaves out its optional fields
+REQUIRED_FIELDS_END = {'PTR': 'result', 'MPR': 'rtn_rslt', 'FTR': 'opt_flag'}
+UNITS = ('V', 'A', 'mV', 'uA', 'Ohm', 's')
+PINS_PER_SITE = 8
+START_TIME = 1700000000
+
+TEST_FAILED = 0x80
+# opt_flag of a PTR/MPR: no spec limits (bits 2, 3) and, for MPR, no start_in/incr_in (bit 1)
+PTR_OPT_FLAG = 0x0C
+MPR_OPT_FLAG = 0x0E
+# opt_flag of an FTR: cycle count, addresses, repeat count, fail count and vector offset all invalid
+FTR_OPT_FLAG = 0xFF
+
+
+class LotGenerator:
+    """Writes one synthetic lot; see generate_stdf for the arguments."""
+
+    def __init__(self, stdf_file, wafers: int, parts_per_wafer: int, sites: int, tests: int,
+                 mix: Dict[str, float], omit: str, endianness: str, seed: int):
+        if omit not in OMIT_PATTERNS:
+            raise ValueError(f"Unknown omission pattern {omit!r}, expected one of {', '.join(OMIT_PATTERNS)}")
+        self.stdf_file = stdf_file
+        self.wafers = wafers
+        self.parts_per_wafer = parts_per_wafer
+        self.sites = sites
+        self.omit = omit
+        self.endianness = endianness
+        self.random = random.Random(seed)
+        self.counts = Counter()
+        self.pins = list(range(1, PINS_PER_SITE + 1))
+        self.tests = [self._define_test(index, mix) for index in range(tests)]
+        self.written_tests = set()
+        self.hard_bins = Counter()
+        self.soft_bins = Counter()
+        self.executed = Counter()
+        self.failed = Counter()
+
+    def _define_test(self, index: int, mix: Dict[str, float]) -> dict:
+        kind = self.random.choices(list(mix), weights=list(mix.values()))[0]
+        mean = round(self.random.uniform(-5, 5), 3)
+        sigma = round(self.random.uniform(0.01, 0.5), 3)
+        return {
+            'kind': kind,
+            'test_num': 1000 + index,
+            'name': f"{kind.lower()}_test_{index}",
+            'mean': mean,
+            'sigma': sigma,
+            'lo_limit': mean - 3.5 * sigma,
+            'hi_limit': mean + 3.5 * sigma,
+            'units': self.random.choice(UNITS),
+            'pins': sorted(self.random.sample(self.pins, self.random.randint(2, 4))),
+            'fail_rate': self.random.uniform(0.001, 0.02),
+        }
+
+    def write(self, record_type: str, entry: dict, omit_after: Optional[str] = None) -> None:
+        self.stdf_file.write(pack_record(record_type, entry, self.endianness, omit_after=omit_after))
+        self.counts[record_type] += 1
+
+    def _omit_after(self, record_type: str, test: dict) -> Optional[str]:
+        """Last field to write for this test record, None to write it whole."""
+        first = (test['test_num'], record_type) not in self.written_tests
+        self.written_tests.add((test['test_num'], record_type))
+        if self.omit == 'repeat' and not first:
+            return REQUIRED_FIELDS_END[record_type]
+        if self.omit == 'random' and self.random.random() < 0.5:
+            fields = payload_field_names(record_type)
+            start = fields.index(REQUIRED_FIELDS_END[record_type])
+            return self.random.choice(fields[start:])
+        return None
+
+    def header(self) -> None:
+        self.write('FAR', {'cpu_type': CPU_TYPES[self.endianness], 'stdf_ver': 4})
+        self.write('ATR', {'mod_tim': START_TIME, 'cmd_line': 'synthetic lot generator'})
+        self.write('MIR', {
+            'setup_t': START_TIME, 'start_t': START_TIME + 60, 'stat_num': 1, 'mode_cod': 'P',
+            'rtst_cod': ' ', 'prot_cod': ' ', 'burn_tim': None, 'cmod_cod': ' ',
+            'lot_id': 'SYNTH01', 'part_typ': 'SYNTHETIC', 'node_nam': 'node01', 'tstr_typ': 'generator',
+            'job_nam': 'synthetic_job', 'job_rev': '1', 'sblot_id': 'SB01', 'oper_nam': 'ops',
+            'exec_typ': 'synthetic', 'exec_ver': '1.0', 'test_cod': 'WS1', 'tst_temp': '25',
+        })
+        self.write('RDR', {'num_bins': 0})
+        self.write('SDR', {'head_num': 1, 'site_grp': 1, 'site_num': tuple(range(self.sites)),
+                           'hand_typ': 'prober', 'card_id': 'PC01'})
+        for site in range(self.sites):
+            for pin in self.pins:
+                self.write('PMR', {'pmr_indx': site * PINS_PER_SITE + pin, 'chan_typ': 1,
+                                   'chan_nam': f"ch{pin}", 'phy_nam': f"P{pin}", 'log_nam': f"pin{pin}",
+                                   'head_num': 1, 'site_num': site})
+        self.write('PGR', {'grp_indx': 32768, 'grp_nam': 'all_pins', 'pmr_indx': tuple(self.pins)})
+        self.write('PLR', {'grp_indx': (32768,), 'grp_mode': (0,), 'grp_radx': (2,), 'pgm_char': ('H',),
+                           'rtn_char': ('L',), 'pgm_chal': ('',), 'rtn_chal': ('',)})
+        self.write('WCR', {'wafr_siz': 300.0, 'die_ht': 5.0, 'die_wid': 5.0, 'wf_units': 3, 'wf_flat': 'D',
+                           'center_x': None, 'center_y': None, 'pos_x': 'R', 'pos_y': 'U'})
+        self.write('GDR', {'gen_data': ('U7', 'M300', 'B70000', 'I-3', 'S-300', 'L-70000', 'F1.5', 'D0.1',
+                                        'Tsynthetic', 'XA5', 'Y0F', 'NC')})
+        self.write('DTR', {'text_dat': 'synthetic lot'})
+
+    def test_record(self, test: dict, site: int, fail: bool) -> None:
+        kind = test['kind']
+        test_flg = TEST_FAILED if fail else 0
+        if kind == 'PTR':
+            deviation = self.random.uniform(3.6, 5) if fail else self.random.gauss(0, 1)
+            self.write('PTR', {
+                'test_num': test['test_num'], 'head_num': 1, 'site_num': site, 'test_flg': test_flg,
+                'parm_flg': 0, 'result': test['mean'] + deviation * test['sigma'], 'test_txt': test['name'],
+                'alarm_id': '', 'opt_flag': PTR_OPT_FLAG, 'res_scal': 0, 'llm_scal': 0, 'hlm_scal': 0,
+                'lo_limit': test['lo_limit'], 'hi_limit': test['hi_limit'], 'units': test['units'],
+                'c_resfmt': '%9.3f', 'c_llmfmt': '%9.3f', 'c_hlmfmt': '%9.3f', 'lo_spec': None, 'hi_spec': None,
+            }, omit_after=self._omit_after('PTR', test))
+        elif kind == 'MPR':
+            pins = test['pins']
+            results = tuple(test['mean'] + self.random.gauss(0, 1) * test['sigma'] for _ in pins)
+            self.write('MPR', {
+                'test_num': test['test_num'], 'head_num': 1, 'site_num': site, 'test_flg': test_flg,
+                'parm_flg': 0, 'rtn_stat': tuple(1 if fail and i == 0 else 0 for i in range(len(pins))),
+                'rtn_rslt': results, 'test_txt': test['name'], 'alarm_id': '', 'opt_flag': MPR_OPT_FLAG,
+                'res_scal': 0, 'llm_scal': 0, 'hlm_scal': 0, 'lo_limit': test['lo_limit'],
+                'hi_limit': test['hi_limit'], 'start_in': None, 'incr_in': None,
+                'rtn_indx': tuple(site * PINS_PER_SITE + pin for pin in pins), 'units': test['units'],
+                'units_in': '', 'c_resfmt': '%9.3f', 'c_llmfmt': '%9.3f', 'c_hlmfmt': '%9.3f',
+            }, omit_after=self._omit_after('MPR', test))
+        else:
+            self.write('FTR', {
+                'test_num': test['test_num'], 'head_num': 1, 'site_num': site, 'test_flg': test_flg,
+                'opt_flag': FTR_OPT_FLAG, 'rtn_icnt': 0, 'pgm_icnt': 0,
+                'fail_pin': tuple(test['pins'][:1]) if fail else (), 'vect_nam': f"vec_{test['test_num']}",
+                'time_set': 'ts1', 'op_code': '', 'test_txt': test['name'], 'alarm_id': '', 'prog_txt': '',
+                'rslt_txt': 'fail' if fail else 'pass', 'patg_num': None, 'spin_map': (),
+            }, omit_after=self._omit_after('FTR', test))
+        self.executed[test['test_num']] += 1
+        self.failed[test['test_num']] += fail
+
+    def part(self, site: int, part_id: int, x: int, y: int) -> None:
+        failed_test = None
+        for index, test in enumerate(self.tests):
+            fail = failed_test is None and self.random.random() < test['fail_rate']
+            if fail:
+                failed_test = index
+            self.test_record(test, site, fail)
+        hard_bin = 1 if failed_test is None else 2 + failed_test % 4
+        soft_bin = 1 if failed_test is None else 100 + failed_test
+        self.hard_bins[hard_bin] += 1
+        self.soft_bins[soft_bin] += 1
+        self.write('PRR', {
+            'head_num': 1, 'site_num': site, 'part_flg': 0 if failed_test is None else 0x08,
+            'num_test': len(self.tests), 'hard_bin': hard_bin, 'soft_bin': soft_bin, 'x_coord': x, 'y_coord': y,
+            'test_t': self.random.randint(50, 500), 'part_id': str(part_id), 'part_txt': '', 'part_fix': None,
+        })
+
+    def wafer(self, wafer_index: int, first_part_id: int) -> None:
+        wafer_id = f"W{wafer_index + 1:02d}"
+        columns = max(1, math.ceil(math.sqrt(self.parts_per_wafer)))
+        self.write('WIR', {'head_num': 1, 'site_grp': None, 'start_t': START_TIME + 3600 * wafer_index,
+                           'wafer_id': wafer_id})
+        good = 0
+        for start in range(0, self.parts_per_wafer, self.sites):
+            touchdown = range(start, min(start + self.sites, self.parts_per_wafer))
+            for site, _ in enumerate(touchdown):
+                self.write('PIR', {'head_num': 1, 'site_num': site})
+            for site, index in enumerate(touchdown):
+                before = self.hard_bins[1]
+                self.part(site, first_part_id + index, index % columns, index // columns)
+                good += self.hard_bins[1] - before
+        self.write('WRR', {'head_num': 1, 'site_grp': None, 'finish_t': START_TIME + 3600 * wafer_index + 3000,
+                           'part_cnt': self.parts_per_wafer, 'rtst_cnt': 0, 'abrt_cnt': 0, 'good_cnt': good,
+                           'func_cnt': None, 'wafer_id': wafer_id})
+
+    def summary(self) -> None:
+        for test in self.tests:
+            self.write('TSR', {'head_num': 255, 'site_num': 0, 'test_typ': test['kind'][0],
+                               'test_num': test['test_num'], 'exec_cnt': self.executed[test['test_num']],
+                               'fail_cnt': self.failed[test['test_num']], 'alrm_cnt': 0, 'test_nam': test['name'],
+                               'seq_name': 'main', 'test_lbl': '', 'opt_flag': 0xFF})
+        for bin_num, count in sorted(self.hard_bins.items()):
+            self.write('HBR', {'head_num': 255, 'site_num': 0, 'hbin_num': bin_num, 'hbin_cnt': count,
+                               'hbin_pf': 'P' if bin_num == 1 else 'F', 'hbin_nam': f"HB{bin_num}"})
+        for bin_num, count in sorted(self.soft_bins.items()):
+            self.write('SBR', {'head_num': 255, 'site_num': 0, 'sbin_num': bin_num, 'sbin_cnt': count,
+                               'sbin_pf': 'P' if bin_num == 1 else 'F', 'sbin_nam': f"SB{bin_num}"})
+        parts = self.wafers * self.parts_per_wafer
+        self.write('PCR', {'head_num': 255, 'site_num': 0, 'part_cnt': parts, 'rtst_cnt': 0, 'abrt_cnt': 0,
+                           'good_cnt': self.hard_bins[1], 'func_cnt': None})
+        self.write('MRR', {'finish_t': START_TIME + 3600 * self.wafers, 'disp_cod': ' ', 'usr_desc': '',
+                           'exc_desc': ''})
+
+    def run(self) -> Dict[str, int]:
+        self.header()
+        self.write('BPS', {'seq_name': 'main'})
+        for wafer_index in range(self.wafers):
+            self.wafer(wafer_index, wafer_index * self.parts_per_wafer + 1)
+        self.write('EPS', {})
+        self.summary()
+        return dict(self.counts)
+
+
+def payload_field_names(record_type: str) -> list:
+    """Payload field names of a record type, in template order."""
+    return [name for name, _ in create_stdf_template(record_type)['payload_fields']]
+
+
+def generate_stdf(path: str, wafers: int = 1, parts_per_wafer: int = 100, sites: int = 4, tests: int = 50,
+                  mix: Optional[Dict[str, float]] = None, omit: str = 'repeat', endianness: str = '<',
+                  seed: int = 0) -> Dict[str, int]:
+    """
+    Write a synthetic lot to path (gzip when it ends in .gz) and return its record counts.
+
+    Args:
+        wafers: Wafers in the lot (WIR/WRR pairs).
+        parts_per_wafer: Parts per wafer, tested `sites` at a time.
+        sites: Sites tested in parallel.
+        tests: Tests per part, each a PTR, MPR or FTR drawn with the weights of mix.
+        omit: Optional-field omission pattern, one of OMIT_PATTERNS.
+        endianness: '<' (little-endian, cpu_type 2) or '>' (big-endian, cpu_type 1).
+        seed: Seed of the random generator; the same arguments give the same file.
+    """
+    with get_file_handle(path, 'wb') as stdf_file:
+        counts = LotGenerator(stdf_file, wafers, parts_per_wafer, sites, tests, mix or DEFAULT_MIX, omit,
+                              endianness, seed).run()
+    logger.info(f"Wrote {sum(counts.values())} records to {path}")
+    return counts
+
+
+def verify_round_trip(path: str) -> Dict[str, int]:
+    """
+    Decode every record of an STDF file and check that encoding the entry gives back its bytes.
+
+    Returns:
+        dict: Record counts, with the number of mismatching records under 'mismatches'.
+    """
+    stdf_mapping = create_stdf_mapping()
+    counts = Counter()
+    with get_file_handle(path, 'rb') as stdf_file:
+        endianness = determine_file_params(stdf_file)['endianness']
+        for rec_typ, rec_sub, data in iter_raw_records(stdf_file, endianness):
+            record_type = stdf_mapping.get((rec_typ, rec_sub))
+            if record_type is None:
+                counts['unknown'] += 1
+                continue
+            entry = handle_stdf_entry(get_stdf_template(stdf_mapping, rec_typ, rec_sub), data, endianness)
+            counts[record_type] += 1
+            if pack_record(record_type, entry, endianness)[4:] != data:
+                counts['mismatches'] += 1
+                logger.error(f"{record_type} #{counts[record_type]} does not round-trip")
+    counts.setdefault('mismatches', 0)
+    return dict(counts)
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description='Generate synthetic STDF lots or verify encoder round trips')
+    parser.add_argument('path', help='Output STDF file (.gz for gzip), or the file to check with --verify')
+    parser.add_argument('--verify', action='store_true', help='Check that every record of path round-trips')
+    parser.add_argument('--wafers', type=int, default=1, help='Wafers in the lot (default: 1)')
+    parser.add_argument('--parts', type=int, default=100, help='Parts per wafer (default: 100)')
+    parser.add_argument('--sites', type=int, default=4, help='Sites tested in parallel (default: 4)')
+    parser.add_argument('--tests', type=int, default=50, help='Tests per part (default: 50)')
+    parser.add_argument('--mix', type=float, nargs=3, metavar=('PTR', 'MPR', 'FTR'),
+                        default=list(DEFAULT_MIX.values()), help='Weights of PTR, MPR and FTR tests (default: 0.8 0.1 0.1)')
+    parser.add_argument('--omit', choices=OMIT_PATTERNS, default='repeat',
+                        help='Optional-field omission pattern (default: repeat)')
+    parser.add_argument('--endianness', choices=list(ENDIANNESS), default='little', help='Byte order (default: little)')
+    parser.add_argument('--seed', type=int, default=0, help='Random seed (default: 0)')
+    args = parser.parse_args()
+
+    if args.verify:
+        counts = verify_round_trip(args.path)
+        print(', '.join(f"{record_type}: {count}" for record_type, count in sorted(counts.items())))
+        return 1 if counts['mismatches'] else 0
+
+    counts = generate_stdf(args.path, wafers=args.wafers, parts_per_wafer=args.parts, sites=args.sites,
+                           tests=args.tests, mix=dict(zip(DEFAULT_MIX, args.mix)), omit=args.omit,
+                           endianness=ENDIANNESS[args.endianness], seed=args.seed)
+    print(', '.join(f"{record_type}: {count}" for record_type, count in sorted(counts.items())))
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -1,11 +1,72 @@
 # src/core/utils/templates.py
+from functools import lru_cache
+from typing import Optional
 
 from src.core.stdf.templates import STDF_TEMPLATES
+from src.core.stdf.unpackers import BULK_ARRAY_TYPES
 from src.core.atdf.templates import ATDF_TEMPLATES
 
+# The mapping and the per-record-type templates are built once per process and
+# shared: callers must not modify them. Call clear_template_caches() after
+# changing STDF_TEMPLATES or ATDF_TEMPLATES.
+
+
+def clear_template_caches():
+    create_stdf_mapping.cache_clear()
+    create_stdf_template.cache_clear()
+    create_atdf_template.cache_clear()
+    bulk_array_records.cache_clear()
+
+def register_record_type(record_type: str, rec_typ: int, rec_sub: int, fields: dict) -> None:
+    """
+    Add a record layout (e.g. a vendor record in rec_typ 180/181) to STDF_TEMPLATES.
+
+    fields maps the payload field names, in record order, to a dtype ('U*4',
+    'C*n', ...), a (dtype, ref) pair for arrays (e.g. ('xU*2', 'count')), or a
+    full template field dict. The record is then decoded like any standard record, by
+    iter_records, to_dataframes and the column store; it has no ATDF mapping.
+    Worker processes need the same registration, e.g. at import time of the
+    module that defines the layout.
+    """
+    known_dtypes = {info['dtype'] for template in STDF_TEMPLATES.values() for info in template.values()}
+    owner = create_stdf_mapping().get((rec_typ, rec_sub))
+    if owner is not None and owner != record_type:
+        raise ValueError(f"rec_typ={rec_typ}, rec_sub={rec_sub} is already the {owner} record")
+    if owner is None and record_type in STDF_TEMPLATES:
+        raise ValueError(f"Record type {record_type} already exists")
+
+    template = {
+        "rec_len": {"dtype": "U*2", "ref": None, "value": None, "missing": None},
+        "rec_typ": {"dtype": "U*1", "ref": None, "value": rec_typ, "missing": None},
+        "rec_sub": {"dtype": "U*1", "ref": None, "value": rec_sub, "missing": None},
+    }
+    for name, spec in fields.items():
+        if isinstance(spec, dict):
+            info = {"ref": None, "value": None, "missing": None, **spec}
+        elif isinstance(spec, tuple):
+            info = {"dtype": spec[0], "ref": spec[1], "value": None, "missing": None}
+        else:
+            info = {"dtype": spec, "ref": None, "value": None, "missing": None}
+        if info['dtype'] not in known_dtypes:
+            raise ValueError(f"Invalid data type {info['dtype']} for {record_type}.{name}")
+        if info['ref'] is not None and info['ref'] not in template:
+            raise ValueError(f"{record_type}.{name} refers to {info['ref']}, which is not an earlier field")
+        template[name] = info
+
+    STDF_TEMPLATES[record_type] = template
+    clear_template_caches()
+
+
+def unregister_record_type(record_type: str) -> None:
+    """Remove a layout added with register_record_type."""
+    STDF_TEMPLATES.pop(record_type, None)
+    clear_template_caches()
+
+
 def get_record_types():
     return list(STDF_TEMPLATES.keys())
 
+@lru_cache(maxsize=None)
 def create_stdf_mapping():
     """Create mapping of (rec_typ, rec_sub) to record types."""
     mapping = {}
@@ -16,15 +77,20 @@ def create_stdf_mapping():
             mapping[(rec_typ, rec_sub)] = record
     return mapping
 
+@lru_cache(maxsize=None)
 def create_stdf_template(record_type):
     if record_type not in STDF_TEMPLATES:
         raise ValueError(f"No template found for STDF record type {record_type}")
     
+    fields = STDF_TEMPLATES[record_type].copy()
     return {
         "record_type": record_type,
-        "fields": STDF_TEMPLATES[record_type].copy()
+        "fields": fields,
+        # Fields decoded from the payload, i.e. without rec_len, rec_typ and rec_sub
+        "payload_fields": list(fields.items())[3:]
     }
 
+@lru_cache(maxsize=None)
 def create_atdf_template(record_type):
     if record_type not in ATDF_TEMPLATES:
         raise ValueError(f"No template found for ATDF record type {record_type}")
@@ -46,6 +112,21 @@ def get_stdf_template(stdf_mapping, rec_typ, rec_sub):
         raise ValueError(message)
 
 
+@lru_cache(maxsize=None)
+def bulk_array_records() -> frozenset:
+    """Record types with numeric arrays decoded into NumPy arrays (kxU*1 ... kxU*8, kxU*f)."""
+    return frozenset(record_type for record_type, template in STDF_TEMPLATES.items()
+                     if any(info['dtype'] in BULK_ARRAY_TYPES or info['dtype'] == 'kxU*f'
+                            for info in template.values()))
+
+
+def find_atdf_template(record_type: str) -> Optional[dict]:
+    """ATDF template of a record type, None for record types without one (e.g. registered vendor records)."""
+    if record_type not in ATDF_TEMPLATES:
+        return None
+    return create_atdf_template(record_type)
+
+
 def get_atdf_template(record_type: str) -> dict:
     try:
         return create_atdf_template(record_type)
@@ -0,0 +1,310 @@
+# src/core/utils/watch.py
+"""Watch-folder daemon feeding new STDF files to a warm process pool."""
+import ctypes
+import ctypes.util
+import json
+import logging
+import os
+import select
+import sqlite3
+import struct
+import time
+from collections import deque
+from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, wait
+from concurrent.futures.process import BrokenProcessPool
+from pathlib import Path
+from typing import Dict, Iterable, List, Optional
+
+from .files import find_stdf_files
+
+logger = logging.getLogger(__name__)
+
+JOB_TABLE_NAME = '.stdf2atdf-jobs.db'
+STDF_SUFFIX = '.stdf'
+# Seconds a file's size and mtime must stay unchanged before it is converted
+SETTLE_TIME = 5.0
+# Seconds between scans (polling watcher) or wake-ups (inotify watcher)
+POLL_INTERVAL = 1.0
+
+IN_MODIFY = 0x00000002
+IN_CLOSE_WRITE = 0x00000008
+IN_MOVED_TO = 0x00000080
+IN_CREATE = 0x00000100
+IN_ISDIR = 0x40000000
+INOTIFY_MASK = IN_MODIFY | IN_CLOSE_WRITE | IN_MOVED_TO | IN_CREATE
+INOTIFY_EVENT = struct.Struct('iIII')
+
+
+def is_stdf_path(path: Path) -> bool:
+    return path.suffix.lower() == STDF_SUFFIX
+
+
+class InotifyWatcher:
+    """Reports STDF files created, written or moved into the watched trees (Linux inotify via libc)."""
+
+    def __init__(self, directories: Iterable[Path]):
+        self._libc = ctypes.CDLL(ctypes.util.find_library('c'), use_errno=True)
+        self._fd = self._libc.inotify_init1(os.O_NONBLOCK | os.O_CLOEXEC)
+        if self._fd < 0:
+            raise OSError(ctypes.get_errno(), 'inotify_init1 failed')
+        self._watches = {}
+        for directory in directories:
+            self._add_tree(Path(directory))
+
+    def _add_tree(self, directory: Path) -> List[Path]:
+        """Watch directory and its subdirectories; return the STDF files already inside."""
+        found = []
+        for root, _, files in os.walk(directory):
+            wd = self._libc.inotify_add_watch(self._fd, os.fsencode(root), INOTIFY_MASK)
+            if wd < 0:
+                logger.warning(f"Cannot watch {root}: {os.strerror(ctypes.get_errno())}")
+                continue
+            self._watches[wd] = Path(root)
+            found.extend(Path(root) / name for name in files if is_stdf_path(Path(name)))
+        return found
+
+    def poll(self, timeout: float) -> List[Path]:
+        readable, _, _ = select.select([self._fd], [], [], timeout)
+        if not readable:
+            return []
+        buffer = os.read(self._fd, 64 * 1024)
+        changed = []
+        offset = 0
+        while offset < len(buffer):
+            wd, mask, _, name_length = INOTIFY_EVENT.unpack_from(buffer, offset)
+            offset += INOTIFY_EVENT.size
+            name = buffer[offset:offset + name_length].rstrip(b'\0')
+            offset += name_length
+            directory = self._watches.get(wd)
+            if directory is None or not name:
+                continue
+            path = directory / os.fsdecode(name)
+            if mask & IN_ISDIR:
+                if mask & (IN_CREATE | IN_MOVED_TO):
+                    changed.extend(self._add_tree(path))
+            elif is_stdf_path(path):
+                changed.append(path)
+        return changed
+
+    def close(self) -> None:
+        os.close(self._fd)
+
+
+class PollingWatcher:
+    """Fallback watcher: rescans the trees and reports STDF files whose size or mtime changed."""
+
+    def __init__(self, directories: Iterable[Path]):
+        self.directories = [Path(directory) for directory in directories]
+        self._seen = {}
+
+    def poll(self, timeout: float) -> List[Path]:
+        time.sleep(timeout)
+        changed = []
+        for directory in self.directories:
+            for path in find_stdf_files(directory):
+                try:
+                    stat = path.stat()
+                except FileNotFoundError:
+                    continue
+                signature = (stat.st_size, stat.st_mtime_ns)
+                if self._seen.get(path) != signature:
+                    self._seen[path] = signature
+                    changed.append(path)
+        return changed
+
+    def close(self) -> None:
+        pass
+
+
+def create_watcher(directories: List[Path], use_inotify: bool = True):
+    if use_inotify:
+        try:
+            watcher = InotifyWatcher(directories)
+            logger.info("Watching with inotify")
+            return watcher
+        except (OSError, AttributeError) as e:
+            logger.info(f"inotify unavailable ({e}), polling instead")
+    return PollingWatcher(directories)
+
+
+class JobTable:
+    """SQLite table of the files seen by the daemon and the outcome of their conversion."""
+
+    def __init__(self, path: Path):
+        self.path = Path(path)
+        self.connection = sqlite3.connect(self.path)
+        self.connection.execute('PRAGMA journal_mode=WAL')
+        self.connection.execute(
+            'CREATE TABLE IF NOT EXISTS jobs ('
+            'path TEXT PRIMARY KEY, size INTEGER, mtime_ns INTEGER, status TEXT, '
+            'queued_at REAL, started_at REAL, finished_at REAL, records TEXT, error TEXT)'
+        )
+        # Jobs interrupted by a previous shutdown are converted again
+        self.connection.execute("UPDATE jobs SET status = 'interrupted' WHERE status IN ('queued', 'running')")
+        self.connection.commit()
+
+    def is_done(self, path: Path, size: int, mtime_ns: int) -> bool:
+        row = self.connection.execute('SELECT size, mtime_ns, status FROM jobs WHERE path = ?',
+                                      (str(path),)).fetchone()
+        return row is not None and row == (size, mtime_ns, 'done')
+
+    def queued(self, path: Path, size: int, mtime_ns: int) -> None:
+        with self.connection:
+            self.connection.execute(
+                'INSERT OR REPLACE INTO jobs (path, size, mtime_ns, status, queued_at) VALUES (?, ?, ?, ?, ?)',
+                (str(path), size, mtime_ns, 'queued', time.time()))
+
+    def started(self, path: Path) -> None:
+        with self.connection:
+            self.connection.execute("UPDATE jobs SET status = 'running', started_at = ? WHERE path = ?",
+                                    (time.time(), str(path)))
+
+    def finished(self, path: Path, records: Optional[dict] = None, error: Optional[str] = None) -> None:
+        with self.connection:
+            self.connection.execute(
+                'UPDATE jobs SET status = ?, finished_at = ?, records = ?, error = ? WHERE path = ?',
+                ('failed' if error else 'done', time.time(), json.dumps(records) if records else None,
+                 error, str(path)))
+
+    def close(self) -> None:
+        self.connection.close()
+
+
+def warm_worker() -> None:
+    """Pool initializer: pay for the heavy imports and template setup once per worker."""
+    import pandas  # noqa: F401
+    import sqlalchemy  # noqa: F401
+    from src.converter import run_conversion  # noqa: F401
+    from .templates import create_stdf_mapping
+    create_stdf_mapping()
+
+
+def start_warm_pool(max_workers: int) -> ProcessPoolExecutor:
+    """Process pool whose workers are all spawned and warmed before it is returned."""
+    executor = ProcessPoolExecutor(max_workers=max_workers, initializer=warm_worker)
+    for future in [executor.submit(time.sleep, 0.1) for _ in range(max_workers)]:
+        future.result()
+    logger.info(f"Started {max_workers} warm workers")
+    return executor
+
+
+def convert_file(path: Path, options: dict) -> Dict[str, int]:
+    """Worker task: convert one file and return only its record counts (the entries stay in the worker)."""
+    from .services import process_single_file
+    result = process_single_file(path, **options)
+    return {record_type: len(entries) for record_type, entries in result.items() if len(entries)}
+
+
+class WatchDaemon:
+    """
+    Converts STDF files dropped into watched directories with a persistent, pre-warmed process pool.
+
+    A file is converted once its size and mtime have been stable for settle_time
+    seconds. At most max_pending conversions are in flight; further ready files
+    wait in the daemon's queue. Every file's outcome is recorded in a JobTable,
+    and files already done with the same size and mtime are skipped on restart.
+
+    Args:
+        options: Keyword arguments of process_single_file (output, database, records, ...).
+    """
+
+    def __init__(self, directories: List[Path], options: dict, max_workers: Optional[int] = None,
+                 settle_time: float = SETTLE_TIME, poll_interval: float = POLL_INTERVAL,
+                 max_pending: Optional[int] = None, job_table: Optional[Path] = None,
+                 use_inotify: bool = True):
+        self.directories = [Path(directory) for directory in directories]
+        self.options = options
+        self.max_workers = max_workers or max(1, (os.cpu_count() or 2) // 2)
+        self.settle_time = settle_time
+        self.poll_interval = poll_interval
+        self.max_pending = max_pending or 2 * self.max_workers
+        self.job_table = Path(job_table) if job_table else self.directories[0] / JOB_TABLE_NAME
+        self.jobs = None
+        self.use_inotify = use_inotify
+        self.candidates = {}
+        self.ready = deque()
+        self.running = {}
+        self.executor = None
+
+    def _notice(self, paths: Iterable[Path]) -> None:
+        now = time.monotonic()
+        for path in paths:
+            if path not in self.candidates and path not in self.running and path not in self.ready:
+                self.candidates[path] = (None, now)
+
+    def _settle(self) -> None:
+        """Move files whose size and mtime stayed unchanged for settle_time to the ready queue."""
+        now = time.monotonic()
+        for path, (signature, since) in list(self.candidates.items()):
+            try:
+                stat = path.stat()
+            except FileNotFoundError:
+                del self.candidates[path]
+                continue
+            current = (stat.st_size, stat.st_mtime_ns)
+            if current != signature:
+                self.candidates[path] = (current, now)
+            elif now - since >= self.settle_time:
+                del self.candidates[path]
+                if not self.jobs.is_done(path, *current):
+                    self.jobs.queued(path, *current)
+                    self.ready.append(path)
+
+    def _submit(self) -> None:
+        while self.ready and len(self.running) < self.max_pending:
+            path = self.ready.popleft()
+            self.running[path] = self.executor.submit(convert_file, path, self.options)
+            self.jobs.started(path)
+
+    def _collect(self, timeout: float) -> None:
+        if not self.running:
+            return
+        done, _ = wait(list(self.running.values()), timeout=timeout, return_when=FIRST_COMPLETED)
+        broken = False
+        for path, future in list(self.running.items()):
+            if future not in done:
+                continue
+            del self.running[path]
+            try:
+                records = future.result()
+                self.jobs.finished(path, records=records)
+                logger.info(f"Converted {path} ({sum(records.values())} records)")
+            except BrokenProcessPool as e:
+                broken = True
+                self.jobs.finished(path, error=f"worker died: {e}")
+                logger.error(f"Worker died while converting {path}")
+            except Exception as e:
+                self.jobs.finished(path, error=str(e))
+                logger.error(f"Failed to convert {path}: {e}")
+        if broken:
+            # Requeue the other in-flight files and replace the pool
+            for path in self.running:
+                self.ready.appendleft(path)
+            self.running.clear()
+            self.executor.shutdown(wait=False)
+            self.executor = start_warm_pool(self.max_workers)
+
+    def run(self, stop_event=None) -> None:
+        """Watch until stop_event (a threading/multiprocessing Event) is set or the process is interrupted."""
+        # Opened here so the daemon can run in a thread other than the one that created it
+        self.jobs = JobTable(self.job_table)
+        watcher = create_watcher(self.directories, self.use_inotify)
+        self.executor = start_warm_pool(self.max_workers)
+        try:
+            for directory in self.directories:
+                self._notice(find_stdf_files(directory))
+            logger.info(f"Watching {', '.join(map(str, self.directories))}")
+
+            while stop_event is None or not stop_event.is_set():
+                self._notice(watcher.poll(self.poll_interval if not self.running else 0))
+                self._settle()
+                self._submit()
+                self._collect(self.poll_interval if self.running else 0)
+        except KeyboardInterrupt:
+            logger.info("Stopping watch")
+        finally:
+            watcher.close()
+            # Let the conversions in flight finish and record them
+            self.executor.shutdown(wait=True)
+            self._collect(0)
+            self.jobs.close()
@@ -0,0 +1,60 @@
+# tests/conftest.py
+"""Shared fixtures: small synthetic lots written with src.core.utils.synthetic."""
+import pytest
+
+from src.core.stdf.packers import pack_record
+from src.core.utils.synthetic import generate_stdf
+
+
+@pytest.fixture
+def make_lot(tmp_path):
+    """Write a synthetic lot under tmp_path; returns (path, record counts)."""
+    def make(name: str = 'lot.stdf', wafers: int = 1, parts_per_wafer: int = 8, sites: int = 4, tests: int = 12,
+             **kwargs):
+        path = tmp_path / name
+        counts = generate_stdf(str(path), wafers=wafers, parts_per_wafer=parts_per_wafer, sites=sites,
+                               tests=tests, **kwargs)
+        return path, counts
+    return make
+
+
+@pytest.fixture
+def interleaved_lot(tmp_path):
+    """
+    Two heads of three sites with results interleaved across sites and PRRs in reverse site order.
+
+    Returns (path, parts): parts maps each part_id to (head, site, wafer_id, results), results
+    being the (test_num, result) pairs of the part; part_ids are numbered in PIR order.
+    """
+    def pack(record_type, entry):
+        return pack_record(record_type, entry, '<')
+
+    records = [pack('FAR', {'cpu_type': 2, 'stdf_ver': 4}), pack('MIR', {'lot_id': 'INTERLEAVED'})]
+    parts = {}
+    part_id = 0
+    for head in (1, 2):
+        records.append(pack('WIR', {'head_num': head, 'site_grp': 255, 'start_t': 0, 'wafer_id': f"W{head}"}))
+    for touchdown in range(2):
+        for head in (1, 2):
+            ids = {}
+            for site in range(3):
+                part_id += 1
+                ids[site] = part_id
+                parts[str(part_id)] = (head, site, f"W{head}", [])
+                records.append(pack('PIR', {'head_num': head, 'site_num': site}))
+            for test_num in range(100, 104):
+                for site in range(3):
+                    result = ids[site] * 1000 + test_num
+                    parts[str(ids[site])][3].append((test_num, result))
+                    records.append(pack('PTR', {'test_num': test_num, 'head_num': head, 'site_num': site,
+                                                'test_flg': 0, 'parm_flg': 0, 'result': float(result)}))
+            for site in reversed(range(3)):
+                records.append(pack('PRR', {'head_num': head, 'site_num': site, 'part_flg': 0, 'num_test': 4,
+                                            'hard_bin': 1, 'soft_bin': 1, 'x_coord': touchdown, 'y_coord': site,
+                                            'test_t': 0, 'part_id': str(ids[site])}))
+    for head in (1, 2):
+        records.append(pack('WRR', {'head_num': head, 'site_grp': 255, 'finish_t': 0, 'part_cnt': 6}))
+    records.append(pack('MRR', {'finish_t': 0}))
+    path = tmp_path / 'interleaved.stdf'
+    path.write_bytes(b''.join(records))
+    return path, parts
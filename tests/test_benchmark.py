@@ -0,0 +1,60 @@
+# tests/test_benchmark.py
+import json
+import sys
+
+import pytest
+
+from src.core.utils import benchmark
+from src.core.utils.benchmark import compare_results
+
+BASELINE = {
+    'corpus': {'parts': 100, 'tests': 10, 'seed': 0},
+    'stages': {'decode': {'records_per_s': 100_000.0, 'mb_per_s': 10.0, 'seconds': 1.0}},
+    'end_to_end': {'seconds': 2.0, 'peak_rss_mb': 100.0, 'records_per_s': 50_000.0},
+    'scaling': [{'workers': 1, 'records_per_s': 50_000.0, 'speedup': 1.0}],
+    'startup': {'help': 0.2},
+}
+
+
+def results(decode_rate: float = 100_000.0, seconds: float = 2.0, peak_rss_mb: float = 100.0) -> dict:
+    current = json.loads(json.dumps(BASELINE))
+    current['stages']['decode']['records_per_s'] = decode_rate
+    current['end_to_end'].update(seconds=seconds, peak_rss_mb=peak_rss_mb)
+    return current
+
+
+def regressions(current: dict, tolerance: float = 0.1) -> dict:
+    return {row['metric']: row['change'] for row in compare_results(current, BASELINE, tolerance)
+            if row['regression']}
+
+
+def test_changes_within_tolerance_pass():
+    comparison = compare_results(results(decode_rate=95_000.0, seconds=2.1), BASELINE)
+    assert len(comparison) == 7 and not any(row['regression'] for row in comparison)
+    change = {row['metric']: row['change'] for row in comparison}
+    assert change['stages.decode.records_per_s'] == pytest.approx(-0.05)
+    assert change['end_to_end.seconds'] == pytest.approx(0.05)
+
+
+def test_regressions_follow_the_direction_of_each_metric():
+    # Throughput lower, time and memory higher are regressions; the opposite are improvements
+    assert regressions(results(decode_rate=80_000.0, seconds=2.5, peak_rss_mb=150.0)) == pytest.approx({
+        'stages.decode.records_per_s': -0.2, 'end_to_end.seconds': 0.25, 'end_to_end.peak_rss_mb': 0.5})
+    assert regressions(results(decode_rate=200_000.0, seconds=1.0, peak_rss_mb=50.0)) == {}
+    assert regressions(results(decode_rate=80_000.0), tolerance=0.25) == {}
+
+
+def test_compare_command(tmp_path, monkeypatch, capsys):
+    paths = {}
+    for name, content in (('baseline', BASELINE), ('same', results()), ('slower', results(seconds=3.0))):
+        paths[name] = tmp_path / f'{name}.json'
+        paths[name].write_text(json.dumps(content))
+
+    monkeypatch.setattr(sys, 'argv', ['benchmark', 'compare', str(paths['same']), str(paths['baseline'])])
+    assert benchmark.main() == 0
+    monkeypatch.setattr(sys, 'argv', ['benchmark', 'compare', str(paths['slower']), str(paths['baseline'])])
+    assert benchmark.main() == 1
+    assert '1 regression(s)' in capsys.readouterr().out
+    monkeypatch.setattr(sys, 'argv', ['benchmark', 'compare', str(paths['slower']), str(paths['baseline']),
+                                      '--tolerance', '0.6'])
+    assert benchmark.main() == 0
@@ -0,0 +1,103 @@
+# tests/test_checkpoint.py
+import json
+import os
+
+import pandas as pd
+import pytest
+
+from src.converter import run_conversion
+from src.core.utils.checkpoint import checkpoint_path
+from src.core.utils.colstore import open_column_store
+from src.core.utils.synthetic import generate_stdf
+
+
+class Interrupted(KeyboardInterrupt):
+    """Stands in for Ctrl+C partway through a conversion."""
+
+
+def interrupt_after(parts: int):
+    seen = []
+
+    def on_part(part):
+        seen.append(part)
+        if len(seen) == parts:
+            raise Interrupted
+    return on_part
+
+
+@pytest.fixture
+def checkpointed(make_lot, tmp_path):
+    """A lot and convert(name, **options) writing its ATDF, column store and stats outputs under name."""
+    path, counts = make_lot(wafers=2, parts_per_wafer=40, seed=8)
+
+    def convert(name: str, **options) -> dict:
+        outputs = {'output_atdf_file': str(tmp_path / f'{name}.atdf'),
+                   'output_column_store': str(tmp_path / f'{name}.cols'),
+                   'output_stats': str(tmp_path / f'{name}.stats.json')}
+        options.setdefault('checkpoint_file', checkpoint_path(str(path)))
+        run_conversion(str(path), checkpoint_interval=2048, **outputs, **options)
+        return outputs
+    return path, counts, convert
+
+
+def renamed(outputs: dict, name: str) -> dict:
+    return {option: path.replace('expected', name) for option, path in outputs.items()}
+
+
+def assert_same_outputs(outputs: dict, expected: dict) -> None:
+    with open(outputs['output_atdf_file']) as f, open(expected['output_atdf_file']) as g:
+        assert f.read() == g.read()
+
+    store = open_column_store(outputs['output_column_store'])
+    expected_store = open_column_store(expected['output_column_store'])
+    assert store.record_types == expected_store.record_types
+    for record_type in expected_store.record_types:
+        pd.testing.assert_frame_equal(store.to_frame(record_type), expected_store.to_frame(record_type))
+
+    with open(outputs['output_stats']) as f, open(expected['output_stats']) as g:
+        rows, expected_rows = json.load(f)['summary'], json.load(g)['summary']
+    assert len(rows) == len(expected_rows)
+    for row, expected_row in zip(rows, expected_rows):
+        assert row == pytest.approx(expected_row)
+
+
+def test_resumed_conversion_matches_uninterrupted(checkpointed, caplog):
+    path, counts, convert = checkpointed
+    expected = convert('expected', checkpoint_file=None)
+
+    with pytest.raises(Interrupted):
+        convert('resumed', on_part=interrupt_after(counts['PRR'] // 2))
+    with open(checkpoint_path(str(path))) as f:
+        offset = json.load(f)['input_offset']
+    assert 0 < offset < path.stat().st_size
+
+    caplog.set_level('INFO')
+    convert('resumed', resume=True)
+    assert f"from input offset {offset}" in caplog.text
+    assert_same_outputs(renamed(expected, 'resumed'), expected)
+    # A completed conversion removes its checkpoint
+    assert not os.path.exists(checkpoint_path(str(path)))
+
+
+def test_mismatched_checkpoint_is_ignored(checkpointed, caplog):
+    path, counts, convert = checkpointed
+    caplog.set_level('INFO')
+
+    # Other options: the checkpoint is ignored and the conversion starts over
+    with pytest.raises(Interrupted):
+        convert('resumed', on_part=interrupt_after(counts['PRR'] // 2))
+    records = ['PIR', 'PTR', 'PRR']
+    expected = convert('expected', records_to_process=records, checkpoint_file=None)
+    convert('resumed', records_to_process=records, resume=True)
+    assert 'ignoring it' in caplog.text and 'Resuming' not in caplog.text
+    assert_same_outputs(renamed(expected, 'resumed'), expected)
+    caplog.clear()
+
+    # The input was rewritten since the checkpoint was taken
+    with pytest.raises(Interrupted):
+        convert('resumed', on_part=interrupt_after(counts['PRR'] // 2))
+    generate_stdf(str(path), wafers=2, parts_per_wafer=40, sites=4, tests=12, seed=9)
+    expected = convert('expected', checkpoint_file=None)
+    convert('resumed', resume=True)
+    assert 'ignoring it' in caplog.text and 'Resuming' not in caplog.text
+    assert_same_outputs(renamed(expected, 'resumed'), expected)
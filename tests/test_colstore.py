@@ -0,0 +1,82 @@
+# tests/test_colstore.py
+import numpy as np
+import pytest
+
+from src.converter import iter_records, run_conversion
+from src.core.utils.colstore import PARTIAL_FILE, SCHEMA_FILE, open_column_store
+from src.core.utils.columnar import numpy_dtype, record_columns, to_column_value
+
+
+def stored_values(store, record_type: str, field: str) -> list:
+    """Values of one column as to_column_value gives them, None where missing."""
+    info = store.columns(record_type)[field]
+    if info['kind'] == 'string':
+        return store.strings(record_type, field).tolist()
+    values = np.asarray(store.column(record_type, field))
+    if info['kind'] == 'array':
+        offsets = store.offsets(record_type, field)
+        return [values[offsets[i]:offsets[i + 1]].tolist() for i in range(len(offsets) - 1)]
+    valid = store.valid(record_type, field)
+    return [value if valid is None or valid[i] else None for i, value in enumerate(values.tolist())]
+
+
+@pytest.mark.parametrize('endianness', ['<', '>'])
+def test_column_store_matches_decoded_records(make_lot, tmp_path, endianness):
+    path, counts = make_lot(tests=20, mix={'PTR': 0.4, 'MPR': 0.3, 'FTR': 0.3}, omit='repeat',
+                            endianness=endianness, seed=6)
+    run_conversion(str(path), output_column_store=str(tmp_path / 'lot.cols'))
+    store = open_column_store(str(tmp_path / 'lot.cols'))
+
+    for record_type in ('PTR', 'MPR', 'FTR', 'PRR', 'MIR'):
+        entries = [entry for _, entry in iter_records(str(path), records=[record_type])]
+        assert store.count(record_type) == counts[record_type] == len(entries)
+        for field, stdf_dtype in record_columns(record_type).items():
+            expected = [to_column_value(stdf_dtype, entry.get(field)) for entry in entries]
+            if store.columns(record_type)[field]['kind'] == 'array':
+                expected = [list(value) if value is not None else [] for value in expected]
+            # R*4 values decode to the float32 value itself, so they compare exactly
+            assert stored_values(store, record_type, field) == expected, f"{record_type}.{field}"
+
+
+def test_column_dtypes(make_lot, tmp_path):
+    path, _ = make_lot(omit='repeat', seed=6)
+    run_conversion(str(path), output_column_store=str(tmp_path / 'lot.cols'))
+    store = open_column_store(str(tmp_path / 'lot.cols'))
+
+    assert store.column('PTR', 'result').dtype == np.float32
+    assert store.column('PTR', 'test_num').dtype == np.uint32
+    assert store.column('PRR', 'x_coord').dtype == np.int16
+    for field, stdf_dtype in record_columns('PTR').items():
+        if numpy_dtype(stdf_dtype):
+            assert store.column('PTR', field).dtype == np.dtype(numpy_dtype(stdf_dtype)), field
+    # Limits are only in the first PTR of each test, so the column has a validity mask
+    valid = store.valid('PTR', 'lo_limit')
+    assert valid is not None and 0 < valid.sum() < len(valid)
+    assert store.valid('PTR', 'test_num') is None
+
+    frame = store.to_frame('PTR', ['test_num', 'result', 'lo_limit'], rows=slice(0, 5))
+    assert len(frame) == 5
+    assert frame['lo_limit'].isna().sum() == 5 - valid[:5].sum()
+
+
+def test_interrupted_store_is_replaced(make_lot, tmp_path):
+    path, counts = make_lot(seed=6)
+    store_path = tmp_path / 'lot.cols'
+
+    def interrupt(part):
+        raise KeyboardInterrupt
+
+    with pytest.raises(KeyboardInterrupt):
+        run_conversion(str(path), output_column_store=str(store_path), on_part=interrupt)
+    assert (store_path / PARTIAL_FILE).exists() and not (store_path / SCHEMA_FILE).exists()
+
+    run_conversion(str(path), output_column_store=str(store_path))
+    assert not (store_path / PARTIAL_FILE).exists()
+    assert open_column_store(str(store_path)).count('PRR') == counts['PRR']
+
+    unrelated = tmp_path / 'unrelated'
+    unrelated.mkdir()
+    (unrelated / 'notes.txt').write_text('keep')
+    with pytest.raises(ValueError):
+        run_conversion(str(path), output_column_store=str(unrelated))
+    assert (unrelated / 'notes.txt').exists()
@@ -0,0 +1,56 @@
+# tests/test_consolidated.py
+import queue
+import sqlite3
+
+from src.core.utils import consolidated
+from src.core.utils.consolidated import file_key, run_writer, send_to_database
+
+
+def ingest(database_path, files):
+    database_queue = queue.Queue()
+    for input_file, entries, extra_tables in files:
+        send_to_database(database_queue, str(input_file), entries, extra_tables)
+    database_queue.put(None)
+    run_writer(str(database_path), database_queue)
+
+
+def rows(database_path, table_name):
+    with sqlite3.connect(database_path) as connection:
+        cursor = connection.execute(f'SELECT * FROM "{table_name}" ORDER BY rowid')
+        columns = [description[0] for description in cursor.description]
+        return [dict(zip(columns, row)) for row in cursor]
+
+
+def test_later_fields_reach_the_consolidated_database(tmp_path, monkeypatch):
+    monkeypatch.setattr(consolidated, 'BATCH_ROWS', 1)
+    first = tmp_path / 'first.stdf'
+    second = tmp_path / 'second.stdf'
+    first.write_bytes(b'')
+    second.write_bytes(b'')
+    ingest(tmp_path / 'lot.db', [
+        (first, {'MIR': [{'lot_id': 'A'}], 'PTR': [{'test_num': 1}, {'test_num': 2, 'units': 'V'}]},
+         {'parts': [{'p_id': 1}, {'p_id': 2, 'x_coord': 3}]}),
+        (second, {'MIR': [{'lot_id': 'B'}], 'PTR': [{'test_num': 1, 'p_id': 7}]},
+         {'parts': [{'p_id': 1, 'soft_bin': 9}]}),
+    ])
+
+    test_results = rows(tmp_path / 'lot.db', 'test_results')
+    assert [row['units'] for row in test_results] == [None, 'V', None]
+    assert [row['p_id'] for row in test_results] == [None, None, 7]
+    assert [row['file_id'] for row in test_results] == [file_key(first)] * 2 + [file_key(second)]
+
+    parts = rows(tmp_path / 'lot.db', 'parts')
+    assert [(row['p_id'], row['x_coord'], row['soft_bin']) for row in parts] == [(1, None, None), (2, 3, None),
+                                                                               (1, None, 9)]
+    files = rows(tmp_path / 'lot.db', 'files')
+    assert [(row['rows'], row['status']) for row in files] == [(5, 'complete'), (3, 'complete')]
+
+
+def test_reingested_file_replaces_its_rows(tmp_path):
+    input_file = tmp_path / 'lot.stdf'
+    input_file.write_bytes(b'')
+    entries = {'MIR': [{'lot_id': 'A'}], 'PTR': [{'test_num': 1}, {'test_num': 2}]}
+    ingest(tmp_path / 'lot.db', [(input_file, entries, None)])
+    ingest(tmp_path / 'lot.db', [(input_file, entries, None)])
+    assert len(rows(tmp_path / 'lot.db', 'test_results')) == 2
+    assert len(rows(tmp_path / 'lot.db', 'files')) == 1
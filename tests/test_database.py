@@ -0,0 +1,67 @@
+# tests/test_database.py
+import sqlite3
+from functools import partial
+
+from src.core.utils import database
+from src.core.utils.database import DatabaseAppender, create_database_from_atdf, iter_table_chunks
+
+
+def entries_with_late_fields():
+    # The first PTR has no part link; the later ones bring p_id, and the second one units as well
+    return {
+        'MIR': [{'lot_id': 'LOT1'}],
+        'PTR': [{'test_num': 1, 'result': 0.5},
+                {'test_num': 2, 'result': 1.5, 'p_id': 1, 'units': 'V'},
+                {'test_num': 3, 'result': 2.5, 'p_id': 2}],
+        'FTR': [{'test_num': 4, 'vect_nam': 'vec'}],
+    }
+
+
+def table(path, name):
+    with sqlite3.connect(path) as connection:
+        cursor = connection.execute(f'SELECT * FROM "{name}"')
+        columns = [description[0] for description in cursor.description]
+        return [dict(zip(columns, row)) for row in cursor]
+
+
+def test_columns_grow_with_later_entries():
+    chunks = list(iter_table_chunks(entries_with_late_fields(), 'file', 'session', chunk_size=1))
+    test_results = [(columns, chunk) for table_name, columns, chunk in chunks if table_name == 'test_results']
+    assert len(test_results) == 4
+    assert 'p_id' not in test_results[0][0]
+    assert {'p_id', 'units'} <= set(test_results[1][0])
+    assert 'vect_nam' in test_results[3][0]
+    for (earlier, _), (later, _) in zip(test_results, test_results[1:]):
+        assert later[:len(earlier)] == earlier
+
+
+def test_database_keeps_fields_of_later_entries(tmp_path, monkeypatch):
+    # One record per chunk, so the later fields arrive after the table was created
+    monkeypatch.setattr(database, 'iter_table_chunks', partial(iter_table_chunks, chunk_size=1))
+    path = tmp_path / 'lot.db'
+    create_database_from_atdf(str(path), entries_with_late_fields())
+    rows = table(path, 'test_results')
+    assert [row['test_num'] for row in rows] == [1, 2, 3, 4]
+    assert [row['p_id'] for row in rows] == [None, 1, 2, None]
+    assert [row['units'] for row in rows] == [None, 'V', None, None]
+    assert rows[3]['vect_nam'] == 'vec'
+
+
+def test_single_chunk_database_keeps_fields_of_later_entries(tmp_path):
+    path = tmp_path / 'lot.db'
+    create_database_from_atdf(str(path), entries_with_late_fields())
+    assert [row['units'] for row in table(path, 'test_results')] == [None, 'V', None, None]
+
+
+def test_appender_adds_columns(tmp_path):
+    path = tmp_path / 'lot.db'
+    entries = entries_with_late_fields()
+    late = entries['PTR'][1:]
+    entries['PTR'] = entries['PTR'][:1]
+    appender = DatabaseAppender(str(path))
+    appender.append(entries)
+    entries['PTR'].extend(late)
+    appender.close(entries)
+    rows = table(path, 'test_results')
+    assert [row['test_num'] for row in rows] == [1, 4, 2, 3]
+    assert [row['p_id'] for row in rows] == [None, None, 1, 2]
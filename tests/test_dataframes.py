@@ -0,0 +1,45 @@
+# tests/test_dataframes.py
+import numpy as np
+import pandas as pd
+
+from src.converter import iter_records, to_dataframes
+from src.core.utils.columnar import record_columns, to_column_value
+
+
+def test_dataframe_dtypes(make_lot):
+    path, counts = make_lot(tests=20, omit='repeat', seed=8)
+    frames = to_dataframes(str(path), records=['PTR', 'PRR', 'MIR'])
+
+    assert set(frames) == {'PTR', 'PRR', 'MIR'}
+    ptr = frames['PTR']
+    assert len(ptr) == counts['PTR']
+    assert ptr['result'].dtype == np.float32
+    assert ptr['test_num'].dtype == np.uint32
+    assert ptr['head_num'].dtype == np.uint8
+    assert isinstance(ptr['test_txt'].dtype, pd.CategoricalDtype)
+    # Later PTRs of a test leave out the limits and opt_flag: NaN floats and nullable integers
+    assert ptr['lo_limit'].isna().any() and ptr['lo_limit'].notna().any()
+    assert ptr['opt_flag'].dtype == 'UInt8' and ptr['opt_flag'].isna().any()
+    assert frames['PRR']['x_coord'].dtype == np.int16
+    assert frames['MIR']['lot_id'].tolist() == ['SYNTH01']
+
+
+def test_dataframe_values(make_lot):
+    path, _ = make_lot(tests=20, omit='random', seed=8)
+    frame = to_dataframes(str(path), records=['PTR'])['PTR']
+    entries = [entry for _, entry in iter_records(str(path), records=['PTR'])]
+
+    for field, stdf_dtype in record_columns('PTR').items():
+        expected = [to_column_value(stdf_dtype, entry[field]) for entry in entries]
+        actual = [None if pd.isna(value) else value for value in frame[field].tolist()]
+        assert actual == expected, field
+
+
+def test_dataframe_fields(make_lot):
+    path, _ = make_lot(seed=8)
+    frames = to_dataframes(str(path), records=['PTR', 'PRR'], fields=['test_num', 'result', 'hard_bin'])
+    assert list(frames['PTR'].columns) == ['test_num', 'result']
+    assert list(frames['PRR'].columns) == ['hard_bin']
+
+    frames = to_dataframes(str(path), records=['PTR'], fields={'PTR': ['site_num']})
+    assert list(frames['PTR'].columns) == ['site_num']
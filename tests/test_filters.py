@@ -0,0 +1,89 @@
+# tests/test_filters.py
+import pytest
+
+from src.converter import iter_records, run_conversion
+
+PART_RECORDS = ('PIR', 'PTR', 'MPR', 'FTR', 'PRR')
+RESULT_RECORDS = ('PTR', 'MPR', 'FTR')
+
+
+def in_ranges(value, ranges) -> bool:
+    return value is not None and any((lo is None or value >= lo) and (hi is None or value <= hi) for lo, hi in ranges)
+
+
+def filter_decoded(records, sites=None, tests=None, results=None, fail=False, hard_bins=None) -> dict:
+    """The rows a filter expression keeps, decided on decoded entries; grouped by record type."""
+    def keeps(record_type, entry) -> bool:
+        if sites is not None and entry['site_num'] not in sites:
+            return False
+        if record_type in RESULT_RECORDS:
+            if tests is not None and not in_ranges(entry['test_num'], tests):
+                return False
+            if fail and int(entry['test_flg'], 2) & 0xC0 != 0x80:
+                return False
+        if record_type == 'PTR' and results is not None and not in_ranges(entry['result'], results):
+            return False
+        return True
+
+    kept = {}
+    open_parts = {}
+    for record_type, entry in records:
+        if record_type not in PART_RECORDS:
+            kept.setdefault(record_type, []).append(entry)
+            continue
+        part = (entry['head_num'], entry['site_num'])
+        if record_type == 'PIR':
+            open_parts[part] = []
+        passed = keeps(record_type, entry)
+        if record_type == 'PRR':
+            buffered = open_parts.pop(part, [])
+            if passed and (hard_bins is None or entry['hard_bin'] in hard_bins):
+                for buffered_type, buffered_entry in buffered + [(record_type, entry)]:
+                    kept.setdefault(buffered_type, []).append(buffered_entry)
+        elif passed:
+            open_parts[part].append((record_type, entry))
+    return kept
+
+
+def by_type(records) -> dict:
+    grouped = {}
+    for record_type, entry in records:
+        grouped.setdefault(record_type, []).append(entry)
+    return grouped
+
+
+@pytest.fixture(scope='module')
+def lot(tmp_path_factory):
+    from src.core.utils.synthetic import generate_stdf
+    path = tmp_path_factory.mktemp('filters') / 'lot.stdf'
+    generate_stdf(str(path), wafers=2, parts_per_wafer=24, sites=4, tests=40,
+                  mix={'PTR': 0.6, 'MPR': 0.2, 'FTR': 0.2}, seed=21)
+    return str(path)
+
+
+@pytest.mark.parametrize('expression, reference', [
+    ('site=0,2', {'sites': {0, 2}}),
+    ('test_num=1005..1014', {'tests': [(1005, 1014)]}),
+    ('test_num=..1003,1030..', {'tests': [(None, 1003), (1030, None)]}),
+    ('result=..0', {'results': [(None, 0)]}),
+    ('fail', {'fail': True}),
+    ('hard_bin=1', {'hard_bins': {1}}),
+    ('site=1,3 hard_bin=2,3,4,5 test_num=1010..', {'sites': {1, 3}, 'hard_bins': {2, 3, 4, 5},
+                                                    'tests': [(1010, None)]}),
+])
+def test_filter_keeps_the_rows_of_a_decoded_filter(lot, expression, reference):
+    expected = filter_decoded(iter_records(lot), **reference)
+    filtered = by_type(iter_records(lot, filter_expression=expression))
+    assert filtered == expected
+    # Something is dropped and something kept
+    assert 0 < sum(map(len, filtered.values())) < sum(1 for _ in iter_records(lot))
+
+
+def test_conversion_counts_dropped_records(lot):
+    result = run_conversion(lot, filter_expression='site=0 hard_bin=1', collect_metrics=True)
+    expected = filter_decoded(iter_records(lot), sites={0}, hard_bins={1})
+    full = by_type(iter_records(lot))
+    skipped = result.metrics.to_dict()['record_types']
+    for record_type in PART_RECORDS:
+        dropped = len(full.get(record_type, [])) - len(expected.get(record_type, []))
+        assert skipped.get(record_type, {}).get('skipped', 0) == dropped, record_type
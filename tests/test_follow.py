@@ -0,0 +1,156 @@
+# tests/test_follow.py
+import sqlite3
+import types
+
+import pytest
+
+from src.converter import run_conversion
+from src.core.stdf import reader
+from src.core.stdf.reader import HEADER_SIZE, follow_raw_records, iter_raw_records
+
+
+def record_offsets(data: bytes) -> list:
+    """Header offsets of the records of a little-endian STDF file."""
+    offsets = []
+    offset = 0
+    while offset < len(data):
+        offsets.append(offset)
+        offset += HEADER_SIZE + int.from_bytes(data[offset:offset + 2], 'little')
+    return offsets
+
+
+@pytest.fixture
+def growing_file(tmp_path, monkeypatch):
+    """
+    grow(data, cuts, on_poll=None): write data[:cuts[0]] and append up to the next cut at every poll.
+
+    Polls are the reader's sleeps; on_poll is called before each append. A fake
+    clock advances by the poll interval at every poll, so idle timeouts need no waiting.
+    """
+    path = tmp_path / 'growing.stdf'
+    clock = types.SimpleNamespace(now=0.0, polls=0)
+
+    def grow(data: bytes, cuts: list, on_poll=None):
+        ends = list(cuts) + [len(data)]
+        path.write_bytes(data[:ends[0]])
+        pending = iter(zip(ends, ends[1:]))
+
+        def sleep(seconds):
+            clock.now += seconds
+            clock.polls += 1
+            if on_poll:
+                on_poll()
+            start, end = next(pending, (None, None))
+            if start is not None:
+                with open(path, 'ab') as f:
+                    f.write(data[start:end])
+
+        monkeypatch.setattr(reader, 'time', types.SimpleNamespace(sleep=sleep, monotonic=lambda: clock.now))
+        return path, clock
+    return grow
+
+
+def cuts_between_and_inside_records(data: bytes) -> list:
+    # Mid-header, mid-payload and exact boundaries, spread over the file
+    offsets = record_offsets(data)
+    step = len(offsets) // 6
+    return [offsets[step] + 2, offsets[2 * step] + HEADER_SIZE + 1, offsets[3 * step],
+            offsets[4 * step] + 1, offsets[5 * step] + HEADER_SIZE]
+
+
+def test_follow_reads_every_record_up_to_the_mrr(make_lot, growing_file):
+    lot, _ = make_lot(seed=11)
+    data = lot.read_bytes()
+    cuts = cuts_between_and_inside_records(data)
+    # Bytes after the MRR are never read
+    path, clock = growing_file(data + b'\x00' * 40, cuts + [len(data)])
+    idle = []
+
+    with open(lot, 'rb') as f:
+        expected = list(iter_raw_records(f, '<'))
+    with open(path, 'rb') as f:
+        records = list(follow_raw_records(f, '<', poll_interval=0.5, on_idle=lambda: idle.append(f.tell())))
+        assert f.tell() == len(data)
+
+    assert records == expected
+    assert records[-1][:2] == (1, 20)
+    # Caught up once at every cut, each time rewound to the last complete record
+    assert clock.polls == len(cuts) and len(idle) == len(cuts)
+    offsets = record_offsets(data)
+    assert all(position in offsets for position in idle)
+
+
+def test_idle_timeout_stops_without_mrr(make_lot, growing_file):
+    lot, _ = make_lot(seed=11)
+    data = lot.read_bytes()
+    offsets = record_offsets(data)
+    # The writer stops partway through the last PRR and never writes the MRR
+    cut = offsets[-3] + HEADER_SIZE + 2
+    path, clock = growing_file(data[:cut], [offsets[len(offsets) // 2]])
+
+    with open(lot, 'rb') as f:
+        expected = list(iter_raw_records(f, '<'))[:len(offsets) - 3]
+    with open(path, 'rb') as f:
+        records = list(follow_raw_records(f, '<', poll_interval=1.0, idle_timeout=5.0))
+        assert f.tell() == offsets[-3]
+
+    assert records == expected
+    assert clock.now == pytest.approx(1.0 + 5.0)
+
+
+def table_rows(path, name: str) -> list:
+    """
+    Rows comparable across runs: without the per-run ids, the session prefix of
+    generated ids and the DataFrame index, with integral floats as ints (a
+    column of a one-shot write is REAL when any of its values is missing).
+    """
+    with sqlite3.connect(path) as connection:
+        cursor = connection.execute(f'SELECT * FROM "{name}"')
+        columns = [description[0] for description in cursor.description]
+        rows = []
+        for values in cursor:
+            row = dict(zip(columns, values))
+            session = row.get('test_session_id')
+            for column in ('file_id', 'test_session_id', 'created_at', 'index'):
+                row.pop(column, None)
+            for column, value in row.items():
+                if isinstance(value, float) and value.is_integer():
+                    row[column] = int(value)
+                elif session and isinstance(value, str) and value.startswith(session):
+                    row[column] = value[len(session):]
+            rows.append(sorted(row.items()))
+    return sorted(rows, key=repr)
+
+
+def table_names(path) -> list:
+    with sqlite3.connect(path) as connection:
+        return sorted(name for name, in connection.execute("SELECT name FROM sqlite_master WHERE type = 'table'"))
+
+
+def test_follow_appends_to_database_incrementally(make_lot, growing_file, tmp_path):
+    lot, _ = make_lot(seed=11)
+    data = lot.read_bytes()
+    database_path = tmp_path / 'followed.db'
+    atdf_path = tmp_path / 'followed.atdf'
+    seen = []
+
+    def on_poll():
+        # What a reader of the outputs sees while the tester is still writing
+        written = database_path.exists() and 'test_results' in table_names(database_path)
+        rows = len(table_rows(database_path, 'test_results')) if written else 0
+        seen.append((rows, atdf_path.stat().st_size))
+
+    path, _ = growing_file(data, cuts_between_and_inside_records(data), on_poll)
+    run_conversion(str(path), output_atdf_file=str(atdf_path), output_atdf_database=str(database_path),
+                   follow=True, poll_interval=0.1)
+    run_conversion(str(lot), output_atdf_file=str(tmp_path / 'lot.atdf'), output_atdf_database=str(tmp_path / 'lot.db'))
+
+    result_rows = [rows for rows, _ in seen]
+    assert result_rows == sorted(result_rows) and 0 < result_rows[1] < result_rows[-1]
+    atdf_sizes = [size for _, size in seen]
+    assert atdf_sizes == sorted(atdf_sizes) and 0 < atdf_sizes[0] < atdf_sizes[-1]
+
+    assert atdf_path.read_text() == (tmp_path / 'lot.atdf').read_text()
+    assert table_names(database_path) == table_names(tmp_path / 'lot.db')
+    for name in table_names(tmp_path / 'lot.db'):
+        assert table_rows(database_path, name) == table_rows(tmp_path / 'lot.db', name), name
@@ -0,0 +1,64 @@
+# tests/test_iter_records.py
+from collections import Counter
+
+import pandas as pd
+
+from src.converter import iter_dataframes, iter_records, to_dataframes
+from src.core.stdf.handler import handle_stdf_entry
+from src.core.utils.templates import create_stdf_template
+
+
+def test_every_record_in_file_order(make_lot):
+    path, counts = make_lot(seed=12)
+    records = list(iter_records(str(path)))
+    assert Counter(record_type for record_type, _ in records) == counts
+    assert records[0][0] == 'FAR' and records[-1][0] == 'MRR'
+
+
+def test_records_and_fields(make_lot):
+    path, counts = make_lot(seed=12)
+    full = [entry for _, entry in iter_records(str(path), records=['PTR'])]
+    selected = list(iter_records(str(path), records=['PTR', 'PRR'], fields=['test_num', 'result', 'hard_bin']))
+
+    assert Counter(record_type for record_type, _ in selected) == {'PTR': counts['PTR'], 'PRR': counts['PRR']}
+    ptrs = [entry for record_type, entry in selected if record_type == 'PTR']
+    assert ptrs == [{'test_num': entry['test_num'], 'result': entry['result']} for entry in full]
+    assert all(list(entry) == ['hard_bin'] for record_type, entry in selected if record_type == 'PRR')
+
+
+def test_raw_payloads(make_lot):
+    path, _ = make_lot(endianness='>', seed=12)
+    template = create_stdf_template('PTR')
+    raw = [bytes(payload) for _, payload in iter_records(str(path), records=['PTR'], raw=True)]
+    decoded = [entry for _, entry in iter_records(str(path), records=['PTR'])]
+    assert len(raw) == len(decoded)
+    for payload, entry in zip(raw, decoded):
+        from_payload = handle_stdf_entry(template, payload, '>')
+        assert {name: from_payload.get(name) for name in entry} == entry
+
+
+def test_stopping_early(make_lot):
+    path, _ = make_lot(seed=12)
+    records = iter_records(str(path))
+    for record_type, entry in records:
+        if record_type == 'WIR':
+            break
+    assert entry['wafer_id'] == 'W01'
+    records.close()
+
+
+def test_chunked_dataframes_match_one_frame(make_lot):
+    path, counts = make_lot(parts_per_wafer=16, seed=12)
+    whole = to_dataframes(str(path), records=['PTR', 'PRR'])
+    chunks = {}
+    for record_type, frame in iter_dataframes(str(path), records=['PTR', 'PRR'], chunk_size=50):
+        assert len(frame) <= 50
+        chunks.setdefault(record_type, []).append(frame)
+
+    assert len(chunks['PTR']) == -(-counts['PTR'] // 50)
+    for record_type, frames in chunks.items():
+        combined = pd.concat(frames, ignore_index=True)
+        expected = whole[record_type]
+        # Categories differ per chunk; compare the values
+        for column in expected.columns:
+            pd.testing.assert_series_equal(combined[column].astype(object), expected[column].astype(object))
@@ -0,0 +1,64 @@
+# tests/test_manifest.py
+import os
+import sys
+
+import pytest
+
+from src import cli
+from src.core.utils import services
+from src.core.utils.manifest import MANIFEST_NAME
+
+
+@pytest.fixture
+def incremental_run(make_lot, tmp_path, monkeypatch):
+    """Two lots in tmp_path; run(*flags) converts them with --incremental and returns the names converted."""
+    make_lot('first.stdf', seed=1)
+    make_lot('second.stdf', seed=2)
+    process_files = services.process_files
+
+    def run(*flags):
+        converted = []
+
+        def recording(input_files, **kwargs):
+            converted.extend(path.name for path in input_files)
+            return process_files(input_files, **kwargs)
+
+        monkeypatch.setattr(services, 'process_files', recording)
+        monkeypatch.setattr(sys, 'argv', ['stdf2atdf', str(tmp_path), '--incremental', '--workers', '1', *flags])
+        assert cli.main() == 0
+        return sorted(converted)
+    return run
+
+
+def test_unchanged_files_are_skipped(incremental_run, tmp_path):
+    assert incremental_run('--output') == ['first.stdf', 'second.stdf']
+    assert (tmp_path / MANIFEST_NAME).exists()
+    assert incremental_run('--output') == []
+
+
+def test_touched_file_with_same_content_is_skipped(incremental_run, tmp_path):
+    incremental_run('--output')
+    path = tmp_path / 'first.stdf'
+    stat = path.stat()
+    os.utime(path, ns=(stat.st_atime_ns, stat.st_mtime_ns + 5_000_000_000))
+    assert incremental_run('--output') == []
+
+    # Same size, one byte changed: the fingerprint no longer matches
+    data = bytearray(path.read_bytes())
+    data[-3] ^= 0xFF
+    path.write_bytes(bytes(data))
+    assert incremental_run('--output') == ['first.stdf']
+
+
+def test_changed_options_reconvert(incremental_run):
+    incremental_run('--output')
+    assert incremental_run('--output', '--records', 'PTR', 'PRR') == ['first.stdf', 'second.stdf']
+    assert incremental_run('--output', '--records', 'PRR', 'PTR') == []
+    assert incremental_run('--output', '--records', 'PRR', 'PTR', '--filter', 'site=1') == ['first.stdf', 'second.stdf']
+
+
+def test_deleted_output_reconverts(incremental_run, tmp_path):
+    incremental_run('--output', '--stats')
+    (tmp_path / 'second.stats.json').unlink()
+    assert incremental_run('--output', '--stats') == ['second.stdf']
+    assert (tmp_path / 'second.stats.json').exists()
@@ -0,0 +1,56 @@
+# tests/test_matrix.py
+import numpy as np
+
+from src.converter import iter_records, run_conversion
+from src.core.stdf.packers import pack_record
+from src.core.utils.matrix import MISSING_COORDINATE, PartTestMatrix, load_part_test_matrix
+
+
+def test_matrix_holds_ptr_results(make_lot, tmp_path):
+    path, counts = make_lot(tests=10, mix={'PTR': 1.0}, seed=4)
+    run_conversion(str(path), output_matrix=str(tmp_path / 'lot'))
+    matrix, parts, tests = load_part_test_matrix(str(tmp_path / 'lot'))
+
+    assert matrix.shape == (counts['PRR'], counts['TSR'])
+    prrs = [entry for _, entry in iter_records(str(path), records=['PRR'])]
+    assert parts['x_coord'].tolist() == [prr['x_coord'] for prr in prrs]
+    assert parts['hard_bin'].tolist() == [prr['hard_bin'] for prr in prrs]
+
+    # Results in file order: each part's tests fill one row
+    ptrs = [entry for _, entry in iter_records(str(path), records=['PTR'])]
+    expected = np.array([ptr['result'] for ptr in ptrs], dtype=np.float32).reshape(matrix.shape)
+    assert tests.tolist() == [ptr['test_num'] for ptr in ptrs[:matrix.shape[1]]]
+    np.testing.assert_array_equal(matrix, expected)
+
+
+def test_missing_coordinates(tmp_path):
+    path = tmp_path / 'lot.stdf'
+    records = [
+        pack_record('FAR', {'cpu_type': 2, 'stdf_ver': 4}, '<'),
+        pack_record('PIR', {'head_num': 1, 'site_num': 0}, '<'),
+        pack_record('PTR', {'test_num': 1, 'head_num': 1, 'site_num': 0, 'test_flg': 0, 'parm_flg': 0,
+                            'result': 1.5}, '<'),
+        # The PRR ends before x_coord and y_coord
+        pack_record('PRR', {'head_num': 1, 'site_num': 0, 'part_flg': 0, 'num_test': 1, 'hard_bin': 1,
+                            'soft_bin': 1}, '<'),
+        pack_record('PIR', {'head_num': 1, 'site_num': 0}, '<'),
+        pack_record('PRR', {'head_num': 1, 'site_num': 0, 'part_flg': 0, 'num_test': 0, 'hard_bin': 1,
+                            'soft_bin': 1, 'x_coord': 0, 'y_coord': 0}, '<'),
+    ]
+    path.write_bytes(b''.join(records))
+    run_conversion(str(path), output_matrix=str(tmp_path / 'lot'))
+    matrix, parts, _ = load_part_test_matrix(str(tmp_path / 'lot'))
+
+    assert parts['x_coord'].tolist() == [MISSING_COORDINATE, 0]
+    assert parts['y_coord'].tolist() == [MISSING_COORDINATE, 0]
+    assert matrix[0, 0] == 1.5 and np.isnan(matrix[1, 0])
+
+
+def test_result_without_test_num_is_counted():
+    # A decoded PTR that holds head and site but no test_num
+    matrix = PartTestMatrix()
+    matrix.append('PIR', {'head_num': 1, 'site_num': 0})
+    matrix.append('PTR', {'head_num': 1, 'site_num': 0, 'test_num': None, 'result': 1.0})
+    matrix.append('PRR', {'head_num': 1, 'site_num': 0})
+    _, _, tests = matrix.to_arrays()
+    assert len(tests) == 0 and matrix.unnumbered_results == 1
@@ -0,0 +1,63 @@
+# tests/test_metadata.py
+import json
+import sys
+
+import pytest
+
+from src import cli
+from src.converter import iter_records
+from src.core.stdf.metadata import catalog_files, read_lot_metadata
+from src.core.stdf.packers import pack_record
+from src.core.utils.synthetic import START_TIME
+
+
+def present(entry):
+    return {name: value for name, value in entry.items() if value is not None}
+
+
+@pytest.mark.parametrize('name, endianness', [('lot.stdf', '<'), ('lot.stdf', '>'), ('lot.stdf.gz', '>')])
+def test_metadata_matches_decoded_records(make_lot, name, endianness):
+    path, _ = make_lot(name, wafers=3, endianness=endianness, seed=16)
+    metadata = read_lot_metadata(path)
+    decoded = {record_type: entry for record_type, entry in iter_records(str(path), records=['MIR', 'SDR', 'MRR'])}
+
+    for record_type in ('MIR', 'MRR'):
+        assert present(metadata[record_type]) == present(decoded[record_type])
+    assert [sdr['site_num'] for sdr in metadata['SDR']] == [decoded['SDR']['site_num']]
+    assert (metadata['lot_id'], metadata['part_typ'], metadata['node_nam']) == ('SYNTH01', 'SYNTHETIC', 'node01')
+    assert (metadata['start_t'], metadata['finish_t']) == (START_TIME + 60, START_TIME + 3 * 3600)
+    assert metadata['complete'] and metadata['finish_time']
+    assert metadata['endianness'] == ('big' if endianness == '>' else 'little')
+
+
+def test_mrr_found_behind_lookalike_bytes(make_lot):
+    path, _ = make_lot(parts_per_wafer=40, seed=16)
+    # A DTR after the MRR whose text holds MRR key bytes; only the real MRR leads to the end of the file
+    trailer = pack_record('DTR', {'text_dat': 'x\x01\x14' * 20}, '<')
+    path.write_bytes(path.read_bytes() + trailer)
+
+    metadata = read_lot_metadata(path, tail_window=512)
+    assert metadata['complete'] and metadata['finish_t'] == START_TIME + 3600
+
+
+def test_missing_mrr(make_lot):
+    path, _ = make_lot(seed=16)
+    path.write_bytes(path.read_bytes()[:-5])
+    metadata = read_lot_metadata(path)
+    assert metadata['lot_id'] == 'SYNTH01'
+    assert not metadata['complete']
+    assert metadata['MRR'] is None and metadata['finish_time'] is None
+
+
+def test_catalog_and_command_line(make_lot, tmp_path, monkeypatch):
+    first, _ = make_lot('first.stdf', seed=1)
+    make_lot('second.stdf', seed=2)
+    catalog = catalog_files([first, tmp_path / 'missing.stdf'], report_path=str(tmp_path / 'catalog.json'))
+    assert catalog[0]['lot_id'] == 'SYNTH01' and 'error' in catalog[1]
+
+    monkeypatch.setattr(sys, 'argv', ['stdf2atdf', str(tmp_path), '--metadata'])
+    assert cli.main() == 0
+    with open(tmp_path / 'metadata.json') as f:
+        saved = json.load(f)
+    assert sorted(metadata['file'].rsplit('/', 1)[-1] for metadata in saved) == ['first.stdf', 'second.stdf']
+    assert all(metadata['complete'] for metadata in saved)
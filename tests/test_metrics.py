@@ -0,0 +1,85 @@
+# tests/test_metrics.py
+import json
+import pstats
+import struct
+
+import pytest
+
+from src.converter import iter_records, run_conversion
+from src.core.utils.metrics import STAGES, ConversionMetrics, merge_metrics, profiled
+
+# A record of a type without a template
+VENDOR_RECORD = struct.pack('<HBB', 3, 200, 7) + b'abc'
+
+
+def test_counts_and_skipped_records(make_lot):
+    path, counts = make_lot(seed=14)
+    with open(path, 'ab') as f:
+        f.write(VENDOR_RECORD * 2)
+    metrics = run_conversion(str(path), records_to_process=['PIR', 'PTR', 'PRR'], collect_metrics=True).metrics
+    record_types = metrics.record_types
+
+    for record_type in ('PIR', 'PTR', 'PRR'):
+        assert record_types[record_type]['records'] == counts[record_type]
+        assert record_types[record_type]['skipped'] == 0
+    # Records left out by the record selection are only counted as skipped
+    for record_type in ('MIR', 'WIR', 'TSR', 'MRR'):
+        assert record_types[record_type]['records'] == 0 and record_types[record_type]['bytes'] == 0
+        assert record_types[record_type]['skipped'] == counts[record_type]
+    assert record_types['unknown']['skipped'] == 2
+
+    data = path.read_bytes()
+    ptr_bytes = sum(4 + len(payload) for _, payload in iter_records(str(path), records=['PTR'], raw=True))
+    assert record_types['PTR']['bytes'] == ptr_bytes
+    totals = metrics.totals()
+    assert totals['records'] == sum(counts[record_type] for record_type in ('PIR', 'PTR', 'PRR'))
+    assert totals['records'] + totals['skipped'] == sum(counts.values()) + 2
+    assert metrics.files == 1 and metrics.input_bytes == len(data)
+
+
+def test_row_filter_drops_count_as_skipped(make_lot):
+    path, counts = make_lot(seed=14)
+    metrics = run_conversion(str(path), filter_expression='site=1', collect_metrics=True).metrics
+    kept = sum(1 for _ in iter_records(str(path), records=['PTR'], filter_expression='site=1'))
+    assert 0 < kept < counts['PTR']
+    assert metrics.record_types['PTR']['records'] == kept
+    assert metrics.record_types['PTR']['skipped'] == counts['PTR'] - kept
+
+
+def test_round_trip_and_merge(make_lot, tmp_path):
+    first, _ = make_lot('first.stdf', seed=1)
+    second, _ = make_lot('second.stdf', seed=2)
+    partials = [run_conversion(str(path), output_metrics=str(tmp_path / f'{path.stem}.metrics.json')).metrics
+                for path in (first, second)]
+
+    with open(tmp_path / 'first.metrics.json') as f:
+        saved = json.load(f)
+    assert saved == json.loads(json.dumps(partials[0].to_dict()))
+    restored = ConversionMetrics.from_dict(saved)
+    assert restored.to_dict() == partials[0].to_dict()
+    # read is derived from the record loop and the timed stages, never stored as a phase
+    assert 'read' not in restored.phases
+    phases, totals = saved['phases'], saved['totals']
+    assert phases['read'] == pytest.approx(max(0.0, phases['records'] - sum(totals[f'{stage}_s'] for stage in STAGES)))
+
+    merged = merge_metrics([restored, None, ConversionMetrics.from_dict(partials[1].to_dict())])
+    assert merged.files == 2
+    assert merged.input_bytes == first.stat().st_size + second.stat().st_size
+    for record_type, counters in merged.record_types.items():
+        for name, value in counters.items():
+            expected = sum(partial.record_types.get(record_type, {}).get(name, 0) for partial in partials)
+            assert value == pytest.approx(expected), (record_type, name)
+    assert merged.phases['records'] == pytest.approx(sum(partial.phases['records'] for partial in partials))
+    assert merged.table().splitlines()[-2].startswith('total')
+
+
+def test_profiled(make_lot, tmp_path, caplog):
+    path, _ = make_lot(seed=14)
+    caplog.set_level('INFO')
+    with profiled(str(tmp_path / 'lot'), top=5):
+        run_conversion(str(path))
+
+    stats = pstats.Stats(str(tmp_path / 'lot.prof'))
+    assert any(function == 'run_conversion' for _, _, function in stats.stats)
+    assert 'top 5 functions by cumulative time' in caplog.text
+    assert 'Peak traced memory' in caplog.text
@@ -0,0 +1,40 @@
+# tests/test_parts.py
+import sqlite3
+
+from src.converter import run_conversion
+
+
+def test_interleaved_parts(interleaved_lot):
+    path, expected = interleaved_lot
+    parts = []
+    run_conversion(str(path), on_part=parts.append)
+
+    assert len(parts) == len(expected)
+    # Parts are handed over as their PRR arrives: reverse site order within each touchdown
+    assert [part.prr['part_id'] for part in parts[:3]] == ['3', '2', '1']
+    for part in parts:
+        head, site, wafer_id, results = expected[part.prr['part_id']]
+        assert (part.head_num, part.site_num) == (head, site)
+        assert (part.pir['head_num'], part.pir['site_num']) == (head, site)
+        assert part.p_id == int(part.prr['part_id'])
+        assert part.wafer['wafer_id'] == wafer_id and part.w_id == head
+        assert [(entry['test_num'], entry['result']) for _, entry in part.results] == results
+        assert part.result_count == len(results) and part.passed
+
+
+def test_database_links_results_to_parts(interleaved_lot, tmp_path):
+    path, expected = interleaved_lot
+    run_conversion(str(path), output_atdf_database=str(tmp_path / 'lot.db'))
+    with sqlite3.connect(tmp_path / 'lot.db') as connection:
+        parts = connection.execute('SELECT p_id, w_id, head_num, site_num, wafer_id, part_id, results '
+                                   'FROM parts ORDER BY p_id').fetchall()
+        results = connection.execute('SELECT p_id, w_id, test_number, test_result FROM test_results').fetchall()
+
+    assert [(p_id, w_id, head, site, wafer_id, results_count) for p_id, w_id, head, site, wafer_id, _, results_count
+            in parts] == [(int(part_id), head, head, site, wafer_id, len(part_results))
+                          for part_id, (head, site, wafer_id, part_results) in expected.items()]
+    assert len(results) == sum(len(part_results) for _, _, _, part_results in expected.values())
+    for p_id, w_id, test_num, result in results:
+        head, _, _, part_results = expected[str(p_id)]
+        assert w_id == head
+        assert (test_num, result) in part_results
@@ -0,0 +1,73 @@
+# tests/test_progress.py
+import json
+import re
+
+import pytest
+
+from src.core.utils import services
+from src.core.utils.progress import ProgressMonitor, ProgressReporter, format_duration
+
+
+def test_progress_file_reaches_completion(make_lot, tmp_path, monkeypatch):
+    paths, counts = zip(*(make_lot(f'lot{index}.stdf', parts_per_wafer=40, seed=index) for index in range(2)))
+    progress_file = tmp_path / 'progress.json'
+    snapshots = []
+
+    class RecordingMonitor(ProgressMonitor):
+        # Reports every 50 ms instead of every few seconds, keeping each one
+        def __init__(self, *args, **kwargs):
+            super().__init__(*args, interval=0.05, **kwargs)
+
+        def report(self):
+            summary = super().report()
+            snapshots.append(summary)
+            return summary
+
+    monkeypatch.setattr(services, 'ProgressMonitor', RecordingMonitor)
+    results = services.process_files(list(paths), output=True, max_workers=2, progress_file=str(progress_file))
+    assert len(results) == 2
+
+    with open(progress_file) as f:
+        final = json.load(f)
+    assert final == json.loads(json.dumps(snapshots[-1]))
+    assert (final['files_total'], final['files_done'], final['files_failed']) == (2, 2, 0)
+    assert final['bytes_done'] == final['bytes_total'] == sum(path.stat().st_size for path in paths)
+    assert final['fraction'] == 1.0 and final['eta_s'] == 0.0
+    assert final['records'] == sum(sum(lot_counts.values()) for lot_counts in counts)
+    for path in paths:
+        state = final['files'][str(path)]
+        assert state['state'] == 'done' and state['fraction'] == 1.0 and not state['stalled']
+
+    fractions = [snapshot['fraction'] for snapshot in snapshots]
+    assert fractions == sorted(fractions)
+    for snapshot in snapshots:
+        assert snapshot['eta_s'] is None or snapshot['eta_s'] >= 0
+        assert re.fullmatch(r'\d{2}:\d{2}:\d{2}|--:--:--', format_duration(snapshot['eta_s']))
+
+
+def test_eta_from_partial_reports(make_lot, tmp_path):
+    path, _ = make_lot(seed=3)
+    size = path.stat().st_size
+    monitor = ProgressMonitor([path], interval=60)
+    with monitor:
+        reporter = ProgressReporter(monitor.queue, str(path))
+
+        class HalfRead:
+            def tell(self):
+                return size // 2
+
+        reporter.records = 100
+        reporter.started(HalfRead())
+    summary = monitor.summary()
+
+    assert summary['files_done'] == 0 and summary['files']
+    assert summary['fraction'] == pytest.approx((size // 2) / size)
+    # Half the input left at the rate so far takes about as long again as the time elapsed
+    assert summary['eta_s'] == pytest.approx(summary['elapsed'] * (size - size // 2) / (size // 2))
+    assert summary['files'][str(path)]['record_type'] is None and summary['records'] == 100
+
+
+def test_format_duration():
+    assert format_duration(None) == '--:--:--'
+    assert format_duration(0.4) == '00:00:00'
+    assert format_duration(3725.9) == '01:02:05'
@@ -0,0 +1,71 @@
+# tests/test_resync.py
+import random
+import struct
+
+import pytest
+
+from src.converter import run_conversion
+from src.core.stdf.reader import QuarantineReport, plausible_keys, resync_raw_records
+from src.core.utils.templates import create_stdf_mapping
+
+
+def record_offsets(buffer: bytes) -> list:
+    offsets = []
+    position = 0
+    while position + 4 <= len(buffer):
+        offsets.append(position)
+        position += 4 + struct.unpack_from('<H', buffer, position)[0]
+    return offsets
+
+
+def resync(path):
+    quarantine = QuarantineReport(str(path))
+    with open(path, 'rb') as stdf_file:
+        records = list(resync_raw_records(stdf_file, '<', plausible_keys(create_stdf_mapping()), quarantine))
+    return records, [(found['start'], found['end'], found['reason']) for found in quarantine.ranges]
+
+
+@pytest.fixture
+def lot(make_lot):
+    path, counts = make_lot(seed=9)
+    buffer = path.read_bytes()
+    return path, buffer, record_offsets(buffer), sum(counts.values())
+
+
+def test_corrupt_length_and_garbage(lot):
+    path, buffer, offsets, total = lot
+    damaged = bytearray(buffer)
+    # Record 40 claims 37 more bytes than it has, and 500 random bytes precede record 120
+    rec_len = struct.unpack_from('<H', damaged, offsets[40])[0]
+    struct.pack_into('<H', damaged, offsets[40], rec_len + 37)
+    garbage = bytes(random.Random(1).randrange(256) for _ in range(500))
+    path.write_bytes(bytes(damaged[:offsets[120]]) + garbage + bytes(damaged[offsets[120]:]))
+
+    records, ranges = resync(path)
+    assert ranges == [(offsets[40], offsets[41], 'bad record length'),
+                      (offsets[120], offsets[120] + 500, 'damaged header')]
+    assert len(records) == total - 1
+
+    result = run_conversion(str(path), resync=True)
+    assert [(found['start'], found['end'], found['reason']) for found in result.quarantine] == ranges
+
+
+def test_length_past_end_of_file(lot):
+    path, buffer, offsets, total = lot
+    # The claimed end of record -5 lies past the end of the file, but the next records are intact
+    damaged = bytearray(buffer)
+    struct.pack_into('<H', damaged, offsets[-5], 0xFFFF)
+    path.write_bytes(bytes(damaged))
+
+    records, ranges = resync(path)
+    assert ranges == [(offsets[-5], offsets[-4], 'bad record length')]
+    assert len(records) == total - 1
+
+
+def test_truncated_last_record(lot):
+    path, buffer, offsets, total = lot
+    path.write_bytes(buffer[:-3])
+
+    records, ranges = resync(path)
+    assert ranges == [(offsets[-1], len(buffer) - 3, 'truncated record')]
+    assert len(records) == total - 1
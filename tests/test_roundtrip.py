@@ -0,0 +1,42 @@
+# tests/test_roundtrip.py
+import gzip
+
+import pytest
+
+from src.core.utils.synthetic import OMIT_PATTERNS, PINS_PER_SITE, verify_round_trip
+
+
+@pytest.mark.parametrize('endianness', ['<', '>'])
+@pytest.mark.parametrize('omit', OMIT_PATTERNS)
+def test_round_trip(make_lot, endianness, omit):
+    path, counts = make_lot(wafers=2, parts_per_wafer=6, sites=4, tests=12, omit=omit, endianness=endianness,
+                            seed=7)
+    verified = verify_round_trip(str(path))
+    assert verified.pop('mismatches') == 0
+    assert verified == counts
+    assert counts['PIR'] == counts['PRR'] == 12
+    assert counts['WIR'] == counts['WRR'] == 2
+    assert sum(counts.get(kind, 0) for kind in ('PTR', 'MPR', 'FTR')) == 12 * 12
+    assert counts['TSR'] == 12
+    assert counts['PMR'] == 4 * PINS_PER_SITE
+    for record_type in ('FAR', 'MIR', 'SDR', 'PCR', 'MRR'):
+        assert counts[record_type] == 1
+
+
+def test_gzip_round_trip(make_lot):
+    path, counts = make_lot('lot.stdf', seed=3)
+    gz_path, gz_counts = make_lot('lot.stdf.gz', seed=3)
+    assert gz_counts == counts
+    assert gzip.decompress(gz_path.read_bytes()) == path.read_bytes()
+    verified = verify_round_trip(str(gz_path))
+    assert verified.pop('mismatches') == 0
+    assert verified == counts
+
+
+@pytest.mark.parametrize('omit', OMIT_PATTERNS)
+def test_same_seed_same_bytes(make_lot, omit):
+    first, _ = make_lot('first.stdf', omit=omit, seed=11)
+    second, _ = make_lot('second.stdf', omit=omit, seed=11)
+    other, _ = make_lot('other.stdf', omit=omit, seed=12)
+    assert first.read_bytes() == second.read_bytes()
+    assert first.read_bytes() != other.read_bytes()
@@ -0,0 +1,58 @@
+# tests/test_scan.py
+import json
+import sys
+
+import pytest
+
+from src import cli
+from src.core.stdf.scan import format_scan, scan_file, scan_files
+
+
+@pytest.mark.parametrize('name, endianness', [('lot.stdf', '<'), ('lot.stdf', '>'), ('lot.stdf.gz', '<')])
+def test_scan_counts_records_from_headers(make_lot, name, endianness):
+    path, counts = make_lot(name, wafers=2, endianness=endianness, seed=15)
+    report = scan_file(str(path))
+
+    assert {name: counted['records'] for name, counted in report['record_types'].items()} == counts
+    assert report['records'] == sum(counts.values())
+    assert sum(counted['bytes'] for counted in report['record_types'].values()) == report['size']
+    assert (report['parts'], report['wafers']) == (counts['PIR'], 2)
+    assert report['endianness'] == ('big' if endianness == '>' else 'little')
+    assert report['starts_with_far'] and report['ends_with_mrr'] and report['trailing_bytes'] == 0
+    assert format_scan(report).endswith('complete')
+
+
+def test_scan_reports_truncation_and_unknown_types(make_lot):
+    path, counts = make_lot(seed=15)
+    # An unknown 180/7 record, then a record cut off after 3 of its bytes
+    path.write_bytes(path.read_bytes() + b'\x02\x00\xb4\x07ab' + b'\x10\x00\x0f')
+    report = scan_file(str(path))
+
+    assert report['records'] == sum(counts.values()) + 1
+    assert report['record_types']['180/7'] == {'records': 1, 'bytes': 6}
+    assert report['trailing_bytes'] == 3
+    assert not report['ends_with_mrr']
+    summary = format_scan(report)
+    assert 'no MRR at the end' in summary and '3 trailing bytes' in summary and 'unknown types 180/7' in summary
+
+
+def test_scan_files_report(make_lot, tmp_path):
+    first, first_counts = make_lot('first.stdf', seed=1)
+    second, second_counts = make_lot('second.stdf.gz', seed=2)
+    reports = scan_files([first, second, tmp_path / 'missing.stdf'], report_path=str(tmp_path / 'scan.json'))
+
+    assert 'error' in reports[2]
+    with open(tmp_path / 'scan.json') as f:
+        saved = json.load(f)
+    assert len(saved['files']) == 3
+    assert saved['record_types']['PTR']['records'] == first_counts['PTR'] + second_counts['PTR']
+
+
+def test_scan_command_line(make_lot, tmp_path, monkeypatch):
+    path, counts = make_lot(seed=3)
+    monkeypatch.setattr(sys, 'argv', ['stdf2atdf', str(path), '--scan'])
+    assert cli.main() == 0
+    with open(path.with_suffix('.scan.json')) as f:
+        saved = json.load(f)
+    assert saved['files'][0]['records'] == sum(counts.values())
+    assert not path.with_suffix('.atdf').exists()
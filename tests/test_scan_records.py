@@ -0,0 +1,99 @@
+# tests/test_scan_records.py
+import numpy as np
+import pytest
+
+from src.converter import iter_records, run_conversion, to_dataframes
+from src.core.stdf.handler import handle_stdf_entry
+from src.core.stdf.packers import pack_record
+from src.core.utils.synthetic import verify_round_trip
+from src.core.utils.templates import create_stdf_template
+
+FAIL_COUNT = 6
+
+
+def str_entry(site: int, wide: bool = False) -> dict:
+    cycles = np.arange(FAIL_COUNT, dtype=np.uint64) * (1 << 33 if wide else 100_000) + site
+    return {
+        'cont_flg': '00000000', 'test_num': 900, 'head_num': 1, 'site_num': site, 'psr_ref': 1,
+        'test_flg': '10000000', 'log_typ': '', 'test_txt': 'scan', 'alarm_id': '', 'prog_txt': '', 'rslt_txt': '',
+        'z_val': 0, 'fmu_flg': '00000000', 'mask_map': (), 'fal_map': (), 'cyc_cnt': 1 << 40 if wide else 1 << 20,
+        'totf_cnt': FAIL_COUNT, 'totl_cnt': FAIL_COUNT, 'cyc_base': 0, 'bit_base': 0,
+        'lim_indx': [1, 2], 'lim_spec': [70000, 3], 'cond_lst': ('VDD=0.9',),
+        'cyc_ofst': cycles, 'pmr_indx': [site + 1 + (300 if wide else 0)] * FAIL_COUNT,
+        'chn_num': [1] * FAIL_COUNT, 'exp_data': [0, 1] * (FAIL_COUNT // 2), 'cap_data': [1, 0] * (FAIL_COUNT // 2),
+        'new_data': [], 'pat_num': [site] * FAIL_COUNT, 'bit_pos': list(range(FAIL_COUNT)),
+        'usr1': [], 'usr2': [], 'usr3': [], 'user_txt': ('a', 'b'),
+    }
+
+
+def scan_lot(path, endianness: str) -> None:
+    records = [
+        pack_record('FAR', {'cpu_type': 1 if endianness == '>' else 2, 'stdf_ver': 4}, endianness),
+        pack_record('VUR', {'upd_nam': ('Scan:2007.1',)}, endianness),
+        pack_record('MIR', {'lot_id': 'SCAN'}, endianness),
+        pack_record('PSR', {'psr_indx': 1, 'psr_nam': 'atpg', 'pat_bgn': [0, 5000], 'pat_end': [4999, 9999],
+                            'pat_file': ('a.stil', 'b.stil')}, endianness),
+        pack_record('NMR', {'totm_cnt': 2, 'pmr_indx': [1, 2], 'atpg_nam': ('si0', 'so0')}, endianness),
+        pack_record('CDR', {'cdr_indx': 1, 'chn_nam': 'chain0', 'chn_len': 1000, 'sin_pin': 1, 'sout_pin': 2,
+                            'm_clks': [3], 's_clks': [], 'inv_val': 0, 'cell_lst': ('u1/ff0', 'u1/ff1')}, endianness),
+        pack_record('SSR', {'ssr_nam': 'scan', 'chn_list': [1]}, endianness),
+        pack_record('CNR', {'chn_num': 1, 'bit_pos': 0, 'cell_nam': 'u1/ff0'}, endianness),
+    ]
+    for site in range(2):
+        records.append(pack_record('PIR', {'head_num': 1, 'site_num': site}, endianness))
+        records.append(pack_record('STR', str_entry(site, wide=site == 1), endianness))
+        records.append(pack_record('PRR', {'head_num': 1, 'site_num': site, 'part_flg': '00001000', 'num_test': 1,
+                                           'hard_bin': 2, 'soft_bin': 2}, endianness))
+    records.append(pack_record('MRR', {'finish_t': 0}, endianness))
+    path.write_bytes(b''.join(records))
+
+
+@pytest.mark.parametrize('endianness', ['<', '>'])
+@pytest.mark.parametrize('wide', [False, True])
+def test_str_arrays(endianness, wide):
+    entry = str_entry(1, wide)
+    record = pack_record('STR', entry, endianness)
+    decoded = handle_stdf_entry(create_stdf_template('STR'), record[4:], endianness)
+
+    assert decoded['cyc_ofst'].dtype == (np.uint64 if wide else np.uint32)
+    assert decoded['pmr_indx'].dtype == (np.uint16 if wide else np.uint8)
+    assert decoded['lim_spec'].dtype == np.uint32
+    for field in ('cyc_ofst', 'pmr_indx', 'chn_num', 'exp_data', 'cap_data', 'pat_num', 'bit_pos', 'lim_spec'):
+        assert isinstance(decoded[field], np.ndarray), field
+        assert decoded[field].tolist() == list(entry[field]), field
+    assert decoded['user_txt'] == ('a', 'b')
+    assert pack_record('STR', decoded, endianness) == record
+
+
+@pytest.mark.parametrize('endianness', ['<', '>'])
+def test_scan_lot_round_trips(tmp_path, endianness):
+    scan_lot(tmp_path / 'scan.stdf', endianness)
+    counts = verify_round_trip(str(tmp_path / 'scan.stdf'))
+    assert counts['mismatches'] == 0
+    assert {record_type: counts[record_type] for record_type in ('VUR', 'PSR', 'NMR', 'CDR', 'SSR', 'CNR', 'STR')} == \
+        {'VUR': 1, 'PSR': 1, 'NMR': 1, 'CDR': 1, 'SSR': 1, 'CNR': 1, 'STR': 2}
+
+
+def test_compact_arrays_write_the_same_outputs(tmp_path):
+    scan_lot(tmp_path / 'scan.stdf', '<')
+    joined = run_conversion(str(tmp_path / 'scan.stdf'), str(tmp_path / 'joined.atdf'))
+    compact = run_conversion(str(tmp_path / 'scan.stdf'), str(tmp_path / 'compact.atdf'), compact_arrays=True)
+
+    atdf = (tmp_path / 'joined.atdf').read_text()
+    assert atdf == (tmp_path / 'compact.atdf').read_text()
+    assert atdf.count('\nSTR:') == 2 and '\nPSR:' in atdf
+    assert len(joined['STR']) == len(compact['STR']) == 2
+    for joined_entry, compact_entry in zip(joined['STR'], compact['STR']):
+        for field, value in compact_entry.items():
+            if isinstance(value, np.ndarray):
+                assert joined_entry[field] == ','.join(map(str, value.tolist())), field
+
+
+def test_str_dataframe(tmp_path):
+    scan_lot(tmp_path / 'scan.stdf', '>')
+    frame = to_dataframes(str(tmp_path / 'scan.stdf'), records=['STR'])['STR']
+    entries = [entry for _, entry in iter_records(str(tmp_path / 'scan.stdf'), records=['STR'])]
+    assert frame['site_num'].tolist() == [0, 1]
+    for field in ('cyc_ofst', 'pmr_indx', 'bit_pos'):
+        assert [values.tolist() for values in frame[field]] == [entry[field].tolist() for entry in entries]
+    assert frame['cyc_ofst'][1].tolist() == str_entry(1, wide=True)['cyc_ofst'].tolist()
@@ -0,0 +1,198 @@
+# tests/test_server.py
+import asyncio
+import contextlib
+import os
+import socket
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+import pytest
+
+from src import converter
+from src.converter import iter_records
+from src.core.utils import server as server_module
+from src.core.utils.server import ConversionServer, query_file, submit
+
+
+@pytest.fixture
+def counted_records(monkeypatch):
+    """Count the records iter_records yields to query_file."""
+    yielded = []
+
+    def counting(*args, **kwargs):
+        for record in iter_records(*args, **kwargs):
+            yielded.append(record[0])
+            yield record
+
+    monkeypatch.setattr(converter, 'iter_records', counting)
+    return yielded
+
+
+def test_query_applies_the_filter(make_lot):
+    path, _ = make_lot(seed=12)
+    rows = query_file(str(path), ['PTR', 'PRR'], ['site_num', 'test_num', 'result', 'hard_bin'], None, 'site=1')
+    expected = {}
+    for record_type, entry in iter_records(str(path), records=['PTR', 'PRR'],
+                                           fields=['site_num', 'test_num', 'result', 'hard_bin'],
+                                           filter_expression='site=1'):
+        expected.setdefault(record_type, []).append(entry)
+
+    assert rows == expected
+    assert {row['site_num'] for row in rows['PTR'] + rows['PRR']} == {1}
+
+
+def test_query_stops_at_the_limit(make_lot, counted_records):
+    path, counts = make_lot(wafers=2, seed=12)
+    rows = query_file(str(path), ['PIR', 'PRR'], None, 3, None)
+    assert {record_type: len(record_rows) for record_type, record_rows in rows.items()} == {'PIR': 3, 'PRR': 3}
+    assert rows['PRR'] == [entry for _, entry in iter_records(str(path), records=['PRR'])][:3]
+    # Read up to the third PRR, not to the end of the file
+    assert counted_records.count('PRR') == 3 and counted_records.count('PIR') < counts['PIR']
+
+    rows = query_file(str(path), ['PRR', 'MRR'], ['hard_bin'], 2, None)
+    assert len(rows['PRR']) == 2 and len(rows['MRR']) == 1
+
+
+@contextlib.asynccontextmanager
+async def running_server(socket_path: str, **options):
+    server = ConversionServer(**options)
+    task = asyncio.ensure_future(server.serve(socket_path=socket_path))
+    # Wait until the server accepts connections (a stale socket file may be there before)
+    while True:
+        if task.done():
+            task.result()
+        try:
+            _, writer = await asyncio.open_unix_connection(socket_path)
+        except (FileNotFoundError, ConnectionRefusedError):
+            await asyncio.sleep(0.01)
+            continue
+        writer.close()
+        break
+    try:
+        yield server
+    finally:
+        task.cancel()
+        with contextlib.suppress(asyncio.CancelledError):
+            await task
+
+
+async def request(socket_path: str, request: dict) -> list:
+    return [event async for event in submit(request, socket_path=socket_path)]
+
+
+def test_convert_and_query_round_trip(make_lot, tmp_path):
+    path, counts = make_lot(seed=12)
+    socket_path = str(tmp_path / 'service.sock')
+    # A socket left behind by a server that died is replaced
+    stale = socket.socket(socket.AF_UNIX)
+    stale.bind(socket_path)
+    stale.close()
+
+    async def scenario():
+        async with running_server(socket_path, max_workers=1):
+            convert = await request(socket_path, {'id': 1, 'op': 'convert', 'path': str(path),
+                                                  'outputs': ['output']})
+            query = await request(socket_path, {'id': 2, 'op': 'query', 'path': str(path), 'records': ['PRR'],
+                                                'fields': ['site_num', 'hard_bin'], 'filter': 'site=2'})
+            missing = await request(socket_path, {'id': 3, 'op': 'query', 'path': str(tmp_path / 'missing.stdf')})
+        return convert, query, missing
+
+    convert, query, missing = asyncio.run(scenario())
+    assert [event['event'] for event in convert] == ['accepted', 'progress', 'progress', 'result', 'done']
+    assert all(event['id'] == 1 for event in convert)
+    assert convert[3]['records']['PRR'] == counts['PRR']
+    assert path.with_suffix('.atdf').exists()
+
+    rows = [row for event in query if event['event'] == 'rows' for row in event['rows']]
+    assert rows == [entry for _, entry in iter_records(str(path), records=['PRR'], fields=['site_num', 'hard_bin'],
+                                                       filter_expression='site=2')]
+    assert rows and {row['site_num'] for row in rows} == {2}
+    assert [event['event'] for event in missing] == ['error']
+    assert not os.path.exists(tmp_path / 'service.sock')
+
+
+def test_refuses_to_replace_a_file_that_is_not_a_socket(tmp_path):
+    path = tmp_path / 'service.sock'
+    path.write_text('not a socket')
+    with pytest.raises(FileExistsError):
+        asyncio.run(ConversionServer(max_workers=1).serve(socket_path=str(path)))
+    assert path.read_text() == 'not a socket'
+
+
+@pytest.fixture
+def gated_queries(monkeypatch):
+    """Queries run in threads and block until release is set; calls records the limit of each one started."""
+    gate = threading.Event()
+    calls = []
+
+    def gated_query(path, records, fields, limit, filter_expression=None):
+        calls.append(limit)
+        gate.wait(10)
+        return {'PRR': [{'limit': limit}]}
+
+    monkeypatch.setattr(server_module, 'start_warm_pool', ThreadPoolExecutor)
+    monkeypatch.setattr(server_module, 'query_file', gated_query)
+    return gate, calls
+
+
+async def wait_for(condition, timeout: float = 10.0) -> None:
+    loop = asyncio.get_running_loop()
+    deadline = loop.time() + timeout
+    while not condition():
+        assert loop.time() < deadline
+        await asyncio.sleep(0.01)
+
+
+def test_identical_jobs_are_merged(make_lot, tmp_path, gated_queries):
+    path, _ = make_lot(seed=12)
+    gate, calls = gated_queries
+    socket_path = str(tmp_path / 'service.sock')
+    query = {'op': 'query', 'path': str(path), 'records': ['PRR'], 'limit': 5}
+
+    async def scenario():
+        async with running_server(socket_path, max_workers=2):
+            first = asyncio.ensure_future(request(socket_path, {'id': 1, **query}))
+            await wait_for(lambda: calls)
+            second = asyncio.ensure_future(request(socket_path, {'id': 2, **query}))
+            other = asyncio.ensure_future(request(socket_path, {'id': 3, **query, 'filter': 'site=1'}))
+            await wait_for(lambda: len(calls) == 2)
+            gate.set()
+            return await asyncio.gather(first, second, other)
+
+    first, second, other = asyncio.run(scenario())
+    assert first[0] == {'id': 1, 'event': 'accepted', 'job': first[0]['job'], 'merged': False}
+    assert second[0] == {'id': 2, 'event': 'accepted', 'job': first[0]['job'], 'merged': True}
+    assert other[0]['merged'] is False and other[0]['job'] != first[0]['job']
+    # The merged request receives every event of the job, from the first
+    assert [event['event'] for event in second] == [event['event'] for event in first]
+    assert second[-2]['rows'] == first[-2]['rows'] == [{'limit': 5}]
+    assert calls == [5, 5]
+
+
+def test_jobs_per_client_are_limited(make_lot, tmp_path, gated_queries):
+    path, _ = make_lot(seed=12)
+    gate, calls = gated_queries
+    socket_path = str(tmp_path / 'service.sock')
+
+    def query(request_id: int, client: str) -> dict:
+        return {'id': request_id, 'op': 'query', 'path': str(path), 'limit': request_id, 'client': client}
+
+    async def scenario():
+        async with running_server(socket_path, max_workers=4, max_per_client=1):
+            requests = [asyncio.ensure_future(request(socket_path, query(1, 'a')))]
+            await wait_for(lambda: calls == [1])
+            requests.append(asyncio.ensure_future(request(socket_path, query(2, 'a'))))
+            requests.append(asyncio.ensure_future(request(socket_path, query(3, 'b'))))
+            # Client b runs alongside, client a's second job waits for its first
+            await wait_for(lambda: calls == [1, 3])
+            await asyncio.sleep(0.2)
+            waiting = list(calls)
+            gate.set()
+            return waiting, await asyncio.gather(*requests)
+
+    waiting, events = asyncio.run(scenario())
+    assert waiting == [1, 3]
+    assert calls == [1, 3, 2]
+    assert all(request_events[-1]['event'] == 'done' for request_events in events)
+    states = [event['state'] for event in events[1] if event['event'] == 'progress']
+    assert states == ['queued', 'running']
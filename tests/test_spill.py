@@ -0,0 +1,47 @@
+# tests/test_spill.py
+import sqlite3
+
+from src.converter import run_conversion
+from src.core.utils import spill
+from src.core.utils.spill import SpilledList, SpillStore, materialize
+
+# Columns that hold run-specific ids or timestamps
+RUN_COLUMNS = {'created_at', 'file_id', 'test_session_id', 'part_id', 'test_id', 'wafer_id', 'full_wafer_id'}
+
+
+def database_tables(path) -> dict:
+    tables = {}
+    with sqlite3.connect(path) as connection:
+        for (name,) in connection.execute("SELECT name FROM sqlite_master WHERE type = 'table' ORDER BY name"):
+            cursor = connection.execute(f'SELECT * FROM "{name}"')
+            columns = [description[0] for description in cursor.description]
+            keep = [i for i, column in enumerate(columns) if column not in RUN_COLUMNS]
+            tables[name] = ([columns[i] for i in keep], [[row[i] for i in keep] for row in cursor])
+    return tables
+
+
+def test_spilled_list_chunks(tmp_path):
+    store = SpillStore(1, str(tmp_path))
+    spilled = SpilledList(store, chunk_size=3)
+    spilled.extend({'n': n} for n in range(10))
+    assert len(spilled) == 10
+    assert spilled[4] == {'n': 4} and spilled[-1] == {'n': 9}
+    assert spilled[2:8:2] == [{'n': 2}, {'n': 4}, {'n': 6}]
+    assert [entry['n'] for entry in spilled] == list(range(10))
+    spilled.release()
+    assert len(spilled) == 0
+
+
+def test_spilled_conversion_matches_in_memory(make_lot, tmp_path, monkeypatch):
+    path, _ = make_lot(parts_per_wafer=16, tests=20, seed=2)
+    in_memory = run_conversion(str(path), str(tmp_path / 'memory.atdf'), str(tmp_path / 'memory.db'))
+
+    # Check the budget often, so the small lot spills
+    monkeypatch.setattr(spill, 'CHECK_INTERVAL', 64)
+    spilled = run_conversion(str(path), str(tmp_path / 'spilled.atdf'), str(tmp_path / 'spilled.db'),
+                             memory_budget=16 * 1024, spill_dir=str(tmp_path))
+
+    assert any(isinstance(entries, SpilledList) for entries in spilled.values())
+    assert materialize(spilled) == materialize(in_memory)
+    assert (tmp_path / 'spilled.atdf').read_text() == (tmp_path / 'memory.atdf').read_text()
+    assert database_tables(tmp_path / 'spilled.db') == database_tables(tmp_path / 'memory.db')
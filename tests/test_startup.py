@@ -0,0 +1,39 @@
+# tests/test_startup.py
+import json
+import os
+import subprocess
+import sys
+
+from src.core.utils.startup import PROJECT_ROOT, write_minimal_stdf
+
+HEAVY_MODULES = ('numpy', 'pandas', 'sqlalchemy', 'psutil')
+
+# Runs the command line tool in this interpreter, then reports which heavy modules it loaded
+PROBE = f"""
+import json, sys
+from src import cli
+sys.argv = ['stdf2atdf'] + sys.argv[1:]
+code = cli.main()
+print(json.dumps({{'code': code, 'loaded': [name for name in {HEAVY_MODULES!r} if name in sys.modules]}}))
+"""
+
+
+def heavy_modules_loaded(directory, *arguments) -> list:
+    completed = subprocess.run([sys.executable, '-c', PROBE, *arguments], cwd=directory, capture_output=True,
+                               text=True, check=True, env=dict(os.environ, PYTHONPATH=str(PROJECT_ROOT)))
+    report = json.loads(completed.stdout.strip().splitlines()[-1])
+    assert report['code'] == 0
+    return report['loaded']
+
+
+def test_atdf_conversion_loads_no_heavy_modules(make_lot, tmp_path):
+    minimal = tmp_path / 'minimal.stdf'
+    write_minimal_stdf(minimal)
+    assert heavy_modules_loaded(tmp_path, str(minimal), '--output') == []
+    assert minimal.with_suffix('.atdf').exists()
+
+    path, _ = make_lot(seed=13)
+    assert heavy_modules_loaded(tmp_path, str(path), '--output') == []
+    assert path.with_suffix('.atdf').exists()
+    # The probe itself sees the libraries once an output needs them
+    assert 'numpy' in heavy_modules_loaded(tmp_path, str(path), '--columns')
@@ -0,0 +1,76 @@
+# tests/test_stats.py
+import json
+import struct
+
+import pytest
+
+from src.converter import iter_records, run_conversion
+from src.core.utils import stats
+
+# A PTR with an empty payload: every field, test_num included, is missing
+EMPTY_PTR = struct.pack('<HBB', 0, 15, 10)
+
+
+@pytest.fixture
+def lot_without_test_num(make_lot):
+    path, counts = make_lot(tests=10, mix={'PTR': 1.0}, seed=5)
+    with open(path, 'ab') as f:
+        f.write(EMPTY_PTR * 3)
+    return path, counts
+
+
+def collect(entries) -> stats.TestStatistics:
+    statistics = stats.TestStatistics()
+    for record_type, entry in entries:
+        statistics.append(record_type, entry)
+    return statistics
+
+
+def restored(statistics: stats.TestStatistics) -> stats.TestStatistics:
+    return stats.TestStatistics.from_dict(json.loads(json.dumps(statistics.checkpoint())))
+
+
+def test_statistics_keep_missing_test_num(lot_without_test_num):
+    path, counts = lot_without_test_num
+    statistics = run_conversion(str(path), collect_statistics=True).statistics
+    rows = statistics.summary()
+    missing = [row for row in rows if row['test_num'] is None]
+    assert [row['executions'] for row in missing] == [3, 3]
+    assert all(row['count'] == 0 and row['mean'] is None for row in missing)
+    overall = [row for row in rows if row['head_num'] is None and row['test_num'] is not None]
+    assert len(overall) == 10
+    assert sum(row['executions'] for row in overall) == counts['PTR']
+
+    loaded = restored(statistics)
+    assert None in loaded.tests
+    assert loaded.summary() == rows
+
+
+def test_merged_partials_match_one_pass(lot_without_test_num):
+    path, _ = lot_without_test_num
+    entries = list(iter_records(str(path), records=['PTR']))
+    half = len(entries) // 2
+    merged = restored(collect(entries[:half])).merge(restored(collect(entries[half:])))
+    single = collect(entries).summary()
+
+    merged_rows = merged.summary()
+    assert len(merged_rows) == len(single)
+    for merged_row, row in zip(merged_rows, single):
+        assert merged_row == pytest.approx(row)
+
+
+def ptr(result: float, opt_flag: str, lo_limit: float, hi_limit: float) -> tuple:
+    return 'PTR', {'test_num': 1, 'head_num': 1, 'site_num': 0, 'test_flg': '00000000', 'result': result,
+                   'opt_flag': opt_flag, 'lo_limit': lo_limit, 'hi_limit': hi_limit}
+
+
+def test_limits_marked_absent_or_invalid_are_ignored():
+    # Bit 6: no low limit, bit 5: high limit invalid; the second PTR carries the valid high limit
+    statistics = collect([ptr(1.0, '01100000', -100.0, 100.0), ptr(3.0, '00000000', 0.0, 4.0)])
+    row = statistics.summary()[-1]
+    assert (row['lo_limit'], row['hi_limit']) == (0.0, 4.0)
+
+    statistics = collect([ptr(1.0, '11000000', 0.0, 4.0), ptr(3.0, '11000000', 0.0, 4.0)])
+    row = statistics.summary()[-1]
+    assert row['lo_limit'] is None and row['hi_limit'] is None
+    assert row['cp'] is None and row['cpk'] is None
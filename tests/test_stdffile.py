@@ -0,0 +1,61 @@
+# tests/test_stdffile.py
+import pytest
+
+from src.converter import iter_records, run_conversion
+from src.core.stdf.stdffile import STDFFile
+
+
+def present(entry):
+    return {name: value for name, value in entry.items() if value is not None}
+
+
+@pytest.mark.parametrize('endianness', ['<', '>'])
+def test_random_access_matches_sequential_read(make_lot, endianness):
+    path, counts = make_lot(wafers=2, endianness=endianness, seed=5)
+    records = list(iter_records(str(path)))
+
+    with STDFFile(path, cache_size=16) as stdf:
+        assert len(stdf) == len(records) == sum(counts.values())
+        assert stdf.counts() == counts
+        # Out of order, past the cache and from the end, then slices and iteration
+        for index in list(range(len(records) - 1, -1, -7)) + [0, 3, len(records) // 2]:
+            assert stdf[index] == records[index]
+            assert stdf[index - len(records)] == records[index]
+        assert stdf[10:40:3] == records[10:40:3]
+        assert list(stdf) == records
+
+        prrs = stdf.by_type('PRR')
+        assert len(prrs) == counts['PRR']
+        assert list(prrs) == [entry for record_type, entry in records if record_type == 'PRR']
+        assert prrs[-1] == stdf.entry(int(stdf.indices('PRR')[-1]))
+        assert stdf.record_type(0) == 'FAR' and stdf.record_type(len(stdf) - 1) == 'MRR'
+        assert bytes(stdf.payload(0))[0] == (1 if endianness == '>' else 2)
+
+        with pytest.raises(IndexError):
+            stdf[len(records)]
+        with pytest.raises(IndexError):
+            stdf.part(counts['PIR'] + 1)
+
+
+def test_parts_match_streamed_parts(interleaved_lot):
+    path, expected = interleaved_lot
+    streamed = []
+    run_conversion(str(path), on_part=streamed.append)
+
+    with STDFFile(path) as stdf:
+        for streamed_part in streamed:
+            part = stdf.part(streamed_part.p_id)
+            head, site, wafer_id, results = expected[part.prr['part_id']]
+            assert (part.p_id, part.head_num, part.site_num) == (streamed_part.p_id, head, site)
+            # STDFFile entries hold every field, missing ones as None
+            assert present(part.pir) == present(streamed_part.pir)
+            assert present(part.prr) == present(streamed_part.prr)
+            assert part.w_id == streamed_part.w_id and part.wafer['wafer_id'] == wafer_id
+            assert [(entry['test_num'], entry['result']) for _, entry in part.results] == results
+            assert part.result_count == len(results) and part.passed
+
+
+def test_gzip_is_refused(make_lot):
+    path, _ = make_lot('lot.stdf.gz')
+    with pytest.raises(ValueError):
+        STDFFile(path)
@@ -0,0 +1,77 @@
+# tests/test_vendor_records.py
+import struct
+
+import numpy as np
+import pytest
+
+from src.converter import iter_records, run_conversion, to_dataframes
+from src.core.utils.templates import register_record_type, unregister_record_type
+
+VENDOR_KEY = (180, 1)
+VENDOR_FIELDS = {'head_num': 'U*1', 'site_num': 'U*1', 'n': 'U*2', 'codes': ('xU*2', 'n')}
+
+
+def vendor_record(site: int, codes: list) -> bytes:
+    payload = struct.pack(f'<BBH{len(codes)}H', 1, site, len(codes), *codes)
+    return struct.pack('<HBB', len(payload), *VENDOR_KEY) + payload
+
+
+@pytest.fixture
+def vendor_lot(make_lot):
+    """A generated lot with vendor records before its MRR, and the same lot without them."""
+    clean, counts = make_lot('clean.stdf', seed=14)
+    buffer = clean.read_bytes()
+    mrr_start = 0
+    while mrr_start + 4 + struct.unpack_from('<H', buffer, mrr_start)[0] < len(buffer):
+        mrr_start += 4 + struct.unpack_from('<H', buffer, mrr_start)[0]
+    vendor = [(site, list(range(site, site + 3 * site + 1))) for site in range(4)]
+    path = clean.with_name('vendor.stdf')
+    path.write_bytes(buffer[:mrr_start] + b''.join(vendor_record(*args) for args in vendor) + buffer[mrr_start:])
+    return path, clean, vendor
+
+
+@pytest.fixture
+def register_vendor():
+    """Registers the VND layout when called; it is removed again after the test."""
+    yield lambda: register_record_type('VND', *VENDOR_KEY, VENDOR_FIELDS)
+    unregister_record_type('VND')
+
+
+def test_unknown_records_are_skipped(vendor_lot, tmp_path):
+    path, clean, vendor = vendor_lot
+    result = run_conversion(str(path), str(tmp_path / 'vendor.atdf'), collect_metrics=True,
+                            output_unknown=str(tmp_path / 'vendor.unknown.bin'))
+    run_conversion(str(clean), str(tmp_path / 'clean.atdf'))
+
+    assert (tmp_path / 'vendor.atdf').read_text() == (tmp_path / 'clean.atdf').read_text()
+    assert result.metrics.to_dict()['record_types']['unknown']['skipped'] == len(vendor)
+    # The sidecar is a FAR in the input's byte order followed by the records as read
+    sidecar = (tmp_path / 'vendor.unknown.bin').read_bytes()
+    assert sidecar == (struct.pack('<HBBBB', 2, 0, 10, 2, 4)
+                       + b''.join(vendor_record(*args) for args in vendor))
+
+
+def test_registered_layout_decodes_sidecar(vendor_lot, tmp_path, register_vendor):
+    path, _, vendor = vendor_lot
+    run_conversion(str(path), output_unknown=str(tmp_path / 'vendor.unknown.bin'))
+    register_vendor()
+
+    frame = to_dataframes(str(tmp_path / 'vendor.unknown.bin'), records=['VND'])['VND']
+    assert frame['site_num'].tolist() == [site for site, _ in vendor]
+    assert [codes.tolist() for codes in frame['codes']] == [codes for _, codes in vendor]
+
+    entries = [entry for _, entry in iter_records(str(path), records=['VND'])]
+    assert [(entry['site_num'], list(entry['codes'])) for entry in entries] == vendor
+    assert frame['codes'][0].dtype == np.uint16
+
+
+def test_register_rejects_conflicts(register_vendor):
+    register_vendor()
+    with pytest.raises(ValueError):
+        register_record_type('OTHER', *VENDOR_KEY, VENDOR_FIELDS)
+    with pytest.raises(ValueError):
+        register_record_type('PTR', 180, 2, VENDOR_FIELDS)
+    with pytest.raises(ValueError):
+        register_record_type('BAD', 181, 1, {'value': 'Q*9'})
+    with pytest.raises(ValueError):
+        register_record_type('BAD', 181, 1, {'codes': ('xU*2', 'count')})
@@ -0,0 +1,161 @@
+# tests/test_watch.py
+import os
+import sqlite3
+import threading
+import time
+import types
+
+import pytest
+
+from src.core.utils import watch
+from src.core.utils.watch import JobTable, PollingWatcher, WatchDaemon
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    """Fake monotonic clock of the watch module; sleeping advances it."""
+    clock = types.SimpleNamespace(now=1000.0)
+
+    def sleep(seconds):
+        clock.now += seconds
+
+    monkeypatch.setattr(watch, 'time', types.SimpleNamespace(monotonic=lambda: clock.now, sleep=sleep,
+                                                             time=time.time))
+    return clock
+
+
+@pytest.fixture
+def daemon(tmp_path):
+    daemon = WatchDaemon([tmp_path], {}, max_workers=1, settle_time=5.0)
+    daemon.jobs = JobTable(tmp_path / watch.JOB_TABLE_NAME)
+    yield daemon
+    daemon.jobs.close()
+
+
+def test_files_settle_before_they_are_queued(daemon, clock, tmp_path):
+    path = tmp_path / 'lot.stdf'
+    path.write_bytes(b'x' * 10)
+    daemon._notice([path])
+    daemon._settle()
+    clock.now += 4.0
+    daemon._settle()
+    assert not daemon.ready
+
+    # Still being written: the settle time starts over
+    with open(path, 'ab') as f:
+        f.write(b'x' * 10)
+    clock.now += 2.0
+    daemon._settle()
+    clock.now += 4.0
+    daemon._settle()
+    assert not daemon.ready
+
+    clock.now += 1.0
+    daemon._settle()
+    assert list(daemon.ready) == [path] and not daemon.candidates
+
+
+def test_vanished_candidates_are_dropped(daemon, clock, tmp_path):
+    path = tmp_path / 'lot.stdf'
+    path.write_bytes(b'x')
+    daemon._notice([path])
+    daemon._settle()
+    path.unlink()
+    clock.now += 10.0
+    daemon._settle()
+    assert not daemon.candidates and not daemon.ready
+
+
+def test_duplicate_events_are_suppressed(daemon, clock, tmp_path):
+    path = tmp_path / 'lot.stdf'
+    path.write_bytes(b'x' * 10)
+    # Several events for one file while it settles, is queued and runs make one job
+    daemon._notice([path, path])
+    daemon._settle()
+    daemon._notice([path])
+    clock.now += 5.0
+    daemon._settle()
+    daemon._notice([path])
+    daemon._settle()
+    assert list(daemon.ready) == [path]
+
+    daemon.ready.clear()
+    stat = path.stat()
+    daemon.jobs.started(path)
+    daemon.jobs.finished(path, records={'PTR': 1})
+    assert daemon.jobs.is_done(path, stat.st_size, stat.st_mtime_ns)
+
+    # Seen again unchanged (e.g. after a restart): already done, not queued again
+    daemon._notice([path])
+    daemon._settle()
+    clock.now += 5.0
+    daemon._settle()
+    assert not daemon.ready
+
+    # Changed content is a new job
+    path.write_bytes(b'y' * 12)
+    daemon._notice([path])
+    daemon._settle()
+    clock.now += 5.0
+    daemon._settle()
+    assert list(daemon.ready) == [path]
+
+
+def test_interrupted_jobs_are_redone(tmp_path):
+    path = tmp_path / 'lot.stdf'
+    jobs = JobTable(tmp_path / 'jobs.db')
+    jobs.queued(path, 10, 1)
+    jobs.started(path)
+    jobs.close()
+
+    jobs = JobTable(tmp_path / 'jobs.db')
+    assert not jobs.is_done(path, 10, 1)
+    status, = jobs.connection.execute('SELECT status FROM jobs').fetchone()
+    jobs.close()
+    assert status == 'interrupted'
+
+
+def test_polling_watcher_reports_changes(tmp_path, clock):
+    watcher = PollingWatcher([tmp_path])
+    assert watcher.poll(1.0) == []
+
+    first = tmp_path / 'first.stdf'
+    first.write_bytes(b'x')
+    (tmp_path / 'notes.txt').write_text('not STDF')
+    (tmp_path / 'sub').mkdir()
+    second = tmp_path / 'sub' / 'second.stdf'
+    second.write_bytes(b'x')
+    assert sorted(watcher.poll(1.0)) == [first, second]
+    assert watcher.poll(1.0) == []
+
+    with open(first, 'ab') as f:
+        f.write(b'x')
+    assert watcher.poll(1.0) == [first]
+    stat = second.stat()
+    os.utime(second, ns=(stat.st_atime_ns, stat.st_mtime_ns + 1_000_000_000))
+    assert watcher.poll(1.0) == [second]
+    assert clock.now == pytest.approx(1005.0)
+
+
+def test_daemon_converts_dropped_files(make_lot, tmp_path):
+    inbox = tmp_path / 'inbox'
+    inbox.mkdir()
+    daemon = WatchDaemon([inbox], {'output': True}, max_workers=1, settle_time=0.2, poll_interval=0.05,
+                         use_inotify=False)
+    stop = threading.Event()
+    thread = threading.Thread(target=daemon.run, args=(stop,))
+    thread.start()
+    try:
+        path, _ = make_lot('inbox/lot.stdf', seed=3)
+        deadline = time.monotonic() + 60
+        status = None
+        while status != 'done' and time.monotonic() < deadline:
+            time.sleep(0.1)
+            with sqlite3.connect(inbox / watch.JOB_TABLE_NAME) as connection:
+                row = connection.execute('SELECT status FROM jobs WHERE path = ?', (str(path),)).fetchone()
+            status = row[0] if row else None
+    finally:
+        stop.set()
+        thread.join()
+    assert status == 'done'
+    assert path.with_suffix('.atdf').exists()